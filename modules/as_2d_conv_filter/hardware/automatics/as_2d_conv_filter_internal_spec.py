@@ -42,6 +42,7 @@ of the ASTERICS hardware module as_2d_conv_filter_internal.
 # -----------------------------------------------------------------------------
 
 from as_automatics_2d_window_module import AsWindowModule
+from as_automatics_resources import get_resource_model, get_window_filter_cost
 
 
 def get_module_instance(module_dir: str) -> AsWindowModule:
@@ -60,4 +61,7 @@ def get_module_instance(module_dir: str) -> AsWindowModule:
     # ports, generics, existing interfaces and register interfaces
     module.discover_module(module_dir + "/" + toplevel_file)
 
+    # Resource estimate of the constant kernel convolution
+    module.set_resource_model(**get_resource_model(get_window_filter_cost))
+
     return module
@@ -48,6 +48,7 @@ from as_automatics_constant import Constant
 from as_automatics_cnn_helpers import (
     weights_to_string_for_serial_filter,
     calc_extended_quantized_bias,
+    get_serial_filter_cost,
 )
 
 
@@ -156,6 +157,16 @@ def get_module_instance(module_dir: str) -> AsWindowModule:
             "QUANTIZATION_MULTIPLIERS", quant_mults_const_name
         )
 
+        # Resource estimate from the adder tree size of the weights
+        # (Upper bound: This variant uses CARRY8 adders instead of LUTs)
+        self.set_resource_model(
+            **get_serial_filter_cost(
+                weights,
+                filter_count,
+                int(self.get_generic("DIN_WIDTH").get_value()),
+            )
+        )
+
     module.assign_trained_values = assign_trained_values.__get__(module)
 
     return module
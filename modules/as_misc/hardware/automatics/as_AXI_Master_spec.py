@@ -46,6 +46,8 @@ from as_automatics_interface import Interface
 from as_automatics_port import Port
 from as_automatics_generic import Generic
 from as_automatics_logging import get_log
+from as_automatics_throughput import get_generic_int
+from as_automatics_resources import get_resource_model
 
 LOG = get_log()
 
@@ -228,6 +230,20 @@ class AXIMasterExternal(Interface):
         self.to_external = True
 
 
+def get_axi_master_cost(module) -> dict:
+    """Coarse resource estimate of the AXI_Master: The Xilinx
+    axi_master_burst core plus the command and LocalLink state machines,
+    with the address and data paths registered a few times."""
+    data_width = get_generic_int(module, "C_M_AXI_DATA_WIDTH")
+    addr_width = get_generic_int(module, "C_M_AXI_ADDR_WIDTH")
+    if data_width is None or addr_width is None:
+        return None
+    return {
+        "luts": 400 + 2 * (data_width + addr_width),
+        "ffs": 500 + 3 * (data_width + addr_width),
+    }
+
+
 def get_module_instance(module_dir: str) -> AsModule:
 
     module = AsModule()
@@ -252,6 +268,7 @@ def get_module_instance(module_dir: str) -> AsModule:
 
     module.get_generic("C_M_AXI_DATA_WIDTH").set_value(None)
     module.get_generic("C_M_AXI_ADDR_WIDTH").set_value(None)
+    module.set_resource_model(**get_resource_model(get_axi_master_cost))
 
     module.brief_description = "AXI Master interface. Usually automatically inserted by Automatics. Contains Xilinx-specific HDL code!"
 
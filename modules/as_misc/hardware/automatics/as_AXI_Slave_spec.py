@@ -45,6 +45,8 @@ from as_automatics_interface import Interface
 from as_automatics_port import Port
 from as_automatics_signal import GlueSignal
 from as_automatics_generic import Generic
+from as_automatics_throughput import get_generic_int
+from as_automatics_resources import get_resource_model
 
 
 class AXISlaveExternal(Interface):
@@ -145,6 +147,19 @@ class AXISlaveExternal(Interface):
         self.to_external = True
 
 
+def get_axi_slave_cost(module) -> dict:
+    """Coarse resource estimate of the AXI_Slave: AXI4-Lite handshakes,
+    registered address and data channels and the read data multiplexer."""
+    data_width = get_generic_int(module, "C_S_AXI_DATA_WIDTH")
+    addr_width = get_generic_int(module, "C_S_AXI_ADDR_WIDTH")
+    if data_width is None or addr_width is None:
+        return None
+    return {
+        "luts": 40 + data_width + addr_width,
+        "ffs": 20 + 2 * data_width + addr_width,
+    }
+
+
 def get_module_instance(module_dir: str) -> AsModule:
     module = AsModule()
 
@@ -164,6 +179,7 @@ def get_module_instance(module_dir: str) -> AsModule:
 
     module.get_generic("C_S_AXI_DATA_WIDTH").set_value(None)
     module.get_generic("C_S_AXI_ADDR_WIDTH").set_value(None)
+    module.set_resource_model(**get_resource_model(get_axi_slave_cost))
 
     module.brief_description = (
         "AXI Slave interface. Usually automatically inserted by Automatics."
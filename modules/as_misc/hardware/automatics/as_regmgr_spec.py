@@ -97,6 +97,10 @@ def get_module_instance(module_dir: str) -> AsModule:
     # ports, generics, existing interfaces and register interfaces
     module.discover_module(module_dir + "/" + toplevel_file)
 
+    # Resource estimate: One 32 bit register slice per register,
+    # read multiplexer and address decoding
+    module.set_resource_model(luts=("REG_COUNT", 16), ffs=("REG_COUNT", 32))
+
     # Configuration method. This method is automatically executed
     # by Automatics during the connection process, only if the module was
     # automatically instantiated.
@@ -42,6 +42,8 @@ of the ASTERICS hardware module as_memreader.
 # -----------------------------------------------------------------------------
 
 from as_automatics_module import AsModule
+from as_automatics_resources import get_resource_model
+from as_automatics_memory_bandwidth import get_memory_module_cost
 
 
 def get_module_instance(module_dir: str) -> AsModule:
@@ -60,4 +62,13 @@ def get_module_instance(module_dir: str) -> AsModule:
     # ports, generics, existing interfaces and register interfaces
     module.discover_module(module_dir + "/" + toplevel_file)
 
+    # Stream rate properties for the throughput analysis:
+    # The memory port delivers up to MEMORY_DATA_WIDTH bits per cycle
+    module.set_stream_rate(memory_width="MEMORY_DATA_WIDTH")
+
+    # Resource estimate of the FIFO, address generator and control logic
+    module.set_resource_model(
+        **get_resource_model(get_memory_module_cost, "DOUT_WIDTH")
+    )
+
     return module
@@ -42,6 +42,8 @@ of the ASTERICS hardware module as_memwriter.
 # -----------------------------------------------------------------------------
 
 from as_automatics_module import AsModule
+from as_automatics_resources import get_resource_model
+from as_automatics_memory_bandwidth import get_memory_module_cost
 
 
 def get_module_instance(module_dir: str) -> AsModule:
@@ -60,4 +62,21 @@ def get_module_instance(module_dir: str) -> AsModule:
     # ports, generics, existing interfaces and register interfaces
     module.discover_module(module_dir + "/" + toplevel_file)
 
+    # Stream rate properties for the throughput analysis:
+    # The memory port takes up to MEMORY_DATA_WIDTH bits per cycle,
+    # the FIFO buffers data while the memory bus is busy.
+    # The FIFO holds FIFO_NUMBER_OF_BURSTS bursts of MAX_PLATFORM_BURST_LENGTH
+    # bytes; 'stall_cycles' is an assumed worst case memory bus latency
+    module.set_stream_rate(
+        memory_width="MEMORY_DATA_WIDTH",
+        buffered=True,
+        stall_cycles=32,
+        buffer_bits=("FIFO_NUMBER_OF_BURSTS", "MAX_PLATFORM_BURST_LENGTH", 8),
+        buffer_generic="FIFO_NUMBER_OF_BURSTS",
+    )
+    # Resource estimate of the FIFO, address generator and control logic
+    module.set_resource_model(
+        **get_resource_model(get_memory_module_cost, "DIN_WIDTH")
+    )
+
     return module
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_stream_fifo_spec.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Python module used by as_automatics used to build the generators internal model
+of the ASTERICS hardware module as_stream_fifo.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_stream_fifo_spec.py
+# @author Philip Manke
+# @brief Specifics for as_stream_fifo used by as_automatics
+# -----------------------------------------------------------------------------
+
+from as_automatics_module import AsModule
+from as_automatics_throughput import get_generic_int
+from as_automatics_stream_fifo import get_buffer_cost
+
+
+def get_fifo_cost(module, resource: str) -> int:
+    """Resource estimate of the FIFO buffer and its control logic."""
+    depth = get_generic_int(module, "BUFF_DEPTH")
+    width = get_generic_int(module, "DATA_WIDTH")
+    if depth is None or width is None:
+        return None
+    cost = get_buffer_cost(depth, width)
+    # Read/write pointers, fill level and flags
+    control = {"luts": 30, "ffs": 3 * depth.bit_length() + width + 4}
+    return cost.get(resource, 0) + control.get(resource, 0)
+
+
+def get_module_instance(module_dir: str) -> AsModule:
+    module = AsModule()
+
+    toplevel_file = "hardware/hdl/vhdl/as_stream_fifo.vhd"
+
+    module.files = []
+
+    module.dependencies = ["fifo_fwft", "helpers"]
+    module.show_in_browser = True
+    module.dev_status = AsModule.DevStatus.ALPHA
+    module.module_type = AsModule.ModuleTypes.HARDWARE
+    module.module_category = "As Stream Infrastructure"
+
+    # as_automatics now automatically parses the toplevel file and discovers
+    # ports, generics, existing interfaces and register interfaces
+    module.discover_module(module_dir + "/" + toplevel_file)
+
+    # Stream rate properties for the throughput analysis:
+    # The stream is buffered in a FIFO of BUFF_DEPTH entries
+    module.set_stream_rate(
+        buffered=True, buffer_bits=("BUFF_DEPTH", "DATA_WIDTH")
+    )
+    module.set_resource_model(
+        luts=lambda mod: get_fifo_cost(mod, "luts"),
+        ffs=lambda mod: get_fifo_cost(mod, "ffs"),
+        bram18=lambda mod: get_fifo_cost(mod, "bram18"),
+    )
+
+    return module
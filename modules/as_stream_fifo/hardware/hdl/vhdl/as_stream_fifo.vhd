@@ -0,0 +1,171 @@
+----------------------------------------------------------------------------------
+--  This file is part of the ASTERICS Framework.
+--  (C) 2019 Hochschule Augsburg, University of Applied Sciences
+----------------------------------------------------------------------------------
+-- File:           as_stream_fifo.vhd
+-- Entity:         as_stream_fifo
+--
+-- Company:        Efficient Embedded Systems Group at University of Applied Sciences, Augsburg, Germany
+-- Author:         Philip Manke
+--
+-- Description:    Elastic buffer for an as_stream pixel data stream
+----------------------------------------------------------------------------------
+--  This program is free software; you can redistribute it and/or
+--  modify it under the terms of the GNU Lesser General Public
+--  License as published by the Free Software Foundation; either
+--  version 3 of the License, or (at your option) any later version.
+--
+--  This program is distributed in the hope that it will be useful,
+--  but WITHOUT ANY WARRANTY; without even the implied warranty of
+--  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+--  Lesser General Public License for more details.
+--
+--  You should have received a copy of the GNU Lesser General Public License
+--  along with this program; if not, see <http://www.gnu.org/licenses/>
+--  or write to the Free Software Foundation, Inc.,
+--  51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+----------------------------------------------------------------------------------
+--! @file as_stream_fifo.vhd
+--! @brief Elastic buffer for an as_stream pixel data stream
+--! @addtogroup asterics_modules
+--! @{
+--! @defgroup as_stream_fifo as_stream_fifo: Elastic AsStream Buffer
+--! This module buffers an AsStream in a first word fall through FIFO.
+--! It absorbs bursts of the data source and stall of the data sink.
+--! Stall is only asserted towards the data source when the FIFO is
+--! almost full.
+--! Inserted by as_automatics where required (see 'set_auto_stream_fifos').
+--! Buffer depth (power of 2, at least 8) is configurable through generics.
+--! @}
+----------------------------------------------------------------------------------
+
+--! @addtogroup as_stream_fifo
+--! @{
+
+
+library IEEE;
+use IEEE.STD_LOGIC_1164.ALL;
+use IEEE.NUMERIC_STD.ALL;
+
+library asterics;
+use asterics.helpers.all;
+use asterics.fifo_fwft;
+
+
+entity as_stream_fifo is
+generic (
+    DATA_WIDTH : integer := 8;
+    BUFF_DEPTH : integer := 16
+);
+port (
+    clk         : in  std_logic;
+    reset       : in  std_logic;
+    ready       : out std_logic;
+
+    -- AsStream in ports
+    vsync_in      : in  std_logic;
+    vcomplete_in  : in  std_logic;
+    hsync_in      : in  std_logic;
+    hcomplete_in  : in  std_logic;
+    strobe_in     : in  std_logic;
+    data_in       : in  std_logic_vector(DATA_WIDTH - 1 downto 0);
+    data_error_in : in  std_logic;
+    sync_error_in : in  std_logic;
+    stall_out     : out std_logic;
+
+    -- AsStream out ports
+    vsync_out      : out std_logic;
+    vcomplete_out  : out std_logic;
+    hsync_out      : out std_logic;
+    hcomplete_out  : out std_logic;
+    strobe_out     : out std_logic;
+    data_out       : out std_logic_vector(DATA_WIDTH - 1 downto 0);
+    data_error_out : out std_logic;
+    sync_error_out : out std_logic;
+    stall_in       : in  std_logic
+);
+end as_stream_fifo;
+
+--! @}
+
+architecture RTL of as_stream_fifo is
+
+-- Data bits and the six flags of the AsStream are stored in the FIFO
+constant c_fifo_data_width : integer := DATA_WIDTH + 6;
+-- Free entries when stall is asserted:
+-- Covers the registered stall signal and the reaction of the data source
+constant c_stall_margin : integer := 4;
+
+constant c_prog_full_thresh : std_logic_vector(log2_ceil(BUFF_DEPTH) - 1 downto 0)
+            := std_logic_vector(to_unsigned(BUFF_DEPTH - c_stall_margin, log2_ceil(BUFF_DEPTH)));
+
+signal wr_en, rd_en, full, empty, prog_full : std_logic;
+signal din, dout : std_logic_vector(c_fifo_data_width - 1 downto 0);
+signal fifo_level : std_logic_vector(log2_ceil(BUFF_DEPTH) downto 0);
+
+begin
+
+-- sanity check for generic "BUFF_DEPTH":
+assert BUFF_DEPTH >= 2 * c_stall_margin
+report "Generic BUFF_DEPTH must be at least 8"
+severity failure;
+
+ready <= not reset;
+
+
+fifo_buffer : entity fifo_fwft
+  GENERIC MAP (
+    DATA_WIDTH => c_fifo_data_width,
+    BUFF_DEPTH => BUFF_DEPTH,
+    PROG_EMPTY_ENABLE => False,
+    PROG_FULL_ENABLE => True
+  )
+  PORT MAP (
+    clk => clk,
+    reset => reset,
+    din => din,
+    wr_en => wr_en,
+    rd_en => rd_en,
+    dout => dout,
+    full => full,
+    level => fifo_level,
+    empty => empty,
+    prog_empty_thresh => (others => '0'),
+    prog_empty => open,
+    prog_full_thresh => c_prog_full_thresh,
+    prog_full => prog_full
+  );
+
+
+-- FIFO input:
+wr_en <= strobe_in and not full;
+din   <= data_in & sync_error_in & data_error_in & hcomplete_in
+            & hsync_in & vcomplete_in & vsync_in;
+
+-- Stall the data source if the FIFO is almost full
+stall_proc: process (clk)
+begin
+  if rising_edge(clk) then
+    if reset = '1' then
+      stall_out <= '0';
+    else
+      stall_out <= prog_full;
+    end if;
+  end if;
+end process;
+
+
+-- FIFO output:
+rd_en <= '1' when (empty = '0') and (stall_in = '0') else '0';
+
+strobe_out     <= rd_en;
+data_out       <= dout(c_fifo_data_width - 1 downto 6);
+vsync_out      <= dout(0) and rd_en;
+vcomplete_out  <= dout(1) and rd_en;
+hsync_out      <= dout(2) and rd_en;
+hcomplete_out  <= dout(3) and rd_en;
+data_error_out <= dout(4) and rd_en;
+sync_error_out <= dout(5) and rd_en;
+
+
+end RTL;
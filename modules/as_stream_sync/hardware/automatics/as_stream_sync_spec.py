@@ -61,4 +61,9 @@ def get_module_instance(module_dir: str) -> AsModule:
     # ports, generics, existing interfaces and register interfaces
     module.discover_module(module_dir + "/" + toplevel_file)
 
+    # Stream rate properties for the throughput analysis:
+    # Both streams are buffered in FIFOs of BUFF_DEPTH entries,
+    # the FIFO inputs are registered
+    module.set_stream_rate(buffered=True, latency=2)
+
     return module
@@ -100,6 +100,33 @@ def resolve_data_width(data_width: Port.DataWidth, generics: list) -> list:
     return Port.DataWidth(a=value0, sep=spliton, b=value1)
 
 
+def get_buffer_statistics(buffer_rows: list, minimum_bram_size: int) -> dict:
+    """! @brief Calculates statistics for the image buffers of a pipeline.
+    Returns a dictionary with the number of buffers and their size in bits,
+    split into buffers implemented in BRAM and registers:
+    {"count", "size", "count_bram", "count_reg", "size_bram", "size_reg"}"""
+    stats = {
+        "count": len(buffer_rows),
+        "size": 0,
+        "count_bram": 0,
+        "count_reg": 0,
+        "size_bram": 0,
+        "size_reg": 0,
+    }
+    for buff in buffer_rows:
+        buffsize = buff.get_size()
+        stats["size"] += buffsize
+        if buffsize > minimum_bram_size:
+            stats["count_bram"] += 1
+            window_size = buff.window_width * buff.get_bit_width()
+            stats["size_bram"] += buffsize - window_size
+            stats["size_reg"] += window_size
+        else:
+            stats["count_reg"] += 1
+            stats["size_reg"] += buffsize
+    return stats
+
+
 def report_buffer_statistics(
     buffer_rows: list, minimum_bram_size: int, verbosity: int = 0
 ):
@@ -108,24 +135,7 @@ def report_buffer_statistics(
     buffers and prints to console.
     A summary (default) or a per-buffer report can be created using 'verbosity'.
     """
-    count = len(buffer_rows)
-    total_size = 0
-    count_bram = 0
-    count_reg = 0
-    size_bram = 0
-    size_reg = 0
-
-    for buff in buffer_rows:
-        buffsize = buff.get_size()
-        total_size += buffsize
-        if buffsize > minimum_bram_size:
-            count_bram += 1
-            window_size = buff.window_width * buff.get_bit_width()
-            size_bram += buffsize - window_size
-            size_reg += window_size
-        else:
-            count_reg += 1
-            size_reg += buffsize
+    stats = get_buffer_statistics(buffer_rows, minimum_bram_size)
     print(
         (
             "\n"
@@ -140,14 +150,7 @@ def report_buffer_statistics(
             "Total size of BRAM required in bits: {size_bram}\n"
             "Total size of registers required: {size_reg}\n"
             "\n"
-        ).format(
-            count=count,
-            size=total_size,
-            count_bram=count_bram,
-            count_reg=count_reg,
-            size_bram=size_bram,
-            size_reg=size_reg,
-        )
+        ).format(**stats)
     )
     if verbosity > 0:
         count = 0
@@ -54,6 +54,7 @@ from as_automatics_2d_helpers import (
     get_delay,
     set_delay,
     report_buffer_statistics,
+    get_buffer_statistics,
     generate_window_assignments,
     pipeline_connection_error_string,
 )
@@ -65,7 +66,10 @@ from as_automatics_signal import GenericSignal, GlueSignal
 from as_automatics_helpers import foreach
 from as_automatics_module import AsModule
 from as_automatics_module_group import AsModuleGroup, Register
-from as_automatics_module_wrapper import AsModuleWrapper
+from as_automatics_module_wrapper import (
+    AsModuleWrapper,
+    share_identical_wrappers,
+)
 from as_automatics_exceptions import AsModuleError, AsConnectionError
 from as_automatics_connection_helper import (
     resolve_data_width,
@@ -78,13 +82,13 @@ from as_automatics_vhdl_writer_helpers import generate_component_declaration
 
 from as_automatics_logging import get_log
 
-LOG = get_log()
+LOG = get_log("pipeline2d")
 
 ##
 # @addtogroup automatics_2dwpl
 # @{
 
-LOG = get_log()
+LOG = get_log("pipeline2d")
 
 ## @ingroup automatics_intrep
 class As2DWindowPipeline(AsModuleGroup):
@@ -104,6 +108,9 @@ class As2DWindowPipeline(AsModuleGroup):
     OutputStream = namedtuple(
         "OutputStream", ("stream", "source", "signal", "target_stream")
     )
+    # Qualified names are required to pickle nested named tuples
+    InputStream.__qualname__ = "As2DWindowPipeline.InputStream"
+    OutputStream.__qualname__ = "As2DWindowPipeline.OutputStream"
 
     def __init__(self, columns: int, rows: int, name: str, chain):
         if chain is None:
@@ -368,6 +375,13 @@ class As2DWindowPipeline(AsModuleGroup):
             self.buffer_rows, self.minimum_bram_size, verbosity
         )
 
+    ## @ingroup automatics_cds
+    def get_pipeline_buffer_statistics(self) -> dict:
+        """! @brief Returns the numbers of the buffer report as a dictionary.
+        See 'print_pipeline_buffer_report' and
+        'as_automatics_2d_helpers.get_buffer_statistics'."""
+        return get_buffer_statistics(self.buffer_rows, self.minimum_bram_size)
+
     ## @ingroup automatics_cds
     def connect(
         self, source, sink, *, no_delay: bool = False, no_stall: bool = False
@@ -394,6 +408,8 @@ class As2DWindowPipeline(AsModuleGroup):
             except ValueError:
                 pass
         self.chain.module_groups.extend(wrappers)
+        # Synthesize identical modules out-of-context only once
+        share_identical_wrappers(wrappers)
 
     # ------------------------ DELAY MANAGEMENT METHODS ------------------------
 
@@ -450,7 +466,7 @@ class As2DWindowPipeline(AsModuleGroup):
             if module.input_delay < get_delay(source):
                 module.input_delay = get_delay(source)
                 module.__update_delay__()
-                LOG.debug("Updated module delay to " + str(module.delay))
+                LOG.debug("Updated module delay to %s", module.delay)
             else:
                 # We only need to update the delays of the module,
                 # if the input delay of the module is greater than
@@ -464,7 +480,7 @@ class As2DWindowPipeline(AsModuleGroup):
                     # Found an input port with a higher delay than previously
                     # Update the delay and all module connections
                     set_delay(module, get_delay(source))
-                    LOG.debug("Updated module delay to " + str(module.delay))
+                    LOG.debug("Updated module delay to %s", module.delay)
                 else:
                     # We only need to update the delays of the module,
                     # if the input delay of the module is greater than
@@ -475,7 +491,7 @@ class As2DWindowPipeline(AsModuleGroup):
                     return None
             else:  # No delay set, this is the initial pass for this module
                 set_delay(module, get_delay(source))
-                LOG.debug("Updated module delay to " + module.delay)
+                LOG.debug("Updated module delay to %s", module.delay)
         # Need to handle this module! For all ports
         for port in module.get_full_port_list(include_signals=False):
             # We move from a module input to all of it's outputs
@@ -689,7 +705,7 @@ class As2DWindowPipeline(AsModuleGroup):
                 continue
             # Sort the buffer list ascending by buffer length
             bufflist.sort(key=lambda buff: buff.length)
-            LOG.debug("Merging buffers: %s", str(bufflist))
+            LOG.debug("Merging buffers: %s", bufflist)
             # Merge the buffers
             prev_buff = bufflist[0]
             for buff in bufflist[1:]:
@@ -1020,6 +1036,9 @@ class As2DWindowPipeline(AsModuleGroup):
                 wport.glue_signal = sig
             # Xilinx Vivado OOC Runs can't deal with entity declarations
             # Modules have to be declared as components
+            # (once for wrappers sharing their entity)
+            if mod.shared_wrapper is not None and mod.shared_wrapper in modules:
+                continue
             declr_str = generate_component_declaration(mod)
             code_dict["signals"].append(declr_str)
 
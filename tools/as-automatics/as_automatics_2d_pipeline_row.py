@@ -55,7 +55,7 @@ from as_automatics_helpers import foreach
 
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("pipeline2d")
 
 ##
 # @addtogroup automatics_2dwpl
@@ -52,7 +52,7 @@ from as_automatics_2d_helpers import resolve_data_width
 
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("pipeline2d")
 
 ##
 # @addtogroup automatics_2dwpl
@@ -63,6 +63,8 @@ class AsWindowInterface(Interface):
     """! @brief Interface definition for interface 'as_window'.
     Used in as_automatics_2d_pipeline::As2DWindowPipeline."""
 
+    __slots__ = ("delay", "window", "window_port")
+
     INTERFACE_TYPE_STR = "as_window"
 
     def __init__(self):
@@ -50,7 +50,7 @@ from as_automatics_2d_window_interface import AsWindowInterface
 
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("pipeline2d")
 
 ##
 # @addtogroup automatics_2dwpl
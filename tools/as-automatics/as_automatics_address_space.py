@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_address_space.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Allocation of the slave register address space of a processing chain
+and export of the resulting register map.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_address_space.py
+# @ingroup automatics_connection
+# @author Philip Manke
+# @brief Slave register address allocation and register map export.
+# -----------------------------------------------------------------------------
+
+import csv
+import json
+from collections import namedtuple
+from math import ceil, log2
+
+from as_automatics_exceptions import AsAssignError, AsFileError
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log("connect")
+
+##
+# @addtogroup automatics_connection
+# @{
+
+## Output formats of 'write_address_map'
+ADDRESS_MAP_FORMATS = ("json", "csv", "h", "rdl")
+
+## Register types (SlaveRegisterInterface.REG_DIR_MATCH) -> SystemRDL access
+RDL_ACCESS = {
+    "HW -> SW": ("r", "w"),
+    "HW <- SW": ("rw", "r"),
+    "HW <=> SW": ("rw", "rw"),
+}
+
+
+def get_bit_width(count: int) -> int:
+    """! @brief Number of address bits required to select one of 'count'."""
+    return int(ceil(log2(count))) if count > 1 else 0
+
+
+def get_regif_name(regif) -> str:
+    """! @brief Name of a register interface as used in 'asterics.h'."""
+    return regif.parent.name + regif.name_suffix
+
+
+class RegisterSlot(
+    namedtuple("RegisterSlot", ("regif", "slot", "base_address", "pinned"))
+):
+    """! @brief A register interface placed in the address space.
+    'slot' is the module number decoded by as_main and as_regmgr
+    (the 'regif_num' of the register interface)."""
+
+    __slots__ = ()
+
+
+class AddressSpaceAllocator:
+    """! @brief Assigns the register interfaces of a chain to address slots.
+    The hardware (as_main and as_regmgr) decodes the module number from the
+    address bits above the register address, so all slots have the same
+    size: 'regs_per_module' registers, rounded to a power of two.
+    Register interfaces are placed in the order they are allocated, skipping
+    slots reserved by pinned base addresses. Pinned base addresses keep the
+    address of a register interface fixed for existing software."""
+
+    def __init__(
+        self,
+        base_address: int,
+        top_address: int,
+        addr_per_reg: int,
+        regs_per_module: int,
+        pinned: dict = None,
+    ):
+        self.base_address = base_address
+        self.top_address = top_address
+        self.addr_per_reg = addr_per_reg
+        self.regs_per_module = regs_per_module
+        self.stride = addr_per_reg * regs_per_module
+        # Slot number -> RegisterSlot
+        self.slots = {}
+        # Register interface name -> pinned slot number
+        self.pinned = {}
+        self.next_slot = 0
+        for name, address in (pinned or {}).items():
+            self.pin(name, address)
+
+    def pin(self, name: str, address: int):
+        """! @brief Reserve the slot at 'address' for register interface 'name'.
+        @param name: Module name + register interface suffix.
+        @param address: Absolute base address; Must be aligned to the slot size.
+        """
+        offset = address - self.base_address
+        if address > self.top_address or offset < 0:
+            raise AsAssignError(
+                name,
+                "Pinned base address {:#010X} is outside of the ASTERICS "
+                "address space ({:#010X} - {:#010X})!".format(
+                    address, self.base_address, self.top_address
+                ),
+            )
+        if offset % self.stride:
+            raise AsAssignError(
+                name,
+                "Pinned base address {:#010X} is not aligned to the register "
+                "interface size of {} bytes!".format(address, self.stride),
+            )
+        slot = offset // self.stride
+        other = next(
+            (pname for pname, pslot in self.pinned.items() if pslot == slot),
+            None,
+        )
+        if other is not None and other != name:
+            raise AsAssignError(
+                name,
+                "Pinned base address {:#010X} is already pinned for '{}'!".format(
+                    address, other
+                ),
+            )
+        self.pinned[name] = slot
+
+    def allocate(self, regif) -> RegisterSlot:
+        """! @brief Place 'regif' in the address space.
+        Sets the base address and slot number of the register interface."""
+        name = get_regif_name(regif)
+        slot = self.pinned.get(name)
+        pinned = slot is not None
+        if pinned:
+            if slot in self.slots:
+                raise AsAssignError(
+                    regif,
+                    "Pinned base address slot {} is already used by '{}'!".format(
+                        slot, get_regif_name(self.slots[slot].regif)
+                    ),
+                )
+        else:
+            reserved = set(self.pinned.values())
+            while self.next_slot in self.slots or self.next_slot in reserved:
+                self.next_slot += 1
+            slot = self.next_slot
+        address = self.base_address + slot * self.stride
+        # Check if the address space is out of bounds
+        if address > self.top_address:
+            raise AsAssignError(
+                regif,
+                "Too many register interfaces or too many registers! "
+                "Address space is full at module '{}'".format(regif.parent),
+            )
+        regif.set_module_base_addr(address, slot)
+        self.slots[slot] = RegisterSlot(regif, slot, address, pinned)
+        return self.slots[slot]
+
+    def get_unused_pins(self) -> list:
+        """! @brief Names of pinned register interfaces that were not placed."""
+        placed = {
+            get_regif_name(entry.regif) for entry in self.slots.values()
+        }
+        return [name for name in self.pinned if name not in placed]
+
+    @property
+    def slot_count(self) -> int:
+        """! @brief Number of slots decoded (highest used slot + 1)."""
+        return max(self.slots, default=-1) + 1
+
+    def get_unused_slots(self) -> list:
+        """! @brief Slot numbers below 'slot_count' without register interface."""
+        return [
+            slot for slot in range(self.slot_count) if slot not in self.slots
+        ]
+
+    def get_report(self) -> dict:
+        """! @brief Summary of the allocated address space.
+        Includes the decode width and the address space wasted by the fixed
+        slot size, compared to placing every register interface in a
+        region of its own size (rounded to a power of two)."""
+        reg_addr_width = get_bit_width(self.regs_per_module)
+        byte_width = get_bit_width(self.addr_per_reg)
+        mod_addr_width = get_bit_width(self.slot_count)
+        span = self.slot_count * self.stride
+        used = sum(
+            max(entry.regif.get_reg_count(), 0) * self.addr_per_reg
+            for entry in self.slots.values()
+        )
+        packed_span = sum(
+            2 ** get_bit_width(max(entry.regif.get_reg_count(), 1))
+            * self.addr_per_reg
+            for entry in self.slots.values()
+        )
+        return {
+            "base_address": self.base_address,
+            "register_interfaces": len(self.slots),
+            "slots": self.slot_count,
+            "slot_size": self.stride,
+            "pinned": sum(1 for entry in self.slots.values() if entry.pinned),
+            "module_addr_width": mod_addr_width,
+            "reg_addr_width": reg_addr_width,
+            "decode_width": mod_addr_width + reg_addr_width + byte_width,
+            "address_span": span,
+            "used_bytes": used,
+            "wasted_bytes": span - used,
+            "packed_span": packed_span,
+            "packed_decode_width": get_bit_width(packed_span),
+        }
+
+    def get_register_map(self) -> list:
+        """! @brief One dictionary per register, ordered by address."""
+        rows = []
+        for slot in sorted(self.slots):
+            entry = self.slots[slot]
+            regif = entry.regif
+            for idx, reg_type in enumerate(regif.get_reg_list()):
+                rows.append(
+                    {
+                        "interface": get_regif_name(regif),
+                        "module": regif.parent.name,
+                        "entity": regif.parent.entity_name,
+                        "slot": slot,
+                        "pinned": entry.pinned,
+                        "register": idx,
+                        "address": entry.base_address
+                        + idx * self.addr_per_reg,
+                        "type": reg_type,
+                    }
+                )
+        return rows
+
+
+def write_address_map(
+    allocator: AddressSpaceAllocator,
+    path: str,
+    output_format: str = "json",
+    name: str = "asterics",
+) -> bool:
+    """! @brief Export the register map of 'allocator' to the file 'path'.
+    @param output_format: One of ADDRESS_MAP_FORMATS: JSON, CSV, C header
+                          or a SystemRDL-like description.
+    @param name: Name of the address map (C prefix / RDL addrmap name)."""
+    if output_format not in ADDRESS_MAP_FORMATS:
+        raise ValueError(
+            "Invalid address map format '{}'! Choose from: {}".format(
+                output_format, ", ".join(ADDRESS_MAP_FORMATS)
+            )
+        )
+    writer = {
+        "json": _write_json,
+        "csv": _write_csv,
+        "h": _write_c_header,
+        "rdl": _write_rdl,
+    }[output_format]
+    try:
+        with open(path, "w", newline="") as file:
+            writer(allocator, file, name)
+    except OSError as err:
+        raise AsFileError(path, "Could not write the address map!", str(err))
+    LOG.info("Wrote register map to '%s'.", path)
+    return True
+
+
+def _write_json(allocator: AddressSpaceAllocator, file, name: str):
+    json.dump(
+        {
+            "name": name,
+            "summary": allocator.get_report(),
+            "registers": allocator.get_register_map(),
+        },
+        file,
+        indent=2,
+    )
+
+
+def _write_csv(allocator: AddressSpaceAllocator, file, name: str):
+    columns = (
+        "address",
+        "interface",
+        "module",
+        "entity",
+        "slot",
+        "pinned",
+        "register",
+        "type",
+    )
+    writer = csv.DictWriter(file, columns, lineterminator="\n")
+    writer.writeheader()
+    for row in allocator.get_register_map():
+        row["address"] = "{:#010x}".format(row["address"])
+        writer.writerow(row)
+
+
+def _write_c_header(allocator: AddressSpaceAllocator, file, name: str):
+    prefix = name.upper()
+    guard = "{}_REGMAP_H".format(prefix)
+    report = allocator.get_report()
+    file.write("/* Register map generated by ASTERICS Automatics */\n")
+    file.write("#ifndef {0}\n#define {0}\n\n".format(guard))
+    file.write(
+        "#define {}_REGMAP_DECODE_WIDTH {}\n".format(
+            prefix, report["decode_width"]
+        )
+    )
+    file.write(
+        "#define {}_REGMAP_SLOT_SIZE {}\n".format(prefix, report["slot_size"])
+    )
+    current = None
+    for row in allocator.get_register_map():
+        iname = row["interface"].upper()
+        if iname != current:
+            current = iname
+            file.write(
+                "\n#define {}_{}_BASEADDR 0x{:08X}u\n".format(
+                    prefix, iname, row["address"]
+                )
+            )
+        file.write(
+            "#define {}_{}_REG{} 0x{:08X}u /* {} */\n".format(
+                prefix, iname, row["register"], row["address"], row["type"]
+            )
+        )
+    file.write("\n#endif /* {} */\n".format(guard))
+
+
+def _write_rdl(allocator: AddressSpaceAllocator, file, name: str):
+    file.write("addrmap {} {{\n".format(name))
+    for slot in sorted(allocator.slots):
+        entry = allocator.slots[slot]
+        regif = entry.regif
+        file.write(
+            "  regfile {{\n    // {} (slot {}{})\n".format(
+                regif.parent.entity_name,
+                slot,
+                ", pinned" if entry.pinned else "",
+            )
+        )
+        for idx, reg_type in enumerate(regif.get_reg_list()):
+            access = RDL_ACCESS.get(reg_type)
+            if access is None:
+                continue  # Inactive register
+            file.write(
+                "    reg {{ field {{ sw = {}; hw = {}; }} data[{}]; }} "
+                "reg{} @ {:#x};\n".format(
+                    access[0],
+                    access[1],
+                    regif.data_width,
+                    idx,
+                    idx * allocator.addr_per_reg,
+                )
+            )
+        file.write(
+            "  }} {} @ {:#x};\n".format(
+                get_regif_name(regif), entry.base_address
+            )
+        )
+    file.write("};\n")
+
+
+## @}
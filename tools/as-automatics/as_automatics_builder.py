@@ -42,6 +42,7 @@ Functions that handle common tasks when building a hardware processing chain.
 # -----------------------------------------------------------------------------
 
 import os
+import shlex
 import itertools as ittls
 
 from shutil import copy, rmtree
@@ -52,13 +53,15 @@ from as_automatics_proc_chain import AsProcessingChain
 from as_automatics_module import AsModule
 from as_automatics_module_group import AsModuleGroup
 from as_automatics_module_wrapper import AsModuleWrapper
-from as_automatics_exceptions import AsFileError, AsModuleError
+from as_automatics_exceptions import AsFileError, AsModuleError, AsToolError
 from as_automatics_helpers import append_to_path, minimize_name
 from as_automatics_builder_templates import *
+from as_automatics_packaging import PackagingJob
 
 import as_automatics_logging as as_log
+import as_automatics_vhdl_dependencies as as_vdeps
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("writer")
 
 
 ##
@@ -430,8 +433,45 @@ def write_asterics_h(chain: AsProcessingChain, output_path: str):
         )
 
 
+def get_ooc_run_weight(source_files: set) -> int:
+    """! @brief Estimate the synthesis effort of an out-of-context run.
+    Uses the size of its VHDL source files in bytes (or their number, if
+    the files cannot be found)."""
+    weight = 0
+    for source in source_files:
+        try:
+            weight += os.path.getsize(source)
+        except OSError:
+            weight += 1
+    return weight
+
+
+def get_ooc_schedule_tcl(ooc_runs: list, jobs: int = 0) -> str:
+    """! @brief Generate the TCL commands running the out-of-context runs.
+    The runs do not depend on each other, but the synthesis of the toplevel
+    depends on all of them: They are launched in parallel, the longest runs
+    first, and waited on before the packaging continues.
+    @param ooc_runs: List of tuples (run weight, OOC fileset name).
+    @param jobs: Number of parallel runs (0: number of CPUs).
+    @return The TCL commands as a string."""
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, len(ooc_runs))
+    filesets = [
+        fileset
+        for _, fileset in sorted(ooc_runs, key=lambda run: (-run[0], run[1]))
+    ]
+    return TCL_OOC_SCHEDULE_TEMPLATE.format(
+        filesets=" ".join(filesets),
+        count=len(filesets),
+        jobs=jobs,
+    )
+
+
 def write_vivado_package_tcl(
-    chain: AsProcessingChain, output_path: str, additions_c1: str = ""
+    chain: AsProcessingChain,
+    output_path: str,
+    additions_c1: str = "",
+    ooc_jobs: int = 0,
 ) -> bool:
     """! @brief Write two TCL script fragments sourced by the packaging TCL script.
     This function generates Vivado-specific TCL commands!
@@ -446,6 +486,8 @@ def write_vivado_package_tcl(
     Parameters:
     chain - AsProcessingChain: The current processing chain to build
     output_path - String: Toplevel folder of the current project
+    ooc_jobs - Integer: Number of parallel out-of-context synthesis runs
+               (0: number of CPUs; None: only create the runs)
     Returns a boolean value: True on success, False otherwise"""
 
     # Class to manage the AXI interface information for the TCL packaging
@@ -592,7 +634,15 @@ def write_vivado_package_tcl(
 
     outsourced_files = []
     ooc_modules = [
-        mod for mod in chain.modules if isinstance(mod, AsModuleWrapper)
+        mod
+        for mod in ittls.chain(chain.modules, chain.module_groups)
+        if isinstance(mod, AsModuleWrapper)
+    ]
+    # Wrappers sharing the entity of another wrapper reuse its OOC run
+    ooc_modules = [
+        mod
+        for idx, mod in enumerate(ooc_modules)
+        if mod.shared_wrapper is None and mod not in ooc_modules[:idx]
     ]
     if ooc_modules:
         tcl_ooc_commands = [
@@ -601,6 +651,7 @@ def write_vivado_package_tcl(
         ]
     else:
         tcl_ooc_commands = []
+    ooc_runs = []  # (run weight, fileset name)
     count = 1
     for mod in ooc_modules:
         source_files = set()
@@ -614,11 +665,21 @@ def write_vivado_package_tcl(
             for dmod in dep_mods:
                 modtemplate = chain.library.get_module_template(dmod)
                 source_files.update(modtemplate.files)
+        ooc_runs.append((get_ooc_run_weight(source_files), mod.entity_name))
         source_files = (
             sf.rsplit("/", maxsplit=1)[-1] for sf in sorted(source_files)
         )
+        users = [
+            wrapper.name
+            for wrapper in chain.module_groups
+            if getattr(wrapper, "shared_wrapper", None) is mod
+        ]
+        reuse = ""
+        if users:
+            reuse = "# Also instantiated as: {}\n".format(" ".join(users))
         tcl_ooc_commands.append(
-            TCL_OOC_TEMPLATE.format(
+            reuse
+            + TCL_OOC_TEMPLATE.format(
                 ent_name=mod.entity_name,
                 source_files=" ".join(source_files),
                 top_source=mod.name + ".vhd",
@@ -631,6 +692,8 @@ def write_vivado_package_tcl(
             files=" ".join(outsourced_files)
         )
     )
+    if ooc_runs and ooc_jobs is not None:
+        tcl_ooc_commands.append(get_ooc_schedule_tcl(ooc_runs, ooc_jobs))
 
     content3 += "\n".join(tcl_ooc_commands)
 
@@ -652,39 +715,66 @@ def write_vivado_package_tcl(
             )
 
 
-def run_vivado_packaging(
-    chain: AsProcessingChain, output_path: str, tcl_additions: str = ""
-):
-    """! @brief Write the necessary TCL fragments and run the TCL packaging script.
-    Requires Vivado to be installed and in callable from the current terminal.
+def create_packaging_job(
+    chain: AsProcessingChain,
+    output_path: str,
+    tcl_additions: str = "",
+    ooc_jobs: int = 0,
+    timeout: float = None,
+) -> PackagingJob:
+    """! @brief Write the necessary TCL fragments and return the packaging job.
+    The job runs Vivado in the output folder, logging its output to
+    'packaging.log' there. Use 'PackagingJob.run()' or a 'PackagingRunner'
+    to run it.
     Parameters:
     chain: The current processing chain.
     output_path: The root of the output folder structure.
-    No return value."""
+    ooc_jobs: Number of parallel out-of-context synthesis runs
+              (see 'write_vivado_package_tcl').
+    timeout: Seconds after which Vivado is terminated (None: no limit).
+    Returns the (not yet started) PackagingJob."""
     # Write the necessary tcl fragments
-    write_vivado_package_tcl(chain, output_path, tcl_additions)
+    write_vivado_package_tcl(chain, output_path, tcl_additions, ooc_jobs)
     # Clean path
     path = append_to_path(os.path.realpath(output_path), "/")
     # Input path to launch string
-    launch_string = VIVADO_TCL_COMMANDLINE_TEMPLATE.format(
-        automatics_home + "/", path
+    command = shlex.split(
+        VIVADO_TCL_COMMANDLINE_TEMPLATE.format(automatics_home + "/", path)
+    )
+    return PackagingJob(
+        command,
+        cwd=path,
+        timeout=timeout,
+        log_path=path + "packaging.log",
     )
-    cwd = os.getcwd()
 
-    LOG.info("Running Vivado IP-Core packaging...")
-    try:
-        # Move to output path
-        os.chdir(output_path)
-        # Launch Vivado there, packaging the IP Core
-        os.system(launch_string)
-        # Move back home
-        os.chdir(cwd)
-    except Exception as err:
-        LOG.critical("Packaging via Vivado has failed!\nError: '%s'", str(err))
-        raise err
-    # Cleanup
+
+def log_packaging_progress(job: PackagingJob):
+    """! @brief Progress callback for packaging jobs, reporting to the log."""
+    if job.ooc_progress[1] and job.phase == "ooc_setup":
+        LOG.debug(
+            "Packaging '%s': OOC fileset %s of %s",
+            job.name,
+            job.ooc_progress[0],
+            job.ooc_progress[1],
+        )
+    else:
+        LOG.info(
+            "Packaging '%s': Phase '%s' (%.1fs)",
+            job.name,
+            job.phase,
+            job.get_duration(),
+        )
+
+
+def cleanup_vivado_packaging(chain: AsProcessingChain, output_path: str):
+    """! @brief Remove the temporary Vivado files after packaging.
+    The Vivado project is kept if it includes out-of-context runs."""
     ooc_runs_present = any(
-        (isinstance(mod, AsModuleWrapper) for mod in chain.modules)
+        (
+            isinstance(mod, AsModuleWrapper)
+            for mod in ittls.chain(chain.modules, chain.module_groups)
+        )
     )
     if not ooc_runs_present:
         for target_suf in HOUSE_CLEANING_LIST_VIVADO:
@@ -711,19 +801,72 @@ def run_vivado_packaging(
                 output_path
             )
         )
+
+
+def run_vivado_packaging(
+    chain: AsProcessingChain,
+    output_path: str,
+    tcl_additions: str = "",
+    ooc_jobs: int = 0,
+    timeout: float = None,
+) -> PackagingJob:
+    """! @brief Write the necessary TCL fragments and run the TCL packaging script.
+    Requires Vivado to be installed and in callable from the current terminal.
+    Vivado runs in the output folder; The working directory of Automatics is
+    not changed. Vivado's output is written to 'packaging.log' there.
+    Parameters:
+    chain: The current processing chain.
+    output_path: The root of the output folder structure.
+    ooc_jobs: Number of parallel out-of-context synthesis runs
+              (see 'write_vivado_package_tcl').
+    timeout: Seconds after which Vivado is terminated (None: no limit).
+    Returns the finished PackagingJob (output, per-phase timings).
+    Raises AsToolError if Vivado could not be run or packaging failed."""
+    job = create_packaging_job(
+        chain, output_path, tcl_additions, ooc_jobs, timeout
+    )
+    job.on_progress = log_packaging_progress
+
+    LOG.info("Running Vivado IP-Core packaging...")
+    job.run()
+    for phase, seconds in job.phase_times.items():
+        LOG.info("Packaging phase '%s' took %.1f seconds.", phase, seconds)
+    if not job.success:
+        LOG.critical(
+            "Packaging via Vivado has failed (%s)!\nError: '%s'\nLog: '%s'",
+            job.status,
+            job.error,
+            job.log_path,
+        )
+        raise AsToolError(
+            "Vivado",
+            "IP-Core packaging {}".format(job.status),
+            job.error,
+        )
+    cleanup_vivado_packaging(chain, output_path)
     LOG.info("Packaging complete!")
+    return job
 
 
 def gather_hw_files(
-    chain: AsProcessingChain, output_folder: str, use_symlinks: bool = True
+    chain: AsProcessingChain,
+    output_folder: str,
+    use_symlinks: bool = True,
+    derive_dependencies: bool = True,
 ) -> bool:
     """! @brief Copy or link to module VHDL files of an ASTERICS chain.
     Collect all required hardware descriptive files
-    for the current ASTERICS system. Mainly looks at the AsModule.files,
-    .module_dir and .dependencies attributes to find required files.
+    for the current ASTERICS system. By default, the required files are
+    derived from the VHDL sources: Starting from the generated VHDL files
+    in 'output_folder' and the files of the modules in 'chain', all files
+    providing packages and entities used by these files are collected
+    (see as_automatics_vhdl_dependencies.py). Files of modules required by
+    the VHDL code but missing in AsModule.dependencies are included.
     @param chain: current processing chain
     @param output_folder: The root of the output folder structure
     @param use_symlinks: Whether or not to link (True) or copy (False) files
+    @param derive_dependencies: If False, collect the files of the modules
+                   listed in the AsModule.dependencies attributes instead.
     @return  True on success, else False"""
 
     LOG.info("Gathering HDL source files...")
@@ -731,72 +874,136 @@ def gather_hw_files(
 
     # Collect all module entity names
     unique_modules = get_unique_modules(chain)
-
+    # Module entity name -> [files]
+    module_files = {}
     for entity in unique_modules:
-        this_path = append_to_path(out_path, entity)
-        try:
-            os.makedirs(this_path, 0o755, exist_ok=True)
-        except FileExistsError:
-            pass
         module = chain.library.get_module_template(entity)
         if module is None:
             continue
-        module_dir = os.path.realpath(module.module_dir)
-        for hw_file in module.files:
-            source = os.path.realpath(hw_file)
-            if not hw_file.startswith("/"):
-                comp = os.path.commonprefix([module_dir, source])
-                if comp != module_dir:
-                    # Append the file path to the module directory, cutting off '/'
-                    source = append_to_path(
-                        module_dir, hw_file, add_trailing_slash=False
-                    )
+        module_files[entity] = as_vdeps.get_module_files(module)
+        for source in module_files[entity]:
             if not os.path.isfile(source):
                 raise AsFileError(source, "File not found!")
-            filename = source.rsplit("/", maxsplit=1)[-1]
-            dest = this_path + filename
-
-            LOG.debug("Gather HW files: Link '%s' to '%s'", source, dest)
-
-            if use_symlinks:
-                # Try to create a symlink
-                try:
-                    os.symlink(source, dest)
-                except FileExistsError:
-                    # If a symlink already exists, delete it and retry
-                    os.unlink(dest)
-                    try:
-                        os.symlink(source, dest)
-                    except IOError as err:
-                        LOG.critical(
-                            (
-                                "Could not link file '%s' of module '%s'!"
-                                " - '%s'"
-                            ),
-                            filename,
-                            entity,
-                            str(err),
-                        )
-                        return False
-                except IOError as err:
-                    LOG.critical(
-                        ("Could not link file '%s' of module '%s'! " "- '%s'"),
-                        filename,
-                        entity,
-                        str(err),
-                    )
-                    return False
-            else:
-                try:
-                    copy(source, dest)
-                except IOError as err:
-                    LOG.critical(
-                        ("Could not copy file '%s' of module '%s'!" " - '%s'"),
-                        filename,
-                        entity,
-                        str(err),
-                    )
-                    return False
+
+    if derive_dependencies:
+        module_files = get_required_hw_files(chain, out_path, unique_modules)
+
+    for entity, files in module_files.items():
+        this_path = append_to_path(out_path, entity)
+        os.makedirs(this_path, 0o755, exist_ok=True)
+        for source in files:
+            if not gather_file(source, this_path, entity, use_symlinks):
+                return False
+    if as_vdeps.cache_dir:
+        as_vdeps.save_scan_cache(as_vdeps.cache_dir)
+    return True
+
+
+def get_required_hw_files(
+    chain: AsProcessingChain, output_folder: str, unique_modules: list
+) -> dict:
+    """! @brief Determine the module VHDL files required by an ASTERICS chain.
+    The files in 'output_folder' (generated by the VHDL writer) and the files
+    of all (non-group) modules of 'chain' are the roots of the file
+    dependency closure. Differences to the declared dependencies
+    ('unique_modules', see 'get_unique_modules') are logged.
+    @return Dictionary: Module entity name -> [files to gather]."""
+    graph = chain.library.get_dependency_graph()
+    roots = []
+    for filename in sorted(os.listdir(output_folder)):
+        if filename.endswith((".vhd", ".vhdl")):
+            path = os.path.join(output_folder, filename)
+            graph.add_file(path)
+            roots.append(path)
+    for module in chain.modules:
+        if not isinstance(module, AsModuleGroup):
+            roots.extend(graph.get_module_files(module.entity_name))
+    closure = graph.get_closure(roots)
+
+    # Keep the folder names of the declared dependencies
+    # (entity names are case insensitive)
+    declared = {entity.lower(): entity for entity in unique_modules}
+    out = {}
+    for path in closure:
+        owners = graph.file_owners.get(path)
+        if not owners:
+            # Generated files of the output folder
+            continue
+        # Shared files: Prefer a module used by the chain
+        owner = next(
+            (owner for owner in owners if owner in declared), owners[0]
+        )
+        out.setdefault(declared.get(owner, owner), []).append(path)
+
+    for unit in sorted(
+        {unit for path in closure for unit in graph.get_unresolved_units(path)}
+    ):
+        LOG.debug("Gather HW files: No module provides '%s'.", unit)
+    for entity in out:
+        if entity not in unique_modules:
+            LOG.info(
+                (
+                    "Module '%s' is required by the VHDL sources, but not "
+                    "declared as a dependency."
+                ),
+                entity,
+            )
+    for entity in unique_modules:
+        if entity not in out:
+            LOG.debug(
+                "Declared dependency '%s' is not used by the VHDL sources.",
+                entity,
+            )
+    return out
+
+
+def gather_file(
+    source: str, dest_path: str, entity: str, use_symlinks: bool = True
+) -> bool:
+    """! @brief Copy or link to the file 'source' in the folder 'dest_path'.
+    @param entity: Module the file belongs to, used for log messages.
+    @return True on success, else False."""
+    filename = source.rsplit("/", maxsplit=1)[-1]
+    dest = append_to_path(dest_path, filename, add_trailing_slash=False)
+
+    LOG.debug("Gather HW files: Link '%s' to '%s'", source, dest)
+
+    if use_symlinks:
+        # Try to create a symlink
+        try:
+            os.symlink(source, dest)
+        except FileExistsError:
+            # If a symlink already exists, delete it and retry
+            os.unlink(dest)
+            try:
+                os.symlink(source, dest)
+            except IOError as err:
+                LOG.critical(
+                    ("Could not link file '%s' of module '%s'!" " - '%s'"),
+                    filename,
+                    entity,
+                    str(err),
+                )
+                return False
+        except IOError as err:
+            LOG.critical(
+                ("Could not link file '%s' of module '%s'! " "- '%s'"),
+                filename,
+                entity,
+                str(err),
+            )
+            return False
+    else:
+        try:
+            copy(source, dest)
+        except IOError as err:
+            LOG.critical(
+                ("Could not copy file '%s' of module '%s'!" " - '%s'"),
+                filename,
+                entity,
+                str(err),
+            )
+            return False
     return True
 
 
@@ -329,6 +329,28 @@ TCL_OOC_TEMPLATE = (
     "update_compile_order -fileset {ent_name}\n"
 )
 
+TCL_OOC_SCHEDULE_TEMPLATE = (
+    "\n# Run the OOC synthesis runs, longest first\n"
+    "set ooc_runs []\n"
+    "foreach ooc_fileset [list {filesets}] {{\n"
+    # Vivado usually creates the runs of new blocksets itself
+    "  if {{[llength [get_runs -quiet ${{ooc_fileset}}_synth_1]] == 0}} {{\n"
+    "    create_run ${{ooc_fileset}}_synth_1 -srcset $ooc_fileset "
+    "-flow [get_property flow [get_runs synth_1]]\n"
+    "  }}\n"
+    "  lappend ooc_runs ${{ooc_fileset}}_synth_1\n"
+    "}}\n"
+    'puts "Running {count} Out-of-Context Synthesis Runs ({jobs} jobs)..."\n'
+    "launch_runs $ooc_runs -jobs {jobs}\n"
+    # The synthesis of the toplevel requires all OOC runs
+    "foreach ooc_run $ooc_runs {{\n"
+    "  wait_on_run $ooc_run\n"
+    '  if {{[get_property progress [get_runs $ooc_run]] != "100%"}} {{\n'
+    '    puts "Out-of-Context Synthesis Run $ooc_run failed!"\n'
+    "  }}\n"
+    "}}\n"
+)
+
 HOUSE_CLEANING_LIST_VIVADO = (
     "package_interface_config.tcl",
     "package_config.tcl",
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_chain_diff.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Structural comparison of two connected processing chains: Modules,
+generics, connections, 2D Window Pipeline line buffers and registers.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_chain_diff.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Structural diff of processing chains.
+# -----------------------------------------------------------------------------
+
+import json
+
+from as_automatics_module_group import AsModuleGroup
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_connection_helper import get_parent_module
+from as_automatics_exceptions import AsFileError
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Version of the chain description format
+DESCRIPTION_FORMAT = 1
+## Sections of a chain description compared entry by entry
+ENTRY_SECTIONS = ("modules", "groups", "buffers", "registers")
+
+
+def get_endpoint_id(obj) -> str:
+    """! @brief Return a stable identifier of a port or signal.
+    "<module>.<port>" for module ports, "group:<group>.<signal>" for ports
+    and signals of module groups (wrappers share the name of the module
+    they contain)."""
+    parent = get_parent_module(obj)
+    name = getattr(obj, "code_name", None) or str(obj)
+    if parent is None:
+        return name
+    prefix = "group:" if isinstance(parent, AsModuleGroup) else ""
+    return "{}{}.{}".format(prefix, parent.name, name)
+
+
+def get_generics(module) -> dict:
+    return {
+        gen.code_name: str(gen.get_value())
+        for gen in getattr(module, "generics", ())
+    }
+
+
+def describe_chain(chain) -> dict:
+    """! @brief Return a JSON serializable description of the connected
+    'chain', keyed by names that are stable between runs:
+    'modules' and 'groups': Entity/type, parent group and generics,
+    'connections': Sink endpoint -> sorted list of source endpoints,
+    'buffers': Line buffers of 2D Window Pipelines with their sizes,
+    'registers': Register interfaces with base address and types."""
+    desc = {
+        "format": DESCRIPTION_FORMAT,
+        "modules": {},
+        "groups": {},
+        "connections": {},
+        "buffers": {},
+        "registers": {},
+    }
+    member_of = {}
+    for group in chain.module_groups:
+        for mod in group.modules:
+            member_of[id(mod)] = group.name
+    for group in chain.module_groups:
+        desc["groups"][group.name] = {
+            "type": type(group).__name__,
+            "entity": group.entity_name,
+            "group": member_of.get(id(group), ""),
+            "generics": get_generics(group),
+        }
+    objects = []
+    for mod in chain.modules:
+        objects.append(mod)
+        if isinstance(mod, AsModuleGroup):
+            continue
+        desc["modules"][mod.name] = {
+            "entity": mod.entity_name,
+            "group": member_of.get(id(mod), ""),
+            "generics": get_generics(mod),
+        }
+    objects.extend(chain.module_groups)
+    if chain.top is not None:
+        objects.append(chain.top)
+
+    # Collect each connection once, from both of its ends
+    edges = set()
+    for obj in objects:
+        ports = list(obj.get_full_port_list())
+        ports.extend(getattr(obj, "signals", ()))
+        for port in ports:
+            incoming = getattr(port, "incoming", None)
+            if incoming is not None and not isinstance(incoming, list):
+                incoming = [incoming]
+            for source in incoming or ():
+                edges.add((get_endpoint_id(source), get_endpoint_id(port)))
+            for sink in getattr(port, "outgoing", ()):
+                edges.add((get_endpoint_id(port), get_endpoint_id(sink)))
+    connections = desc["connections"]
+    for source, sink in edges:
+        connections.setdefault(sink, []).append(source)
+    for sources in connections.values():
+        sources.sort()
+
+    for pipe in chain.module_groups:
+        if not isinstance(pipe, As2DWindowPipeline):
+            continue
+        for row in pipe.buffer_rows:
+            size = row.get_size()
+            desc["buffers"][pipe.name + "/" + row.name] = {
+                "length": row.length,
+                "bit_width": row.get_bit_width(),
+                "window_width": row.window_width,
+                "size": size,
+                "memory": "bram"
+                if size > pipe.minimum_bram_size
+                else "registers",
+            }
+
+    if chain.address_allocator is not None:
+        registers = desc["registers"]
+        for row in chain.address_allocator.get_register_map():
+            entry = registers.setdefault(
+                row["interface"],
+                {
+                    "module": row["module"],
+                    "address": row["address"],
+                    "types": [],
+                },
+            )
+            entry["types"].append(row["type"])
+    return desc
+
+
+def write_chain_description(chain, path: str):
+    """! @brief Write the description of 'chain' to the JSON file 'path'.
+    Compare saved descriptions using 'chain_diff'."""
+    try:
+        with open(path, "w") as file:
+            json.dump(describe_chain(chain), file, indent=2, sort_keys=True)
+    except IOError as err:
+        raise AsFileError(path, "Could not write chain description", str(err))
+    LOG.info("Wrote chain description to '%s'.", path)
+
+
+def read_chain_description(path: str) -> dict:
+    """! @brief Read a chain description written by
+    'write_chain_description'."""
+    try:
+        with open(path, "r") as file:
+            desc = json.load(file)
+    except (IOError, ValueError) as err:
+        raise AsFileError(path, "Could not read chain description", str(err))
+    if not isinstance(desc, dict) or desc.get("format") != DESCRIPTION_FORMAT:
+        raise AsFileError(
+            path,
+            "Unsupported chain description format",
+            "Supported: {}".format(DESCRIPTION_FORMAT),
+        )
+    return desc
+
+
+def diff_entries(old: dict, new: dict) -> dict:
+    """! @brief Compare two dictionaries of entries (name -> attributes).
+    @return Dictionary: 'added' and 'removed' entry names and 'changed':
+            Entry name -> attribute -> [old value, new value]."""
+    out = {
+        "added": sorted(name for name in new if name not in old),
+        "removed": sorted(name for name in old if name not in new),
+        "changed": {},
+    }
+    for name in sorted(old):
+        if name not in new or old[name] == new[name]:
+            continue
+        fields = {}
+        for key in sorted(set(old[name]) | set(new[name])):
+            if old[name].get(key) != new[name].get(key):
+                fields[key] = [old[name].get(key), new[name].get(key)]
+        out["changed"][name] = fields
+    return out
+
+
+class ChainDiff:
+    """! @brief Structural differences between two processing chains.
+    All comparisons are dictionary and set lookups by name, so the
+    run time grows linearly with the size of the chains."""
+
+    def __init__(self, old: dict, new: dict):
+        ## Per section (see ENTRY_SECTIONS): Result of 'diff_entries'
+        self.sections = {}
+        for section in ENTRY_SECTIONS:
+            self.sections[section] = diff_entries(
+                old.get(section, {}), new.get(section, {})
+            )
+        # Generics are listed separately, one entry per generic
+        self.generics = []
+        for section in ("modules", "groups"):
+            changed = self.sections[section]["changed"]
+            for name, fields in changed.items():
+                gens = fields.pop("generics", None)
+                if gens is None:
+                    continue
+                old_gens, new_gens = gens
+                for gen in sorted(set(old_gens) | set(new_gens)):
+                    if old_gens.get(gen) != new_gens.get(gen):
+                        self.generics.append(
+                            {
+                                "module": name,
+                                "generic": gen,
+                                "old": old_gens.get(gen),
+                                "new": new_gens.get(gen),
+                            }
+                        )
+            for name in [name for name in changed if not changed[name]]:
+                del changed[name]
+        old_cons = old.get("connections", {})
+        new_cons = new.get("connections", {})
+        old_edges = {
+            (src, sink) for sink, srcs in old_cons.items() for src in srcs
+        }
+        new_edges = {
+            (src, sink) for sink, srcs in new_cons.items() for src in srcs
+        }
+        self.connections = {
+            "added": sorted(new_edges - old_edges),
+            "removed": sorted(old_edges - new_edges),
+            # Sinks connected in both chains, but to other sources:
+            # Sink -> {"removed": [sources], "added": [sources]}
+            "rewired": {},
+        }
+        for sink in sorted(old_cons):
+            if sink in new_cons and old_cons[sink] != new_cons[sink]:
+                old_srcs = set(old_cons[sink])
+                new_srcs = set(new_cons[sink])
+                self.connections["rewired"][sink] = {
+                    "removed": sorted(old_srcs - new_srcs),
+                    "added": sorted(new_srcs - old_srcs),
+                }
+
+    def is_empty(self) -> bool:
+        """! @brief True if both chains are structurally identical."""
+        return not (
+            self.generics
+            or self.connections["added"]
+            or self.connections["removed"]
+            or any(
+                diff["added"] or diff["removed"] or diff["changed"]
+                for diff in self.sections.values()
+            )
+        )
+
+    def __bool__(self) -> bool:
+        return not self.is_empty()
+
+    def to_dict(self) -> dict:
+        out = dict(self.sections)
+        out["generics"] = self.generics
+        out["connections"] = {
+            "added": [list(edge) for edge in self.connections["added"]],
+            "removed": [list(edge) for edge in self.connections["removed"]],
+            "rewired": self.connections["rewired"],
+        }
+        out["identical"] = self.is_empty()
+        return out
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the differences to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error("Could not write chain diff '%s': %s", path, str(err))
+            return False
+        return True
+
+    def __str__(self) -> str:
+        if self.is_empty():
+            return "Chains are structurally identical."
+        out = []
+        for section in ENTRY_SECTIONS:
+            diff = self.sections[section]
+            for name in diff["added"]:
+                out.append("+ {} {}".format(section[:-1], name))
+            for name in diff["removed"]:
+                out.append("- {} {}".format(section[:-1], name))
+            for name, fields in diff["changed"].items():
+                for key, (old, new) in fields.items():
+                    if key == "address":
+                        old, new = hex(old), hex(new)
+                    out.append(
+                        "~ {} {}: {}: {} -> {}".format(
+                            section[:-1], name, key, old, new
+                        )
+                    )
+        for gen in self.generics:
+            out.append(
+                "~ generic {}.{}: {} -> {}".format(
+                    gen["module"], gen["generic"], gen["old"], gen["new"]
+                )
+            )
+        rewired = self.connections["rewired"]
+        for sink, srcs in rewired.items():
+            out.append(
+                "~ connection {}: {}".format(
+                    sink,
+                    ", ".join(
+                        ["-" + src for src in srcs["removed"]]
+                        + ["+" + src for src in srcs["added"]]
+                    ),
+                )
+            )
+        for source, sink in self.connections["added"]:
+            if sink not in rewired:
+                out.append("+ connection {} -> {}".format(source, sink))
+        for source, sink in self.connections["removed"]:
+            if sink not in rewired:
+                out.append("- connection {} -> {}".format(source, sink))
+        return "\n".join(out)
+
+
+def chain_diff(old, new) -> ChainDiff:
+    """! @brief Compare two processing chains structurally.
+    @param old, new: Connected processing chains, chain descriptions
+                     (see 'describe_chain') or paths to saved descriptions
+                     (see 'write_chain_description').
+    @return A ChainDiff. Print it or export it using 'write_json'."""
+    descs = []
+    for chain in (old, new):
+        if isinstance(chain, str):
+            chain = read_chain_description(chain)
+        elif not isinstance(chain, dict):
+            chain = describe_chain(chain)
+        descs.append(chain)
+    return ChainDiff(*descs)
+
+
+## @}
@@ -41,9 +41,11 @@ Collection of helper functions for CNN layers in ASTERICS systems.
 # @brief Collection of helper functions for CNN layers in ASTERICS systems.
 # -----------------------------------------------------------------------------
 
+import math
+
 from as_automatics_logging import get_log
 
-LOG = get_log()
+LOG = get_log("pipeline2d")
 
 
 ##
@@ -166,6 +168,36 @@ def calc_extended_quantized_bias(filter_kernel, bias):
     return akk
 
 
+def get_serial_filter_cost(
+    weights: list, filter_count: int, din_width: int
+) -> dict:
+    """Coarse resource estimate of a serial convolution filter module.
+    The filters share one carry-save adder tree sized for the filter with
+    the most weighted summands (PoT factors) and one quantizer.
+    Returns a dictionary for 'AsModule.set_resource_model'."""
+    weights_per_filter = len(weights) // filter_count
+    summands = max(
+        get_total_elements_for_filter(
+            weights[idx : idx + weights_per_filter]
+        )
+        for idx in range(0, len(weights), weights_per_filter)
+    )
+    summands = max(summands, 2)
+    # Summands are the input data shifted by up to 7 bits
+    width = din_width + 8 + math.ceil(math.log2(summands))
+    stages = get_csa_adder_stages(summands)
+    # One LUT per bit for each 3:2 compressor and the final adder
+    luts = (summands - 1) * width
+    # Registered summands and two vectors per adder stage
+    ffs = summands * (din_width + 8) + stages * 2 * width
+    # Quantizer: 56 x 24 bit multiplication, 25 x 18 bit DSP inputs,
+    # 80 bit result registered in three stages
+    dsps = math.ceil(56 / 25) * math.ceil(24 / 18)
+    luts += 56 + 80
+    ffs += 56 + 24 + 3 * 80
+    return {"luts": luts, "ffs": ffs, "dsps": dsps}
+
+
 def reduce_add_sub(weights: list, max_ones: int) -> list:
     """Reduce the number of PoT factors required per weight up to 'max_ones'.
     Returns the modified 'weights'."""
@@ -55,7 +55,7 @@ from as_automatics_port import Port
 from as_automatics_templates import AsStream
 from as_automatics_logging import get_log
 
-LOG = get_log()
+LOG = get_log("pipeline2d")
 
 ##
 # @addtogroup automatics_cnn
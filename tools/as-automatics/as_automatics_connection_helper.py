@@ -56,7 +56,7 @@ from as_automatics_generic import Generic
 import as_automatics_helpers as as_help
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ##
@@ -177,7 +177,7 @@ def __resolve_data_width__(data_width, port) -> tuple:
             ),
             port.code_name,
             port.parent.name,
-            str(data_width),
+            data_width,
         )
         return data_width
     return new_data_width
@@ -463,7 +463,7 @@ def connect_generics(module: AsModule):
                 higher_mod = getattr(higher_mod, "parent", None)
                 module_path.append(higher_mod)
             if fgen:  # If we found a matching generic, set this
-                LOG.debug("Processing module path: '%s'", str(module_path))
+                LOG.debug("Processing module path: '%s'", module_path)
                 # Reorder modules: top to bottom
                 module_path.reverse()
                 for mod in module_path:
@@ -512,7 +512,7 @@ def connect_generics(module: AsModule):
                 module_path.append(ModGenPair(higher_mod, fgen))
                 # Next higher module
                 higher_mod = getattr(higher_mod, "parent", None)
-            LOG.debug("Processing module path: '%s'", str(module_path))
+            LOG.debug("Processing module path: '%s'", module_path)
             # Reorder modules: top to bottom
             module_path.reverse()
             # Create the template external Generic
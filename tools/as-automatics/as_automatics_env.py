@@ -53,7 +53,7 @@ from as_automatics_2d_pipeline import As2DWindowPipeline
 import as_automatics_builder as as_build
 import as_automatics_logging as as_log
 import as_automatics_templates as as_templates
-import as_automatics_visual as as_vis
+import as_automatics_graph_export as as_graph
 
 LOG = as_log.get_log()
 
@@ -63,12 +63,16 @@ class AsAutomatics:
     """! @brief Class bundling the main user-facing functionality of Automatics.
     Should be the only thing you need to import to use Automatics."""
 
-    def __init__(self, asterics_home: str, version_no: str):
+    def __init__(
+        self,
+        asterics_home: str,
+        version_no: str,
+        library: AsModuleLibrary = None,
+    ):
         self.asterics_home = append_to_path(
             os.path.realpath(asterics_home), "//"
         )
         self.version = version_no
-        self.library = AsModuleLibrary(asterics_home)
         self.current_chain = None
         self.windowpipes = []
 
@@ -78,9 +82,19 @@ class AsAutomatics:
 
         self.ipcore_name = "ASTERICS"
         self.ipcore_descr = "ASTERICS Image Processing Chain"
-
-        # Construct and assign interface templates
-        as_templates.add_templates()
+        ## Parallel out-of-context synthesis runs when packaging
+        ## (0: number of CPUs, None: only create the runs)
+        self.ooc_jobs = 0
+        ## Seconds after which Vivado packaging is aborted (None: no limit)
+        self.packaging_timeout = None
+
+        if library is None:
+            self.library = AsModuleLibrary(asterics_home)
+            # Construct and assign interface templates
+            as_templates.add_templates()
+        else:
+            # Share an already loaded module library (see AsSession)
+            self.library = library
 
     ##
     # @addtogroup automatics_mngmt
@@ -102,7 +116,20 @@ class AsAutomatics:
     def set_ipcore_description(self, description_text: str):
         self.ipcore_descr = description_text
 
-    def add_module_repository(self, module_dir: str, repo_name: str) -> list:
+    def set_ooc_jobs(self, jobs: int = 0):
+        self.ooc_jobs = jobs
+
+    def set_packaging_timeout(self, timeout: float = None):
+        self.packaging_timeout = timeout
+
+    def add_module_repository(
+        self,
+        module_dir: str,
+        repo_name: str,
+        module_callback=None,
+        jobs: int = None,
+        lazy: bool = None,
+    ) -> list:
         """! @brief Add a repository of ASTERICS modules.
         The module repository must be structured in the same way
         as the default module repository.
@@ -112,8 +139,27 @@ class AsAutomatics:
         module_dir: Path to the repository folder
             (where the individual module directories are stored)
         repo_name: Name that is internally used to refer to the repository.
+        module_callback: Optional function, called as
+            'module_callback(module_name, repo_name)' for each found module.
+        jobs: Number of processes analyzing the VHDL files in parallel
+            (0: number of CPUs, None: the library's 'discovery_jobs').
+        lazy: List the modules from the repository's manifest index and
+            load their templates on first use (None: 'lazy_loading').
         Returns a list of the names of the found modules."""
-        return self.library.add_module_repository(module_dir, repo_name)
+        return self.library.add_module_repository(
+            module_dir, repo_name, module_callback, jobs, lazy
+        )
+
+    def reset_build_state(self):
+        """! @brief Forget the current chain, window pipelines and errors.
+        Used to start a new build using an already loaded module library."""
+        self.current_chain = None
+        self.windowpipes = []
+        # Keep the fail-fast setting of the previous error manager
+        AsError.err_mgr = AsErrorManager(
+            AsError.err_mgr.fail_fast if AsError.err_mgr else None
+        )
+        AsProcessingChain.err_mgr = AsError.err_mgr
 
     ## @}
 
@@ -154,7 +200,11 @@ class AsAutomatics:
     SYSTEM_TEMPLATE_PATH = "support/sys_template/"
 
     def _write_hw(
-        self, path: str, use_symlinks: bool = True, allow_deletion: bool = False
+        self,
+        path: str,
+        use_symlinks: bool = True,
+        allow_deletion: bool = False,
+        jobs: int = 1,
     ):
         # Make sure path is good
         opath = self._check_and_get_output_path(path)
@@ -173,7 +223,7 @@ class AsAutomatics:
             raise AsFileError(opath, "Could not write to output folder!")
         # Generate and collect hardware files
         try:
-            self._gen_hw(opath, use_symlinks)
+            self._gen_hw(opath, use_symlinks, jobs)
         except IOError:
             LOG.error(
                 (
@@ -188,7 +238,7 @@ class AsAutomatics:
             return False
         return True
 
-    def _gen_hw(self, path: str, use_symlinks: bool = True):
+    def _gen_hw(self, path: str, use_symlinks: bool = True, jobs: int = 1):
         err_mgr = self.current_chain.err_mgr
         if err_mgr.has_errors():
             LOG.critical(
@@ -200,11 +250,12 @@ class AsAutomatics:
             )
         # Instantiate VHDL writer class
         writer = VHDLWriter(self.current_chain)
-        # Generate asterics.vhd
-        writer.write_module_group_vhd(path, self.current_chain.top)
-        # Generate additional files for generic module groups
-        for group in self.current_chain.module_groups:
-            writer.write_module_group_vhd(path, group)
+        # Generate asterics.vhd and the files for generic module groups
+        writer.write_module_group_files(
+            path,
+            [self.current_chain.top] + list(self.current_chain.module_groups),
+            jobs,
+        )
 
         # Collect the hardware and software source files
         as_build.gather_hw_files(self.current_chain, path, use_symlinks)
@@ -364,7 +415,13 @@ class AsAutomatics:
         # Run packaging
         LOG.info("Running packaging in '%s'.", path)
         try:
-            as_build.run_vivado_packaging(self.current_chain, path, add_c1)
+            as_build.run_vivado_packaging(
+                self.current_chain,
+                path,
+                add_c1,
+                self.ooc_jobs,
+                self.packaging_timeout,
+            )
         except (IOError, AsError) as err:
             LOG.error(str(err))
             return False
@@ -425,7 +482,17 @@ class AsAutomatics:
             display_name=self.ipcore_name,
             description=self.ipcore_descr,
         )
-        as_build.run_vivado_packaging(self.current_chain, ip_path, add_c1)
+        try:
+            as_build.run_vivado_packaging(
+                self.current_chain,
+                ip_path,
+                add_c1,
+                self.ooc_jobs,
+                self.packaging_timeout,
+            )
+        except (IOError, AsError) as err:
+            LOG.error(str(err))
+            return False
 
         # Add VEARS core
         if add_vears:
@@ -449,12 +516,14 @@ class AsAutomatics:
         show_ports: bool = False,
         show_unconnected: bool = False,
         show_line_buffers: bool = False,
-    ):
+        output_format: str = "svg",
+        collapse: str = "none",
+    ) -> bool:
         """! @brief Generate an SVG graph of the generated system.
         Generates and writes a graph representation of the ASTERICS chain
         and, if present, the 2D Window Pipelines using GraphViz Dot.
-        This is a wrapper for as_automatics_visual::system_graph() and should be
-        called via
+        This is a wrapper for as_automatics_graph_export::write_chain_graph()
+        and should be called via
         as_automatics_proc_chain::AsProcessingChain::write_system_graph().
         @param system: Chain or pipe object to visualize
                        (AsProcessingChain or As2DWindowPipeline).
@@ -465,34 +534,31 @@ class AsAutomatics:
         @param show_ports: Add all ports to the interface edges. [False]
         @param show_unconnected: Write a list of unconnected ports into the module
                                  nodes. WARNING: Many false positives! [False]
+        @param output_format: 'svg', 'dot' or 'json'. ['svg']
+        @param collapse: Collapse level for large systems:
+                         'none', 'layer', 'pipeline' or 'group'. ['none']
+        @return True if the graph was written.
         """
-        if not as_vis.graphviz_available:
-            LOG.critical(
-                (
-                    "Could not find python package 'graphviz' on your system!"
-                    " Cannot generate system graph!\nTry installing it "
-                    "using: 'pip install graphviz'"
-                )
-            )
-        elif system is None:
-            as_vis.system_graph(
-                self.current_chain,
-                out_file,
-                show_ports,
-                show_auto_inst,
-                show_unconnected,
-                show_toplevels,
-                show_line_buffers,
-            )
-        elif isinstance(system, AsProcessingChain):
-            as_vis.system_graph(
+        if system is None:
+            system = self.current_chain
+        if not isinstance(system, AsProcessingChain):
+            LOG.error("Can only draw graphs of processing chains!")
+            return False
+        try:
+            as_graph.write_chain_graph(
                 system,
                 out_file,
-                show_ports,
-                show_auto_inst,
-                show_unconnected,
-                show_toplevels,
-                show_line_buffers,
+                output_format,
+                show_ports=show_ports,
+                show_auto_inst=show_auto_inst,
+                show_unconnected=show_unconnected,
+                show_toplevels=show_toplevels,
+                show_line_buffers=show_line_buffers,
+                collapse=collapse,
             )
+        except (AsError, IOError, ValueError) as err:
+            LOG.critical("Cannot generate system graph! %s", str(err))
+            return False
+        return True
 
     ## @}
@@ -100,6 +100,8 @@ if __name__ == "__main__":
     # Init Automatics and load standard modules...
     print("Getting default modules from '{}'...".format(asterics_home))
     auto = AsAutomatics(asterics_home, Automatics_version)
+    # List the modules from the manifest indexes, load them on first use
+    auto.library.lazy_loading = True
     auto.add_module_repository(
         append_to_path(asterics_home, "modules"), "default"
     )
@@ -121,6 +123,7 @@ if __name__ == "__main__":
         print("")
         print("List of Automatics functions:")
         print("  list_modules(verbosity, repo)")
+        print("  search_modules(text, repo)")
         print("  module_detail(name, repo, verbose)")
         print("  scan_folder(path, repo)")
         print("  get_module(name, repo)")
@@ -139,6 +142,19 @@ if __name__ == "__main__":
         """
         auto.library.list_modules(verbosity, repo)
 
+    def search_modules(text: str, repo: str = ""):
+        """! @brief Print the modules matching 'text' in their name,
+        description, category or interfaces, without loading any modules.
+        Use parameter 'repo' to search only in a specific repository."""
+        for manifest in auto.library.search_modules(text, repo):
+            print(
+                "{} ({}): {}".format(
+                    manifest["entity"],
+                    manifest["repository"],
+                    manifest["brief_description"],
+                )
+            )
+
     def get_module(name: str, repo: str = ""):
         """! @brief Returns the module object for the module matching 'name',
         from the module library.
@@ -41,6 +41,9 @@ Module containing all error and exception classes used in as_automatics.
 # @brief Module containing all exception classes used in as_automatics.
 # -----------------------------------------------------------------------------
 
+import json
+import threading
+
 import as_automatics_logging as as_log
 
 LOG = as_log.get_log()
@@ -52,6 +55,15 @@ LOG = as_log.get_log()
 
 SEVERITIES = ("Error", "Warning", "Critical")
 SEVERITY_MAP = {2: "Warning", 1: "Error", 0: "Critical"}
+## Severity -> rank (lower is more severe)
+SEVERITY_RANK = {sev: rank for rank, sev in SEVERITY_MAP.items()}
+## Severity -> all severities at or above it
+SEVERITIES_AT_LEAST = {
+    sev: tuple(
+        other for other in SEVERITIES if SEVERITY_RANK[other] <= rank
+    )
+    for sev, rank in SEVERITY_RANK.items()
+}
 ERROR_TYPES = (
     "General",
     "Object",
@@ -63,16 +75,79 @@ ERROR_TYPES = (
 )
 
 
-class AsErrorManager:
-    """! @brief Class to collect, count and categorize all Automatics-specific errors."""
+def get_error_module_name(err) -> str:
+    """! @brief Return the name of the module an error concerns.
+    Uses the affected object's parent module for object errors and the
+    module name for module errors. Returns an empty string if unknown."""
+    if isinstance(err, AsModuleError):
+        return str(err.cause)
+    obj = getattr(err, "affected", None)
+    if obj is None:
+        obj = getattr(err, "from_object", None)
+    # Walk up to the first object that is an AsModule (has an entity name)
+    while obj is not None and not isinstance(obj, str):
+        if hasattr(obj, "entity_name"):
+            return obj.name
+        obj = getattr(obj, "parent", None)
+    return ""
 
-    def __init__(self):
+
+class AsErrorManager:
+    """! @brief Class to collect, count and categorize all Automatics-specific errors.
+    Errors are stored in insertion order and indexed by severity, error type,
+    error class (including base classes) and module name. Registering,
+    clearing and counting errors runs in constant time.
+    'fail_fast' may be set to a severity: The first error of at least this
+    severity is stored in 'fail_fast_error' and 'auto_connect' of the
+    processing chain stops at its next phase."""
+
+    def __init__(self, fail_fast: str = None):
+        # id(err) -> err; Dictionaries keep the order errors were added in
+        self.error_store = {}
         self.error_count = {}
-        self.error_severities = {}
-        self.errors = []
+        self.error_severities = {sev: 0 for sev in SEVERITIES}
+        # Class name -> {id(err): err}
+        self.errors_by_class = {}
+        # Module name -> {id(err): err}
+        self.errors_by_module = {}
+        self.fail_fast = None
+        self.fail_fast_error = None
+        if fail_fast:
+            self.set_fail_fast(fail_fast)
+
+    @property
+    def errors(self) -> list:
+        """! @brief List of all registered errors in order of occurrence."""
+        return list(self.error_store.values())
+
+    def set_fail_fast(self, severity: str = "Critical"):
+        """! @brief Set the error severity that aborts 'auto_connect' early.
+        @param severity: 'Critical', 'Error', 'Warning' or None to disable."""
+        if severity is not None and severity not in SEVERITIES:
+            raise ValueError("Invalid error severity '{}'".format(severity))
+        self.fail_fast = severity
+        self.fail_fast_error = None
+        if severity is not None:
+            # Errors registered before the threshold was set count as well
+            self.fail_fast_error = next(
+                (
+                    err
+                    for err in self.error_store.values()
+                    if err.severity in SEVERITIES_AT_LEAST[severity]
+                ),
+                None,
+            )
+
+    def fail_fast_triggered(self) -> bool:
+        """! @brief Returns whether an error reached the fail-fast threshold."""
+        return self.fail_fast_error is not None
 
     def register_error(self, err):
         """! @brief Called when a new error object is generated."""
+        err_id = id(err)
+        if err_id in self.error_store:
+            return
+        self.error_store[err_id] = err
         try:
             self.error_count[err.type] += 1
         except KeyError:
@@ -81,40 +156,48 @@ class AsErrorManager:
             self.error_severities[err.severity] += 1
         except KeyError:
             self.error_severities[err.severity] = 1
-        self.errors.append(err)
+        for cls in type(err).__mro__:
+            if cls is Exception:
+                break
+            self.errors_by_class.setdefault(cls.__name__, {})[err_id] = err
+        err.module_name = get_error_module_name(err)
+        if err.module_name:
+            self.errors_by_module.setdefault(err.module_name, {})[
+                err_id
+            ] = err
+        if (
+            self.fail_fast is not None
+            and self.fail_fast_error is None
+            and err.severity in SEVERITIES_AT_LEAST[self.fail_fast]
+        ):
+            self.fail_fast_error = err
 
     def clear_error(self, err):
-        try:
-            self.error_severities[err.severity] -= 1
-            self.error_count[err.type] -= 1
-            self.errors.remove(err)
-        except KeyError:
-            pass
-        except ValueError:
-            self.error_severities[err.severity] += 1
-            self.error_count[err.type] += 1
+        """! @brief Remove a handled error from the manager."""
+        err_id = id(err)
+        if self.error_store.pop(err_id, None) is None:
+            return
+        self.error_severities[err.severity] -= 1
+        self.error_count[err.type] -= 1
+        for cls in type(err).__mro__:
+            if cls is Exception:
+                break
+            self.errors_by_class[cls.__name__].pop(err_id, None)
+        if err.module_name:
+            self.errors_by_module[err.module_name].pop(err_id, None)
+        if err is self.fail_fast_error:
+            self.set_fail_fast(self.fail_fast)
 
     def has_errors(self, severity: str = "Error") -> bool:
         """! @brief Returns whether errors have been encountered.
         Use 'severity' to exclude errors below the passed severity."""
-        if not self.errors:
+        if not self.error_store:
             return False
-        if severity not in SEVERITIES:
+        try:
+            severities = SEVERITIES_AT_LEAST[severity]
+        except KeyError:
             raise ValueError("Invalid error severity '{}'".format(severity))
-        sev_id = next(
-            (
-                idx
-                for idx in sorted(SEVERITY_MAP.keys())
-                if SEVERITY_MAP[idx] == severity
-            )
-        )
-        for idx in range(sev_id, 0, -1):
-            try:
-                if self.error_severities[SEVERITY_MAP[idx]]:
-                    return True
-            except KeyError:
-                pass
-        return False
+        return any(self.error_severities[sev] for sev in severities)
 
     def has_specific_error(
         self, err_type: str = "", severity: str = ""
@@ -123,13 +206,7 @@ class AsErrorManager:
         Allows checking whether errors of a specific type and/or severity
         have occurred."""
         if err_type and severity:
-            return bool(
-                [
-                    err
-                    for err in self.errors
-                    if err.type == err_type and err.severity == severity
-                ]
-            )
+            return bool(self.get_errors(err_type, severity=severity))
         elif err_type:
             return True if self.get_error_count(err_type) > 0 else False
         elif severity:
@@ -137,7 +214,7 @@ class AsErrorManager:
                 True if self.get_error_severity_count(severity) > 0 else False
             )
         # Else ->
-        return bool(len(self.errors))
+        return bool(self.error_store)
 
     def get_error_count(self, err_type: str = "") -> int:
         if err_type:
@@ -153,30 +230,66 @@ class AsErrorManager:
                     )
                     return -1
         # Else ->
-        return len(self.errors)
+        return len(self.error_store)
 
     def get_error_severity_count(self, severity: str) -> int:
         try:
             return self.error_severities[severity]
         except KeyError:
-            if severity in SEVERITIES:
-                return 0
-            else:
-                LOG.error(
-                    ("Invalid error severity querying AsErrorManager!" " '%s'"),
-                    severity,
-                )
-                return -1
-
-    def get_errors(self, err_type: str = "") -> list:
-        if err_type:
-            return [err for err in self.errors if err.type == err_type]
-        # -> Else
-        return self.errors
+            LOG.error(
+                ("Invalid error severity querying AsErrorManager!" " '%s'"),
+                severity,
+            )
+            return -1
+
+    def get_error_class_count(self, error_class) -> int:
+        """! @brief Returns the number of errors of an error class.
+        @param error_class: Class or class name, e.g. 'AsConnectionError'.
+        Errors of derived classes are counted as well."""
+        if not isinstance(error_class, str):
+            error_class = error_class.__name__
+        return len(self.errors_by_class.get(error_class, ()))
+
+    def get_module_names(self) -> list:
+        """! @brief Returns the names of all modules with errors."""
+        return [name for name, errs in self.errors_by_module.items() if errs]
+
+    def get_errors(
+        self,
+        err_type: str = "",
+        severity: str = "",
+        module: str = "",
+        error_class=None,
+    ) -> list:
+        """! @brief Returns the errors matching all of the passed filters.
+        @param err_type: Error type, e.g. 'Connection'.
+        @param severity: Only errors of exactly this severity.
+        @param module: Name of the module the errors concern.
+        @param error_class: Error class or class name.
+                            Includes errors of derived classes."""
+        if module:
+            errors = self.errors_by_module.get(module, {}).values()
+        elif error_class is not None:
+            if not isinstance(error_class, str):
+                error_class = error_class.__name__
+            errors = self.errors_by_class.get(error_class, {}).values()
+        else:
+            errors = self.error_store.values()
+        if error_class is not None and module:
+            if not isinstance(error_class, str):
+                error_class = error_class.__name__
+            class_errors = self.errors_by_class.get(error_class, {})
+            errors = [err for err in errors if id(err) in class_errors]
+        return [
+            err
+            for err in errors
+            if (not err_type or err.type == err_type)
+            and (not severity or err.severity == severity)
+        ]
 
     def print_errors(self):
         count = 0
-        for err in self.errors:
+        for err in self.error_store.values():
             try:
                 getattr(err, "base_msg")
             except AttributeError:
@@ -184,6 +297,46 @@ class AsErrorManager:
             print("#{} [{}] - {}".format(count, err.severity, str(err)))
             count += 1
 
+    def to_dict(self) -> dict:
+        """! @brief Returns all errors and error counts as a dictionary.
+        Only contains strings and numbers, suitable for a JSON export."""
+        return {
+            "total": len(self.error_store),
+            "fail_fast": self.fail_fast,
+            "aborted_by": self.fail_fast_error.to_dict()
+            if self.fail_fast_error is not None
+            else None,
+            "severities": dict(self.error_severities),
+            "types": {
+                err_type: count
+                for err_type, count in self.error_count.items()
+                if count
+            },
+            "classes": {
+                name: len(errs)
+                for name, errs in self.errors_by_class.items()
+                if errs
+            },
+            "modules": {
+                name: len(errs)
+                for name, errs in self.errors_by_module.items()
+                if errs
+            },
+            "errors": [err.to_dict() for err in self.error_store.values()],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Export all errors to a JSON file at 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except OSError as err:
+            LOG.error(
+                "Could not write errors to '%s': %s", path, err.strerror
+            )
+            return False
+        return True
+
 
 # Base exceptions:
 
@@ -198,8 +351,25 @@ class AsError(Exception):
         super().__init__()
         self.type = err_type
         self.severity = severity
+        self.module_name = ""
+        # The manager this error is registered with
+        self.err_mgr = get_error_manager()
         self.err_mgr.register_error(self)
 
+    def to_dict(self) -> dict:
+        """! @brief Returns the attributes of this error as a dictionary."""
+        out = {
+            "class": type(self).__name__,
+            "type": self.type,
+            "severity": self.severity,
+            "module": self.module_name,
+        }
+        for attr in ("base_msg", "message", "detail", "cause", "affected"):
+            value = getattr(self, attr, None)
+            if value:
+                out[attr] = str(value)
+        return out
+
 
 class AsTextError(AsError):
     """! @brief Generic Automatics exception class with additional textual info.
@@ -214,10 +384,10 @@ class AsTextError(AsError):
         err_type: str = "General",
         severity: str = "Error",
     ):
-        super().__init__(err_type, severity)
         self.message = msg
         self.detail = detail
         self.cause = cause
+        super().__init__(err_type, severity)
         self.base_msg = "Error occurred!"
 
     def __str__(self):
@@ -240,10 +410,10 @@ class AsObjectError(AsError):
         err_type: str = "Object",
         severity: str = "Error",
     ):
-        super().__init__(err_type, severity)
         self.message = msg
         self.detail = detail
         self.affected = affected_obj
+        super().__init__(err_type, severity)
         self.base_msg = "Object error occurred"
 
     def __str__(self):
@@ -380,14 +550,50 @@ class AsNameError(AsTextError):
             label = "{} in {}".format(affected_name, str(from_object))
         else:
             label = affected_name
+        self.from_object = from_object
         super().__init__(
             label, msg, detail, err_type="InvalidName", severity=severity
         )
 
 
+
+class AsToolError(AsTextError):
+    """! @brief Automatics error class: AsToolError
+    Signifies a failed run of an external tool (e.g. Vivado packaging).
+    'message' and 'detail' contain details about the error.
+    'tool' stores the name of the tool or job that failed."""
+
+    def __init__(
+        self,
+        tool: str,
+        msg: str = "",
+        detail: str = "",
+        severity: str = "Error",
+    ):
+        super().__init__(tool, msg, detail, err_type="Tool", severity=severity)
+        self.base_msg = "External tool failed"
+
+
 if AsError.err_mgr is None:
     AsError.err_mgr = AsErrorManager()
 
+## Error managers set per thread (see 'set_thread_error_manager')
+_thread_state = threading.local()
+
+
+def get_error_manager() -> AsErrorManager:
+    """! @brief Return the error manager new errors are registered with.
+    This is the manager set for the current thread, if any,
+    else the global manager 'AsError.err_mgr'."""
+    return getattr(_thread_state, "err_mgr", None) or AsError.err_mgr
+
+
+def set_thread_error_manager(err_mgr: AsErrorManager):
+    """! @brief Register errors raised in the current thread with 'err_mgr'.
+    Used to keep the errors of processing chains built in parallel apart.
+    Pass None to use the global manager 'AsError.err_mgr' again."""
+    _thread_state.err_mgr = err_mgr
+
 
 def list_errors():
     AsError.err_mgr.print_errors()
@@ -0,0 +1,643 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_gen.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Headless batch generation of ASTERICS systems (asterics-gen):
+Runs a system script or builds a processing chain from a declarative JSON
+description, writes the requested output and reports the time and memory
+used by each phase. The exit status reflects the most severe error.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_gen.py
+# @ingroup automatics_generate
+# @author Philip Manke
+# @brief Command line tool for headless batch generation (asterics-gen).
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from hashlib import sha256
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: No memory statistics
+    resource = None
+
+##
+# @addtogroup automatics_generate
+# @{
+
+## Exit status: Success
+EXIT_OK = 0
+## Exit status: Errors of severity 'Error' or writing the output failed
+EXIT_ERROR = 1
+## Exit status: Invalid command line arguments
+EXIT_USAGE = 2
+## Exit status: Errors of severity 'Critical'
+EXIT_CRITICAL = 3
+## Exit status: The system script or description could not be run
+EXIT_INPUT = 4
+## Exit status: Only warnings, but '--strict' was passed
+EXIT_WARNING = 5
+
+## Output kinds of asterics-gen
+GEN_OUTPUT_KINDS = ("hw", "sw", "core", "ip", "system", "graph")
+## Output kinds written to a directory (can be skipped using the cache)
+CACHED_OUTPUT_KINDS = ("hw", "sw", "core", "ip", "system")
+## Name of the output cache file in a cache directory
+OUTPUT_CACHE_FILENAME = "outputs.json"
+
+
+def get_max_rss() -> tuple:
+    """! @brief Return the peak memory use in MiB of this process and of
+    its largest finished child process (e.g. parallel writers).
+    Returns (0.0, 0.0) if not supported by the platform."""
+    if resource is None:
+        return (0.0, 0.0)
+    # Linux reports KiB, macOS reports bytes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    )
+
+
+class GenProfile:
+    """! @brief Time and memory used by the phases of a generator run.
+    Wall clock time, CPU time of this process and of its child processes
+    and the peak memory use at the end of each phase are recorded."""
+
+    def __init__(self):
+        ## List of dictionaries, one per finished phase
+        self.phases = []
+        self._current = None
+
+    def start(self, phase: str):
+        """! @brief End the current phase and start the phase 'phase'."""
+        self.stop()
+        times = os.times()
+        self._current = (
+            phase,
+            time.perf_counter(),
+            times.user + times.system,
+            times.children_user + times.children_system,
+        )
+
+    def stop(self):
+        """! @brief End the current phase."""
+        if self._current is None:
+            return
+        phase, start, cpu, child_cpu = self._current
+        times = os.times()
+        rss, child_rss = get_max_rss()
+        self.phases.append(
+            {
+                "phase": phase,
+                "seconds": round(time.perf_counter() - start, 4),
+                "cpu_seconds": round(times.user + times.system - cpu, 4),
+                "child_cpu_seconds": round(
+                    times.children_user + times.children_system - child_cpu,
+                    4,
+                ),
+                "max_rss_mib": round(rss, 1),
+                "child_max_rss_mib": round(child_rss, 1),
+            }
+        )
+        self._current = None
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": self.phases,
+            "total_seconds": round(
+                sum(phase["seconds"] for phase in self.phases), 4
+            ),
+        }
+
+    def write_json(self, path: str) -> bool:
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            print(
+                "Could not write profile '{}': {}".format(path, err),
+                file=sys.stderr,
+            )
+            return False
+        return True
+
+    def __str__(self) -> str:
+        columns = (
+            ("phase", "phase"),
+            ("seconds", "wall [s]"),
+            ("cpu_seconds", "cpu [s]"),
+            ("child_cpu_seconds", "child cpu [s]"),
+            ("max_rss_mib", "max rss [MiB]"),
+        )
+        rows = [
+            [str(phase[key]) for key, _ in columns] for phase in self.phases
+        ]
+        rows.append(["total", str(self.to_dict()["total_seconds"])])
+        widths = [
+            max(
+                [len(title)]
+                + [len(row[idx]) for row in rows if len(row) > idx]
+            )
+            for idx, (_, title) in enumerate(columns)
+        ]
+        out = ["  ".join(t.rjust(w) for (_, t), w in zip(columns, widths))]
+        out.append("  ".join("-" * w for w in widths))
+        for row in rows:
+            out.append("  ".join(val.rjust(w) for val, w in zip(row, widths)))
+        return "\n".join(out)
+
+
+def read_build_description(path: str) -> dict:
+    """! @brief Read a declarative chain description from the JSON file 'path'.
+    Relative repository paths are resolved relative to the file."""
+    with open(path, "r") as file:
+        desc = json.load(file)
+    if not isinstance(desc, dict) or not desc.get("modules"):
+        raise ValueError("The description does not define any 'modules'")
+    base_dir = os.path.dirname(os.path.realpath(path))
+    desc["repositories"] = {
+        name: os.path.join(base_dir, repo_path)
+        for name, repo_path in desc.get("repositories", {}).items()
+    }
+    return desc
+
+
+def get_endpoint(chain, endpoint: str):
+    """! @brief Return the module, port or interface named 'endpoint'.
+    'endpoint' is a module name or '<module name>.<port or interface>'."""
+    mod_name, _, name = endpoint.partition(".")
+    module = chain.get_module(mod_name)
+    if module is None:
+        raise ValueError("Unknown module '{}'".format(mod_name))
+    if not name:
+        return module
+    obj = module.get_port(name, suppress_error=True)
+    if obj is None:
+        obj = module.get_interface(name, suppress_error=True)
+    if obj is None:
+        raise ValueError(
+            "Module '{}' has no port or interface '{}'".format(mod_name, name)
+        )
+    return obj
+
+
+def set_generics(module, generics: dict):
+    for gen_name, value in generics.items():
+        if not module.set_generic_value(gen_name, value):
+            raise ValueError(
+                "Could not set generic '{}' of module '{}' to '{}'".format(
+                    gen_name, module.name, value
+                )
+            )
+
+
+def build_chain_from_description(asterics, desc: dict):
+    """! @brief Build a processing chain from a declarative description.
+    The description is a dictionary (e.g. read from a JSON file):
+    'modules': List of {'entity', 'name', 'repository', 'generics',
+               'external'} (only 'entity' is required; 'external' lists
+               ports to make external),
+    'connections': List of [source, sink] endpoints, each a module name or
+               '<module name>.<port or interface name>',
+    'auto_instantiate': Add the modules the chain requires (e.g. AXI masters),
+    'generics': {<module name>: {<generic>: <value>}} set after
+               'auto_instantiate', e.g. for automatically added modules,
+    'repositories': {<repository name>: <path>} of additional modules,
+    'target': {'partname', 'design_name', 'board'} (see
+               'define_hardware_target'),
+    'ipcore': {'name', 'description'} (see 'set_ipcore_name').
+    @param asterics: The imported 'asterics' module.
+    @return The processing chain."""
+    for name, path in desc.get("repositories", {}).items():
+        if not asterics.add_module_repository(path, name):
+            raise ValueError(
+                "Could not add module repository '{}'".format(path)
+            )
+    if desc.get("target"):
+        asterics.define_hardware_target(**desc["target"])
+    if desc.get("ipcore"):
+        asterics.set_ipcore_name(**desc["ipcore"])
+    chain = asterics.new_chain()
+    for entry in desc["modules"]:
+        module = chain.add_module(
+            entry["entity"], entry.get("name", ""), entry.get("repository", "")
+        )
+        if module is None:
+            raise ValueError(
+                "Could not add module '{}'".format(entry["entity"])
+            )
+        set_generics(module, entry.get("generics", {}))
+        for port_name in entry.get("external", ()):
+            module.make_port_external(port_name)
+    for source, sink in desc.get("connections", ()):
+        chain.connect(get_endpoint(chain, source), get_endpoint(chain, sink))
+    if desc.get("auto_instantiate"):
+        chain.auto_instantiate()
+    for mod_name, generics in desc.get("generics", {}).items():
+        set_generics(get_endpoint(chain, mod_name), generics)
+    return chain
+
+
+def run_build_script(script: str, args: list) -> int:
+    """! @brief Run a system script as '__main__' with the arguments 'args'.
+    Exiting the script using 'sys.exit()' without a status is no error.
+    @return The exit status of the script (EXIT_INPUT on exceptions other
+            than Automatics errors)."""
+    import runpy
+    from as_automatics_exceptions import AsError
+
+    script = os.path.realpath(script)
+    sys.argv = [script] + list(args)
+    sys.path.insert(0, os.path.dirname(script))
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exit_exc:
+        if exit_exc.code is None or isinstance(exit_exc.code, int):
+            return exit_exc.code or EXIT_OK
+        print(exit_exc.code, file=sys.stderr)
+        return EXIT_INPUT
+    except AsError as err:
+        # Registered in the error manager, reported by the exit status
+        print("Automatics error: {}".format(err), file=sys.stderr)
+    except Exception:
+        traceback.print_exc()
+        return EXIT_INPUT
+    return EXIT_OK
+
+
+def get_output_stamp(chain, kind: str, options: dict) -> str:
+    """! @brief Return a hash of everything the output of 'chain' depends on:
+    The structure and settings of the connected chain, the output options
+    and the modification times of the module sources and of Automatics."""
+    from as_automatics_chain_diff import describe_chain
+    from as_automatics_helpers import get_file_mtimes
+    from as_automatics_watch import WATCHED_SUFFIXES
+
+    auto = chain.parent
+    hashgen = sha256()
+    data = {
+        "version": auto.version,
+        "kind": kind,
+        "options": options,
+        "target": [
+            auto.partname_hw,
+            auto.design_name,
+            auto.board_target,
+            auto.ipcore_name,
+            auto.ipcore_descr,
+        ],
+        "chain": describe_chain(chain),
+    }
+    hashgen.update(json.dumps(data, sort_keys=True, default=str).encode())
+    folders = {os.path.dirname(os.path.realpath(__file__))}
+    folders.update(
+        os.path.realpath(mod.module_dir)
+        for mod in chain.modules
+        if getattr(mod, "module_dir", "")
+    )
+    mtimes = get_file_mtimes(sorted(folders), WATCHED_SUFFIXES)
+    hashgen.update(json.dumps(sorted(mtimes.items())).encode())
+    return hashgen.hexdigest()
+
+
+def read_output_cache(cache_dir: str) -> dict:
+    try:
+        with open(os.path.join(cache_dir, OUTPUT_CACHE_FILENAME), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_output_cache(cache_dir: str, cache: dict):
+    path = os.path.join(cache_dir, OUTPUT_CACHE_FILENAME)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path + ".tmp", "w") as file:
+            json.dump(cache, file, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+    except OSError as err:
+        print(
+            "Could not write output cache '{}': {}".format(path, err),
+            file=sys.stderr,
+        )
+
+
+def write_output(chain, kind: str, output: str, args) -> bool:
+    """! @brief Write the output 'kind' of 'chain' to 'output'."""
+    symlinks = not args.no_symlinks
+    if kind == "hw":
+        return chain.write_hw(output, symlinks, args.force, args.jobs or 1)
+    if kind == "sw":
+        return chain.write_sw(output, symlinks, args.force)
+    if kind == "core":
+        return chain.write_asterics_core(output, symlinks, args.force)
+    if kind == "ip":
+        return chain.write_ip_core_xilinx(output, symlinks, args.force)
+    if kind == "system":
+        return chain.write_system(output, symlinks, args.force)
+    # The graph format is chosen by the file extension (default: SVG)
+    base, ext = os.path.splitext(output)
+    if ext in (".svg", ".dot", ".json"):
+        return chain.write_system_graph(base, output_format=ext[1:])
+    return chain.write_system_graph(output)
+
+
+def get_exit_code(err_mgr, strict: bool = False) -> int:
+    """! @brief Return the exit status for the errors in 'err_mgr'."""
+    if err_mgr.has_errors("Critical"):
+        return EXIT_CRITICAL
+    if err_mgr.has_errors("Error"):
+        return EXIT_ERROR
+    if strict and err_mgr.has_errors("Warning"):
+        return EXIT_WARNING
+    return EXIT_OK
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="asterics-gen",
+        description=(
+            "Generate an ASTERICS system from a system script or a JSON "
+            "chain description, without a GUI or interactive session."
+        ),
+        epilog=(
+            "Exit status: 0 success, 1 errors, 2 invalid arguments, "
+            "3 critical errors, 4 the script or description failed, "
+            "5 warnings (with --strict). "
+            "Example: asterics-gen script.py -k core -o out -- --script-option"
+        ),
+    )
+    parser.add_argument(
+        "input",
+        help="System script (.py) or declarative chain description (.json).",
+    )
+    parser.add_argument(
+        "args",
+        nargs="*",
+        help=(
+            "Arguments passed to the system script. Arguments starting "
+            "with '-' follow a '--' separator."
+        ),
+    )
+    parser.add_argument(
+        "-k",
+        "--kind",
+        choices=GEN_OUTPUT_KINDS,
+        help=(
+            "Output to write from the chain. Optional for system scripts "
+            "writing their own output."
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "Output directory. For 'graph': Output file, the extension "
+            "selects the format (.svg, .dot or .json)."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help=(
+            "Parallel processes analyzing the module library, writing "
+            "hardware files and running out-of-context synthesis "
+            "(0: number of CPUs)."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time and memory used by each phase.",
+    )
+    parser.add_argument(
+        "--profile-json", metavar="FILE", help="Write the profile to FILE."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help=(
+            "Cache module library analysis results and output stamps in DIR. "
+            "Unchanged outputs are not written again."
+        ),
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Write the output even if the output cache is up to date.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Delete the contents of the output directory first.",
+    )
+    parser.add_argument(
+        "--no-symlinks",
+        action="store_true",
+        help="Copy module source files instead of linking them.",
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="Fail on warnings."
+    )
+    parser.add_argument(
+        "--errors-json", metavar="FILE", help="Write all errors to FILE."
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-q", "--quiet", action="store_true", help="Only show critical errors."
+    )
+    verbosity.add_argument(
+        "-v", "--verbose", action="store_true", help="Show info messages."
+    )
+    verbosity.add_argument(
+        "--silent",
+        action="store_true",
+        help="Don't write a log file, only show errors.",
+    )
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """! @brief Command line interface of asterics-gen."""
+    parser = get_parser()
+    # Options may follow the input: Script arguments are the remaining
+    # positional arguments and everything after '--'
+    args = parser.parse_intermixed_args(argv)
+    is_description = args.input.endswith(".json")
+    if is_description and args.args:
+        parser.error(
+            "unrecognized arguments for a chain description: {}".format(
+                " ".join(args.args)
+            )
+        )
+    if args.kind and not args.output:
+        parser.error("--kind requires --output")
+    if is_description and not args.kind:
+        parser.error("chain descriptions require --kind and --output")
+    if args.jobs is not None and args.jobs < 0:
+        parser.error("--jobs must be 0 or larger")
+    if not os.path.isfile(args.input):
+        print("Input '{}' not found!".format(args.input), file=sys.stderr)
+        return EXIT_INPUT
+
+    profile = GenProfile()
+    profile.start("startup")
+    import asterics
+    from as_automatics_exceptions import AsError
+    from as_automatics_helpers import append_to_path
+
+    if args.silent:
+        asterics.silent()
+    elif args.quiet:
+        asterics.quiet()
+    elif args.verbose:
+        asterics.verbose()
+
+    profile.start("library")
+    if args.cache_dir:
+        asterics.set_cache_dir(args.cache_dir)
+    if args.jobs is not None:
+        asterics.set_discovery_jobs(args.jobs)
+        asterics.set_ooc_synthesis_jobs(args.jobs)
+    try:
+        if asterics.Auto.library.get_repo("default") is None:
+            asterics.Auto.add_module_repository(
+                append_to_path(asterics.asterics_home, "modules"), "default"
+            )
+    except AsError as err:
+        print(
+            "Could not load the module library: {}".format(err),
+            file=sys.stderr,
+        )
+        return EXIT_CRITICAL
+
+    profile.start("build")
+    exit_code = EXIT_OK
+    if is_description:
+        try:
+            desc = read_build_description(args.input)
+            build_chain_from_description(asterics, desc)
+        except AsError as err:
+            print("Automatics error: {}".format(err), file=sys.stderr)
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            print(
+                "Invalid chain description '{}': {}".format(args.input, err),
+                file=sys.stderr,
+            )
+            exit_code = EXIT_INPUT
+    else:
+        exit_code = run_build_script(args.input, args.args)
+    err_mgr = AsError.err_mgr
+    chain = asterics.Auto.current_chain
+
+    if exit_code == EXIT_OK and args.kind and not err_mgr.has_errors():
+        if chain is None:
+            print(
+                "The script did not create a processing chain!",
+                file=sys.stderr,
+            )
+            exit_code = EXIT_INPUT
+        elif not chain.auto_connect_run:
+            profile.start("connect")
+            try:
+                chain.auto_connect()
+            except AsError:
+                pass
+
+    if exit_code == EXIT_OK and args.kind and not err_mgr.has_errors():
+        profile.start("write")
+        output = os.path.realpath(args.output)
+        stamp = None
+        cache = {}
+        if args.cache_dir and args.kind in CACHED_OUTPUT_KINDS:
+            options = {"symlinks": not args.no_symlinks}
+            stamp = get_output_stamp(chain, args.kind, options)
+            cache = read_output_cache(args.cache_dir)
+        if (
+            stamp is not None
+            and not args.rebuild
+            and not args.force
+            and os.path.isdir(output)
+            and cache.get(output) == {"kind": args.kind, "stamp": stamp}
+        ):
+            print("Output '{}' is up to date.".format(args.output))
+        else:
+            try:
+                success = write_output(chain, args.kind, args.output, args)
+            except (AsError, OSError) as err:
+                print("Could not write output: {}".format(err), file=sys.stderr)
+                success = False
+            if not success:
+                exit_code = EXIT_ERROR
+            elif stamp is not None:
+                cache[output] = {"kind": args.kind, "stamp": stamp}
+                write_output_cache(args.cache_dir, cache)
+    profile.stop()
+
+    severity_code = get_exit_code(err_mgr, args.strict)
+    if exit_code == EXIT_OK or severity_code == EXIT_CRITICAL:
+        exit_code = severity_code or exit_code
+    if err_mgr.errors and not args.silent:
+        print(
+            "Finished with {} critical error(s), {} error(s), {} warning(s)."
+            .format(
+                err_mgr.get_error_severity_count("Critical"),
+                err_mgr.get_error_severity_count("Error"),
+                err_mgr.get_error_severity_count("Warning"),
+            ),
+            file=sys.stderr,
+        )
+    if args.errors_json:
+        err_mgr.write_json(args.errors_json)
+    if args.profile:
+        print(profile)
+    if args.profile_json:
+        profile.write_json(args.profile_json)
+    return exit_code
+
+
+## @}
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -42,9 +42,15 @@ Implements the class 'Generic' for as_automatics.
 # -----------------------------------------------------------------------------
 
 from inspect import isfunction
+from as_automatics_helpers import intern_name
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
+
+
+def accept_any_value(value) -> bool:
+    """! @brief Default value check function of Generics: Accepts all values."""
+    return True
 
 
 ## @ingroup automatics_intrep
@@ -55,6 +61,19 @@ class Generic:
     Additionally, some meta information for as_automatics and data
     relevant only while building the processing chain is stored."""
 
+    __slots__ = (
+        "value_check_function",
+        "comment",
+        "name",
+        "default_value",
+        "code_name",
+        "data_type",
+        "value",
+        "to_external",
+        "link_to",
+        "parent",
+    )
+
     generic_types = "interface", "module"
 
     def __init__(
@@ -68,13 +87,13 @@ class Generic:
         comment: str = "",
     ):
 
-        self.value_check_function = lambda value: True
+        self.value_check_function = accept_any_value
         self.comment = comment
 
-        self.name = name
+        self.name = intern_name(name)
         self.default_value = default_value
-        self.code_name = code_name
-        self.data_type = data_type
+        self.code_name = intern_name(code_name)
+        self.data_type = intern_name(data_type)
         self.value = default_value
         self.to_external = to_external
 
@@ -0,0 +1,620 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_graph_export.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Export the graph of a connected processing chain as DOT, JSON or SVG.
+The graph is streamed to the output file while walking the chain.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_graph_export.py
+# @ingroup automatics_generate
+# @author Philip Manke
+# @brief Streaming DOT/JSON/SVG export of processing chain graphs.
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+from collections import namedtuple
+
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_cnn_layer import AsNNLayer
+from as_automatics_module_group import AsModuleGroup
+from as_automatics_interface import Interface
+from as_automatics_port import Port
+from as_automatics_signal import GenericSignal
+from as_automatics_connection_helper import get_parent_module
+from as_automatics_exceptions import AsFileError
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log("writer")
+
+##
+# @addtogroup automatics_generate
+# @{
+
+## Output formats of 'write_chain_graph'
+GRAPH_FORMATS = ("svg", "dot", "json")
+## Collapse levels, from most to least detailed:
+# none: Show all modules, 2D window pipelines as clusters.
+# layer: Show each CNN layer as a single node.
+# pipeline: Show each 2D window pipeline (including CNN layers) as a node.
+# group: Show each module group below 'as_main' as a single node.
+GRAPH_COLLAPSE_LEVELS = ("none", "layer", "pipeline", "group")
+
+GraphNode = namedtuple("GraphNode", ("name", "label", "attrs", "cluster"))
+GraphEdge = namedtuple("GraphEdge", ("tail", "head", "label", "kind"))
+## Kinds of edges: Connections of interfaces and of single ports
+EDGE_KINDS = ("interface", "port")
+GraphCluster = namedtuple("GraphCluster", ("name", "label", "attrs"))
+
+NODE_FORM = {"style": "filled", "fillcolor": "white"}
+EXTERNAL_FORM = {"shape": "diamond", "style": "bold"}
+PIPE_MODULE_FORM = {
+    "style": "filled, bold",
+    "color": "blue",
+    "fillcolor": "white",
+}
+BUFFER_FORM = {"shape": "box", "style": "filled", "fillcolor": "white"}
+COLLAPSED_FORM = {
+    "shape": "box3d",
+    "style": "filled",
+    "fillcolor": "lightgrey",
+}
+CLUSTER_FORM = {"style": "filled, rounded", "fillcolor": "lightgrey"}
+EXT_IN_NAME = "External Inputs"
+EXT_OUT_NAME = "External Outputs"
+
+
+class ChainGraph:
+    """! @brief Walks a connected processing chain, generating graph elements.
+    Nodes and edges are generated in one pass over the modules, interfaces
+    and pipelines of the chain (linear in the size of the chain).
+    The options are those of AsProcessingChain.write_system_graph()."""
+
+    def __init__(
+        self,
+        chain,
+        show_ports: bool = False,
+        show_auto_inst: bool = False,
+        show_unconnected: bool = False,
+        show_toplevels: bool = False,
+        show_line_buffers: bool = False,
+        collapse: str = "none",
+    ):
+        if collapse not in GRAPH_COLLAPSE_LEVELS:
+            raise ValueError(
+                "Invalid collapse level '{}'! Valid: {}".format(
+                    collapse, GRAPH_COLLAPSE_LEVELS
+                )
+            )
+        self.chain = chain
+        self.show_ports = show_ports
+        self.show_auto_inst = show_auto_inst
+        self.show_unconnected = show_unconnected
+        self.show_toplevels = show_toplevels
+        self.show_line_buffers = show_line_buffers
+        self.collapse = collapse
+        self.auto_instantiated = set(map(id, chain.auto_instantiated))
+        # Node names and the cluster they are part of (None: no cluster)
+        self.node_clusters = {}
+        # Names of the nodes representing collapsed groups
+        self.collapsed_names = set()
+
+    ## @ingroup automatics_generate
+    def is_collapsed(self, group) -> bool:
+        """! @brief Return True if 'group' is shown as a single node."""
+        if self.collapse == "none" or group is None:
+            return False
+        if group is self.chain.as_main or group is self.chain.top:
+            return False
+        if self.collapse == "layer":
+            return isinstance(group, AsNNLayer)
+        if self.collapse == "pipeline":
+            return isinstance(group, As2DWindowPipeline)
+        return isinstance(group, AsModuleGroup)
+
+    def get_node_module(self, module):
+        """! @brief Return the module or group representing 'module'."""
+        collapsed = module
+        parent = module.parent
+        while parent is not None:
+            if self.is_collapsed(parent):
+                collapsed = parent
+            parent = parent.parent
+        return collapsed
+
+    def clusters(self):
+        """! @brief Generate the clusters (expanded 2D window pipelines)."""
+        for pipe in self.chain.pipelines:
+            if self.get_node_module(pipe) is pipe and not self.is_collapsed(
+                pipe
+            ):
+                attrs = dict(CLUSTER_FORM)
+                attrs["label"] = "2D Window Pipeline: {}".format(pipe.name)
+                yield GraphCluster("cluster_" + pipe.name, attrs["label"], attrs)
+
+    def nodes(self):
+        """! @brief Generate all nodes of the graph."""
+        chain = self.chain
+        if self.show_toplevels:
+            directions = {
+                inter.direction
+                for inter in chain.top.interfaces
+                if inter.to_external
+            }
+            if "in" in directions:
+                yield self.__add_node__(
+                    EXT_IN_NAME, EXT_IN_NAME, EXTERNAL_FORM
+                )
+            if directions - {"in"}:
+                yield self.__add_node__(
+                    EXT_OUT_NAME, EXT_OUT_NAME, EXTERNAL_FORM
+                )
+        collapsed_added = set()
+        for module in self.__chain_modules__():
+            node_mod = self.get_node_module(module)
+            if node_mod is not module:
+                if id(node_mod) not in collapsed_added:
+                    collapsed_added.add(id(node_mod))
+                    yield self.__collapsed_node__(node_mod)
+                continue
+            # If auto-instantiated modules should be shown, add all modules
+            if id(module) in self.auto_instantiated and not self.show_auto_inst:
+                continue
+            if not self.show_toplevels and module in (chain.top, chain.as_main):
+                continue
+            label = module.name
+            # If unconnected ports should be shown:
+            # All ports of toplevel are unconnected; don't print
+            if self.show_unconnected and module is not chain.top:
+                uncon = [
+                    port.code_name for port in module.get_unconnected_ports()
+                ]
+                if uncon:
+                    label += "\n\nUnconnected ports:\n" + "\n".join(uncon)
+            yield self.__add_node__(module.name, label, NODE_FORM)
+
+        for pipe in chain.pipelines:
+            node_mod = self.get_node_module(pipe)
+            if node_mod is not pipe or self.is_collapsed(pipe):
+                if id(node_mod) not in collapsed_added:
+                    collapsed_added.add(id(node_mod))
+                    yield self.__collapsed_node__(node_mod)
+                continue
+            cluster = "cluster_" + pipe.name
+            # Exclude flushing module and buffer modules
+            skip = {id(pipe.pipe_manager)}
+            for buff in pipe.buffer_rows:
+                skip.add(id(buff.module))
+                if self.show_line_buffers:
+                    label = "Module '{}'\ndelay: {}\nlength: {}".format(
+                        buff.name, buff.input_delay, buff.length
+                    )
+                    yield self.__add_node__(
+                        buff.name, label, BUFFER_FORM, cluster
+                    )
+            for mod in pipe.modules:
+                if id(mod) in skip:
+                    continue
+                label = "Module '{}'\nOutput delay: {}".format(
+                    mod.name, mod.delay
+                )
+                yield self.__add_node__(
+                    mod.name, label, PIPE_MODULE_FORM, cluster
+                )
+
+    def edges(self):
+        """! @brief Generate all edges of the graph.
+        Edges are only generated between nodes generated by 'nodes()',
+        which must run first. Edges between the same two collapsed nodes
+        are merged into one edge, listing the first edge of each kind
+        (interface, port) and the number of further edges of that kind."""
+        merged = {}
+        for edge in self.__all_edges__():
+            tail = edge.tail
+            head = edge.head
+            if tail not in self.node_clusters or head not in self.node_clusters:
+                continue
+            if tail in self.collapsed_names or head in self.collapsed_names:
+                if tail == head:
+                    # Connections within a collapsed group
+                    continue
+                kinds = merged.setdefault((tail, head), {})
+                if edge.kind in kinds:
+                    kinds[edge.kind][1] += 1
+                else:
+                    kinds[edge.kind] = [edge.label, 1]
+                continue
+            yield edge
+        for (tail, head), kinds in merged.items():
+            labels = []
+            for kind in EDGE_KINDS:
+                if kind not in kinds:
+                    continue
+                label, count = kinds[kind]
+                if count > 1:
+                    label = "{}\n(+{} more {}s)".format(label, count - 1, kind)
+                labels.append(label)
+            kind = "interface" if "interface" in kinds else "port"
+            yield GraphEdge(tail, head, "\n\n".join(labels), kind)
+
+    def __add_node__(self, name, label, attrs, cluster=None) -> GraphNode:
+        self.node_clusters[name] = cluster
+        return GraphNode(name, label, attrs, cluster)
+
+    def __collapsed_node__(self, group) -> GraphNode:
+        if isinstance(group, AsNNLayer):
+            kind = "CNN Layer"
+        elif isinstance(group, As2DWindowPipeline):
+            kind = "2D Window Pipeline"
+        else:
+            kind = "Module Group"
+        label = "{}: {}\n{} modules".format(kind, group.name, len(group.modules))
+        self.collapsed_names.add(group.name)
+        return self.__add_node__(group.name, label, COLLAPSED_FORM)
+
+    def __chain_modules__(self):
+        chain = self.chain
+        for mod in chain.modules:
+            if not isinstance(mod.parent, As2DWindowPipeline):
+                yield mod
+        yield chain.as_main
+        yield chain.top
+
+    def __node_name__(self, module) -> str:
+        return self.get_node_module(module).name
+
+    def __all_edges__(self):
+        chain = self.chain
+        # For each interface from A to B, a connection from B to A exists.
+        # If we already added A to B or B to A, we skip the connection in the
+        # reverse direction.
+        skip_inters = set()
+        for module in self.__chain_modules__():
+            for inter in module.interfaces:
+                if id(inter) in skip_inters and module is not chain.top:
+                    continue
+                edge = self.__interface_edge__(inter, skip_inters)
+                if edge is not None:
+                    yield edge
+        for pipe in chain.pipelines:
+            yield from self.__pipeline_edges__(pipe)
+
+    def __interface_label__(self, inter) -> str:
+        label = "{}\n{}".format(inter.name, inter.type)
+        # Add a port list to the interface label
+        if self.show_ports:
+            label += ":\n" + "\n".join(port.code_name for port in inter.ports)
+        return label
+
+    def __interface_edge__(self, inter, skip_inters: set) -> GraphEdge:
+        chain = self.chain
+        # For interfaces from or to external (on toplevel)
+        if self.show_toplevels and inter.to_external and inter.parent is chain.top:
+            label = self.__interface_label__(inter)
+            if inter.direction == "in":
+                return GraphEdge(
+                    EXT_IN_NAME, inter.parent.name, label, "interface"
+                )
+            return GraphEdge(
+                inter.parent.name, EXT_OUT_NAME, label, "interface"
+            )
+
+        target = get_interface_target(inter)
+        # No connection? Skip this interface
+        if target is None:
+            return None
+        tail_module = inter.parent
+        # Get the interface of the target port and its parent module
+        head_inter = target.parent
+        head_module = head_inter.parent
+        tail = self.__node_name__(tail_module)
+        if not self.show_auto_inst:
+            # If the tail module was auto-instantiated to the toplevel,
+            # substitute tail with as_main
+            if (head_module is chain.top) and (
+                id(tail_module) in self.auto_instantiated
+            ):
+                tail = chain.as_main.name
+            # Same treatment the other way around
+            elif (tail_module is chain.top) and (
+                id(head_module) in self.auto_instantiated
+            ):
+                head_module = chain.as_main
+        head = self.__node_name__(head_module)
+
+        # Since the edge covers the target interface, skip it later
+        if not head_inter.to_external:
+            skip_inters.add(id(head_inter))
+        label = self.__interface_label__(inter)
+        # Interface direction infers edge (arrow) direction
+        if inter.direction == "in":
+            return GraphEdge(head, tail, label, "interface")
+        return GraphEdge(tail, head, label, "interface")
+
+    def __pipeline_edges__(self, pipe):
+        expanded = not self.is_collapsed(pipe) and (
+            self.get_node_module(pipe) is pipe
+        )
+        if expanded:
+            cluster = "cluster_" + pipe.name
+            for mod in pipe.modules:
+                if self.node_clusters.get(mod.name, 0) != cluster:
+                    continue
+                for port in mod.get_full_port_list():
+                    if port.get_direction_normalized() == "in":
+                        continue
+                    for target in port.outgoing:
+                        if target.code_name == "pipeline_stream_in":
+                            continue
+                        for target_mod in get_target_modules(target):
+                            if target_mod is pipe:
+                                continue
+                            # Only edges within the pipeline
+                            if (
+                                self.node_clusters.get(target_mod.name, 0)
+                                != cluster
+                            ):
+                                continue
+                            yield GraphEdge(
+                                mod.name,
+                                target_mod.name,
+                                port.code_name + " ->\n" + target.code_name,
+                                "port",
+                            )
+        for in_stream in pipe.input_streams:
+            tail = self.__node_name__(get_parent_module(in_stream.stream))
+            if isinstance(in_stream.stream, Interface):
+                label = "{} ->\n{}\n({})".format(
+                    in_stream.stream.name,
+                    in_stream.target.name,
+                    in_stream.stream.type,
+                )
+                kind = "interface"
+            else:
+                label = in_stream.stream.code_name
+                kind = "port"
+            for target in in_stream.signal.outgoing:
+                if isinstance(target, GenericSignal):
+                    continue
+                yield GraphEdge(
+                    tail,
+                    self.__node_name__(get_parent_module(target)),
+                    label,
+                    kind,
+                )
+        for out_stream in pipe.output_streams:
+            label = "{} ->\n{}\n({})".format(
+                out_stream.source.name,
+                out_stream.stream.name,
+                out_stream.stream.type,
+            )
+            yield GraphEdge(
+                self.__node_name__(get_parent_module(out_stream.source)),
+                self.__node_name__(out_stream.target_stream.parent),
+                label,
+                "interface",
+            )
+
+
+def get_port_target(port):
+    """! @brief Return the port or signal 'port' is connected to (or None).
+    Signals and mock glue signals (constant values) are not targets."""
+    if port.get_direction_normalized() == "in":
+        target = port.incoming
+    else:
+        target = port.outgoing[0] if port.outgoing else None
+    if target is None or target.parent is None:
+        return None
+    if "signal" in target.port_type:
+        return None
+    return target
+
+
+def get_interface_target(inter):
+    """! @brief Return a port connected to one of the ports of 'inter'.
+    Single port targets are only used for the last port of the interface."""
+    last = len(inter.ports) - 1
+    for idx, port in enumerate(inter.ports):
+        target = get_port_target(port)
+        if target is None:
+            continue
+        # Skip single port targets
+        if (
+            0 < idx < last
+            and isinstance(target, Port)
+            and target.port_type == "single"
+        ):
+            continue
+        return target
+    return None
+
+
+def get_target_modules(target) -> list:
+    """! @brief Return the modules reached from 'target' through signals."""
+    modules = []
+    seen = set()
+    stack = [target]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, GenericSignal):
+            stack.extend(reversed(current.outgoing))
+        else:
+            mod = get_parent_module(current)
+            if id(mod) not in seen:
+                seen.add(id(mod))
+                modules.append(mod)
+    return modules
+
+
+## @ingroup automatics_generate
+def dot_quote(text) -> str:
+    """! @brief Return 'text' as a quoted DOT string."""
+    return '"{}"'.format(
+        str(text)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _dot_attrs(attrs: dict) -> str:
+    return ", ".join(
+        "{}={}".format(key, dot_quote(value)) for key, value in attrs.items()
+    )
+
+
+def write_dot(graph: ChainGraph, file):
+    """! @brief Stream 'graph' in the DOT format to the text file 'file'."""
+    file.write("digraph {} {{\n".format(dot_quote("AsModule Graph")))
+    clusters = {}
+    for node in graph.nodes():
+        if node.cluster is None:
+            file.write(
+                "\t{} [{}]\n".format(
+                    dot_quote(node.name),
+                    _dot_attrs(dict(node.attrs, label=node.label)),
+                )
+            )
+        else:
+            clusters.setdefault(node.cluster, []).append(node)
+    for cluster in graph.clusters():
+        file.write("\tsubgraph {} {{\n".format(dot_quote(cluster.name)))
+        for key, value in cluster.attrs.items():
+            file.write("\t\t{}={}\n".format(key, dot_quote(value)))
+        for node in clusters.get(cluster.name, ()):
+            file.write(
+                "\t\t{} [{}]\n".format(
+                    dot_quote(node.name),
+                    _dot_attrs(dict(node.attrs, label=node.label)),
+                )
+            )
+        file.write("\t}\n")
+    for edge in graph.edges():
+        file.write(
+            "\t{} -> {} [label={}]\n".format(
+                dot_quote(edge.tail), dot_quote(edge.head), dot_quote(edge.label)
+            )
+        )
+    file.write("}\n")
+
+
+def write_json(graph: ChainGraph, file):
+    """! @brief Stream 'graph' as a JSON node and edge list to 'file'.
+    Format: {"clusters": [{"name", "label"}, ...],
+             "nodes": [{"name", "label", "cluster"}, ...],
+             "edges": [{"tail", "head", "label"}, ...]}"""
+    file.write('{"clusters": [')
+    sep = "\n"
+    for cluster in graph.clusters():
+        file.write(sep)
+        json.dump({"name": cluster.name, "label": cluster.label}, file)
+        sep = ",\n"
+    file.write('],\n"nodes": [')
+    sep = "\n"
+    for node in graph.nodes():
+        file.write(sep)
+        json.dump(
+            {"name": node.name, "label": node.label, "cluster": node.cluster},
+            file,
+        )
+        sep = ",\n"
+    file.write('],\n"edges": [')
+    sep = "\n"
+    for edge in graph.edges():
+        file.write(sep)
+        json.dump(
+            {"tail": edge.tail, "head": edge.head, "label": edge.label}, file
+        )
+        sep = ",\n"
+    file.write("]}\n")
+
+
+def write_chain_graph(
+    chain, out_file: str, output_format: str = "svg", **options
+) -> str:
+    """! @brief Write the graph of the connected processing chain 'chain'.
+    @param out_file: Output file name. The format's file extension is added
+                     ('.svg', '.dot' or '.json').
+    @param output_format: One of GRAPH_FORMATS. SVG output uses the DOT
+                          output and requires the Graphviz 'dot' program.
+    @param options: Options of ChainGraph (show_ports, collapse, ...).
+    @return The path of the written file."""
+    if output_format not in GRAPH_FORMATS:
+        raise ValueError(
+            "Invalid graph format '{}'! Valid: {}".format(
+                output_format, GRAPH_FORMATS
+            )
+        )
+    graph = ChainGraph(chain, **options)
+    path = "{}.{}".format(out_file, output_format)
+    if output_format == "json":
+        with open(path, "w") as file:
+            write_json(graph, file)
+    elif output_format == "dot":
+        with open(path, "w") as file:
+            write_dot(graph, file)
+    else:
+        dot = shutil.which("dot")
+        if dot is None:
+            raise AsFileError(
+                path,
+                "Graphviz 'dot' program not found",
+                "Install Graphviz or use the 'dot' or 'json' output format.",
+            )
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".dot", delete=False
+        ) as file:
+            write_dot(graph, file)
+        try:
+            result = subprocess.run(
+                [dot, "-Tsvg", "-o", path, file.name],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+            )
+        finally:
+            os.remove(file.name)
+        if result.returncode != 0:
+            raise AsFileError(path, "Graphviz 'dot' failed", result.stderr)
+    LOG.info("Wrote system graph to '%s'.", path)
+    return path
+
+
+## @}
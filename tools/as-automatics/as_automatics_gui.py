@@ -484,15 +484,13 @@ if __name__ == "__main__":
             super().close()
 
         def add_module(self, modname: str, reponame: str = ""):
-            mod = self.auto.library.get_module_template(modname, reponame)
+            mod = self.auto.library.get_module_manifest(modname, reponame)
             y = self.modlist.rowCount()
             self.modlist.insertRow(y)
             tablerow = [
-                mod.entity_name,
-                "AsWindowModule"
-                if isinstance(mod, AsWindowModule)
-                else "AsModule",
-                mod.repository_name,
+                mod["entity"],
+                "AsWindowModule" if mod["window_module"] else "AsModule",
+                mod["repository"],
             ]
 
             for x in range(3):
@@ -718,6 +716,7 @@ if __name__ == "__main__":
         app = qtw.QApplication([])
         app.setApplicationName("Automatics Module Explorer (Legacy)")
         auto = AsAutomatics(asterics_path, Automatics_version)
+        auto.library.lazy_loading = True
         auto.add_module_repository(asterics_path + "/modules", "default")
         gui = GUI(auto)
         gui.build_modlist()
@@ -42,6 +42,8 @@ Implements some helper functions used throughout as_automatics.
 # -----------------------------------------------------------------------------
 
 import os
+import sys
+import select
 
 from typing import Sequence
 
@@ -74,6 +76,15 @@ def get_foreach(iterable, func) -> list:
     return list(map(func, iterable))
 
 
+def intern_name(name):
+    """! @brief Return the interned version of the string 'name'.
+    Names of ports and generics repeat across all modules and copies.
+    Values that aren't strings are returned as is."""
+    if type(name) is str:
+        return sys.intern(name)
+    return name
+
+
 ## @ingroup automatics_analyze
 def get_prefix_suffix(
     port_name: str, code_name: str, ignored_keywords: Sequence[str]
@@ -162,7 +173,7 @@ def eval_vhdl_expr(to_eval: str, string_origin: str, variable_dict: dict = {}):
             ("Couldn't parse %s for input '%s'. Got " "TypeError: '%s'"),
             string_origin,
             to_eval,
-            str(err),
+            err,
         )
         return to_eval
     except SyntaxError as err:
@@ -170,7 +181,7 @@ def eval_vhdl_expr(to_eval: str, string_origin: str, variable_dict: dict = {}):
             ("Couldn't parse %s for input '%s'. Got " "SyntaxError: '%s'"),
             string_origin,
             to_eval,
-            str(err),
+            err,
         )
         return to_eval
 
@@ -260,6 +271,55 @@ def get_software_drivers_from_dir(path: str) -> list:
     return out
 
 
+def get_file_mtimes(paths: Sequence[str], suffixes: tuple = None) -> dict:
+    """! @brief Return the modification times of all files in 'paths'.
+    Directories in 'paths' are walked recursively.
+    Only files ending in one of 'suffixes' are included (all if None).
+    Returns a dictionary: {<file path>: <mtime in ns>}."""
+    out = {}
+    for path in paths:
+        if os.path.isfile(path):
+            out[path] = os.stat(path).st_mtime_ns
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for item in files:
+                if suffixes and not item.endswith(suffixes):
+                    continue
+                fpath = os.path.join(root, item)
+                try:
+                    out[fpath] = os.stat(fpath).st_mtime_ns
+                except OSError:
+                    # File vanished while scanning
+                    pass
+    return out
+
+
+def wait_for_worker(running: dict) -> tuple:
+    """! @brief Wait for one of the forked worker processes in 'running' to
+    finish and return its result.
+    The result pipes of all workers are read while waiting: A worker
+    writing more than the pipe buffer holds only exits once its result is
+    read.
+    @param running: Process ID -> (item, read end of the result pipe, list
+                    of the data read so far). The finished worker is removed.
+    @return (item, data written to the result pipe by the worker)"""
+    fds = {entry[1]: pid for pid, entry in running.items()}
+    while True:
+        readable, _, _ = select.select(list(fds), [], [])
+        for read_end in readable:
+            pid = fds[read_end]
+            data = os.read(read_end, 65536)
+            if data:
+                running[pid][2].append(data)
+                continue
+            # End of file: The worker closed the pipe
+            os.close(read_end)
+            os.waitpid(pid, 0)
+            item, _, chunks = running.pop(pid)
+            return item, b"".join(chunks).decode()
+
+
 def minimize_name(name: str, exclude: list = None):
     if not exclude:
         exclude = []
@@ -45,10 +45,11 @@ from typing import Sequence
 
 from as_automatics_port import Port
 from as_automatics_generic import Generic
+from as_automatics_template_index import match_template_ports
 import as_automatics_helpers as as_help
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ## @ingroup automatics_intrep
@@ -60,6 +61,29 @@ class Interface:
     inheriting as_automatics_interface::Interface providing a port configuration
     with core names, data types and data directions."""
 
+    __slots__ = (
+        "ports",
+        "generics",
+        "name",
+        "type",
+        "parent",
+        "template",
+        "direction",
+        "name_prefix",
+        "name_suffix",
+        "unique_name",
+        "connected",
+        "to_external",
+        "instantiate_in_top",
+        "in_entity",
+        "incoming",
+        "outgoing",
+        # Optional attributes, only present if set
+        "connect_to",
+        "nodelay",
+        "no_stall",
+    )
+
     def __init__(
         self, type_name: str, template: object = None, default_name: str = ""
     ):
@@ -168,7 +192,7 @@ class Interface:
             LOG.debug(
                 "Port '%s' already present in interface '%s'",
                 port_obj.name,
-                str(self),
+                self,
             )
             return False
 
@@ -181,7 +205,7 @@ class Interface:
                 LOG.debug(
                     "Port '%s' not found in template '%s'",
                     port_obj.name,
-                    str(self.template),
+                    self.template,
                 )
                 return False
 
@@ -205,7 +229,7 @@ class Interface:
 
         # If the checks passed, add this port
         LOG.debug(
-            "Add port '%s' to interface '%s'.", port_obj.code_name, str(self)
+            "Add port '%s' to interface '%s'.", port_obj.code_name, self
         )
         port_obj.assign_to(self)
         port_obj.port_type = "interface"
@@ -337,7 +361,7 @@ class Interface:
         if self.has_generic(generic_obj.name):
             LOG.debug(
                 "Interface '%s' already has a generic '%s'",
-                str(self),
+                self,
                 generic_obj.name,
             )
             return False
@@ -372,7 +396,7 @@ class Interface:
             LOG.debug(
                 "Removing generic '%s' from interface '%s'",
                 generic_name,
-                str(self),
+                self,
             )
         for rem_gen in to_remove:
             self.generics.remove(rem_gen)
@@ -410,13 +434,16 @@ class Interface:
             self.name_suffix = new_suffix
 
     ## @ingroup automatics_analyze
-    def fit_and_add_port(self, port_obj: Port) -> bool:
+    def fit_and_add_port(self, port_obj: Port, matches=None) -> bool:
         """! @brief Adds a Port to this interface if it matches and is in the template.
         Use if only the code_name of the port is available.
         Finds the longest matching name fragment of the code_name with the
         names of the ports of this interfaces template. This is used to set
         the ports name (port.name). Also compares the pre- and suffixes
-        of the interface and port to add"""
+        of the interface and port to add
+        @param matches: Template matches of the port's code name
+                        (InterfaceTemplateIndex.match), including this
+                        interfaces template. Found here if not passed."""
         # Make sure we got a port object
         if not isinstance(port_obj, Port):
             LOG.error(
@@ -438,23 +465,20 @@ class Interface:
             return False
 
         # Check if the port is defined in this interfaces template
-        matchlist = [
-            tport.name
-            for tport in self.template.ports
-            if tport.name in port_obj.code_name
-        ]
-        if not matchlist:
+        if matches is None:
+            matches = match_template_ports(self.template, port_obj.code_name)
+        # Matches are sorted: Use the longest matching template port
+        match = next(
+            (match for match in matches if match.template is self.template),
+            None,
+        )
+        if match is None:
             LOG.debug("Port '%s' not found in template.", port_obj.code_name)
             return False
-
-        # Find the longest matching template port -> set the ports name to that
-        matchlist.sort(key=lambda name: len(name), reverse=True)
-        port_obj.name = matchlist[0]
+        port_obj.name = match.port.name
 
         # Pre-/Suffix check
-        this_prefix, this_suffix = as_help.get_prefix_suffix(
-            port_obj.name, port_obj.code_name, Port.directions
-        )
+        this_prefix, this_suffix = match.prefix, match.suffix
         first_port = not self.ports
         if not first_port:
             # If this is not the first port, the pre-/suffix need to match
@@ -474,7 +498,7 @@ class Interface:
         LOG.debug(
             "Trying to add '%s' to interface '%s'",
             port_obj.code_name,
-            str(self),
+            self,
         )
         # Try adding the port
         if not self.add_port(port_obj):
@@ -504,7 +528,7 @@ class Interface:
             )
         else:
             LOG.debug(
-                "Removing port '%s' from interface '%s'", port_name, str(self)
+                "Removing port '%s' from interface '%s'", port_name, self
             )
         for rem_port in to_remove:
             self.ports.remove(rem_port)
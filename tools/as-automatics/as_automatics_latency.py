@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_latency.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Static latency and frame rate analysis of processing chains: Latency of the
+stream paths from source to sink modules, fill and flush delays of 2D window
+pipelines and the achievable frame rate.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_latency.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Latency and frame rate analysis of processing chains.
+# -----------------------------------------------------------------------------
+
+import csv
+import json
+import math
+
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_throughput import (
+    EXTERNAL_NODE,
+    ThroughputAnalysis,
+    get_rate_value,
+)
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Columns of the CSV export of a LatencyReport
+CSV_COLUMNS = (
+    "source",
+    "sink",
+    "cycles",
+    "microseconds",
+    "fill_cycles",
+    "flush_cycles",
+    "modules",
+)
+
+
+class NodeLatency:
+    """! @brief Latency of one module (or 2D window pipeline) of a chain."""
+
+    def __init__(self, name: str, cycles: float):
+        self.name = name
+        ## Cycles from an input strobe to the output strobe it causes
+        self.cycles = cycles
+        ## 2D window pipelines: Strobes to fill and to flush the pipeline
+        self.fill_strobes = 0
+        self.flush_strobes = 0
+        ## Strobes per cycle at the input of the module
+        self.rate = 1.0
+        ## Cycles to flush the pipeline at the end of a frame
+        self.flush_cycles = 0.0
+
+    def is_pipeline(self) -> bool:
+        return self.fill_strobes > 0
+
+    def to_dict(self, clock_hz: float) -> dict:
+        out = {
+            "name": self.name,
+            "cycles": round(self.cycles, 2),
+            "microseconds": round(self.cycles / clock_hz * 1e6, 4),
+        }
+        if self.is_pipeline():
+            out["fill_strobes"] = self.fill_strobes
+            out["flush_strobes"] = self.flush_strobes
+            out["flush_cycles"] = round(self.flush_cycles, 2)
+            out["strobes_per_cycle"] = round(self.rate, 4)
+        return out
+
+
+class PathLatency:
+    """! @brief Longest stream path from a source to a sink module."""
+
+    def __init__(self, source: str, sink: str, modules: list):
+        self.source = source
+        self.sink = sink
+        ## Names of the modules along the path (including source and sink)
+        self.modules = modules
+        ## Latency of the path in clock cycles
+        self.cycles = 0.0
+        ## Cycles to fill / flush the 2D window pipelines along the path
+        self.fill_cycles = 0.0
+        self.flush_cycles = 0.0
+
+    def to_dict(self, clock_hz: float) -> dict:
+        return {
+            "source": self.source,
+            "sink": self.sink,
+            "cycles": round(self.cycles, 2),
+            "microseconds": round(self.cycles / clock_hz * 1e6, 4),
+            "fill_cycles": round(self.fill_cycles, 2),
+            "flush_cycles": round(self.flush_cycles, 2),
+            "modules": self.modules,
+        }
+
+
+class LatencyReport:
+    """! @brief Result of the latency analysis of a processing chain.
+    See 'analyze_latency'."""
+
+    def __init__(
+        self,
+        clock_hz: float,
+        width: int,
+        height: int,
+        blanking: tuple,
+        pixel_width: int,
+    ):
+        self.clock_hz = clock_hz
+        self.width = width
+        self.height = height
+        ## Blanking per frame: (pixels per line, lines)
+        self.blanking = blanking
+        self.pixel_width = pixel_width
+        ## Node name -> NodeLatency
+        self.modules = {}
+        self.paths = []
+        ## Source name -> frame timing (see 'analyze_latency')
+        self.sources = {}
+
+    def get_path(self, source: str, sink: str) -> PathLatency:
+        return next(
+            (
+                path
+                for path in self.paths
+                if path.source == source and path.sink == sink
+            ),
+            None,
+        )
+
+    def get_fill_cycles(self) -> float:
+        """! @brief Return the cycles until the first result of the chain:
+        The longest latency of all paths, including the 2D window pipeline
+        fill delays."""
+        return max((path.cycles for path in self.paths), default=0.0)
+
+    def get_fps(self) -> float:
+        """! @brief Return the lowest achievable frame rate of all sources."""
+        rates = [src["fps"] for src in self.sources.values()]
+        return min(rates) if rates else 0.0
+
+    def to_us(self, cycles: float) -> float:
+        return cycles / self.clock_hz * 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "clock_hz": self.clock_hz,
+            "width": self.width,
+            "height": self.height,
+            "blanking": list(self.blanking),
+            "pixel_width": self.pixel_width,
+            "fill_cycles": round(self.get_fill_cycles(), 2),
+            "fill_microseconds": round(
+                self.to_us(self.get_fill_cycles()), 4
+            ),
+            "fps": round(self.get_fps(), 3),
+            "sources": self.sources,
+            "paths": [path.to_dict(self.clock_hz) for path in self.paths],
+            "modules": [
+                mod.to_dict(self.clock_hz) for mod in self.modules.values()
+            ],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the report to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error(
+                "Could not write latency report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def write_csv(self, path: str) -> bool:
+        """! @brief Write the path latencies to the CSV file 'path'."""
+        try:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(CSV_COLUMNS)
+                for lat in self.paths:
+                    row = lat.to_dict(self.clock_hz)
+                    row["modules"] = " > ".join(row["modules"])
+                    writer.writerow([row[col] for col in CSV_COLUMNS])
+        except IOError as err:
+            LOG.error(
+                "Could not write latency report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def compare(self, other) -> dict:
+        """! @brief Compare the latencies of this report with 'other'.
+        Paths are matched by their source and sink module names.
+        @param other: LatencyReport of another variant of the chain.
+        @return Dictionary: 'paths': Per path the cycles of both reports
+                and the difference (other - this; None if a path is missing
+                in one of the reports), 'fill_cycles' and 'fps' likewise."""
+
+        def delta(this, that):
+            if this is None or that is None:
+                return None
+            return round(that - this, 4)
+
+        keys = [(path.source, path.sink) for path in self.paths]
+        keys.extend(
+            (path.source, path.sink)
+            for path in other.paths
+            if (path.source, path.sink) not in keys
+        )
+        paths = []
+        for source, sink in keys:
+            this = self.get_path(source, sink)
+            that = other.get_path(source, sink)
+            this = round(this.cycles, 2) if this is not None else None
+            that = round(that.cycles, 2) if that is not None else None
+            paths.append(
+                {
+                    "source": source,
+                    "sink": sink,
+                    "cycles": this,
+                    "other_cycles": that,
+                    "delta_cycles": delta(this, that),
+                    "delta_microseconds": delta(
+                        None if this is None else self.to_us(this),
+                        None if that is None else other.to_us(that),
+                    ),
+                }
+            )
+        return {
+            "paths": paths,
+            "fill_cycles": {
+                "this": round(self.get_fill_cycles(), 2),
+                "other": round(other.get_fill_cycles(), 2),
+                "delta": delta(
+                    self.get_fill_cycles(), other.get_fill_cycles()
+                ),
+            },
+            "fps": {
+                "this": round(self.get_fps(), 3),
+                "other": round(other.get_fps(), 3),
+                "delta": delta(self.get_fps(), other.get_fps()),
+            },
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            "Latency at {:.1f} MHz, {}x{} pixels, blanking {}x{}:".format(
+                self.clock_hz / 1e6,
+                self.width,
+                self.height,
+                self.blanking[0],
+                self.blanking[1],
+            )
+        ]
+        for path in self.paths:
+            lines.append(
+                "  {} -> {}: {:.0f} cycles ({:.2f} us), "
+                "pipeline fill {:.0f} cycles".format(
+                    path.source,
+                    path.sink,
+                    path.cycles,
+                    self.to_us(path.cycles),
+                    path.fill_cycles,
+                )
+            )
+        for mod in self.modules.values():
+            if mod.is_pipeline():
+                lines.append(
+                    "  Pipeline '{}': fill {} strobes, flush {} strobes "
+                    "({:.0f} cycles)".format(
+                        mod.name,
+                        mod.fill_strobes,
+                        mod.flush_strobes,
+                        mod.flush_cycles,
+                    )
+                )
+        for name, src in self.sources.items():
+            lines.append(
+                "  Source '{}': {:.0f} cycles per frame "
+                "(flush {:.0f}), {:.2f} fps".format(
+                    name, src["frame_cycles"], src["flush_cycles"], src["fps"]
+                )
+            )
+        return "\n".join(lines)
+
+
+class LatencyAnalysis:
+    """! @brief Latency analysis of the stream connections of a chain.
+    Uses the graph and the sustainable strobe rates of the
+    ThroughputAnalysis. Latency of the nodes:
+    - Modules: 'latency' cycles (see AsModule.set_stream_rate). Modules
+      widening the data width wait for the input strobes of one output
+      strobe first.
+    - 2D window pipelines: Filled with 'pipeline_delay' + 1 strobes before
+      the first result (see the 'PIPELINE_DEPTH' of as_pipeline_manager),
+      at the rate of their input. At the end of a frame, the same number
+      of strobes is flushed through the pipeline.
+    The latency of a path is the sum of the latencies of its nodes."""
+
+    def __init__(self, chain, source_rates: dict = None):
+        self.chain = chain
+        self.throughput = ThroughputAnalysis(chain, source_rates)
+        self.nodes = {}
+
+    def __get_node_latency__(self, name: str) -> NodeLatency:
+        node = self.throughput.nodes[name]
+        module = node.module
+        if node.inputs:
+            rate = min(edge.rate for edge in node.inputs)
+        else:
+            rate = max((edge.rate for edge in node.outputs), default=1.0)
+        if rate <= 0.0:
+            rate = 1.0
+        if isinstance(module, As2DWindowPipeline):
+            lat = NodeLatency(name, 0.0)
+            lat.fill_strobes = module.pipeline_delay + 1
+            lat.flush_strobes = module.pipeline_delay + 1
+            lat.cycles = lat.fill_strobes / rate
+            lat.flush_cycles = lat.flush_strobes / rate
+        else:
+            cycles = get_rate_value(module, node.rate["latency"])
+            lat = NodeLatency(name, float(cycles if cycles is not None else 1))
+            # Collect the input strobes of the first output strobe
+            in_width = max((edge.width or 0 for edge in node.inputs), default=0)
+            out_width = max(
+                (edge.width or 0 for edge in node.outputs), default=0
+            )
+            if in_width and out_width > in_width:
+                lat.cycles += (math.ceil(out_width / in_width) - 1) / rate
+        lat.rate = rate
+        return lat
+
+    def run(
+        self,
+        clock_hz: float,
+        width: int,
+        height: int,
+        blanking: tuple,
+        pixel_width: int = 8,
+    ) -> LatencyReport:
+        """! @brief Run the analysis and return a LatencyReport."""
+        report = LatencyReport(clock_hz, width, height, blanking, pixel_width)
+        tput = self.throughput.run(clock_hz, pixel_width)
+        order = self.throughput.__get_order__()
+        for name in order:
+            self.nodes[name] = self.__get_node_latency__(name)
+        report.modules = self.nodes
+
+        for source in order:
+            node = self.throughput.nodes[source]
+            if not node.is_source() or not node.outputs:
+                continue
+            paths = self.__get_longest_paths__(source, order)
+            report.paths.extend(paths)
+            report.sources[source] = self.__get_frame_timing__(
+                report, tput.sources.get(source), paths
+            )
+        return report
+
+    def __get_longest_paths__(self, source: str, order: list) -> list:
+        """! @brief Return the longest path from 'source' to each sink."""
+        # Node name -> (path cycles, previous node)
+        best = {source: (self.nodes[source].cycles, None)}
+        sinks = []
+        for name in order[order.index(source) :]:
+            if name not in best:
+                continue
+            node = self.throughput.nodes[name]
+            targets = [
+                edge.sink for edge in node.outputs if edge.sink in self.nodes
+            ]
+            if not targets or any(
+                edge.sink == EXTERNAL_NODE for edge in node.outputs
+            ):
+                sinks.append(name)
+            for target in targets:
+                # Only follow edges in topological order (skip cycles)
+                if order.index(target) <= order.index(name):
+                    continue
+                cycles = best[name][0] + self.nodes[target].cycles
+                if target not in best or cycles > best[target][0]:
+                    best[target] = (cycles, name)
+        paths = []
+        for sink in sinks:
+            if sink == source:
+                continue
+            modules = []
+            current = sink
+            while current is not None:
+                modules.insert(0, current)
+                current = best[current][1]
+            path = PathLatency(source, sink, modules)
+            path.cycles = best[sink][0]
+            for name in modules:
+                if self.nodes[name].is_pipeline():
+                    path.fill_cycles += self.nodes[name].cycles
+                    path.flush_cycles += self.nodes[name].flush_cycles
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def __get_frame_timing__(
+        report: LatencyReport, source: dict, paths: list
+    ) -> dict:
+        """! @brief Return the frame timing of a source module.
+        Pipelines are flushed after the last pixel of a frame; The part
+        of the flush not covered by the vertical blanking delays the
+        next frame."""
+        hblank, vblank = report.blanking
+        pixels = 0.0
+        if source is not None:
+            pixels = source["sustainable"] * source["pixels_per_strobe"]
+        if pixels <= 0.0:
+            pixels = 1.0
+        line_cycles = (report.width + hblank) / pixels
+        frame_cycles = line_cycles * (report.height + vblank)
+        flush = max((path.flush_cycles for path in paths), default=0.0)
+        frame_cycles += max(flush - line_cycles * vblank, 0.0)
+        return {
+            "pixels_per_cycle": round(pixels, 4),
+            "frame_cycles": round(frame_cycles, 2),
+            "frame_microseconds": round(report.to_us(frame_cycles), 4),
+            "flush_cycles": round(flush, 2),
+            "fps": report.clock_hz / frame_cycles if frame_cycles else 0.0,
+        }
+
+
+def analyze_latency(
+    chain,
+    clock_hz: float = 100e6,
+    width: int = 640,
+    height: int = 480,
+    blanking=0,
+    pixel_width: int = 8,
+    source_rates: dict = None,
+) -> LatencyReport:
+    """! @brief Analyze the latency and frame rate of a connected chain.
+    @param chain: The AsProcessingChain ('auto_connect' must have run).
+    @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+    @param width: Image width in pixels.
+    @param height: Image height in lines.
+    @param blanking: Horizontal blanking in pixels per line or a tuple of
+                     horizontal blanking (pixels) and vertical blanking
+                     (lines).
+    @param pixel_width: Bits per pixel, to convert strobes to pixels.
+    @param source_rates: Optional dictionary: Module name -> strobes per
+                 cycle of source modules (see 'analyze_throughput').
+    @return A LatencyReport."""
+    if not isinstance(blanking, (tuple, list)):
+        blanking = (blanking, 0)
+    report = LatencyAnalysis(chain, source_rates).run(
+        clock_hz, width, height, tuple(blanking), pixel_width
+    )
+    LOG.info(
+        "Latency: %i stream paths, fill delay %.0f cycles (%.2f us), "
+        "%.2f frames per second.",
+        len(report.paths),
+        report.get_fill_cycles(),
+        report.to_us(report.get_fill_cycles()),
+        report.get_fps(),
+    )
+    return report
+
+
+## @}
@@ -41,29 +41,198 @@ This module sets up Pythons logging module for as_automatics.
 # @brief This module sets up Pythons logging module for as_automatics.
 # -----------------------------------------------------------------------------
 
+import os
+import queue
+import atexit
+import threading
 import logging
+import logging.handlers
 
 
 ##
 # @addtogroup automatics_logging
 # @{
 
+## Name of the logger used by Automatics
+LOGGER_NAME = "as_automatics"
+LOGLEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+## Subsystems with their own logger (child of the Automatics logger)
+SUBSYSTEMS = ("parser", "connect", "pipeline2d", "writer")
+
+# Settings of the last call to init_log, reused by set_loglevel
+_settings = {"logfilename": "as_automatics.log", "silent": False}
+# Background thread writing the log records to the actual outputs
+_listener = None
+_queue_handler = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """! @brief Queue handler passing log records on without formatting them.
+    The records are only formatted by the listener thread. Records with
+    arguments that are not plain values (such as Automatics objects, which
+    may change before the record is written) are converted to text here.
+    Records of at least 'sync_level' (those shown on the console) are
+    written immediately, after all queued records, so console output keeps
+    its order relative to other output of the program (e.g. 'print')."""
+
+    PLAIN_TYPES = (str, int, float, bool, type(None))
+
+    def __init__(self, log_queue, listener=None):
+        super().__init__(log_queue)
+        ## The listener handling the queue, writing records synchronously
+        self.listener = listener
+        ## Records of at least this level are written synchronously
+        self.sync_level = logging.WARNING
+
+    def emit(self, record):
+        if self.listener is None or record.levelno < self.sync_level:
+            super().emit(record)
+            return
+        try:
+            self.listener.handle_now(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        if args and not all(isinstance(arg, self.PLAIN_TYPES) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Tracebacks reference the frames of this thread
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    """! @brief Queue listener handling the queued records in batches.
+    The listener thread wakes up periodically instead of for every record.
+    Waking up for every record hands the GIL back and forth between the
+    build thread and the listener, which costs more than writing the log."""
+
+    ## Time in seconds between two batches
+    INTERVAL = 0.1
+
+    def __init__(self, log_queue, *handlers, respect_handler_level=False):
+        super().__init__(
+            log_queue, *handlers, respect_handler_level=respect_handler_level
+        )
+        self._stop_event = threading.Event()
+        # Held while writing records, keeping them in order
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._stop_event.clear()
+        super().start()
+
+    def _monitor(self):
+        while not self._stop_event.wait(self.INTERVAL):
+            self._handle_queued()
+        self._handle_queued()
+
+    def _handle_queued(self):
+        with self._lock:
+            self._handle_queued_locked()
+
+    def _handle_queued_locked(self):
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            self.handle(record)
+
+    def handle_now(self, record):
+        """! @brief Handle 'record' in the calling thread, after all records
+        queued before it."""
+        with self._lock:
+            self._handle_queued_locked()
+            self.handle(record)
+
+    def stop(self):
+        """! @brief Handle all queued records and stop the listener thread."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        # The listener thread does not exist in forked child processes
+        self._handle_queued()
+
+
+def _start_listener(handlers: list):
+    """! @brief Start a listener thread writing queued records to 'handlers'
+    and return the handler that feeds it."""
+    global _listener, _queue_handler
+    log_queue = queue.SimpleQueue()
+    _listener = _BatchingQueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_handler = _DeferredQueueHandler(log_queue, _listener)
+    _listener.start()
+    return _queue_handler
+
+
+def _stop_listener():
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+    _listener = None
+    _queue_handler = None
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not exist in a forked child process:
+    # Start a new one with a fresh queue (the old queue is still handled
+    # by the parent process).
+    if _listener is None:
+        return
+    logger = logging.getLogger(LOGGER_NAME)
+    old_handler = _queue_handler
+    handler = _start_listener(list(_listener.handlers))
+    handler.setLevel(old_handler.level)
+    handler.sync_level = old_handler.sync_level
+    logger.removeHandler(old_handler)
+    logger.addHandler(handler)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(_stop_listener)
+
 
 def init_log(
     logfilename: str = "as_automatics.log",
     *,
     loglevel_console="WARNING",
-    loglevel_file="INFO"
+    loglevel_file="INFO",
+    silent: bool = False,
+    use_queue: bool = True
 ):
     """! @brief Initialize logging and return the logger.
-    Should only be run once per kernel."""
+    Should only be run once per kernel.
+    @param logfilename: Log file to write to. No log file is used if empty.
+                        The file is only created once the first record is
+                        written to it.
+    @param silent: Silent build mode: Don't use a log file at all and only
+                   output errors on the console.
+    @param use_queue: Write the log outputs from a background thread.
+                      The calling thread only puts the records into a queue.
+    """
     # Setup logging
-    logger = logging.getLogger("as_automatics")
+    logger = logging.getLogger(LOGGER_NAME)
+    _settings["logfilename"] = logfilename
+    _settings["silent"] = silent
 
     ll_console = getattr(logging, loglevel_console, logging.INFO)
     ll_file = getattr(logging, loglevel_file, logging.INFO)
+    if silent:
+        ll_console = max(ll_console, logging.ERROR)
 
-    logger.setLevel(min((ll_console, ll_file)))
     logger.disabled = False
 
     # Make sure only the handlers we want are instantiated
@@ -71,6 +240,8 @@ def init_log(
     if logger.hasHandlers():
         # "Nuke" all references to old handlers
         logger.handlers.clear()
+    # Write all records still queued for the old handlers
+    _stop_listener()
 
     # Set format for log entries
     formatter_logfile = logging.Formatter(
@@ -79,30 +250,55 @@ def init_log(
     formatter_console = logging.Formatter(
         "Automatics %(levelname)s: %(message)s"
     )
+    handlers = []
 
     # Setup logfile log handler
-    logfile = logging.FileHandler(logfilename)
-    logfile.setLevel(ll_file)
-    logfile.setFormatter(formatter_logfile)
-    logger.addHandler(logfile)
+    if logfilename and not silent:
+        logfile = logging.FileHandler(logfilename, delay=True)
+        logfile.setLevel(ll_file)
+        logfile.setFormatter(formatter_logfile)
+        handlers.append(logfile)
 
     # Setup console log handler
     logstream = logging.StreamHandler()
     logstream.setLevel(ll_console)
     logstream.setFormatter(formatter_console)
-    logger.addHandler(logstream)
+    handlers.append(logstream)
+
+    # Records below this level are discarded before they are created
+    loglevel = min(handler.level for handler in handlers)
+    logger.setLevel(loglevel)
+    if use_queue:
+        handler = _start_listener(handlers)
+        handler.setLevel(loglevel)
+        # Console output is written immediately, only batch the rest
+        handler.sync_level = logstream.level
+        logger.addHandler(handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     return logger
 
 
-def get_log():
-    """! @brief Returns the logger, initializing it if necessary."""
-    logger = logging.getLogger("as_automatics")
-    if logger.hasHandlers():
-        return logger
-    return init_log()
+def get_log(subsystem: str = ""):
+    """! @brief Returns the logger, initializing it if necessary.
+    @param subsystem: Return the logger of this subsystem (see SUBSYSTEMS)."""
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.hasHandlers():
+        logger = init_log()
+    if subsystem:
+        return logger.getChild(subsystem)
+    return logger
 
 
-LOGLEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+def flush_log():
+    """! @brief Write all queued log records to the outputs.
+    Call before terminating a process using 'os._exit()'."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+    for handler in logging.getLogger(LOGGER_NAME).handlers:
+        handler.flush()
 
 
 def set_loglevel(console, logfile):
@@ -110,9 +306,32 @@ def set_loglevel(console, logfile):
     console = console.upper()
     logfile = logfile.upper()
     if console in LOGLEVELS and logfile in LOGLEVELS:
-        init_log(loglevel_console=console, loglevel_file=logfile)
+        init_log(
+            _settings["logfilename"],
+            loglevel_console=console,
+            loglevel_file=logfile,
+            silent=_settings["silent"],
+        )
     else:
         print("Invalid loglevels! - {}, {}".format(console, logfile))
 
 
+def set_subsystem_loglevel(subsystem: str, loglevel: str):
+    """! @brief Set the loglevel of a single subsystem (see SUBSYSTEMS).
+    Records below this level are discarded without being created.
+    Records must still pass the console and logfile loglevels to be shown.
+    Use loglevel 'NOTSET' to use the general loglevel again."""
+    loglevel = loglevel.upper()
+    if subsystem not in SUBSYSTEMS:
+        print(
+            "Invalid subsystem '{}'! - Valid are: {}".format(
+                subsystem, ", ".join(SUBSYSTEMS)
+            )
+        )
+    elif loglevel not in LOGLEVELS + ("NOTSET",):
+        print("Invalid loglevel! - {}".format(loglevel))
+    else:
+        get_log(subsystem).setLevel(loglevel)
+
+
 ## @}
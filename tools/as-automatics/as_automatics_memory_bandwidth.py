@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_memory_bandwidth.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Bandwidth model of the memory ports (as_memwriter, as_memreader and their
+AXI_Master) of processing chains. Chooses burst lengths and FIFO depths
+meeting the stream rates with minimal memory resources.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_memory_bandwidth.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Bandwidth model and burst parameter tuning of memory ports.
+# -----------------------------------------------------------------------------
+
+import json
+import math
+
+from as_automatics_templates import AXIMasterMemoryInternal, AsStream
+from as_automatics_throughput import ThroughputAnalysis, get_generic_int
+from as_automatics_stream_fifo import get_buffer_cost, next_power_of_2
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Generics of the memory modules set by the tuning
+BURST_GENERIC = "MAX_PLATFORM_BURST_LENGTH"
+FIFO_GENERIC = "FIFO_NUMBER_OF_BURSTS"
+LENGTH_WIDTH_GENERIC = "BURST_LENGTH_BIT_WIDTH"
+## Generic of the AXI_Master: Maximum AXI burst length in data beats
+AXI_BURST_GENERIC = "C_MAX_BURST_LEN"
+AXI_MIN_BURST_BEATS = 16
+## Minimum number of bursts stored in the FIFO of a memory module
+MIN_FIFO_BURSTS = 2
+## Minimum bandwidth gain of a port to double its transfer size
+MIN_BURST_GAIN = 1.05
+
+
+def get_stream_direction(module) -> str:
+    """! @brief Return the direction ('in' / 'out') of the first as_stream
+    interface of 'module', or '' if it has none."""
+    for inter in getattr(module, "interfaces", ()):
+        if inter.type == AsStream.INTERFACE_TYPE_NAME:
+            return inter.direction
+    return ""
+
+
+def get_memory_module_cost(module, data_width_generic: str) -> dict:
+    """! @brief Coarse resource estimate of a memory module (as_memreader,
+    as_memwriter): The FIFO of FIFO_NUMBER_OF_BURSTS transfers of
+    MAX_PLATFORM_BURST_LENGTH bytes (words of 'data_width_generic' bits,
+    rounded to a power of two as in the VHDL code), the address generator
+    and the transfer control. The slave registers are part of as_regmgr.
+    Returns None if the generics cannot be resolved."""
+    width = get_generic_int(module, data_width_generic)
+    bursts = get_generic_int(module, FIFO_GENERIC)
+    burst_bytes = get_generic_int(module, BURST_GENERIC)
+    if None in (width, bursts, burst_bytes):
+        return None
+    depth = next_power_of_2(bursts * burst_bytes // max(width // 8, 1))
+    address_width = get_generic_int(module, "MEM_ADDRESS_BIT_WIDTH") or 32
+    cost = get_buffer_cost(depth, width)
+    return {
+        # Address and length counters and comparators, control logic
+        "luts": cost["luts"] + 4 * address_width + 60,
+        # Address, section and length registers, FIFO pointers
+        "ffs": 5 * address_width + 3 * depth.bit_length() + width + 40,
+        "bram18": cost["bram18"],
+    }
+
+
+class MemoryBusProfile:
+    """! @brief Parameters of the memory bus the AXI masters connect to.
+    The default values describe a Zynq-7000 high performance port (AXI3)."""
+
+    def __init__(
+        self,
+        data_width: int = 64,
+        clock_hz: float = None,
+        latency: int = 30,
+        masters: int = 0,
+        max_burst_beats: int = 16,
+        external_burst_beats: int = 16,
+        min_burst_bytes: int = 64,
+        max_burst_bytes: int = 2048,
+        utilization_limit: float = 0.8,
+    ):
+        ## Data bits per beat of the memory bus
+        self.data_width = data_width
+        ## Clock of the AXI masters and the bus (None: ASTERICS system clock)
+        self.clock_hz = clock_hz
+        ## Cycles from the address of a burst to its first data beat
+        self.latency = latency
+        ## Masters sharing the bus, including the memory ports of the chain
+        ## (0: only the memory ports of the chain)
+        self.masters = masters
+        ## Longest AXI burst in data beats (AXI3: 16, AXI4: 256)
+        self.max_burst_beats = max_burst_beats
+        ## Burst length in beats assumed for masters outside of the chain
+        self.external_burst_beats = external_burst_beats
+        ## Range of transfer sizes in bytes (powers of 2) to choose from
+        self.min_burst_bytes = min_burst_bytes
+        self.max_burst_bytes = max_burst_bytes
+        ## Highest bus utilization considered sustainable
+        self.utilization_limit = utilization_limit
+
+    @classmethod
+    def from_dict(cls, params: dict):
+        return cls(**params)
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class MemoryPort:
+    """! @brief Bandwidth model of one memory module and its AXI_Master.
+    A transfer of 'burst_bytes' (MAX_PLATFORM_BURST_LENGTH) is split by the
+    AXI_Master into AXI bursts of at most 'axi_beats' data beats. Each AXI
+    burst waits 'latency' cycles for its first beat."""
+
+    def __init__(self, module, direction: str, bits_per_cycle: float):
+        self.module = module
+        self.name = module.name
+        ## "write" (as_memwriter) or "read" (as_memreader)
+        self.direction = direction
+        ## Stream bits per system clock cycle to / from memory
+        self.bits_per_cycle = bits_per_cycle
+        self.memory_width = get_generic_int(module, "MEMORY_DATA_WIDTH") or 32
+        self.axi_master = None
+        for inter in module.interfaces:
+            if inter.type == AXIMasterMemoryInternal.INTERFACE_TYPE_NAME:
+                self.axi_master = getattr(inter, "connect_to", None)
+        ## Chosen parameters
+        self.burst_bytes = get_generic_int(module, BURST_GENERIC) or 256
+        self.fifo_bursts = get_generic_int(module, FIFO_GENERIC) or 4
+        self.axi_beats = AXI_MIN_BURST_BEATS
+        if self.axi_master is not None:
+            self.axi_beats = (
+                get_generic_int(self.axi_master, AXI_BURST_GENERIC)
+                or AXI_MIN_BURST_BEATS
+            )
+        ## Results of the model
+        self.required = 0.0  # Bytes per second
+        self.achievable = 0.0  # Bytes per second
+        self.utilization = 0.0  # Share of the data cycles of the bus
+        self.cost = {}
+
+    def get_max_burst_bytes(self, bus: MemoryBusProfile) -> int:
+        """! @brief Largest transfer the length port of the module supports."""
+        limit = bus.max_burst_bytes
+        width = get_generic_int(self.module, LENGTH_WIDTH_GENERIC)
+        if width:
+            limit = min(limit, 1 << (width - 1))
+        return limit
+
+    def get_beat_bytes(self, bus: MemoryBusProfile) -> int:
+        return max(min(self.memory_width, bus.data_width) // 8, 1)
+
+    def get_beats(self, bus: MemoryBusProfile) -> int:
+        """! @brief Data beats on the bus per transfer."""
+        return math.ceil(self.burst_bytes / self.get_beat_bytes(bus))
+
+    def get_axi_bursts(self) -> int:
+        """! @brief AXI bursts (of MEMORY_DATA_WIDTH bit beats) per transfer."""
+        beats = math.ceil(self.burst_bytes * 8 / self.memory_width)
+        return math.ceil(beats / self.axi_beats)
+
+    def get_fifo_depth(self) -> int:
+        """! @brief FIFO entries (words of MEMORY_DATA_WIDTH bits)."""
+        words = self.fifo_bursts * self.burst_bytes * 8 // self.memory_width
+        return next_power_of_2(max(words, 1))
+
+    def meets_rate(self) -> bool:
+        return self.achievable >= self.required
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "direction": self.direction,
+            "axi_master": getattr(self.axi_master, "name", None),
+            "required_mbyte_per_s": round(self.required / 1e6, 3),
+            "achievable_mbyte_per_s": round(self.achievable / 1e6, 3),
+            "bus_utilization": round(self.utilization, 4),
+            "meets_rate": self.meets_rate(),
+            BURST_GENERIC: self.burst_bytes,
+            FIFO_GENERIC: self.fifo_bursts,
+            AXI_BURST_GENERIC: self.axi_beats,
+            "fifo_depth": self.get_fifo_depth(),
+            "cost": self.cost,
+        }
+
+
+class MemoryBandwidthReport:
+    """! @brief Result of the memory bandwidth model of a processing chain.
+    See 'tune_memory_ports'."""
+
+    def __init__(self, bus: MemoryBusProfile, clock_hz: float):
+        self.bus = bus
+        self.clock_hz = clock_hz
+        self.bus_clock_hz = bus.clock_hz or clock_hz
+        self.ports = []
+        ## Cycles of one arbitration round of all masters on the bus
+        self.round_cycles = 0
+        ## True if the generics of the modules were set
+        self.applied = False
+
+    def get_bus_bandwidth(self) -> float:
+        """! @brief Peak bandwidth of the bus in bytes per second."""
+        return self.bus.data_width / 8 * self.bus_clock_hz
+
+    def get_utilization(self) -> float:
+        """! @brief Share of the data cycles of the bus used by the chain."""
+        return sum(port.utilization for port in self.ports)
+
+    def get_total_cost(self) -> dict:
+        """! @brief Sum of the FIFO memory resources of all ports."""
+        total = {"luts": 0, "bram18": 0}
+        for port in self.ports:
+            total["luts"] += port.cost.get("luts", 0)
+            total["bram18"] += port.cost.get("bram18", 0)
+        return total
+
+    def is_feasible(self) -> bool:
+        return all(port.meets_rate() for port in self.ports) and (
+            self.get_utilization() <= self.bus.utilization_limit
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "bus": self.bus.to_dict(),
+            "clock_hz": self.clock_hz,
+            "bus_bandwidth_mbyte_per_s": round(
+                self.get_bus_bandwidth() / 1e6, 3
+            ),
+            "bus_utilization": round(self.get_utilization(), 4),
+            "round_cycles": self.round_cycles,
+            "feasible": self.is_feasible(),
+            "applied": self.applied,
+            "total_cost": self.get_total_cost(),
+            "ports": [port.to_dict() for port in self.ports],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the report to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error(
+                "Could not write memory bandwidth report '%s': %s",
+                path,
+                str(err),
+            )
+            return False
+        return True
+
+    def __str__(self) -> str:
+        lines = [
+            "Memory bus: {} bit at {:.1f} MHz ({:.1f} MByte/s), "
+            "utilization {:.1f}%:".format(
+                self.bus.data_width,
+                self.bus_clock_hz / 1e6,
+                self.get_bus_bandwidth() / 1e6,
+                self.get_utilization() * 100,
+            )
+        ]
+        for port in self.ports:
+            lines.append(
+                "  {} ({}): {:.1f} of {:.1f} MByte/s, utilization {:.1f}%, "
+                "burst {} bytes ({} beats per AXI burst), FIFO {} bursts "
+                "({} words, {} BRAM18, {} LUTs){}".format(
+                    port.name,
+                    port.direction,
+                    port.required / 1e6,
+                    port.achievable / 1e6,
+                    port.utilization * 100,
+                    port.burst_bytes,
+                    port.axi_beats,
+                    port.fifo_bursts,
+                    port.get_fifo_depth(),
+                    port.cost.get("bram18", 0),
+                    port.cost.get("luts", 0),
+                    "" if port.meets_rate() else " - rate NOT met",
+                )
+            )
+        cost = self.get_total_cost()
+        lines.append(
+            "  Total: {} BRAM18, {} LUTs".format(cost["bram18"], cost["luts"])
+        )
+        return "\n".join(lines)
+
+
+class MemoryBandwidthModel:
+    """! @brief Bandwidth model of the memory ports of a chain.
+    The required rate of each port is the sustainable stream rate of the
+    ThroughputAnalysis. The masters on the bus are served round robin:
+    While a port waits for the latency of its AXI bursts, the bus transfers
+    one transfer of every other master. A port meets its rate if it moves
+    'burst_bytes' per round.
+    Burst lengths start at the smallest size and are doubled for all ports
+    missing their rate, until each port meets its rate, reaches its maximum
+    or gains less than MIN_BURST_GAIN from a longer transfer.
+    The FIFO of each port then holds the data arriving (writer) or consumed
+    (reader) during one round, plus one transfer."""
+
+    def __init__(self, chain, bus: MemoryBusProfile, source_rates=None):
+        self.chain = chain
+        self.bus = bus
+        self.throughput = ThroughputAnalysis(chain, source_rates)
+
+    def __find_ports__(self) -> list:
+        ports = []
+        for node in self.throughput.nodes.values():
+            module = node.module
+            if not node.rate["memory_width"] or not any(
+                inter.type == AXIMasterMemoryInternal.INTERFACE_TYPE_NAME
+                for inter in getattr(module, "interfaces", ())
+            ):
+                continue
+            # Memory writers receive an incoming stream
+            if get_stream_direction(module) == "in":
+                edges, direction = node.inputs, "write"
+            else:
+                edges, direction = node.outputs, "read"
+            bits = sum(edge.get_bits_per_cycle(edge.rate) for edge in edges)
+            ports.append(MemoryPort(module, direction, bits))
+        return ports
+
+    def __get_round_cycles__(self, ports: list) -> int:
+        beats = sum(port.get_beats(self.bus) for port in ports)
+        externals = max(self.bus.masters - len(ports), 0)
+        return beats + externals * self.bus.external_burst_beats
+
+    def __evaluate__(self, report: MemoryBandwidthReport):
+        ports = report.ports
+        bus_hz = report.bus_clock_hz
+        report.round_cycles = self.__get_round_cycles__(ports)
+        for port in ports:
+            # Cycles per transfer: Own latency plus the data of all masters
+            cycles = (
+                port.get_axi_bursts() * self.bus.latency
+                + report.round_cycles
+            )
+            port.achievable = port.burst_bytes / cycles * bus_hz
+            port.utilization = (
+                port.required / port.get_beat_bytes(self.bus) / bus_hz
+            )
+
+    def run(self, clock_hz: float) -> MemoryBandwidthReport:
+        """! @brief Run the model and return a MemoryBandwidthReport."""
+        report = MemoryBandwidthReport(self.bus, clock_hz)
+        self.throughput.run(clock_hz)
+        report.ports = self.__find_ports__()
+        for port in report.ports:
+            port.required = port.bits_per_cycle / 8 * clock_hz
+            port.burst_bytes = max(
+                next_power_of_2(self.bus.min_burst_bytes),
+                port.memory_width // 8,
+            )
+            port.burst_bytes = min(
+                port.burst_bytes, port.get_max_burst_bytes(self.bus)
+            )
+            self.__set_axi_beats__(port)
+
+        # Double the transfers of all ports missing their rate.
+        # Ports gaining little bandwidth from longer transfers are saturated.
+        saturated = set()
+        while True:
+            self.__evaluate__(report)
+            missing = [
+                port
+                for port in report.ports
+                if not port.meets_rate()
+                and port.name not in saturated
+                and port.burst_bytes * 2 <= port.get_max_burst_bytes(self.bus)
+            ]
+            if not missing:
+                break
+            achievable = {port.name: port.achievable for port in missing}
+            for port in missing:
+                port.burst_bytes *= 2
+                self.__set_axi_beats__(port)
+            self.__evaluate__(report)
+            for port in missing:
+                if (
+                    not port.meets_rate()
+                    and port.achievable < achievable[port.name] * MIN_BURST_GAIN
+                ):
+                    port.burst_bytes //= 2
+                    self.__set_axi_beats__(port)
+                    saturated.add(port.name)
+
+        for port in report.ports:
+            cycles = (
+                port.get_axi_bursts() * self.bus.latency
+                + report.round_cycles
+            )
+            buffered = (
+                port.burst_bytes
+                + port.required * cycles / report.bus_clock_hz
+            )
+            port.fifo_bursts = max(
+                next_power_of_2(math.ceil(buffered / port.burst_bytes)),
+                MIN_FIFO_BURSTS,
+            )
+            port.cost = get_buffer_cost(
+                port.get_fifo_depth(), port.memory_width
+            )
+        return report
+
+    def __set_axi_beats__(self, port: MemoryPort):
+        """! @brief Cover one transfer with one AXI burst, if possible."""
+        beats = next_power_of_2(port.burst_bytes * 8 // port.memory_width)
+        port.axi_beats = max(
+            min(beats, self.bus.max_burst_beats), AXI_MIN_BURST_BEATS
+        )
+
+
+def apply_memory_tuning(report: MemoryBandwidthReport) -> bool:
+    """! @brief Set the generics of the memory modules and AXI_Masters to the
+    parameters of 'report'."""
+    success = True
+    for port in report.ports:
+        success &= bool(
+            port.module.set_generic_value(BURST_GENERIC, port.burst_bytes)
+        )
+        success &= bool(
+            port.module.set_generic_value(FIFO_GENERIC, port.fifo_bursts)
+        )
+        if port.axi_master is not None:
+            success &= bool(
+                port.axi_master.set_generic_value(
+                    AXI_BURST_GENERIC, port.axi_beats
+                )
+            )
+    report.applied = success
+    return success
+
+
+def tune_memory_ports(
+    chain,
+    clock_hz: float = 100e6,
+    bus=None,
+    apply: bool = True,
+    source_rates: dict = None,
+) -> MemoryBandwidthReport:
+    """! @brief Choose burst lengths and FIFO depths of the memory ports.
+    @param chain: The AsProcessingChain ('auto_connect' must have run).
+    @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+    @param bus: MemoryBusProfile or a dictionary of its parameters.
+                Defaults to a Zynq-7000 high performance port.
+    @param apply: Set the generics of the memory modules (default: True).
+    @param source_rates: Optional dictionary: Module name -> strobes per
+                 cycle of source modules (see 'analyze_throughput').
+    @return A MemoryBandwidthReport."""
+    if bus is None:
+        bus = MemoryBusProfile()
+    elif isinstance(bus, dict):
+        bus = MemoryBusProfile.from_dict(bus)
+    report = MemoryBandwidthModel(chain, bus, source_rates).run(clock_hz)
+    if apply:
+        apply_memory_tuning(report)
+    LOG.info(
+        "Memory bandwidth: %i memory ports, bus utilization %.1f%%, "
+        "%i BRAM18 for FIFOs.",
+        len(report.ports),
+        report.get_utilization() * 100,
+        report.get_total_cost()["bram18"],
+    )
+    for port in report.ports:
+        if not port.meets_rate():
+            LOG.warning(
+                "Memory bandwidth: '%s' needs %.1f MByte/s, the bus only "
+                "provides %.1f MByte/s.",
+                port.name,
+                port.required / 1e6,
+                port.achievable / 1e6,
+            )
+    if report.get_utilization() > bus.utilization_limit:
+        LOG.warning(
+            "Memory bandwidth: Bus utilization of %.1f%% exceeds the limit "
+            "of %.1f%%.",
+            report.get_utilization() * 100,
+            bus.utilization_limit * 100,
+        )
+    return report
+
+
+## @}
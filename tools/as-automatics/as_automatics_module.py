@@ -55,13 +55,16 @@ from as_automatics_vhdl_reader import VHDLReader
 from as_automatics_port import Port, StandardPort
 from as_automatics_generic import Generic
 from as_automatics_interface import Interface
+from as_automatics_template_index import InterfaceTemplateIndex
 from as_automatics_register import SlaveRegisterInterface
 from as_automatics_exceptions import AsNameError, AsModuleError
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 status_comment_tuple = namedtuple("status_comment", ("status", "comment"))
+# Qualified name is required to pickle the named tuple
+status_comment_tuple.__qualname__ = "status_comment_tuple"
 
 ## @ingroup automatics_intrep
 class AsModule:
@@ -72,6 +75,8 @@ class AsModule:
     to configure itself from top-level files."""
 
     interface_templates_cls = []
+    # Index over 'interface_templates_cls', see '__get_template_index__'
+    interface_template_index_cls = None
     standard_port_templates = [
         StandardPort(name="clk", port_type="external"),
         StandardPort(
@@ -147,6 +152,23 @@ class AsModule:
             comment="Library submodule not fur use by the user (automatically inserted)",
         )
 
+    ## Valid parameters of 'set_stream_rate'
+    STREAM_RATE_PARAMETERS = (
+        "interval",
+        "bit_ratio",
+        "source_rate",
+        "memory_width",
+        "buffered",
+        "burst_length",
+        "stall_cycles",
+        "buffer_bits",
+        "buffer_generic",
+        "latency",
+    )
+
+    ## Resource types of 'set_resource_model'
+    RESOURCE_TYPES = ("luts", "ffs", "bram18", "dsps")
+
     class DevStatus:
         string = "{}: {}\n".format("UNKNOWN", "No state specified")
         string += "{}: {}\n".format("WORK_IN_PROGRESS", "Code in development")
@@ -225,6 +247,12 @@ class AsModule:
         self.module_category = "Unspecified"
         self.dev_status = self.DevStatus.UNKNOWN
         self.module_type = self.ModuleTypes.UNSPECIFIED
+        ## Stream rate metadata for the throughput analysis
+        ## (see 'set_stream_rate')
+        self.stream_rate = {}
+        ## FPGA resource cost model for the resource estimation
+        ## (see 'set_resource_model')
+        self.resource_model = {}
 
     def __str__(self) -> str:
         if self.name:
@@ -286,7 +314,7 @@ class AsModule:
         try:
             out = self.get_interface(name, direction, if_type)
         except AsNameError as err:
-            self.chain.err_mgr.clear_error(err)
+            err.err_mgr.clear_error(err)
         if out is not None:
             return out
         try:
@@ -463,6 +491,64 @@ class AsModule:
         are automatically part of this module's software driver."""
         self.driver_files.append(realpath(driver_file_path))
 
+    def set_stream_rate(self, **rate):
+        """! @brief Declare the stream rate properties of this module.
+        Used by the throughput analysis (as_automatics_throughput.py).
+        Undeclared properties use their defaults.
+        @param interval: Minimum number of clock cycles between two strobes
+                         the module accepts on its inputs. Default: 1
+        @param bit_ratio: Output data bits per input data bit. Default: 1
+        @param source_rate: Strobes per clock cycle on the outputs of modules
+                            without stream inputs. Default: 1
+        @param memory_width: Name of the generic defining the width of the
+                             memory port of memory endpoints (e.g.
+                             "MEMORY_DATA_WIDTH"). Default: None
+        @param buffered: True if the module buffers data, absorbing stall
+                         from its outputs for some time. Default: False
+        @param burst_length: Strobes the module outputs in consecutive
+                             cycles, in addition to bursts caused by
+                             narrowing the data width. Default: 1
+        @param stall_cycles: Cycles the module may stall its inputs in a
+                             row on its own (e.g. waiting for the memory
+                             bus). Default: 0
+        @param buffer_bits: Size of the input buffer in bits, as a tuple of
+                            factors (integers or generic names), e.g.
+                            ("BUFF_DEPTH", "DATA_WIDTH"). Default: None
+        @param buffer_generic: Name of the generic the input buffer size is
+                               proportional to. Set if the automatic stream
+                               FIFO sizing may enlarge the buffer.
+                               Default: None
+        @param latency: Clock cycles from an input strobe to the output
+                        strobe it causes (integer or generic name).
+                        Default: 1"""
+        for key in rate:
+            if key not in self.STREAM_RATE_PARAMETERS:
+                raise ValueError(
+                    "Unknown stream rate parameter '{}' for module '{}'!".format(
+                        key, self.entity_name
+                    )
+                )
+        self.stream_rate.update(rate)
+
+    def set_resource_model(self, **cost):
+        """! @brief Declare the FPGA resource cost of this module.
+        Used by the resource estimation (as_automatics_resources.py).
+        Each value is an integer, a generic name, a tuple of both (product)
+        or a function taking the module and returning an integer.
+        Undeclared resource types count as 0.
+        @param luts: Number of look-up tables.
+        @param ffs: Number of flip-flops.
+        @param bram18: Number of 18 Kb block RAMs.
+        @param dsps: Number of DSP slices."""
+        for key in cost:
+            if key not in self.RESOURCE_TYPES:
+                raise ValueError(
+                    "Unknown resource type '{}' for module '{}'!".format(
+                        key, self.entity_name
+                    )
+                )
+        self.resource_model.update(cost)
+
     def get_interfaces_filtered(self, direction: str = "", if_type: str = ""):
         """! @brief Get a list of interfaces filtered by type and direction.
         This function returns a list of interfaces of this module matching
@@ -758,10 +844,11 @@ class AsModule:
                     "Couldn't add template '%s' to AsModule class, "
                     "already present."
                 ),
-                str(inter_template),
+                inter_template,
             )
             return False
         cls.interface_templates_cls.append(inter_template)
+        AsModule.interface_template_index_cls = None
         return True
 
     def add_local_interface_template(self, inter_template: Interface) -> bool:
@@ -782,7 +869,7 @@ class AsModule:
                     "Couldn't add template '%s' to AsModule class, "
                     "already present."
                 ),
-                str(inter_template),
+                inter_template,
             )
             return False
         self.interface_templates.append(inter_template)
@@ -793,6 +880,21 @@ class AsModule:
         out.extend(self.interface_templates)
         return out
 
+    def __get_template_index__(self) -> InterfaceTemplateIndex:
+        """! @brief Return the index over all interface templates of this module.
+        The index over the global templates is shared by all modules and
+        rebuilt when the global templates change. Local templates of this
+        module are indexed on top of it."""
+        index = AsModule.interface_template_index_cls
+        if index is None or index.templates != tuple(
+            self.interface_templates_cls
+        ):
+            index = InterfaceTemplateIndex(self.interface_templates_cls)
+            AsModule.interface_template_index_cls = index
+        if self.interface_templates:
+            return InterfaceTemplateIndex(self.interface_templates, index)
+        return index
+
     def add_interface(self, interface: Interface) -> bool:
         """! @brief Add an interface instance to this AsModule."""
         inter_temp = copy.copy(interface)
@@ -826,8 +928,8 @@ class AsModule:
         if port_obj.code_name in [port.code_name for port in self.ports]:
             LOG.debug(
                 "Couldn't add port '%s' to module '%s', already present",
-                str(port_obj),
-                str(self),
+                port_obj,
+                self,
             )
             return False
         # Add the port
@@ -880,7 +982,7 @@ class AsModule:
             return True
 
         LOG.debug(
-            "Couldn't add standard port '%s' already present!", str(port_obj)
+            "Couldn't add standard port '%s' already present!", port_obj
         )
         return False
 
@@ -900,8 +1002,8 @@ class AsModule:
         if generic_obj.code_name in [gen.code_name for gen in self.generics]:
             LOG.debug(
                 "Generic '%s' already in module '%s'.",
-                str(generic_obj),
-                str(self),
+                generic_obj,
+                self,
             )
             return False
         # If both checks pass, add the generic
@@ -951,7 +1053,7 @@ class AsModule:
             LOG.debug(
                 "Removing generic '%s' from interface '%s'",
                 generic_name,
-                str(self),
+                self,
             )
         for rem_gen in to_remove:
             self.generics.remove(rem_gen)
@@ -1177,6 +1279,7 @@ class AsModule:
         Either add a new interface that the port might be a part of,
         add the port to an existing interface or as a lone port of
         the module"""
+        template_index = self.__get_template_index__()
         for port in self.entity_ports:
             if not isinstance(port, Port):
                 LOG.error("Skipping '%s'; not a port object.", str(port))
@@ -1184,7 +1287,7 @@ class AsModule:
 
             LOG.debug("Fitting port '%s'", port.code_name)
             # Try first to assign the port to an existing or new interface
-            self.__fit_port__(port)
+            self.__fit_port__(port, template_index=template_index)
 
         # List of ports found in the entity declaration is not needed anymore
         self.entity_ports.clear()
@@ -1198,10 +1301,10 @@ class AsModule:
         to_remove = [
             inter for inter in self.interfaces if not inter.is_complete()
         ]
-        LOG.debug("To Remove: %s", str([repr(inter) for inter in to_remove]))
+        LOG.debug("To Remove: %s", [repr(inter) for inter in to_remove])
         LOG.debug(
             "Interface list: %s",
-            str([repr(inter) for inter in self.interfaces]),
+            [repr(inter) for inter in self.interfaces],
         )
 
         for inter in to_remove:
@@ -1220,7 +1323,9 @@ class AsModule:
                 port.direction = inter.get_port_direction_normalized(port.name)
                 port.optional = False
                 port.port_type = "single"
-                self.__fit_port__(port, new_ifs_allowed=False)
+                self.__fit_port__(
+                    port, new_ifs_allowed=False, template_index=template_index
+                )
         for inter in self.interfaces:
             if isinstance(inter, SlaveRegisterInterface):
                 self.register_ifs.append(inter)
@@ -1242,15 +1347,24 @@ class AsModule:
                         break
 
     def __fit_port__(
-        self, port_obj: Port, new_ifs_allowed: bool = True
+        self,
+        port_obj: Port,
+        new_ifs_allowed: bool = True,
+        template_index: InterfaceTemplateIndex = None,
     ) -> bool:
         """! Assign 'port_obj' either to an existing interface
         of, if not possible, create a new interface for this port.
         If no matching port exists in the interface templates,
         add this port as a lone port specific to this module."""
+        if template_index is None:
+            template_index = self.__get_template_index__()
+        # All template ports matching the port, longest names first
+        matches = template_index.match(port_obj.code_name)
         # Try to fit/assign the port to an existing interface
         LOG.debug("Checking existing interfaces...")
-        if self.__fit_port_to_existing_interface__(port_obj):
+        if self.__fit_port_to_existing_interface__(
+            port_obj, matches, template_index
+        ):
             return True
 
         if new_ifs_allowed:
@@ -1261,7 +1375,7 @@ class AsModule:
                     "Checking against interface templates..."
                 )
             )
-            if self.__fit_port_to_new_interface__(port_obj):
+            if self.__fit_port_to_new_interface__(port_obj, matches):
                 return True
 
         # If the port is not part of a known interface:
@@ -1291,39 +1405,51 @@ class AsModule:
         return False
 
     ## @ingroup automatics_analyze
-    def __fit_port_to_existing_interface__(self, port_obj: Port) -> bool:
+    def __fit_port_to_existing_interface__(
+        self,
+        port_obj: Port,
+        matches: Sequence = None,
+        template_index: InterfaceTemplateIndex = None,
+    ) -> bool:
         """! Attempts to assign 'port_obj' to an existing interface of this
         module. Returns 'True' if the port was assigned, else 'False'."""
 
         for inter in self.interfaces:
             LOG.debug("Looking at existing interface '%s'", inter.int_name())
-            if inter.fit_and_add_port(port_obj):
+            if template_index is not None and template_index.has_template(
+                inter.template
+            ):
+                fitted = inter.fit_and_add_port(port_obj, matches)
+            else:
+                fitted = inter.fit_and_add_port(port_obj)
+            if fitted:
                 return True
 
         return False
 
     ## @ingroup automatics_analyze
-    def __fit_port_to_new_interface__(self, port_obj: Port) -> bool:
+    def __fit_port_to_new_interface__(
+        self, port_obj: Port, matches: Sequence = None
+    ) -> bool:
         """! @brief Checks if 'port_obj' matches a port of the interface templates.
         Calls __new_interface_from_template__() to add the
-        matching interface to this module."""
-        matchlist = []
-        for template in self.__get_interface_templates__():
-            LOG.debug(
-                "Checking interface template for '%s'", template.int_name()
-            )
-            for tport in template.ports:
-                if (
-                    tport.name in port_obj.code_name
-                    and tport.data_type == port_obj.data_type
-                ):
-                    matchlist.append(tport)
-        if matchlist:
-            matchlist.sort(key=lambda prt: len(prt.name), reverse=True)
-            tport = matchlist[0]
+        matching interface to this module.
+        @param matches: Result of InterfaceTemplateIndex.match for the port."""
+        if matches is None:
+            matches = self.__get_template_index__().match(port_obj.code_name)
+        # Matches are sorted: Use the longest matching template port
+        match = next(
+            (
+                match
+                for match in matches
+                if match.port.data_type == port_obj.data_type
+            ),
+            None,
+        )
+        if match is not None:
             LOG.debug("Matched! Adding new interface...")
             new_if = self.__new_interface_from_template__(
-                tport.parent, tport, port_obj
+                match.template, match.port, port_obj, matches
             )
             if new_if is None:
                 return False
@@ -1367,7 +1493,11 @@ class AsModule:
         self.add_generic(generic_obj)
 
     def __new_interface_from_template__(
-        self, template: Interface, t_port: Port, port_obj: Port
+        self,
+        template: Interface,
+        t_port: Port,
+        port_obj: Port,
+        matches: Sequence = None,
     ) -> Interface:
         """! Copies 'template' interface, configures 'port_obj',
         assigns it to the new interface and
@@ -1395,7 +1525,7 @@ class AsModule:
         port_obj.name = t_port.name
         port_obj.optional = t_port.optional
         port_obj.port_type = "interface"
-        if not new_interface.fit_and_add_port(port_obj):
+        if not new_interface.fit_and_add_port(port_obj, matches):
             LOG.error(
                 (
                     "Port '%s' didn't fit in interface '%s' in function "
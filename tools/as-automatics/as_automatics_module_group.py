@@ -61,7 +61,7 @@ from as_automatics_exceptions import AsNameError
 from as_automatics_vhdl_static import REGMGR_REGISTER_CONFIG_NAMES
 
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 ZERO_SIGNAL = GenericSignal("'0'")
 ONE_SIGNAL = GenericSignal("'1'")
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_module_index.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Manifest index of a module repository: A summary of each module template
+(files, interfaces, generics, dependencies, ...) stored with the content
+hashes of the module folder's files, to list the modules of a repository
+without running the module specification scripts.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_module_index.py
+# @ingroup automatics_mm
+# @author Philip Manke
+# @brief Manifest index of the modules of a module repository.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+from hashlib import sha256
+from typing import Sequence
+
+from as_automatics_2d_window_module import AsWindowModule
+from as_automatics_helpers import get_file_mtimes
+from as_automatics_vhdl_dependencies import get_module_files
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log("parser")
+
+##
+# @addtogroup automatics_mm
+# @{
+
+## Name of the index file in a module repository folder
+INDEX_FILENAME = ".as_module_index.json"
+## File types of a module folder that may change its module templates
+INDEXED_SUFFIXES = (".py", ".vhd", ".vhdl", ".c", ".h")
+## Automatics modules the module templates (and so the manifests) depend on
+MANIFEST_SOURCES = (
+    "as_automatics_module",
+    "as_automatics_2d_window_module",
+    "as_automatics_2d_window_interface",
+    "as_automatics_interface",
+    "as_automatics_vhdl_reader",
+    "as_automatics_module_lib",
+    __name__,
+)
+## Directory to store the indexes in, instead of the repositories
+cache_dir = ""
+
+
+def get_index_format() -> str:
+    """! @brief Return the format stamp of the manifest index.
+    Changes with the source code creating the module templates."""
+    hashgen = sha256()
+    for name in MANIFEST_SOURCES:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        with open(module.__file__, "rb") as file:
+            hashgen.update(file.read())
+    return hashgen.hexdigest()
+
+
+def get_index_path(repo_path: str) -> str:
+    """! @brief Return the path of the index file of a module repository."""
+    repo_path = os.path.realpath(repo_path)
+    if cache_dir:
+        name = sha256(repo_path.encode()).hexdigest()[:16]
+        return os.path.join(cache_dir, "module_index_{}.json".format(name))
+    return os.path.join(repo_path, INDEX_FILENAME)
+
+
+def set_cache_dir(path: str):
+    """! @brief Store the manifest indexes in the directory 'path' instead of
+    in the module repositories. Pass an empty string to disable."""
+    global cache_dir
+    cache_dir = path
+
+
+def get_file_hash(path: str) -> str:
+    with open(path, "rb") as file:
+        return sha256(file.read()).hexdigest()
+
+
+def get_module_manifest(module) -> dict:
+    """! @brief Return the manifest of a module template (AsModule):
+    A JSON serializable summary for listing and searching modules."""
+    interfaces = [
+        {"name": inter.name, "type": inter.type, "direction": inter.direction}
+        for inter in module.interfaces
+        + getattr(module, "window_interfaces", [])
+    ]
+    return {
+        "name": module.name,
+        "entity": module.entity_name,
+        "window_module": isinstance(module, AsWindowModule),
+        "folder": module.module_dir,
+        "files": get_module_files(module),
+        "driver_files": list(module.driver_files),
+        "interfaces": interfaces,
+        "register_interfaces": len(module.register_ifs),
+        "ports": [
+            {"name": port.code_name, "direction": port.direction}
+            for port in module.ports
+        ],
+        "generics": [
+            {
+                "name": gen.code_name,
+                "default": str(gen.default_value),
+                "comment": gen.comment,
+            }
+            for gen in module.generics
+        ],
+        "dependencies": list(module.dependencies),
+        "description": module.description,
+        "brief_description": module.brief_description,
+        "module_category": module.module_category,
+        "show_in_browser": module.show_in_browser,
+        "dev_status": dict(module.dev_status._asdict()),
+        "module_type": dict(module.module_type._asdict()),
+    }
+
+
+def manifest_matches(manifest: dict, text: str) -> bool:
+    """! @brief Check if the manifest of a module matches the search 'text'.
+    Case-insensitive search in the entity name, descriptions, category and
+    the names and types of the module's interfaces."""
+    text = text.lower()
+    fields = [
+        manifest["entity"],
+        manifest["brief_description"],
+        manifest["description"],
+        manifest["module_category"],
+    ]
+    for inter in manifest["interfaces"]:
+        fields.extend((inter["name"], inter["type"]))
+    return any(text in str(field).lower() for field in fields)
+
+
+class AsModuleIndex:
+    """! @brief Manifest index of a module repository.
+    Stores the manifests of the modules of each module folder with the
+    modification times and content hashes of the files they were created
+    from: All indexed files of the folder (see 'INDEXED_SUFFIXES') and all
+    files the modules reference from outside of the folder.
+    Files with a changed modification time are hashed again; A folder is
+    only indexed again if any of its files were added, removed or changed
+    their content."""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = os.path.realpath(repo_path)
+        self.path = get_index_path(self.repo_path)
+        ## Module folder -> {"files": {path: [mtime, hash]},
+        ##                   "modules": [manifests]}
+        self.folders = {}
+        ## True if the index differs from the index file
+        self.modified = False
+
+    @classmethod
+    def load(cls, repo_path: str) -> "AsModuleIndex":
+        """! @brief Load the index of the repository 'repo_path'.
+        Returns an empty index if there is no (compatible) index file."""
+        index = cls(repo_path)
+        try:
+            with open(index.path, "r") as file:
+                data = json.load(file)
+            if data["format"] != get_index_format():
+                LOG.debug("Ignoring outdated module index '%s'.", index.path)
+                return index
+            index.folders = data["folders"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return index
+        LOG.debug(
+            "Loaded module index '%s' (%i folders).",
+            index.path,
+            len(index.folders),
+        )
+        return index
+
+    def save(self) -> bool:
+        """! @brief Write the index file.
+        Repositories may be read-only; Failing to write is not an error."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w") as file:
+                json.dump(
+                    {"format": get_index_format(), "folders": self.folders},
+                    file,
+                    indent=1,
+                    sort_keys=True,
+                )
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as err:
+            LOG.info("Could not write module index '%s': %s", self.path, err)
+            return False
+        self.modified = False
+        LOG.debug("Wrote module index '%s'.", self.path)
+        return True
+
+    @staticmethod
+    def __get_folder_files__(folder: str, modules: Sequence[dict]) -> dict:
+        """! @brief Return the files a module folder is indexed by."""
+        files = get_file_mtimes([folder], INDEXED_SUFFIXES)
+        external = set()
+        for manifest in modules:
+            external.update(manifest["files"])
+            external.update(manifest["driver_files"])
+        for path in sorted(external.difference(files)):
+            try:
+                files[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                files[path] = None
+        return files
+
+    def get_folder_modules(self, folder: str) -> list:
+        """! @brief Return the manifests of the modules of 'folder' if the
+        index entry of 'folder' is up to date, else None."""
+        entry = self.folders.get(folder)
+        if entry is None:
+            return None
+        stamps = entry["files"]
+        files = self.__get_folder_files__(folder, entry["modules"])
+        if set(files) != set(stamps):
+            return None
+        for path, mtime in files.items():
+            if mtime == stamps[path][0]:
+                continue
+            if mtime is None:
+                return None
+            # Touched: Only content changes invalidate the entry
+            try:
+                fhash = get_file_hash(path)
+            except OSError:
+                return None
+            if fhash != stamps[path][1]:
+                return None
+            stamps[path] = [mtime, fhash]
+            self.modified = True
+        return entry["modules"]
+
+    def update_folder(self, folder: str, modules: Sequence) -> list:
+        """! @brief Index the module templates (AsModule) created from the
+        scripts of 'folder'. Returns the modules' manifests."""
+        manifests = [get_module_manifest(module) for module in modules]
+        stamps = {}
+        for path, mtime in self.__get_folder_files__(
+            folder, manifests
+        ).items():
+            try:
+                stamps[path] = [mtime, get_file_hash(path)]
+            except OSError:
+                stamps[path] = [None, ""]
+        self.folders[folder] = {"files": stamps, "modules": manifests}
+        self.modified = True
+        LOG.debug("Indexed module folder '%s'.", folder)
+        return manifests
+
+    def remove_other_folders(self, folders: Sequence[str]):
+        """! @brief Drop the entries of all folders not in 'folders'."""
+        for folder in set(self.folders).difference(folders):
+            del self.folders[folder]
+            self.modified = True
+
+
+## @}
@@ -51,9 +51,16 @@ from as_automatics_module import AsModule
 from as_automatics_2d_window_module import AsWindowModule
 from as_automatics_exceptions import AsModuleError, AsFileError, AsError
 from as_automatics_helpers import append_to_path, get_software_drivers_from_dir
+from as_automatics_vhdl_dependencies import VHDLDependencyGraph
+from as_automatics_module_index import (
+    AsModuleIndex,
+    get_module_manifest,
+    manifest_matches,
+)
+import as_automatics_vhdl_reader as as_vhdl_reader
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("parser")
 
 
 ##
@@ -64,7 +71,9 @@ LOG = as_log.get_log()
 class AsModuleRepo:
     """! @brief Repository for AsModule template objects.
     Templates are generated using the AsModuleLibrary
-    Stores modules read from the same source together."""
+    Stores modules read from the same source together.
+    Modules may be listed by their manifest only (see 'register_manifest');
+    Their templates are loaded when they are first requested."""
 
     def __init__(self, repo_name: str, path: str):
         self.name = repo_name
@@ -73,14 +82,35 @@ class AsModuleRepo:
         self.window_modules = []
         self.modules = {}
         self.module_categories = {}
+        ## Entity name -> manifest of listed modules not loaded yet
+        self.manifests = {}
+        ## Function loading listed modules: 'loader(repo, entity_name)'
+        self.loader = None
+
+    def register_manifest(self, manifest: dict) -> bool:
+        """! @brief List a module of this repository by its manifest
+        (see 'as_automatics_module_index') without loading its template."""
+        name = manifest["entity"]
+        if name in self.module_names:
+            return False
+        self.module_names.append(name)
+        if manifest["window_module"]:
+            self.window_modules.append(name)
+        self.manifests[name] = dict(manifest, repository=self.name)
+        self.module_categories.setdefault(manifest["module_category"], [])
+        return True
 
     def register_module(self, module: AsModule):
         """! @brief Add a module to this repository object."""
-        if module.entity_name not in self.module_names:
-            self.module_names.append(module.entity_name)
-            if isinstance(module, AsWindowModule):
-                self.window_modules.append(module.entity_name)
-            self.modules[module.entity_name] = module
+        name = module.entity_name
+        # Listed modules are registered again once loaded
+        if name not in self.modules:
+            if name not in self.module_names:
+                self.module_names.append(name)
+                if isinstance(module, AsWindowModule):
+                    self.window_modules.append(name)
+            self.manifests.pop(name, None)
+            self.modules[name] = module
             module.repository_name = self.name
             try:
                 self.module_categories[module.module_category].append(module)
@@ -89,6 +119,26 @@ class AsModuleRepo:
             return True
         return False
 
+    def unregister_module(self, entity_name: str) -> AsModule:
+        """! @brief Remove a module from this repository object.
+        Returns the removed module or None if it wasn't registered
+        or only listed by its manifest."""
+        module = self.modules.pop(entity_name, None)
+        manifest = self.manifests.pop(entity_name, None)
+        if module is None and manifest is None:
+            return None
+        self.module_names.remove(entity_name)
+        if entity_name in self.window_modules:
+            self.window_modules.remove(entity_name)
+        if module is None:
+            return None
+        category = self.module_categories.get(module.module_category, [])
+        if module in category:
+            category.remove(module)
+            if not category:
+                self.module_categories.pop(module.module_category)
+        return module
+
     def has_module_generic(self, entity_name: str) -> bool:
         """! @brief Check if an As(Window)Module is stored in this repository.
         Returns True if a module or window module with the name
@@ -115,12 +165,30 @@ class AsModuleRepo:
     def get_module_categories(self):
         return sorted(list(self.module_categories.keys()))
 
+    def get_template(self, entity_name: str) -> AsModule:
+        """! @brief Return the template of a registered module.
+        Loads the templates of modules only listed by their manifest.
+        Raises a KeyError for unknown modules."""
+        if entity_name in self.manifests and self.loader is not None:
+            self.loader(self, entity_name)
+        return self.modules[entity_name]
+
+    def get_manifest(self, entity_name: str) -> dict:
+        """! @brief Return the manifest of a registered module.
+        Raises a KeyError for unknown modules."""
+        try:
+            return self.manifests[entity_name]
+        except KeyError:
+            manifest = get_module_manifest(self.modules[entity_name])
+            manifest["repository"] = self.name
+            return manifest
+
     def get_module_generic(self, entity_name: str) -> AsModule:
         """! @brief Get an As(Window)Module from this repository."""
         try:
             return self.get_module(entity_name)
         except AsModuleError as err:
-            AsError.err_mgr.clear_error(err)
+            err.err_mgr.clear_error(err)
             return self.get_window_module(entity_name)
 
     def get_module(self, entity_name: str) -> AsModule:
@@ -130,7 +198,7 @@ class AsModuleRepo:
         if not self.has_module(entity_name):
             raise AsModuleError(entity_name, msg="Could not find module")
         try:
-            return self.modules[entity_name]
+            return self.get_template(entity_name)
         except KeyError:
             raise AsModuleError(entity_name, msg="Could not find module")
 
@@ -147,7 +215,7 @@ class AsModuleRepo:
         if not self.has_window_module(entity_name):
             raise AsModuleError(entity_name, msg="Could not find window module")
         try:
-            return self.modules[entity_name]
+            return self.get_template(entity_name)
         except KeyError:
             raise AsModuleError(entity_name, msg="Could not find window module")
 
@@ -160,23 +228,72 @@ class AsModuleLibrary:
 
     SCRIPT_FOLDER = "hardware/automatics"
     DRIVER_FOLDER = "software/driver"
+    HARDWARE_FOLDER = "hardware"
+    VHDL_SUFFIXES = (".vhd", ".vhdl")
+    ## Imported module specification scripts: {<script name>: <module>}
+    spec_scripts = {}
 
     def __init__(self, asterics_dir: str):
         self.asterics_dir = asterics_dir
         self.repos = []  ## List storing the module repositories
-
-    def add_module_repository(self, path: str, repo_name: str) -> Sequence[str]:
+        ## Default number of processes analyzing the VHDL files of a
+        ## repository in parallel (see 'add_module_repository')
+        self.discovery_jobs = 1
+        ## Default for listing modules from the repositories' manifest
+        ## indexes, loading templates on demand (see 'add_module_repository')
+        self.lazy_loading = False
+
+    def add_module_repository(
+        self,
+        path: str,
+        repo_name: str,
+        module_callback=None,
+        jobs: int = None,
+        lazy: bool = None,
+    ) -> Sequence[str]:
         """! @brief Add a repository to the module library.
         @param path: Path to the repository directory.
               Automatics will search for modules here.
         @param repo_name: Name with which to refer to the repository to.
+        @param module_callback: Optional function called as
+              'module_callback(entity_name, repo_name)' for each module
+              as soon as it is registered (e.g. to update a GUI).
+        @param jobs: Number of processes analyzing the VHDL files of the
+              repository in parallel before the module specification
+              scripts run (0: number of CPUs, None: 'discovery_jobs').
+        @param lazy: List the modules from the repository's manifest index,
+              only running the specification scripts of module folders
+              that changed since the index was written. Templates of listed
+              modules are loaded when first requested (None: 'lazy_loading').
         """
         LOG.debug(
             "Adding module repository '%s' for path '%s'...", repo_name, path
         )
+        if jobs is None:
+            jobs = self.discovery_jobs
+        if lazy is None:
+            lazy = self.lazy_loading
         repo = AsModuleRepo(repo_name, path)
-        module_names = self.__get_and_add_modules_from_dir__(path, repo)
+        repo.loader = self.__load_listed_module__
+        # Register the repository first, modules are accessible immediately
         self.repos.append(repo)
+        try:
+            if lazy:
+                module_names = self.__list_modules_from_index__(
+                    path, repo, module_callback, jobs
+                )
+            else:
+                if jobs != 1:
+                    as_vhdl_reader.prescan_vhdl_files(
+                        self.__get_vhdl_files_in_dir__(path), jobs
+                    )
+                module_names = self.__get_and_add_modules_from_dir__(
+                    path, repo, module_callback
+                )
+        except AsError:
+            self.repos.remove(repo)
+            raise
+        as_vhdl_reader.update_cache_dir()
         LOG.info(
             (
                 "Found and registered %i modules in repository '%s'"
@@ -295,6 +412,46 @@ class AsModuleLibrary:
             out.extend(repo.module_names)
         return out
 
+    def get_module_manifest(
+        self, module_name: str, repo_name: str = ""
+    ) -> dict:
+        """! @brief Return the manifest of a module without loading it.
+        The manifest summarizes the module: Entity name, repository, files,
+        interfaces, generics, dependencies, descriptions and status
+        (see 'as_automatics_module_index.get_module_manifest').
+        @param module_name: The entity name of the module.
+        @param repo_name: Optional. Search only in module repository 'repo_name'.
+        @return The manifest dictionary, 'None' if no match is found."""
+        module_name = module_name.lower()
+        for repo in self.repos:
+            if repo_name and repo.name != repo_name:
+                continue
+            if repo.has_module_generic(module_name):
+                return repo.get_manifest(module_name)
+        return None
+
+    def search_modules(self, text: str, repo_name: str = "") -> list:
+        """! @brief Search the module library without loading any modules.
+        Matches 'text' (case-insensitive) with the entity names,
+        descriptions, categories and interface names and types of modules.
+        @return List of the manifests of the matching modules."""
+        out = []
+        for repo in self.repos:
+            if repo_name and repo.name != repo_name:
+                continue
+            for name in repo.module_names:
+                manifest = repo.get_manifest(name)
+                if manifest_matches(manifest, text):
+                    out.append(manifest)
+        return out
+
+    def load_all_templates(self):
+        """! @brief Load the templates of all modules listed by manifest."""
+        for repo in self.repos:
+            for name in list(repo.manifests):
+                if name in repo.manifests:
+                    self.__load_listed_module__(repo, name)
+
     def get_category_dictionary(self, repo_name: str = ""):
         category_dict = None
         if repo_name:
@@ -330,6 +487,12 @@ class AsModuleLibrary:
             out[repo.name] = repo.modules
         return out
 
+    def get_dependency_graph(self) -> VHDLDependencyGraph:
+        """! @brief Return the dependency graph of the modules' VHDL files.
+        Built on each call; The scan results of unchanged files are cached.
+        """
+        return VHDLDependencyGraph.from_library(self)
+
     def list_modules(self, verbosity: bool = 0, repo_name: str = ""):
         """! @brief List the modules present in this module library.
         List the modules present in this module library using three degrees
@@ -342,13 +505,14 @@ class AsModuleLibrary:
                 if repo_name != reponame:
                     continue
             print("Repository '{}':".format(reponame))
-            modnames = sorted(mods[reponame].keys())
+            repo = self.get_repo(reponame)
+            modnames = sorted(repo.module_names)
             if verbosity == 0:
                 print(modnames)
                 continue
             # For verbosity > 0: print module details
             for module in modnames:
-                mods[reponame][module].list_module(verbosity - 1)
+                repo.get_module_generic(module).list_module(verbosity - 1)
                 print("~~~~~~")
             print("\n")
 
@@ -369,7 +533,10 @@ class AsModuleLibrary:
             )
             return False
 
-        if repo.has_module(module.entity_name):
+        if (
+            repo.has_module(module.entity_name)
+            and module.entity_name not in repo.manifests
+        ):
             LOG.info("Module '%s' already in module lib, skipping", module.name)
             return False
         LOG.debug("Adding module '%s' to module library.", module.entity_name)
@@ -402,24 +569,79 @@ class AsModuleLibrary:
             )
         for folder in mod_folders:
             folder_path = append_to_path(module_dir, folder)
-            if not os.path.isdir(folder_path):
-                continue
-            script_path = append_to_path(folder_path, cls.SCRIPT_FOLDER)
-            if not os.path.isdir(script_path):
-                continue
-            for file in os.listdir(script_path):
-                if cls.__script_name_valid__(file):
-                    scripts.append((folder_path, script_path + file))
+            scripts.extend(cls.__get_module_scripts_in_folder__(folder_path))
         return scripts
 
+    @classmethod
+    def __get_module_scripts_in_folder__(
+        cls, folder_path: str
+    ) -> Sequence[tuple]:
+        if not os.path.isdir(folder_path):
+            return []
+        script_path = append_to_path(folder_path, cls.SCRIPT_FOLDER)
+        if not os.path.isdir(script_path):
+            return []
+        return [
+            (folder_path, script_path + file)
+            for file in os.listdir(script_path)
+            if cls.__script_name_valid__(file)
+        ]
+
+    @classmethod
+    def __get_vhdl_files_in_dir__(cls, module_dir: str) -> Sequence[str]:
+        """! @brief Return the VHDL files named in the module specification
+        scripts of the modules in 'module_dir' (e.g. their toplevel files)."""
+        return cls.__get_vhdl_files_of_scripts__(
+            cls.__get_module_scripts_in_dir__(module_dir)
+        )
+
+    @classmethod
+    def __get_vhdl_files_of_scripts__(
+        cls, script_list: Sequence[tuple]
+    ) -> Sequence[str]:
+        """! @brief Return the VHDL files named in the module specification
+        scripts 'script_list' found in the hardware folders of their modules.
+        """
+        scripts = {}
+        for folder, script in script_list:
+            try:
+                with open(script, "r") as file:
+                    scripts.setdefault(folder, []).append(file.read())
+            except IOError:
+                continue
+        files = []
+        for folder in sorted(scripts):
+            code = "\n".join(scripts[folder])
+            hw_path = append_to_path(folder, cls.HARDWARE_FOLDER)
+            for root, _, names in os.walk(hw_path):
+                files.extend(
+                    os.path.join(root, name)
+                    for name in sorted(names)
+                    if name.endswith(cls.VHDL_SUFFIXES) and name in code
+                )
+        return files
+
     @classmethod
     def __get_modules_from_dir__(cls, module_dir: str) -> Sequence[AsModule]:
+        return list(cls.__iter_modules_from_dir__(module_dir))
+
+    @classmethod
+    def __iter_modules_from_dir__(cls, module_dir: str):
         # Make sure the module path is valid syntactically and ends in a "/"
         module_dir = append_to_path(module_dir, "/")
-        module_list = []
         # Get all module initialization scripts
         script_list = cls.__get_module_scripts_in_dir__(module_dir)
+        return cls.__iter_modules_from_scripts__(script_list)
 
+    @classmethod
+    def __get_modules_from_scripts__(
+        cls, script_list: Sequence[tuple]
+    ) -> Sequence[AsModule]:
+        return list(cls.__iter_modules_from_scripts__(script_list))
+
+    @classmethod
+    def __iter_modules_from_scripts__(cls, script_list: Sequence[tuple]):
+        """! @brief Generator: Run the scripts and yield the resulting modules."""
         for script in script_list:
             module_folder = script[0]
             script_path = script[1]
@@ -433,6 +655,7 @@ class AsModuleLibrary:
             # Get Python module and run / load it
             imported_script = importutil.module_from_spec(spec)
             spec.loader.exec_module(imported_script)
+            cls.spec_scripts[script_name] = imported_script
             LOG.debug(
                 "Modlib calls 'get_module_inst' of script '%s'", script_name
             )
@@ -440,14 +663,13 @@ class AsModuleLibrary:
             module_inst = imported_script.get_module_instance(module_folder)
             LOG.debug(
                 "Modlib received '%s' from script '%s'",
-                str(module_inst),
+                module_inst,
                 script_name,
             )
             # If the output is an AsModule, add it to the library
             if isinstance(module_inst, AsModule):
                 # Add the module source dir, making sure it
                 module_inst.module_dir = module_folder
-                module_list.append(module_inst)
                 # Discover driver files for this module:
                 # If this module already has files manually assigned,
                 # don't scan default location
@@ -461,18 +683,149 @@ class AsModuleLibrary:
                     module_inst.driver_files = [
                         os.path.realpath(df) for df in module_inst.driver_files
                     ]
-        return module_list
+                yield module_inst
 
     def __get_and_add_modules_from_dir__(
-        self, module_dir: str, repo: AsModuleRepo
+        self, module_dir: str, repo: AsModuleRepo, module_callback=None
     ) -> Sequence[str]:
-        modules = self.__get_modules_from_dir__(module_dir)
         name_list = []
         # Count the number of modules that are actually added to the library
-        for mod in modules:
+        for mod in self.__iter_modules_from_dir__(module_dir):
             if self.add_module(mod, repo):
                 name_list.append(mod.entity_name)
+                if module_callback is not None:
+                    module_callback(mod.entity_name, repo.name)
+        return name_list
+
+    def __list_modules_from_index__(
+        self,
+        module_dir: str,
+        repo: AsModuleRepo,
+        module_callback=None,
+        jobs: int = 1,
+    ) -> Sequence[str]:
+        """! @brief Register the modules of a repository by their manifests.
+        Module folders changed since the manifest index was written are
+        loaded and indexed again; The index file is updated."""
+        index = AsModuleIndex.load(module_dir)
+        folders = {}
+        for script in self.__get_module_scripts_in_dir__(module_dir):
+            folders.setdefault(script[0], []).append(script)
+        manifests = {
+            folder: index.get_folder_modules(folder) for folder in folders
+        }
+        stale = [folder for folder in folders if manifests[folder] is None]
+        LOG.debug(
+            "Module index of '%s': %i of %i folders changed.",
+            module_dir,
+            len(stale),
+            len(folders),
+        )
+        if stale and jobs != 1:
+            as_vhdl_reader.prescan_vhdl_files(
+                self.__get_vhdl_files_of_scripts__(
+                    [script for folder in stale for script in folders[folder]]
+                ),
+                jobs,
+            )
+        name_list = []
+        for folder, scripts in folders.items():
+            if manifests[folder] is None:
+                modules = self.__get_modules_from_scripts__(scripts)
+                index.update_folder(folder, modules)
+                added = [
+                    mod.entity_name
+                    for mod in modules
+                    if self.add_module(mod, repo)
+                ]
+            else:
+                added = [
+                    manifest["entity"]
+                    for manifest in manifests[folder]
+                    if repo.register_manifest(manifest)
+                ]
+            for name in added:
+                name_list.append(name)
+                if module_callback is not None:
+                    module_callback(name, repo.name)
+        index.remove_other_folders(folders)
+        if index.modified:
+            index.save()
         return name_list
 
+    def __load_listed_module__(self, repo: AsModuleRepo, entity_name: str):
+        """! @brief Load the templates of the module folder of a module
+        listed by its manifest (see 'AsModuleRepo.register_manifest')."""
+        folder = repo.manifests[entity_name]["folder"]
+        LOG.debug("Loading listed module '%s' from '%s'.", entity_name, folder)
+        scripts = self.__get_module_scripts_in_folder__(folder)
+        for module in self.__get_modules_from_scripts__(scripts):
+            self.add_module(module, repo)
+        # Specification changed, but the index was not updated yet
+        if entity_name in repo.manifests:
+            repo.unregister_module(entity_name)
+        as_vhdl_reader.update_cache_dir()
+
+    def get_module_folder_of_file(self, file_path: str) -> tuple:
+        """! @brief Find the repository and module folder 'file_path' is in.
+        Returns a tuple (repository, module folder path)
+        or (None, "") if the file is not part of any repository."""
+        file_path = os.path.realpath(file_path)
+        for repo in self.repos:
+            repo_path = append_to_path(repo.path, "/")
+            if file_path.startswith(repo_path):
+                folder = file_path[len(repo_path) :].split("/", maxsplit=1)[0]
+                return repo, append_to_path(repo_path, folder)
+        return None, ""
+
+    def reload_module_folders(self, changed_files: Sequence[str]) -> list:
+        """! @brief Re-read only the module templates affected by 'changed_files'.
+        All modules in the module folders containing any of the changed files
+        are removed and their specification scripts are executed again.
+        Modules using a changed file from another folder are reloaded as well.
+        @param changed_files: Paths of files that were modified, added or removed.
+        @return A list of the entity names of all (re)loaded modules."""
+        folders = {}
+        changed_files = set(os.path.realpath(fpath) for fpath in changed_files)
+        for fpath in changed_files:
+            repo, folder = self.get_module_folder_of_file(fpath)
+            if repo is not None:
+                folders[folder] = repo
+        # Modules may reference files outside of their module folder
+        for repo in self.repos:
+            for module in repo.modules.values():
+                # Relative file paths are relative to the module folder
+                files = [
+                    os.path.join(module.module_dir, fpath)
+                    for fpath in module.files
+                ]
+                files.extend(module.driver_files)
+                if not changed_files.isdisjoint(
+                    os.path.realpath(fpath) for fpath in files
+                ):
+                    folders[module.module_dir] = repo
+            for manifest in repo.manifests.values():
+                files = manifest["files"] + manifest["driver_files"]
+                if not changed_files.isdisjoint(files):
+                    folders[manifest["folder"]] = repo
+        reloaded = []
+        for folder, repo in folders.items():
+            for name in [
+                name
+                for name, module in repo.modules.items()
+                if module.module_dir == folder
+            ] + [
+                name
+                for name, manifest in repo.manifests.items()
+                if manifest["folder"] == folder
+            ]:
+                repo.unregister_module(name)
+            scripts = self.__get_module_scripts_in_folder__(folder)
+            for module in self.__get_modules_from_scripts__(scripts):
+                if self.add_module(module, repo):
+                    reloaded.append(module.entity_name)
+        LOG.info("Reloaded module templates: %s", reloaded)
+        return reloaded
+
 
 ## @}
@@ -53,7 +53,7 @@ from as_automatics_port import Port
 from as_automatics_logging import get_log
 
 
-LOG = get_log()
+LOG = get_log("writer")
 
 ## @ingroup automatics_mngtm
 class AsModuleWrapper(AsModuleGroup):
@@ -76,6 +76,9 @@ class AsModuleWrapper(AsModuleGroup):
         self.standard_ports = []
         self.parent = parent
         self.chain = chain
+        ## Wrapper of an identical module whose entity this wrapper uses
+        ## (see 'share_identical_wrappers')
+        self.shared_wrapper = None
 
     def define_module_to_wrap(self, module: AsModule):
         self.modules = [module]
@@ -114,6 +117,30 @@ class AsModuleWrapper(AsModuleGroup):
                 nport.outgoing.append(port)
                 port.incoming = nport
 
+    def get_ooc_signature(self) -> tuple:
+        """! @brief Return a key identical for wrappers of identical modules:
+        The wrapped entity, its generic values and the wrapper ports."""
+        mod = self.modules[0]
+        generics = tuple(
+            sorted(
+                (gen.code_name, str(gen.get_value())) for gen in mod.generics
+            )
+        )
+        ports = tuple(
+            (
+                port.code_name,
+                port.direction,
+                port.data_type,
+                str(port.data_width),
+            )
+            for port in self.get_full_port_list(include_signals=False)
+        )
+        windows = tuple(
+            (winter.window.x, winter.window.y)
+            for winter in getattr(self, "window_interfaces", [])
+        )
+        return (mod.entity_name, generics, ports, windows)
+
     def get_full_port_list(self, include_signals=True):
         portlist = super().get_full_port_list(include_signals)
         if self.modules and isinstance(self.modules[0], AsWindowModule):
@@ -171,3 +198,30 @@ class AsModuleWrapper(AsModuleGroup):
             mport.incoming = sig
             window_ports.append(wport)
         return window_ports
+
+
+## @ingroup automatics_mngtm
+def share_identical_wrappers(wrappers: list) -> dict:
+    """! @brief Let wrappers of identical modules share one wrapper entity.
+    The entity of the first wrapper of each group of identical wrappers is
+    instantiated in place of the others, so it is synthesized out-of-context
+    only once. The other wrappers are not written to files.
+    @param wrappers: List of AsModuleWrapper objects.
+    @return Dictionary: Shared wrapper -> list of the wrappers using it."""
+    groups = {}
+    shared = {}
+    for wrapper in wrappers:
+        key = wrapper.get_ooc_signature()
+        first = groups.setdefault(key, wrapper)
+        shared.setdefault(first, [])
+        if first is wrapper:
+            continue
+        wrapper.shared_wrapper = first
+        wrapper.entity_name = first.entity_name
+        shared[first].append(wrapper)
+        LOG.info(
+            "Module wrapper '%s' reuses the identical wrapper '%s'.",
+            wrapper.name,
+            first.name,
+        )
+    return shared
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_packaging.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Run external tools (e.g. the Vivado IP-Core packaging) as observable jobs:
+Captured output, progress and per-phase timings, timeouts and cancellation,
+several jobs at once.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_packaging.py
+# @ingroup automatics_generate
+# @author Philip Manke
+# @brief Observable packaging jobs running external tools.
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import time
+import signal
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_generate
+# @{
+
+## Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+## Phase of a job before the first progress marker
+STARTUP_PHASE = "startup"
+
+## Progress markers printed by 'packaging.tcl' and its TCL fragments:
+## (pattern, name of the phase starting with the marker)
+PACKAGING_PHASES = (
+    (re.compile(r"Updating the compile order of all sources"), "sources"),
+    (re.compile(r"Generating Out-of-Context Synthesis Runs"), "ooc_setup"),
+    (re.compile(r"Running \d+ Out-of-Context Synthesis Runs"), "ooc_synthesis"),
+    (re.compile(r"Updating compile order and packaging"), "packaging"),
+    (re.compile(r"Saving IP-Core"), "saving"),
+)
+## Progress of the OOC fileset setup ("<n> of <total>")
+OOC_PROGRESS = re.compile(r"^\s*(\d+) of (\d+)\s*$")
+## Lines reporting a failure, even if the tool exits normally
+PACKAGING_FAILURES = (
+    re.compile(r"Encountered an error during IP packaging"),
+    re.compile(r"Out-of-Context Synthesis Run \S+ failed"),
+)
+
+## Seconds between terminating and killing a cancelled job
+KILL_GRACE_PERIOD = 5.0
+
+
+class PackagingJob:
+    """! @brief An external tool run with captured output.
+    The tool runs in 'cwd' using a copy of the environment of this process,
+    updated with 'env'. The working directory of this process is unchanged,
+    so jobs can run in threads.
+    Every output line is stored in 'output', appended to 'log_path' (if set)
+    and passed to the 'on_line' callback. Lines matching one of the
+    'phases' patterns start a new phase; The time spent in each phase is
+    recorded in 'phase_times'. The 'on_progress' callback is called with
+    the job whenever the phase or the OOC progress changes."""
+
+    def __init__(
+        self,
+        command: list,
+        cwd: str,
+        env: dict = None,
+        timeout: float = None,
+        log_path: str = "",
+        name: str = "",
+        phases: tuple = PACKAGING_PHASES,
+        failures: tuple = PACKAGING_FAILURES,
+    ):
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        ## Seconds until the job is terminated (None: no limit)
+        self.timeout = timeout
+        self.log_path = log_path
+        self.name = name or os.path.basename(os.path.normpath(cwd))
+        self.phases = phases
+        self.failures = failures
+        ## Callbacks: on_line(job, line), on_progress(job)
+        self.on_line = None
+        self.on_progress = None
+
+        self.status = PENDING
+        self.returncode = None
+        self.error = ""
+        self.output = []
+        self.phase = STARTUP_PHASE
+        ## Phase name -> seconds, in the order the phases started
+        self.phase_times = {}
+        ## Progress of the OOC setup: (done, total)
+        self.ooc_progress = (0, 0)
+        self.start_time = None
+        self.end_time = None
+        self._process = None
+        self._phase_start = None
+        self._cancelled = False
+        self._timed_out = False
+        self._lock = threading.Lock()
+
+    @property
+    def success(self) -> bool:
+        return self.status == DONE
+
+    def get_duration(self) -> float:
+        """! @brief Return the run time of the job in seconds."""
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.monotonic()) - self.start_time
+
+    def run(self) -> bool:
+        """! @brief Run the job, blocking until the tool exits.
+        @return True if the tool finished successfully."""
+        environment = dict(os.environ)
+        if self.env:
+            environment.update(self.env)
+        self.start_time = time.monotonic()
+        self._phase_start = self.start_time
+        self.status = RUNNING
+        log_file = None
+        try:
+            if self.log_path:
+                log_file = open(self.log_path, "w")
+            with self._lock:
+                if self._cancelled:
+                    raise InterruptedError("Cancelled before start")
+                self._process = subprocess.Popen(
+                    self.command,
+                    cwd=self.cwd,
+                    env=environment,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    universal_newlines=True,
+                    bufsize=1,
+                    # Own process group: Stop the tool's child processes too
+                    start_new_session=(os.name == "posix"),
+                )
+            timer = None
+            if self.timeout:
+                timer = threading.Timer(self.timeout, self._on_timeout)
+                timer.daemon = True
+                timer.start()
+            try:
+                for line in self._process.stdout:
+                    self._handle_line(line.rstrip("\n"), log_file)
+                self.returncode = self._process.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        except InterruptedError:
+            pass
+        except (OSError, ValueError) as err:
+            self.error = "Could not run '{}': {}".format(
+                " ".join(self.command), str(err)
+            )
+        finally:
+            if log_file is not None:
+                log_file.close()
+        self._finish()
+        return self.success
+
+    def cancel(self):
+        """! @brief Terminate the job (from another thread)."""
+        with self._lock:
+            self._cancelled = True
+            self._stop_process()
+
+    def _on_timeout(self):
+        with self._lock:
+            self._timed_out = True
+            self._stop_process()
+
+    def _stop_process(self):
+        proc = self._process
+        if proc is None or proc.poll() is not None:
+            return
+        self._signal(proc, signal.SIGTERM)
+        try:
+            proc.wait(KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            self._signal(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    @staticmethod
+    def _signal(proc: subprocess.Popen, sig: int):
+        try:
+            if os.name == "posix":
+                os.killpg(proc.pid, sig)
+            else:
+                proc.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _handle_line(self, line: str, log_file):
+        self.output.append(line)
+        if log_file is not None:
+            log_file.write(line + "\n")
+            log_file.flush()
+        if self.on_line is not None:
+            self.on_line(self, line)
+        if any(pattern.search(line) for pattern in self.failures):
+            self.error = line.strip()
+        match = OOC_PROGRESS.match(line)
+        if match:
+            self.ooc_progress = (int(match.group(1)), int(match.group(2)))
+            self._notify()
+            return
+        for pattern, phase in self.phases:
+            if pattern.search(line):
+                self._set_phase(phase)
+                return
+
+    def _set_phase(self, phase: str):
+        now = time.monotonic()
+        self.phase_times[self.phase] = (
+            self.phase_times.get(self.phase, 0.0) + now - self._phase_start
+        )
+        self.phase = phase
+        self._phase_start = now
+        self._notify()
+
+    def _notify(self):
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def _finish(self):
+        self.end_time = time.monotonic()
+        self.phase_times[self.phase] = (
+            self.phase_times.get(self.phase, 0.0)
+            + self.end_time
+            - self._phase_start
+        )
+        if self._cancelled:
+            self.status = CANCELLED
+        elif self._timed_out:
+            self.status = TIMEOUT
+            self.error = "Timeout after {} seconds".format(self.timeout)
+        elif self.returncode is None:
+            self.status = FAILED
+        elif self.returncode != 0:
+            self.status = FAILED
+            if not self.error:
+                self.error = "Exit status {}".format(self.returncode)
+        elif self.error:
+            self.status = FAILED
+        else:
+            self.status = DONE
+        self._process = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "command": self.command,
+            "cwd": self.cwd,
+            "status": self.status,
+            "returncode": self.returncode,
+            "error": self.error,
+            "seconds": round(self.get_duration(), 3),
+            "phase_seconds": {
+                phase: round(secs, 3)
+                for phase, secs in self.phase_times.items()
+            },
+            "log": self.log_path,
+        }
+
+
+class PackagingRunner:
+    """! @brief Run several PackagingJobs at the same time."""
+
+    def __init__(self, jobs: int = 0):
+        ## Number of jobs running at the same time (0: number of CPUs)
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.running = []
+        self._lock = threading.Lock()
+
+    def run(self, packaging_jobs: list) -> list:
+        """! @brief Run 'packaging_jobs', blocking until all are finished.
+        @return The list of jobs (see PackagingJob.status)."""
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            list(pool.map(self._run_job, packaging_jobs))
+        return packaging_jobs
+
+    def cancel(self):
+        """! @brief Cancel all running jobs (from another thread)."""
+        with self._lock:
+            for job in self.running:
+                job.cancel()
+
+    def _run_job(self, job: PackagingJob):
+        with self._lock:
+            self.running.append(job)
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                self.running.remove(job)
+        return job
+
+
+## @}
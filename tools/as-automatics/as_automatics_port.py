@@ -43,28 +43,149 @@ Implements the class 'Port' for Automatics.
 
 import copy
 
-from collections import namedtuple, deque
+from collections import namedtuple
 from typing import Sequence
 
 from as_automatics_exceptions import AsAssignError
-from as_automatics_helpers import get_printable_datatype
+from as_automatics_helpers import get_printable_datatype, intern_name
 
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ## @ingroup automatics_intrep
+def _immutable_copy(self, memo=None):
+    """! @brief Copy method of immutable value objects: Returns the object.
+    Copies of ports and modules share these objects (flyweights)."""
+    return self
+
+
+## @ingroup automatics_connection
+class RuleAction(namedtuple("RuleAction", "action kind arg")):
+    """! @brief A parsed port rule action.
+    'action' is the action as written in the ruleset, 'kind' the type of
+    the action (e.g. 'fallback_port') and 'arg' its argument (or '')."""
+
+    __slots__ = ()
+    __copy__ = __deepcopy__ = _immutable_copy
+
+
+## Rule actions without an argument
+SIMPLE_RULE_ACTIONS = (
+    "connect",
+    "forceconnect",
+    "make_external",
+    "note",
+    "warning",
+    "error",
+    "none",
+)
+
+
+## @ingroup automatics_connection
+def parse_rule_action(action: str) -> RuleAction:
+    """! @brief Split a port rule action into its type and argument.
+    E.g.: 'bundle_and' -> ('bundle', 'and'),
+    'fallback_port(strobe_in)' -> ('fallback_port', 'strobe_in').
+    Unknown actions are of the type 'invalid'."""
+    if action in SIMPLE_RULE_ACTIONS:
+        return RuleAction(action, action, "")
+    if "bundle" in action:
+        return RuleAction(
+            action, "bundle", action.replace("bundle", "").strip("_ ")
+        )
+    for kind in ("fallback_port", "fallback_signal"):
+        if kind in action:
+            return RuleAction(action, kind, action.replace(kind, "").strip("()"))
+    if "set_value" in action:
+        return RuleAction(
+            action, "set_value", action.replace("set_value", "")[1:-1]
+        )
+    return RuleAction(action, "invalid", "")
+
+
+## @ingroup automatics_connection
+class RuleTable:
+    """! @brief Compiled form of a port ruleset.
+    'conditions': Tuple of the rule conditions in the order of the ruleset,
+                  together with their evaluation function
+                  (None for invalid conditions).
+    'actions': Dictionary: Rule condition -> tuple of RuleAction.
+    Rule tables are cached per ruleset (see 'Port.get_rule_table') and shared
+    by all ports using an equal ruleset."""
+
+    __slots__ = ("conditions", "actions")
+    __copy__ = __deepcopy__ = _immutable_copy
+
+    def __init__(self, ruleset: Sequence, condition_eval: dict):
+        self.actions = {}
+        for rule in ruleset:
+            self.actions.setdefault(rule.condition, []).append(
+                parse_rule_action(rule.action)
+            )
+        for cond in self.actions:
+            self.actions[cond] = tuple(self.actions[cond])
+        self.conditions = tuple(
+            (cond, condition_eval.get(cond)) for cond in self.actions
+        )
+
+
+# Compiled rulesets: ruleset (tuple of Port.Rule) -> RuleTable
+_rule_tables = {}
+
+
 class Port:
     """! @brief Class representing a VHDL Port.
     Description of a single port (^= signal interfacing with a hardware
     module within an ASTERICS processing chain), along with some
     meta-information for Automatics (the processing chain generator)"""
 
+    # Thousands of ports exist in a large chain: No per instance dictionary
+    __slots__ = (
+        "ruleset",
+        "data_type",
+        "optional",
+        "data_width",
+        "parent",
+        "name",
+        "code_name",
+        "direction",
+        "port_type",
+        "connected",
+        "glue_signal",
+        "in_entity",
+        "incoming",
+        "outgoing",
+        "generics",
+        "window_config",
+        # Attributes set by the 2D Window Pipeline, only present if set
+        "delay",
+        "line_dw",
+        "line_width",
+        "nodelay",
+        "no_stall",
+    )
+
     ## @ingroup automatics_intrep
     class DataWidth(namedtuple("DataWidth", "a sep b")):
         """! @brief Describes a VHDL range: (a [down]to b) as a namedtuple (a, sep, b).
-        Non-vector types (e.g. std_logic) are described by (1, None, None)."""
+        Non-vector types (e.g. std_logic) are described by (1, None, None).
+        DataWidth objects are flyweights: Equal values share one object."""
+
+        __slots__ = ()
+        _instances = {}
+        __copy__ = __deepcopy__ = _immutable_copy
+
+        def __new__(cls, a, sep, b):
+            key = (type(a), a, sep, type(b), b)
+            try:
+                return cls._instances[key]
+            except KeyError:
+                new = cls._instances[key] = super().__new__(cls, a, sep, b)
+                return new
+            except TypeError:  # Unhashable values
+                return super().__new__(cls, a, sep, b)
 
         def __str__(self):
             if self.sep is not None:
@@ -152,8 +273,17 @@ class Port:
 
     # __ END class DataWidth __
 
-    Rule = namedtuple("Rule", "condition action")
-    WindowReference = namedtuple("WindowReference", "x y intername")
+    class Rule(namedtuple("Rule", "condition action")):
+        """! @brief A port rule: Apply 'action' if 'condition' is met."""
+
+        __slots__ = ()
+        __copy__ = __deepcopy__ = _immutable_copy
+
+    class WindowReference(namedtuple("WindowReference", "x y intername")):
+        """! @brief Position of a port in the window of a 2D window module."""
+
+        __slots__ = ()
+        __copy__ = __deepcopy__ = _immutable_copy
 
     directions = ("in", "out", "inout")
     port_types = (
@@ -207,10 +337,10 @@ class Port:
     }
 
     # Default rules applied to all ports initially
-    default_rules = [
+    default_rules = (
         Rule("both_present", "connect"),
         Rule("sink_missing", "note"),
-    ]
+    )
 
     def __init__(
         self,
@@ -224,15 +354,16 @@ class Port:
     ):
 
         # This ruleset describes how this port is going to be connected
-        self.ruleset = deque(self.default_rules)
+        # Rulesets are tuples, shared by copies of the port until modified
+        self.ruleset = self.default_rules
 
         # Actual data type of this VHDL port (eg: bit, std_logic, integer, ...)
-        self.data_type = data_type
+        self.data_type = intern_name(data_type)
         self.optional = optional  # Is this port optional (for interfaces)
         self.data_width = data_width  # VHDL data vector width
         self.parent = None
-        self.name = name  # "Base" name of this port
-        self.code_name = code_name  # Name in VHDL of this port
+        self.name = intern_name(name)  # "Base" name of this port
+        self.code_name = intern_name(code_name)  # Name in VHDL of this port
 
         self.direction = "in"  # Data direction
         self.port_type = "interface"
@@ -393,7 +524,9 @@ class Port:
 
         rule = self.Rule(rule_condition, rule_action)
         if self.__check_rule__(rule):
-            self.ruleset.insert(position, rule)
+            ruleset = list(self.ruleset)
+            ruleset.insert(position, rule)
+            self.ruleset = tuple(ruleset)
             return True
         return False
 
@@ -437,32 +570,41 @@ class Port:
             return False
         return True
 
+    def get_rule_table(self) -> RuleTable:
+        """! @brief Return the compiled form of this Port's ruleset."""
+        try:
+            return _rule_tables[self.ruleset]
+        except KeyError:
+            table = RuleTable(self.ruleset, self.rule_condition_eval)
+            _rule_tables[self.ruleset] = table
+            return table
+        except TypeError:
+            # Unhashable ruleset (set directly, not as a tuple): Don't cache
+            return RuleTable(self.ruleset, self.rule_condition_eval)
+
     def get_rule_actions(self, rule_condition: str) -> Sequence[str]:
         """! @brief Return a list of all actions set for 'rule_contition'."""
         return [
-            rule.action
-            for rule in self.ruleset
-            if rule.condition == rule_condition
+            action.action
+            for action in self.get_rule_table().actions.get(
+                rule_condition, ()
+            )
         ]
 
     def reset_ruleset(self):
         """! @brief Sets the ruleset to the default rules."""
-        self.ruleset = copy.copy(self.default_rules)
+        self.ruleset = self.default_rules
 
     def get_rule_conditions(self) -> Sequence[str]:
         """! @brief Return the conditions that are part of this Port's ruleset.
         Return a list of all rule conditions that have an action set for this port.
         """
-        conditions = []
-        for rule in self.ruleset:
-            if rule.condition not in conditions:
-                conditions.append(rule.condition)
-        return conditions
+        return [cond for cond, _ in self.get_rule_table().conditions]
 
     def overwrite_rule(self, rule_condition: str, new_action: str) -> bool:
         """! @brief Replaces the rule actions of an existing rule condition.
         If that rule condition doesn't already exist, it is added."""
-        new_ruleset = deque()
+        new_ruleset = []
         overwrite = False
         ovw_rule = self.Rule(rule_condition, new_action)
 
@@ -476,7 +618,7 @@ class Port:
                     new_ruleset.append(ovw_rule)
             else:
                 new_ruleset.append(rule)
-        self.ruleset = new_ruleset
+        self.ruleset = tuple(new_ruleset)
         return True
 
     ## @ingroup automatics_connection
@@ -510,7 +652,9 @@ class Port:
             return False
         else:
             rule = rule[0]
-            self.ruleset.remove(rule)
+            ruleset = list(self.ruleset)
+            ruleset.remove(rule)
+            self.ruleset = tuple(ruleset)
         return True
 
     def remove_condition(self, rule_condition: str) -> list:
@@ -518,7 +662,7 @@ class Port:
         Remove 'rule_condition' from the ruleset
         along with all rule actions that were defined.
         Returns all removed rules."""
-        new_ruleset = deque()
+        new_ruleset = []
         out = []
         for rule in self.ruleset:
             if rule.condition != rule_condition:
@@ -543,14 +687,16 @@ class Port:
         Duplicates are ignored.
         @param rules: Iterable containing rules of the type 'Port.Rule'
         @param priority: If True all new rules are evaluated first."""
+        ruleset = list(self.ruleset)
         for rule in rules:
             if not self.__check_rule__(rule):
                 continue
-            if rule not in self.ruleset:
+            if rule not in ruleset:
                 if priority:
-                    self.ruleset.appendleft(rule)
+                    ruleset.insert(0, rule)
                 else:
-                    self.ruleset.append(rule)
+                    ruleset.append(rule)
+        self.ruleset = tuple(ruleset)
 
     def set_ruleset(self, new_ruleset: list) -> bool:
         """! @brief Overwrites the current ruleset with the provided list of rules.
@@ -565,7 +711,7 @@ class Port:
             raise AsAssignError(
                 self, "Parameter passed to 'set_ruleset' is not iterable!"
             )
-        self.ruleset = deque(t_ruleset)
+        self.ruleset = tuple(t_ruleset)
         return True
 
     def list_ruleset(self) -> int:
@@ -675,7 +821,6 @@ class Port:
         ('incoming, outgoing, connected and glue_signal).
         Returns the duplicate port object."""
         dupe = copy.copy(self)
-        dupe.ruleset = copy.copy(self.ruleset)
         dupe.incoming = None
         dupe.outgoing = []
         dupe.connected = False
@@ -689,6 +834,8 @@ class StandardPort(Port):
     Has a different default ruleset and serves as a way to differentiate
     between "normal" and "standard" ports."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         name: str = "",
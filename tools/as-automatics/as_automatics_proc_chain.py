@@ -54,7 +54,7 @@ from hashlib import sha256
 from asterics import is_vivado_available
 from as_automatics_module import AsModule
 from as_automatics_module_group import AsModuleGroup
-from as_automatics_port import Port, StandardPort
+from as_automatics_port import Port, StandardPort, parse_rule_action
 from as_automatics_signal import GlueSignal, GenericSignal
 from as_automatics_interface import Interface
 from as_automatics_module_lib import AsModuleLibrary
@@ -71,9 +71,17 @@ from as_automatics_helpers import extract_generics, foreach
 
 import as_automatics_logging as as_log
 import as_automatics_connection_helper as as_conh
+import as_automatics_snapshot as as_snap
+import as_automatics_address_space as as_addr
+import as_automatics_throughput as as_tput
+import as_automatics_stream_fifo as as_sfifo
+import as_automatics_latency as as_lat
+import as_automatics_memory_bandwidth as as_membw
+import as_automatics_resources as as_res
+import as_automatics_chain_diff as as_diff
 
 # Get logging object reference
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ## @ingroup automatics_intrep
@@ -84,6 +92,8 @@ class AsProcessingChain:
 
     # namedtuple template for port-to-port connections
     Connection = namedtuple("Connection", "source sink")
+    # Qualified name is required to pickle the nested named tuple
+    Connection.__qualname__ = "AsProcessingChain.Connection"
 
     # Error manager:
     err_mgr = None
@@ -94,8 +104,11 @@ class AsProcessingChain:
 
     NAME_FRAGMENTS_REMOVED_ON_TOPLEVEL = ("as", "main")
 
-    def __init__(self, module_lib: AsModuleLibrary, parent):
+    def __init__(self, module_lib: AsModuleLibrary, parent, err_mgr=None):
         self.parent = parent
+        if err_mgr is not None:
+            # Chains of an AsSession have their own error manager
+            self.err_mgr = err_mgr
         self.library = module_lib
         self.top = AsTop(self)
         self.as_main = AsMain(self.top, self)
@@ -103,8 +116,10 @@ class AsProcessingChain:
         self.modules = []
         self.user_cons = []
         self.address_space = {}
+        # Register interface name -> pinned base address
+        self.pinned_base_addresses = {}
+        self.address_allocator = None
         self.max_regs_per_module = 0
-        self.cur_addr = 0
         self.mod_addr_width = 0
         self.reg_addr_width = 0
         self.asterics_top_addr = self.asterics_base_addr + 0x0000FFFF
@@ -112,6 +127,10 @@ class AsProcessingChain:
         self.auto_connect_run = False
         self.auto_instantiated = None
         self.pipelines = []
+        ## Automatic stream FIFO insertion (see 'set_auto_stream_fifos')
+        self.auto_stream_fifos = False
+        self.stream_fifo_targets = None
+        self.stream_fifo_report = None
         for module in [self.as_main, self.top]:
             for inter in module.interfaces:
                 # Assign a unique name to all interfaces, so that two as_streams
@@ -131,6 +150,22 @@ class AsProcessingChain:
         self.asterics_base_addr = base_address
         self.asterics_top_addr = base_address + address_space_size
 
+    def set_register_base_address(
+        self, module, address: int, regif_suffix: str = ""
+    ):
+        """! @brief Pin the base address of a module's register interface.
+        Keeps the registers of the module at a fixed address, e.g. for
+        software compatibility between different systems. Other register
+        interfaces are placed around the pinned ones. The address must be
+        aligned to the size of the register interfaces in the address space
+        (4 bytes times the largest register count, rounded to a power of 2).
+        @param module: The module (AsModule or module name).
+        @param address: Absolute base address (including the ASTERICS base).
+        @param regif_suffix: Name suffix of the register interface,
+                             if the module has more than one."""
+        name = getattr(module, "name", module)
+        self.pinned_base_addresses[name + regif_suffix] = address
+
     def get_hash(self) -> str:
         """! @brief Provide a SHA256 hash based on the configuration of this processing chain.
         Can be used to identify this ASTERICS processing chain."""
@@ -153,7 +188,11 @@ class AsProcessingChain:
 
     ## @ingroup automatics_generate
     def write_hw(
-        self, path: str, use_symlinks: bool = True, force: bool = False
+        self,
+        path: str,
+        use_symlinks: bool = True,
+        force: bool = False,
+        jobs: int = 1,
     ):
         """! @brief Generate the VHDL hardware files of this ASTERICS chain.
         Wrapper function for AsAutomatics._write_hw.
@@ -163,6 +202,8 @@ class AsProcessingChain:
         @param path: String - Where to put the output. Relative or static path.
         @param use_symlinks: Whether to copy or link to source files.
         @param force: If 'True', deletes anything in the output directory.
+        @param jobs: Number of processes writing module group files in
+                     parallel (0: number of CPUs).
         """
         if not self.auto_connect_run:
             try:
@@ -174,7 +215,9 @@ class AsProcessingChain:
             LOG.critical("Abort! Errors occurred during system build:")
             self.err_mgr.print_errors()
             return False
-        return self.parent._write_hw(path, use_symlinks, allow_deletion=force)
+        return self.parent._write_hw(
+            path, use_symlinks, allow_deletion=force, jobs=jobs
+        )
 
     ## @ingroup automatics_generate
     def write_sw(
@@ -352,9 +395,11 @@ class AsProcessingChain:
         show_ports: bool = False,
         show_unconnected: bool = False,
         show_line_buffers: bool = False,
-    ):
+        output_format: str = "svg",
+        collapse: str = "none",
+    ) -> bool:
         """! @brief Generate an SVG graph of this ASTERICS processing chain.
-        Wraps as_automatics_visual::system_graph().
+        Wraps as_automatics_graph_export::write_chain_graph().
         Generates and writes a graph representation of the ASTERICS chain
         and, if present, the 2D Window Pipelines using GraphViz Dot.
         @param out_file: Path and filename of the graph to generate.
@@ -367,6 +412,14 @@ class AsProcessingChain:
         @param show_line_buffers  Add a representation for row buffers for
                 2D Window Pipeline subsystems.
                 Note: This feature is not tested / in alpha stage of development.
+        @param output_format: 'svg' (requires the Graphviz 'dot' program),
+                              'dot' or 'json' (node and edge list). ['svg']
+        @param collapse: Show parts of large systems as single nodes:
+                         'none': All modules are shown.
+                         'layer': CNN layers are shown as single nodes.
+                         'pipeline': 2D Window Pipelines are single nodes.
+                         'group': Module groups are single nodes. ['none']
+        @return True if the graph was written.
         """
         if not self.auto_connect_run:
             try:
@@ -379,7 +432,7 @@ class AsProcessingChain:
             self.err_mgr.print_errors()
             return False
 
-        self.parent._write_system_graph(
+        return self.parent._write_system_graph(
             self,
             out_file,
             show_toplevels,
@@ -387,6 +440,8 @@ class AsProcessingChain:
             show_ports,
             show_unconnected,
             show_line_buffers,
+            output_format,
+            collapse,
         )
 
     def add_module(
@@ -472,6 +527,237 @@ class AsProcessingChain:
             (mod for mod in self.module_groups if mod.name == module_name), None
         )
 
+    ## @ingroup automatics_cds
+    def save_snapshot(self, path: str) -> bool:
+        """! @brief Save this processing chain to a snapshot file.
+        If necessary, auto_connect() is called before saving the snapshot.
+        The snapshot can be restored using 'asterics.load_snapshot(path)',
+        as long as the module library is unchanged.
+        @param path: The file to write the snapshot to.
+        @return True on success, else False."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return False
+        try:
+            as_snap.save_snapshot(self, path)
+        except AsError:
+            return False
+        return True
+
+    ## @ingroup automatics_cds
+    def write_description(self, path: str) -> bool:
+        """! @brief Save the structure of this chain to a JSON file.
+        The description lists the modules, generics, connections, line
+        buffers and registers of the chain. Compare two descriptions
+        using 'chain.diff' or 'asterics.chain_diff'.
+        If necessary, auto_connect() is called first.
+        @param path: The output file.
+        @return True on success, else False."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return False
+        try:
+            as_diff.write_chain_description(self, path)
+        except AsError as err:
+            LOG.error(str(err))
+            return False
+        return True
+
+    ## @ingroup automatics_cds
+    def diff(self, other):
+        """! @brief Compare this chain structurally with 'other'.
+        Reports added and removed modules, changed generics, rewired
+        connections, changed line buffers and register addresses.
+        If necessary, auto_connect() is called for both chains first.
+        @param other: Another processing chain, or the path to a chain
+                      description (see 'write_description').
+        @return A ChainDiff (see as_automatics_chain_diff.py), None if a
+                chain could not be connected."""
+        for chain in (self, other):
+            if isinstance(chain, AsProcessingChain) and not (
+                chain.auto_connect_run
+            ):
+                try:
+                    chain.auto_connect()
+                except AsError:
+                    return None
+        try:
+            return as_diff.chain_diff(self, other)
+        except AsError as err:
+            LOG.error(str(err))
+            return None
+
+    ## @ingroup automatics_cds
+    def write_address_map(
+        self, path: str, output_format: str = "json", name: str = "asterics"
+    ) -> bool:
+        """! @brief Export the slave register map of this processing chain.
+        If necessary, auto_connect() is called before exporting the output.
+        @param path: The output file.
+        @param output_format: 'json', 'csv', 'h' (C header) or
+                              'rdl' (SystemRDL-like description).
+        @param name: Name of the address map (prefix in the C header).
+        @return True on success, else False."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return False
+        if self.address_allocator is None:
+            LOG.error("No register address space allocated!")
+            return False
+        try:
+            return as_addr.write_address_map(
+                self.address_allocator, path, output_format, name
+            )
+        except AsError as err:
+            LOG.error(str(err))
+            return False
+
+    ## @ingroup automatics_cds
+    def analyze_throughput(
+        self,
+        clock_hz: float = 100e6,
+        pixel_width: int = 8,
+        source_rates: dict = None,
+    ):
+        """! @brief Analyze stream rates and stall handling of this chain.
+        Annotates all stream connections with their data width and strobe
+        rate, finds bottlenecks and stall paths the design does not handle
+        and determines the sustainable pixel rate per source module.
+        If necessary, auto_connect() is called before the analysis.
+        @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+        @param pixel_width: Bits per pixel, to convert strobes to pixels.
+        @param source_rates: Optional dictionary: Module name -> strobes per
+                     clock cycle of source modules (e.g. cameras).
+        @return A ThroughputReport (see as_automatics_throughput.py),
+                None if the chain could not be connected."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return None
+        return as_tput.analyze_throughput(
+            self, clock_hz, pixel_width, source_rates
+        )
+
+    ## @ingroup automatics_cds
+    def latency_report(
+        self,
+        clock_hz: float = 100e6,
+        width: int = 640,
+        height: int = 480,
+        blanking=0,
+        pixel_width: int = 8,
+        source_rates: dict = None,
+    ):
+        """! @brief Analyze the latency and frame rate of this chain.
+        Determines the latency of the longest stream path from each source
+        to each sink module, the fill and flush delays of the 2D window
+        pipelines and the achievable frame rate.
+        If necessary, auto_connect() is called before the analysis.
+        @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+        @param width: Image width in pixels.
+        @param height: Image height in lines.
+        @param blanking: Horizontal blanking in pixels per line or a tuple
+                         (horizontal blanking pixels, vertical blanking lines)
+        @param pixel_width: Bits per pixel, to convert strobes to pixels.
+        @param source_rates: Optional dictionary: Module name -> strobes per
+                     clock cycle of source modules (e.g. cameras).
+        @return A LatencyReport (see as_automatics_latency.py), None if the
+                chain could not be connected. Compare two variants of a
+                chain using 'report.compare(other_report)'."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return None
+        return as_lat.analyze_latency(
+            self, clock_hz, width, height, blanking, pixel_width, source_rates
+        )
+
+    ## @ingroup automatics_cds
+    def tune_memory_ports(
+        self,
+        clock_hz: float = 100e6,
+        bus=None,
+        apply: bool = True,
+        source_rates: dict = None,
+    ):
+        """! @brief Choose the burst and FIFO generics of the memory ports.
+        Models the bandwidth of the memory modules (as_memwriter,
+        as_memreader) and their AXI_Masters on a shared memory bus using
+        the stream rates of the chain. Sets 'MAX_PLATFORM_BURST_LENGTH' and
+        'FIFO_NUMBER_OF_BURSTS' of the memory modules and 'C_MAX_BURST_LEN'
+        of the AXI_Masters to the smallest values meeting the stream rates.
+        Call after all modules are connected and before writing the system.
+        If necessary, auto_connect() is called first.
+        @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+        @param bus: MemoryBusProfile or a dictionary of its parameters
+                    ('data_width', 'clock_hz', 'latency', 'masters', ...).
+                    Defaults to a Zynq-7000 high performance port.
+        @param apply: Set the generics (True, default) or only report.
+        @param source_rates: Optional dictionary: Module name -> strobes per
+                     clock cycle of source modules (e.g. cameras).
+        @return A MemoryBandwidthReport (see
+                as_automatics_memory_bandwidth.py) with the predicted bus
+                utilization per port, None if the chain could not be
+                connected."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return None
+        return as_membw.tune_memory_ports(
+            self, clock_hz, bus, apply, source_rates
+        )
+
+    ## @ingroup automatics_cds
+    def estimate_resources(self, device=None):
+        """! @brief Estimate the FPGA resources of this chain.
+        Combines the resource models of the module specifications
+        (see 'AsModule.set_resource_model') with the line buffers of the
+        2D Window Pipelines, per module and per module group.
+        If necessary, auto_connect() is called first.
+        @param device: Target device for the budget check: A part name,
+                       a DeviceProfile or a dictionary of available
+                       'luts', 'ffs', 'bram18' and 'dsps'.
+                       Default: The part set for the IP-Core.
+        @return A ResourceReport (see as_automatics_resources.py),
+                None if the chain could not be connected."""
+        if not self.auto_connect_run:
+            try:
+                self.auto_connect()
+            except AsError:
+                return None
+        if device is None and self.parent is not None:
+            device = self.parent.partname_hw
+        return as_res.estimate_resources(self, device)
+
+    ## @ingroup automatics_cds
+    def set_auto_stream_fifos(
+        self, enable: bool = True, target_rates: dict = None
+    ):
+        """! @brief Insert and size FIFOs on stream connections automatically.
+        When enabled, auto_connect() models the burst and stall behaviour
+        of the modules along each as_stream connection made by 'connect()'.
+        Where the target rate cannot be sustained otherwise, the input
+        buffer of the sink (e.g. 'FIFO_NUMBER_OF_BURSTS' of as_memwriter)
+        is enlarged or an 'as_stream_fifo' module is inserted.
+        The resulting StreamFifoReport (see as_automatics_stream_fifo.py),
+        including the memory cost of the FIFOs, is stored in
+        'chain.stream_fifo_report'.
+        @param enable: Enable (True, default) or disable automatic FIFOs.
+        @param target_rates: Optional dictionary: Source module name ->
+                     strobes per clock cycle to sustain. Defaults to the
+                     maximum rate of the source modules."""
+        self.auto_stream_fifos = enable
+        self.stream_fifo_targets = target_rates
+
     ## @ingroup automatics_cds
     def list_address_space(self):
         """! @brief Prints the address space of slave registers to the console."""
@@ -693,7 +979,7 @@ class AsProcessingChain:
         These do not require an explicit call of 'connect()' to be connected
         properly, this method handles these tasks automatically."""
         LOG.debug(
-            "Running auto_connect() for %s modules...", str(len(self.modules))
+            "Running auto_connect() for %s modules...", len(self.modules)
         )
 
         self.auto_connect_run = True
@@ -714,6 +1000,14 @@ class AsProcessingChain:
         self._extract_generics(self.as_main)
         self._extract_generics(self.top)
 
+        # Buffer stream connections (before the user connections are made)
+        if self.auto_stream_fifos:
+            self.stream_fifo_report = as_sfifo.insert_stream_fifos(
+                self, self.stream_fifo_targets
+            )
+            for con in self.stream_fifo_report.get_fifos():
+                all_modules.add(con.module)
+
         # Handle pipelines (if present)
         for pipe in self.pipelines:
             try:
@@ -722,12 +1016,20 @@ class AsProcessingChain:
                 if err.severity in ("Error", "Critical"):
                     return False
             all_modules.update(pipe.modules)
+        self._check_fail_fast("2D window pipelines")
         foreach(self.module_groups, lambda gm: gm.__update_generics_list__())
 
         # Determine the maximum amount of registers per module
         self.max_regs_per_module = as_conh.get_max_regs_per_module(all_modules)
         LOG.debug(
-            "Set max_regs_per_module to '%s'.", str(self.max_regs_per_module)
+            "Set max_regs_per_module to '%s'.", self.max_regs_per_module
+        )
+        self.address_allocator = as_addr.AddressSpaceAllocator(
+            self.asterics_base_addr,
+            self.asterics_top_addr,
+            self.addr_per_reg,
+            self.max_regs_per_module,
+            self.pinned_base_addresses,
         )
         # Resolve address widths for all ports, if possible
         self.__get_reg_addr_widths__(all_modules)
@@ -746,6 +1048,8 @@ class AsProcessingChain:
                 continue
             self.modules.extend(group.modules)
 
+        self._check_fail_fast("user connections")
+
         # If any critical errors have occurred, we stop here!
         # We don't want to pile any internal errors, caused by errors in their
         # design, onto them!
@@ -791,6 +1095,7 @@ class AsProcessingChain:
             self._connect_register_interfaces(mod)
             # Update the 'connected'-status for the module
             mod.set_connected(mod.is_connect_complete())
+            self._check_fail_fast("connecting module '%s'", mod.name)
 
         # TODO: Requires more general handling
         # once full support for module groups is implemented
@@ -813,6 +1118,9 @@ class AsProcessingChain:
                 self._propagate_interface(inter, False)
             # ... and register interfaces!
             self._connect_register_interfaces(mod)
+        self._check_fail_fast("module groups")
+
+        self._check_address_space()
 
         # Handle unconnected ports:
         # Assign default values and report to user
@@ -821,6 +1129,7 @@ class AsProcessingChain:
                 continue
             self._handle_unconnected_ports(mod)
         self._handle_unconnected_ports(self.top)
+        self._check_fail_fast("unconnected ports")
 
         # Evaluate generics and replace with calculated values, where possible
         foreach(all_groups, self._resolve_generics)
@@ -849,6 +1158,61 @@ class AsProcessingChain:
                 except AttributeError:
                     pass
 
+    def _check_address_space(self):
+        """! @brief Check and report the allocated register address space.
+        Widens the module address if pinned base addresses leave unused
+        slots between the register interfaces."""
+        allocator = self.address_allocator
+        for name in allocator.get_unused_pins():
+            LOG.warning(
+                "Pinned base address for register interface '%s' unused: "
+                "No such register interface connected to as_regmgr!",
+                name,
+            )
+        report = allocator.get_report()
+        self.mod_addr_width = max(
+            self.mod_addr_width, report["module_addr_width"]
+        )
+        LOG.info(
+            (
+                "Register address space: %s interfaces in %s slots of %s "
+                "bytes, decode width %s bits; %s of %s bytes unused "
+                "(%s bytes if packed by register count)."
+            ),
+            report["register_interfaces"],
+            report["slots"],
+            report["slot_size"],
+            report["decode_width"],
+            report["wasted_bytes"],
+            report["address_span"],
+            report["packed_span"] - report["used_bytes"],
+        )
+
+    def _check_fail_fast(self, phase: str, *args):
+        """! @brief Abort 'auto_connect' if an error reached the fail-fast
+        severity set in the error manager (see 'AsErrorManager.fail_fast').
+        @param phase: Description of the current phase for the error message.
+                      Formatted using 'args' (%-style), if passed.
+        """
+        err = self.err_mgr.fail_fast_error
+        if err is None:
+            return
+        if args:
+            phase = phase % args
+        LOG.critical(
+            (
+                "Fail-fast: Error of severity '%s' encountered, "
+                "auto_connect aborted after %s!"
+            ),
+            err.severity,
+            phase,
+        )
+        raise AsTextError(
+            str(err),
+            "Fail-fast: auto_connect aborted after {}!".format(phase),
+            severity="Critical",
+        )
+
     def _propagate_interface(
         self,
         inter: Interface,
@@ -992,7 +1356,7 @@ class AsProcessingChain:
         )
         # For all register interfaces in the module
         for regif in module.register_ifs:
-            LOG.debug("Handling register interface '%s'...", str(regif))
+            LOG.debug("Handling register interface '%s'...", regif)
             if not any(
                 (
                     con.parent.entity_name == "as_regmgr"
@@ -1001,34 +1365,17 @@ class AsProcessingChain:
             ):
                 LOG.debug("No connected as_regmgr! Skipping...")
                 continue
-            # Check if the address space is out of bounds
-            if self.asterics_base_addr + self.cur_addr > self.asterics_top_addr:
-                LOG.error(
-                    (
-                        "Too many register interfaces or too many "
-                        "registers! Address space is full at module '%s'"
-                    ),
-                    module,
-                )
-                print("AsAutomatics halt! Slave register address space full!")
-                raise Exception("Slave register address space full!")
-
-            # Assign this register interface to the current address offset
-            self.address_space[str(self.cur_addr)] = regif
-            regif_num = self.cur_addr / (
-                self.addr_per_reg * self.max_regs_per_module
-            )
-            # Set register interface attributes
-            regif.set_module_base_addr(
-                self.cur_addr + self.asterics_base_addr, int(regif_num)
-            )
+            # Assign this register interface to the next free address slot
+            # (sets the base address and register interface number)
+            slot = self.address_allocator.allocate(regif)
+            self.address_space[
+                str(slot.base_address - self.asterics_base_addr)
+            ] = regif
             regif.set_connected()
-            # Update the current address offset
-            self.cur_addr += self.addr_per_reg * self.max_regs_per_module
             LOG.debug(
                 "Assigned address '%s' to register interface '%s'",
                 "{:#8X}".format(regif.base_address),
-                str(regif),
+                regif,
             )
             mgrs = [
                 mod
@@ -1076,8 +1423,8 @@ class AsProcessingChain:
         """
         LOG.debug(
             "Connect called for source '%s' and sink '%s'",
-            str(source),
-            str(sink),
+            source,
+            sink,
         )
 
         if source is None or sink is None:
@@ -1086,7 +1433,7 @@ class AsProcessingChain:
                 "Connect statement received no sink or source!",
                 severity="Error",
             )
-        LOG.info("Connecting '%s' to '%s'...", str(source), str(sink))
+        LOG.info("Connecting '%s' to '%s'...", source, sink)
         # Swap source and sink if necessary
         source, sink = as_conh.swap_if_necessary(source, sink)
         if top is None:
@@ -1128,7 +1475,7 @@ class AsProcessingChain:
             return None
 
         LOG.debug(
-            "Looking to connect module '%s' to '%s'.", source.name, str(sink)
+            "Looking to connect module '%s' to '%s'.", source.name, sink
         )
         ret = None
         # If the sink is an AsModule
@@ -1200,7 +1547,7 @@ class AsProcessingChain:
         LOG.debug(
             "Looking to connect interface '%s' to '%s'",
             source.unique_name,
-            str(sink),
+            sink,
         )
         # If the sink is an AsModule call this method for each Interface in the AsModule
         if isinstance(sink, AsModule):
@@ -1294,9 +1641,9 @@ class AsProcessingChain:
             LOG.debug(
                 "'%s' complete: '%s'; '%s' complete: '%s'",
                 source.unique_name,
-                str(source.connected),
+                source.connected,
                 sink.unique_name,
-                str(sink.connected),
+                sink.connected,
             )
             # Return references to the accumulated connections
             return out
@@ -1341,7 +1688,7 @@ class AsProcessingChain:
             LOG.debug(
                 "Looking to connect port '%s' to '%s'",
                 source.code_name,
-                str(sink),
+                sink,
             )
 
             # Swap ports if necessary
@@ -1362,7 +1709,7 @@ class AsProcessingChain:
             if target is not None:
                 # If the target is not None, create a connection
                 LOG.debug(
-                    "Connecting '%s' to '%s'", source.code_name, str(target)
+                    "Connecting '%s' to '%s'", source.code_name, target
                 )
                 # Generate and add glue signals to the toplevel containers
                 if isinstance(target, Port) and (
@@ -1445,23 +1792,22 @@ class AsProcessingChain:
         """! @brief Evaluate the ruleset of a Port to Port connection.
         Evaluate the ruleset of a Port object when trying to connect it to
         a sink object. Calls '_apply_port_ruleset_actions' for execution of
-        the rule actions."""
+        the rule actions.
+        Uses the compiled ruleset of the port (Port.get_rule_table)."""
         target = None
         # For each condition in the ruleset of the source port
-        for cond in source.get_rule_conditions():
+        for cond, cond_eval in source.get_rule_table().conditions:
             LOG.debug("Checking rule '%s' of port '%s'", cond, source.code_name)
-            try:
-                met = Port.rule_condition_eval[cond](source, sink)
-            except KeyError:
+            if cond_eval is None:
                 LOG.warning(
                     "Found invalid ruleset condition '%s'. Ignored!", cond
                 )
-                met = False
+                continue
             # Evaluate the condition
-            if met:
+            if cond_eval(source, sink):
                 LOG.debug(
                     "Condition met! Now executing linked actions: '%s'",
-                    str(source.get_rule_actions(cond)),
+                    source.get_rule_actions(cond),
                 )
                 # Condition met, execute the rule actions
                 ret = self._apply_port_ruleset_actions(
@@ -1471,7 +1817,7 @@ class AsProcessingChain:
                     LOG.debug(
                         "Identified target for port '%s': '%s'",
                         source.code_name,
-                        str(ret),
+                        ret,
                     )
                     target = ret
         return target
@@ -1484,7 +1830,8 @@ class AsProcessingChain:
         """! @brief Apply/Execute the rule actions of a met rule condition."""
         result = target
         # For each action of this condition
-        for action in source.get_rule_actions(cond):
+        # (Actions of earlier conditions may have modified the ruleset)
+        for action in source.get_rule_table().actions.get(cond, ()):
             try:
                 result = self._apply_port_rule(
                     action, source, sink, cond, target, sink_parent, result
@@ -1502,7 +1849,12 @@ class AsProcessingChain:
     def _apply_port_rule(
         self, action, source: Port, sink, cond: str, target, sink_parent, result
     ):
-        """! @brief Apply a single action of a condition in a Port's ruleset."""
+        """! @brief Apply a single action of a condition in a Port's ruleset.
+        @param action: The parsed action (Port RuleAction or action string).
+        Calls the handler for the type of the action
+        (see 'PORT_RULE_HANDLERS')."""
+        if isinstance(action, str):
+            action = parse_rule_action(action)
 
         # When handling unconnected ports of connected interfaces
         if (
@@ -1511,312 +1863,357 @@ class AsProcessingChain:
             and (sink is None or sink.port_type == "interface")
         ):
             # Only execute certain actions (Skipped actions filtered here)
-            if action in self.SKIPPED_ACTIONS:
+            if action.action in self.SKIPPED_ACTIONS:
                 LOG.debug(
                     (
                         "Skipped action '%s' of source '%s' from "
                         "inteface '%s' since it is already connected."
                     ),
-                    action,
+                    action.action,
                     source.code_name,
                     source.parent.name,
                 )
                 return result
 
-        LOG.debug("Handling action '%s'...", action)
-        # On action "connect": simple checks for compatibility:
-        # port direction and port names (not code_names)
-        if action in ("connect", "forceconnect"):
-            # Cannot connect a port to itself...
-            if source is sink:
-                return result
-            if action == "connect" and source.name != sink.name:
+        LOG.debug("Handling action '%s'...", action.action)
+        return self.PORT_RULE_HANDLERS[action.kind](
+            self, action, source, sink, cond, target, sink_parent, result
+        )
+
+    def _port_rule_connect(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule actions 'connect' and 'forceconnect'.
+        Simple checks for compatibility: port direction and port names
+        (not code_names; 'forceconnect' skips the name check)."""
+        # Cannot connect a port to itself...
+        if source is sink:
+            return result
+        if action.kind == "connect" and source.name != sink.name:
+            LOG.debug(
+                "Port names didn't match! '%s' != '%s'",
+                source.name,
+                sink.name,
+            )
+            return result
+        if (
+            source.get_direction_normalized()
+            == sink.get_direction_normalized()
+        ):
+            if not (
+                (source.port_type == "interface" and source.parent.to_external)
+                or source.port_type == "external"
+            ):
+                LOG.debug("Normalized port directions are the same!")
                 LOG.debug(
-                    "Port names didn't match! '%s' != '%s'",
-                    source.name,
-                    sink.name,
+                    "Source '%s':'%s'; Sink '%s':'%s'",
+                    source,
+                    source.get_direction_normalized(),
+                    sink,
+                    sink.get_direction_normalized(),
                 )
                 return result
-            if (
-                source.get_direction_normalized()
-                == sink.get_direction_normalized()
-            ):
-                if not (
-                    (
-                        source.port_type == "interface"
-                        and source.parent.to_external
-                    )
-                    or source.port_type == "external"
-                ):
-                    LOG.debug("Normalized port directions are the same!")
-                    LOG.debug(
-                        "Source '%s':'%s'; Sink '%s':'%s'",
-                        str(source),
-                        source.get_direction_normalized(),
-                        str(sink),
-                        sink.get_direction_normalized(),
-                    )
-                    return result
-            if source.data_type != sink.data_type:
-                return result
-            if not as_conh.manage_data_widths(source, sink):
-                # TODO: The function 'manage_data_widths' has been quite
-                # a headache. Need a more formal implementation of
-                # data width management.
-                # FIXME: What should happen if we end up here?
-                LOG.warning(
-                    "Failed data width management! From: %s ", str(source)
-                )
-                LOG.warning("Of: %s", str(as_conh.get_parent_module(source)))
-                if sink:
-                    LOG.warning("To: %s", str(sink))
-                    LOG.warning("Of: %s", str(as_conh.get_parent_module(sink)))
-                raise AsConnectionError(
-                    source, "Failed data width management", severity="Warning"
-                )
-
-            LOG.debug(
-                "Matching ports identified: '%s' and '%s'",
-                source.code_name,
-                sink.code_name,
+        if source.data_type != sink.data_type:
+            return result
+        if not as_conh.manage_data_widths(source, sink):
+            # TODO: The function 'manage_data_widths' has been quite
+            # a headache. Need a more formal implementation of
+            # data width management.
+            # The ports can't be connected as is: Registered as an error
+            # so that the chain is not written without user intervention.
+            LOG.warning(
+                "Failed data width management! From: %s ", str(source)
+            )
+            LOG.warning("Of: %s", str(as_conh.get_parent_module(source)))
+            if sink:
+                LOG.warning("To: %s", str(sink))
+                LOG.warning("Of: %s", str(as_conh.get_parent_module(sink)))
+            raise AsConnectionError(
+                source, "Failed data width management"
             )
 
-            # If data sink (port with direction "in") already has a connection
-            # we need to check if this target can overwrite it (does not apply to signals)
-            if (
-                ("signal" not in sink.port_type)
-                and (
-                    not isinstance(sink, StandardPort)
-                    and not isinstance(source, StandardPort)
-                )
-            ) and (sink.incoming is not None):
-                # If that connection is less fitting (possibly a fallback port)
-                if sink.name not in sink.incoming.code_name:
-                    # Overwrite the connection
-                    return sink
-                else:
-                    # Otherwise output a warning
-                    LOG.info(
-                        (
-                            "Could not connect port '%s' of '%s' to '%s' of '%s'. "
-                            "Port '%s' already connected to '%s' of '%s'!"
-                        ),
-                        repr(source),
-                        str(as_conh.get_parent_module(source)),
-                        repr(sink),
-                        str(as_conh.get_parent_module(sink)),
-                        repr(sink),
-                        repr(sink.incoming),
-                        str(as_conh.get_parent_module(sink.incoming)),
-                    )
-                    return result
-            return sink
-
-        # For 'bundle_...' actions, the target is either "and" or "or"
-        elif "bundle" in action:
-            btype = action.replace("bundle", "").strip("_ ")
-            source_mod = as_conh.get_parent_module(source)
-            if isinstance(source_mod, AsModuleGroup):
-                top_mod = source_mod
+        LOG.debug(
+            "Matching ports identified: '%s' and '%s'",
+            source.code_name,
+            sink.code_name,
+        )
+
+        # If data sink (port with direction "in") already has a connection
+        # we need to check if this target can overwrite it (does not apply to signals)
+        if (
+            ("signal" not in sink.port_type)
+            and (
+                not isinstance(sink, StandardPort)
+                and not isinstance(source, StandardPort)
+            )
+        ) and (sink.incoming is not None):
+            # If that connection is less fitting (possibly a fallback port)
+            if sink.name not in sink.incoming.code_name:
+                # Overwrite the connection
+                return sink
             else:
-                top_mod = source_mod.parent
-            try:
-                # Add to a list of ports to be bundled
-                top_mod.bundles[btype].append(source)
-            except KeyError:
-                # If the bundle action is neither 'and' nor 'or', error!
-                errtxt = (
-                    "Invalid bundle-action identified: '{}' for port"
-                    " '{}' of module '{}'"
-                ).format(action, source.code_name, str(source_mod))
-                LOG.error(errtxt)
-                raise AsTextError(action, errtxt)
-            except AttributeError:
-                raise AsModuleError(
-                    top_mod.name,
-                    "Bundle rule envoked for a non-group module!",
-                    "From port '{}'".format(source.code_name),
-                )
-            # Check if toplevel already has the port
-            ext_port = top_mod.get_port(source.code_name, suppress_error=True)
-            # If the port is not in the next higher module,
-            # make source external
-            if not ext_port:
-                self._make_external_port(source)
-                # Now get the reference to the new external port
-                ext_port = top_mod.get_port(
-                    source.code_name, suppress_error=True
+                # Otherwise output a warning
+                LOG.info(
+                    (
+                        "Could not connect port '%s' of '%s' to '%s' of '%s'. "
+                        "Port '%s' already connected to '%s' of '%s'!"
+                    ),
+                    repr(source),
+                    as_conh.get_parent_module(source),
+                    repr(sink),
+                    as_conh.get_parent_module(sink),
+                    repr(sink),
+                    repr(sink.incoming),
+                    as_conh.get_parent_module(sink.incoming),
                 )
-                if not ext_port:  # If that didn't work, raise an error!
-                    LOG.error("Failed to make port '%s' external!", str(source))
-                    raise AsConnectionError(
-                        msg="Bundle Signal, make '{}' external".format(
-                            str(source)
-                        ),
-                        affected_obj=source,
-                    )
+                return result
+        return sink
 
-            # Generate a new signal used to "feed" the bundling gate
-            signal_name = "{}_{}_{}".format(
-                source_mod.name, source.code_name, btype
-            )
-            signal = GlueSignal(
-                name=signal_name,
-                data_type=source.data_type,
-                data_width=source.data_width,
+    def _port_rule_bundle(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule actions 'bundle_and' and 'bundle_or'."""
+        # For 'bundle_...' actions, the argument is either "and" or "or"
+        btype = action.arg
+        source_mod = as_conh.get_parent_module(source)
+        if isinstance(source_mod, AsModuleGroup):
+            top_mod = source_mod
+        else:
+            top_mod = source_mod.parent
+        try:
+            # Add to a list of ports to be bundled
+            top_mod.bundles[btype].append(source)
+        except KeyError:
+            # If the bundle action is neither 'and' nor 'or', error!
+            errtxt = (
+                "Invalid bundle-action identified: '{}' for port"
+                " '{}' of module '{}'"
+            ).format(action.action, source.code_name, str(source_mod))
+            LOG.error(errtxt)
+            raise AsTextError(action.action, errtxt)
+        except AttributeError:
+            raise AsModuleError(
+                top_mod.name,
+                "Bundle rule envoked for a non-group module!",
+                "From port '{}'".format(source.code_name),
             )
-            # Connect the signal and associate it with the higher module
-            signal.incoming.append(source)
-            signal.outgoing.append(ext_port)
-            signal.assign_to(top_mod)
-            top_mod.signals.append(signal)
-
-            # Add it as source's glue signal
-            source.set_glue_signal(signal)
-            source.set_connected()
-            return ext_port
-
-        elif action == "make_external":
-            if target:
-                return result
-            # If source is already on toplevel
-            top_mod = as_conh.get_parent_module(source)
-            if top_mod == self.top:
-                return result  # No need for action
-            # Else, make the port external
-            if not self._make_external_port(source, False):
+        # Check if toplevel already has the port
+        ext_port = top_mod.get_port(source.code_name, suppress_error=True)
+        # If the port is not in the next higher module,
+        # make source external
+        if not ext_port:
+            self._make_external_port(source)
+            # Now get the reference to the new external port
+            ext_port = top_mod.get_port(source.code_name, suppress_error=True)
+            if not ext_port:  # If that didn't work, raise an error!
                 LOG.error("Failed to make port '%s' external!", str(source))
                 raise AsConnectionError(
-                    msg="Make external, make '{}' external".format(str(source)),
+                    msg="Bundle Signal, make '{}' external".format(
+                        str(source)
+                    ),
                     affected_obj=source,
                 )
-            # Set next higher up connected port as the target
-            ext_mod = getattr(as_conh.get_parent_module(source), "parent", None)
-            target = ext_mod.get_port(source.code_name, suppress_error=True)
-            return target
-
-        elif "fallback_port" in action:
-            # This action is only valid if no other connection target is
-            # found: Check parent of sink for the fallback port
-            if result is not None:
-                return result
-            # For 'fallback_port(...)', try to find the passed port name
-            # among the port of the parent of the sink port.
-            fbp_name = action.replace("fallback_port", "").strip("()")
-            if sink is None:
-                sink = sink_parent
-                to_port = sink.get_port(fbp_name, suppress_error=True)
-            else:
-                to_port = sink.parent.get_port(fbp_name, suppress_error=True)
-            if to_port is None:
-                to_port = as_conh.get_parent_module(sink).get_port(
-                    fbp_name, suppress_error=True
-                )
-            if to_port is not None and not to_port.connected:
-                return to_port
-
-        elif "fallback_signal" in action:
-            # This action is only valid if no other connection target is
-            # found: Check parent of source for signals matching
-            # the fallback signal name
-            if result is not None:
-                return result
-            mod_parent = as_conh.get_parent_module(source).parent
-            # If the parent of the source's module is not a module group,
-            # there cannot be any signals for us to match with!
-            if not isinstance(mod_parent, AsModuleGroup):
-                return result
-            # Extract the fallback signal name from the action string
-            fbs_name = action.replace("fallback_signal", "").strip("()")
-            # get_signal() returns None if no matching signal is found
-            signal = mod_parent.get_signal(fbs_name)
-            if signal is None:
-                LOG.info(
-                    "Fallback signal '%s' not found for '%s' in '%s'!",
-                    fbs_name,
-                    str(source),
-                    str(mod_parent),
-                )
-            return signal
 
-        elif "set_value" in action:
-            # Only use this constant value action if no target
-            if result is not None:
-                return result
-            # For 'set_value(...)', extract the value
-            value = action.replace("set_value", "")[1:-1]
-            # Generate a "fake" glue signal with the desired value as the name
-            glue = GlueSignal(
-                name=value,
-                code_name=value,
-                data_width=source.data_width,
-                optional=False,
+        # Generate a new signal used to "feed" the bundling gate
+        signal_name = "{}_{}_{}".format(
+            source_mod.name, source.code_name, btype
+        )
+        signal = GlueSignal(
+            name=signal_name,
+            data_type=source.data_type,
+            data_width=source.data_width,
+        )
+        # Connect the signal and associate it with the higher module
+        signal.incoming.append(source)
+        signal.outgoing.append(ext_port)
+        signal.assign_to(top_mod)
+        top_mod.signals.append(signal)
+
+        # Add it as source's glue signal
+        source.set_glue_signal(signal)
+        source.set_connected()
+        return ext_port
+
+    def _port_rule_make_external(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule action 'make_external'."""
+        if target:
+            return result
+        # If source is already on toplevel
+        top_mod = as_conh.get_parent_module(source)
+        if top_mod == self.top:
+            return result  # No need for action
+        # Else, make the port external
+        if not self._make_external_port(source, False):
+            LOG.error("Failed to make port '%s' external!", str(source))
+            raise AsConnectionError(
+                msg="Make external, make '{}' external".format(str(source)),
+                affected_obj=source,
             )
-            glue.is_signal = False
-            glue.assign_to(as_conh.get_parent_module(source).parent)
-            glue.set_connected()
-            if source.get_direction_normalized() == "in":
-                source.incoming = glue
-            elif source.get_direction_normalized() == "out":
-                source.outgoing.append(glue)
-            source.set_connected()
-            source.set_glue_signal(glue)
-            source.in_entity = False
-            return None
-        # The actions 'note', 'warning' and 'error' report to the user
-        elif action == "note":
+        # Set next higher up connected port as the target
+        ext_mod = getattr(as_conh.get_parent_module(source), "parent", None)
+        target = ext_mod.get_port(source.code_name, suppress_error=True)
+        return target
+
+    def _port_rule_fallback_port(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule action 'fallback_port(<port name>)'."""
+        # This action is only valid if no other connection target is
+        # found: Check parent of sink for the fallback port
+        if result is not None:
+            return result
+        # For 'fallback_port(...)', try to find the passed port name
+        # among the port of the parent of the sink port.
+        fbp_name = action.arg
+        if sink is None:
+            sink = sink_parent
+            to_port = sink.get_port(fbp_name, suppress_error=True)
+        else:
+            to_port = sink.parent.get_port(fbp_name, suppress_error=True)
+        if to_port is None:
+            to_port = as_conh.get_parent_module(sink).get_port(
+                fbp_name, suppress_error=True
+            )
+        if to_port is not None and not to_port.connected:
+            return to_port
+        return None
+
+    def _port_rule_fallback_signal(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule action 'fallback_signal(<signal name>)'."""
+        # This action is only valid if no other connection target is
+        # found: Check parent of source for signals matching
+        # the fallback signal name
+        if result is not None:
+            return result
+        mod_parent = as_conh.get_parent_module(source).parent
+        # If the parent of the source's module is not a module group,
+        # there cannot be any signals for us to match with!
+        if not isinstance(mod_parent, AsModuleGroup):
+            return result
+        fbs_name = action.arg
+        # get_signal() returns None if no matching signal is found
+        signal = mod_parent.get_signal(fbs_name)
+        if signal is None:
             LOG.info(
-                "%s triggered by '%s'",
-                as_conh.__get_port_rule_message__(source),
-                cond,
+                "Fallback signal '%s' not found for '%s' in '%s'!",
+                fbs_name,
+                source,
+                mod_parent,
             )
-            # Remove the action so it is only displayed once
-            source.remove_rule(cond, action)
+        return signal
+
+    def _port_rule_set_value(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule action 'set_value(<value>)'."""
+        # Only use this constant value action if no target
+        if result is not None:
             return result
-        elif action == "warning":
-            LOG.warning(
+        value = action.arg
+        # Generate a "fake" glue signal with the desired value as the name
+        glue = GlueSignal(
+            name=value,
+            code_name=value,
+            data_width=source.data_width,
+            optional=False,
+        )
+        glue.is_signal = False
+        glue.assign_to(as_conh.get_parent_module(source).parent)
+        glue.set_connected()
+        if source.get_direction_normalized() == "in":
+            source.incoming = glue
+        elif source.get_direction_normalized() == "out":
+            source.outgoing.append(glue)
+        source.set_connected()
+        source.set_glue_signal(glue)
+        source.in_entity = False
+        return None
+
+    def _port_rule_report(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule actions 'note', 'warning' and 'error'.
+        Report to the user. 'error' stops Automatics."""
+        if action.kind == "note":
+            LOG.info(
                 "%s triggered by '%s'",
                 as_conh.__get_port_rule_message__(source),
                 cond,
             )
             # Remove the action so it is only displayed once
-            source.remove_rule(cond, action)
+            source.remove_rule(cond, action.action)
             return result
-        elif action == "error":
-            LOG.error(
+        if action.kind == "warning":
+            LOG.warning(
                 "%s triggered by '%s'",
                 as_conh.__get_port_rule_message__(source),
                 cond,
             )
-            # No removal necessary, automatics should halt after diplaying
-            print(
-                (
-                    "AsAutomatics stopped because of a triggered 'error' "
-                    "rule for port {} of {}"
-                ).format(source, source.parent)
-            )
-            raise AsConnectionError(
-                msg="Port connection error raised by ruleset",
-                detail="rule condition '{}'".format(cond),
-                affected_obj=source,
-            )
-        elif action == "none":
-            # No action! YEAH!
+            # Remove the action so it is only displayed once
+            source.remove_rule(cond, action.action)
             return result
-        else:
-            LOG.warning(
-                (
-                    "Invalid port rule action detected: '%s' for "
-                    "condition '%s' of port '%s' of module '%s'."
-                ),
-                action,
-                cond,
-                source.code_name,
-                as_conh.get_parent_module(source).name,
-            )
-            raise AsTextError(
-                action, "Invalid port rule action found!", severity="Warning"
-            )
+        LOG.error(
+            "%s triggered by '%s'",
+            as_conh.__get_port_rule_message__(source),
+            cond,
+        )
+        # No removal necessary, automatics should halt after diplaying
+        print(
+            (
+                "AsAutomatics stopped because of a triggered 'error' "
+                "rule for port {} of {}"
+            ).format(source, source.parent)
+        )
+        raise AsConnectionError(
+            msg="Port connection error raised by ruleset",
+            detail="rule condition '{}'".format(cond),
+            affected_obj=source,
+        )
+
+    def _port_rule_none(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Rule action 'none'."""
+        # No action! YEAH!
+        return result
+
+    def _port_rule_invalid(
+        self, action, source: Port, sink, cond: str, target, sink_parent, result
+    ):
+        """! @brief Unknown rule actions."""
+        LOG.warning(
+            (
+                "Invalid port rule action detected: '%s' for "
+                "condition '%s' of port '%s' of module '%s'."
+            ),
+            action.action,
+            cond,
+            source.code_name,
+            as_conh.get_parent_module(source).name,
+        )
+        raise AsTextError(
+            action.action, "Invalid port rule action found!", severity="Warning"
+        )
+
+    ## Rule action type (RuleAction.kind) -> handler method
+    PORT_RULE_HANDLERS = {
+        "connect": _port_rule_connect,
+        "forceconnect": _port_rule_connect,
+        "bundle": _port_rule_bundle,
+        "make_external": _port_rule_make_external,
+        "fallback_port": _port_rule_fallback_port,
+        "fallback_signal": _port_rule_fallback_signal,
+        "set_value": _port_rule_set_value,
+        "note": _port_rule_report,
+        "warning": _port_rule_report,
+        "error": _port_rule_report,
+        "none": _port_rule_none,
+        "invalid": _port_rule_invalid,
+    }
 
     def _make_external_port(self, port: Port, keep_name: bool = True) -> bool:
         """! @brief Propagate 'port' up to toplevel as an external port.
@@ -1825,7 +2222,7 @@ class AsProcessingChain:
         # Check if port is already in toplevel
         tmod = as_conh.get_parent_module(port)
         if tmod is self.top:
-            LOG.info("Port '%s' is already on toplevel!", str(port))
+            LOG.info("Port '%s' is already on toplevel!", port)
             return False
         # "Move" up to toplevel, module by module
         while tmod is not self.top:
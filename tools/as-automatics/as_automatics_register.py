@@ -53,7 +53,7 @@ from as_automatics_constant import Constant
 import as_automatics_helpers as as_help
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ## @ingroup automatics_intrep
@@ -64,6 +64,21 @@ class SlaveRegisterInterface(Interface):
     of an AXI interface.
     Inherits as_automatics_interface::Interface."""
 
+    __slots__ = (
+        "base_address",
+        "bidirectional_regs",
+        "config",
+        "config_applied",
+        "data_width",
+        "hwtosw_regs",
+        "inactive_regs",
+        "max_regs_per_module",
+        "reg_count",
+        "regif_num",
+        "register_table",
+        "swtohw_regs",
+    )
+
     CONST_NAME = "slave_register_configuration"
     DEFAULT_NAME = "slv_reg_interface"
 
@@ -164,7 +179,7 @@ class SlaveRegisterInterface(Interface):
                 LOG.debug(
                     "Assigned config constant '%s' to '%s'",
                     const.code_name,
-                    str(self.parent),
+                    self.parent,
                 )
                 const.assign_to(self)
                 self.config = const
@@ -335,7 +350,7 @@ class SlaveRegisterInterface(Interface):
         self.__count_register_types__()
         self.get_generic("REG_COUNT").value = self.reg_count
         LOG.debug(
-            "Register configuration decoded as: '%s'", str(self.register_table)
+            "Register configuration decoded as: '%s'", self.register_table
         )
         return True
 
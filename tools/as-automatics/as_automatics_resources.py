@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_resources.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Estimation of the FPGA resources (LUTs, flip-flops, block RAMs, DSPs) of a
+connected processing chain before synthesis.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_resources.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Pre-synthesis FPGA resource estimation for processing chains.
+# -----------------------------------------------------------------------------
+
+import csv
+import json
+import math
+
+from as_automatics_module import AsModule
+from as_automatics_module_group import AsModuleGroup
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_throughput import get_rate_value, get_generic_int
+from as_automatics_stream_fifo import BRAM18_ASPECTS
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+RESOURCE_TYPES = AsModule.RESOURCE_TYPES
+CSV_COLUMNS = ("kind", "name", "entity", "group", "model") + RESOURCE_TYPES
+
+## Model names of the module costs
+MODEL_DECLARED = "declared"
+MODEL_BUFFER = "buffer"
+MODEL_NONE = "none"
+
+
+class DeviceProfile:
+    """! @brief Resources available on a target FPGA."""
+
+    def __init__(
+        self,
+        name: str,
+        luts: int,
+        ffs: int,
+        bram18: int,
+        dsps: int,
+    ):
+        self.name = name
+        self.resources = {
+            "luts": luts,
+            "ffs": ffs,
+            "bram18": bram18,
+            "dsps": dsps,
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        return cls(
+            values.get("name", "custom"),
+            *(values.get(res, 0) for res in RESOURCE_TYPES)
+        )
+
+    def to_dict(self) -> dict:
+        out = {"name": self.name}
+        out.update(self.resources)
+        return out
+
+
+## Device profiles by part name prefix (Xilinx Zynq-7000 data sheet values)
+DEVICE_PROFILES = {
+    "xc7z007s": DeviceProfile("xc7z007s", 14400, 28800, 100, 66),
+    "xc7z010": DeviceProfile("xc7z010", 17600, 35200, 120, 80),
+    "xc7z014s": DeviceProfile("xc7z014s", 40600, 81200, 214, 170),
+    "xc7z020": DeviceProfile("xc7z020", 53200, 106400, 280, 220),
+    "xc7z030": DeviceProfile("xc7z030", 78600, 157200, 530, 400),
+}
+
+
+def get_device_profile(device) -> DeviceProfile:
+    """! @brief Return the DeviceProfile for 'device'.
+    @param device: A DeviceProfile, a dictionary (see DeviceProfile.to_dict)
+                   or a part name (e.g. "xc7z010clg400-1").
+    @return The profile, None if the part name is unknown."""
+    if device is None or isinstance(device, DeviceProfile):
+        return device
+    if isinstance(device, dict):
+        return DeviceProfile.from_dict(device)
+    part = str(device).lower()
+    for prefix in sorted(DEVICE_PROFILES, key=len, reverse=True):
+        if part.startswith(prefix):
+            return DEVICE_PROFILES[prefix]
+    LOG.warning("No resource profile for device '%s'.", device)
+    return None
+
+
+def get_bram18_count(depth: int, width: int) -> int:
+    """! @brief Return the number of 18 Kb block RAMs for a depth x width
+    buffer, using the best fitting aspect ratio."""
+    if depth <= 0 or width <= 0:
+        return 0
+    return min(
+        math.ceil(depth / aspect[0]) * math.ceil(width / aspect[1])
+        for aspect in BRAM18_ASPECTS
+    )
+
+
+def get_empty_cost() -> dict:
+    return {res: 0 for res in RESOURCE_TYPES}
+
+
+def add_cost(total: dict, cost: dict):
+    for res in RESOURCE_TYPES:
+        total[res] += cost[res]
+
+
+def get_model_cost(module) -> dict:
+    """! @brief Evaluate the resource model declared by 'module'.
+    Returns None for resource types whose value cannot be resolved."""
+    cost = get_empty_cost()
+    for res, value in getattr(module, "resource_model", {}).items():
+        if callable(value):
+            value = value(module)
+        else:
+            value = get_rate_value(module, value)
+        cost[res] = None if value is None else int(math.ceil(value))
+    return cost
+
+
+class ResourceModelValue:
+    """! @brief Resource model value (see 'AsModule.set_resource_model') of
+    one resource type 'res', taken from the cost of all resource types
+    returned by 'function(module, *args)'.
+    A class instead of a closure, so that modules can be stored in
+    processing chain snapshots ('function' has to be a module level
+    function)."""
+
+    def __init__(self, function, args: tuple, res: str):
+        self.function = function
+        self.args = args
+        self.res = res
+
+    def __call__(self, module):
+        cost = self.function(module, *self.args)
+        return None if cost is None else cost.get(self.res, 0)
+
+
+def get_resource_model(function, *args) -> dict:
+    """! @brief Resource model (see 'AsModule.set_resource_model') of a
+    function returning the cost of all resource types at once:
+    'function(module, *args)' returns a dictionary (resource type -> count)
+    or None if the cost cannot be resolved."""
+    return {
+        res: ResourceModelValue(function, args, res)
+        for res in RESOURCE_TYPES
+    }
+
+
+def get_window_filter_cost(module) -> dict:
+    """! @brief Coarse resource estimate of a 2D convolution filter with a
+    constant kernel (as_generic_filter_module): Each kernel element is a
+    constant multiplication (shifts and adds), summed by an adder tree and
+    registered per kernel row.
+    Returns None if the generics cannot be resolved."""
+    size = get_generic_int(module, "KERNEL_SIZE")
+    din_width = get_generic_int(module, "DIN_WIDTH")
+    dout_width = get_generic_int(module, "DOUT_WIDTH")
+    if None in (size, din_width, dout_width):
+        return None
+    elements = size * size
+    # Input data scaled by small kernel weights, plus the sum's growth
+    width = din_width + 4 + math.ceil(math.log2(elements))
+    return {
+        # One adder of the (shift and add) adder tree per kernel element
+        "luts": elements * width,
+        # Row accumulators, result accumulator and output register
+        "ffs": (size + 1) * width + dout_width,
+    }
+
+
+def get_buffer_row_cost(row) -> dict:
+    """! @brief Return the cost of a 2D Window Pipeline buffer row.
+    Like 'as_automatics_2d_helpers.get_buffer_statistics', buffers larger
+    than the pipeline's MINIMUM_BRAM_SIZE keep the window part in registers
+    and the rest in block RAM, smaller buffers use registers only."""
+    cost = get_empty_cost()
+    width = row.get_bit_width()
+    size = row.get_size()
+    if size > row.pipe.minimum_bram_size:
+        cost["bram18"] = get_bram18_count(row.length - row.window_width, width)
+        cost["ffs"] = row.window_width * width
+    else:
+        cost["ffs"] = size
+    return cost
+
+
+class ModuleCost:
+    """! @brief Estimated resources of one module instance."""
+
+    def __init__(self, module, group: str, model: str, cost: dict):
+        self.module = module
+        self.name = module.name
+        self.entity = module.entity_name
+        ## Name of the module group the module is instantiated in
+        self.group = group
+        ## Origin of the estimate: MODEL_DECLARED, MODEL_BUFFER, MODEL_NONE
+        self.model = model
+        ## Resource type -> count (None: not resolvable)
+        self.cost = cost
+
+    def get_cost(self) -> dict:
+        """! @brief Return the cost, with unresolved values as 0."""
+        return {res: self.cost[res] or 0 for res in RESOURCE_TYPES}
+
+    def to_dict(self) -> dict:
+        out = {
+            "name": self.name,
+            "entity": self.entity,
+            "group": self.group,
+            "model": self.model,
+        }
+        out.update(self.cost)
+        return out
+
+
+class ResourceReport:
+    """! @brief Result of the resource estimation of a processing chain."""
+
+    def __init__(self, device: DeviceProfile = None):
+        self.device = device
+        ## List of ModuleCost objects
+        self.modules = []
+        ## Module group name -> names of the module groups nested within it
+        self.groups = {}
+
+    def get_total(self) -> dict:
+        total = get_empty_cost()
+        for mod in self.modules:
+            add_cost(total, mod.get_cost())
+        return total
+
+    def get_group_total(self, name: str) -> dict:
+        """! @brief Return the cost of module group 'name' including all
+        module groups nested within it."""
+        total = get_empty_cost()
+        for member in self.groups.get(name, ()):
+            add_cost(total, self.get_group_total(member))
+        for mod in self.modules:
+            if mod.group == name:
+                add_cost(total, mod.get_cost())
+        return total
+
+    def get_unmodelled(self) -> list:
+        """! @brief Return the names of modules without a cost model or
+        with unresolvable model values."""
+        return [
+            mod.name
+            for mod in self.modules
+            if mod.model == MODEL_NONE or None in mod.cost.values()
+        ]
+
+    def get_utilization(self, device=None) -> dict:
+        """! @brief Return the fraction of the device used per resource."""
+        device = get_device_profile(device) or self.device
+        if device is None:
+            return {}
+        total = self.get_total()
+        return {
+            res: (total[res] / device.resources[res])
+            if device.resources[res]
+            else float(total[res] > 0)
+            for res in RESOURCE_TYPES
+        }
+
+    def check_budget(self, device=None, limit: float = 1.0) -> list:
+        """! @brief Compare the estimate to the resources of a device.
+        An estimate missing the cost of some modules can not show that the
+        design fits: Incomplete coverage is reported as an issue.
+        @param device: Device profile or part name (default: the report's).
+        @param limit: Fraction of each resource the design may use.
+        @return A list of messages, one per exceeded resource type and one
+                if modules have no (complete) cost model.
+                Empty if the design fits."""
+        device = get_device_profile(device) or self.device
+        if device is None:
+            return ["No device profile to check the resource budget against"]
+        total = self.get_total()
+        issues = []
+        unmodelled = self.get_unmodelled()
+        if unmodelled:
+            issues.append(
+                "Incomplete estimate: {} of {} modules without (complete) "
+                "cost model: {}".format(
+                    len(unmodelled), len(self.modules), ", ".join(unmodelled)
+                )
+            )
+        for res, used in self.get_utilization(device).items():
+            if used > limit:
+                issues.append(
+                    "{}: {} of {} available on {} ({:.1f}%)".format(
+                        res,
+                        total[res],
+                        device.resources[res],
+                        device.name,
+                        100 * used,
+                    )
+                )
+        return issues
+
+    def to_dict(self) -> dict:
+        return {
+            "device": self.device.to_dict() if self.device else None,
+            "total": self.get_total(),
+            "utilization": {
+                res: round(used, 4)
+                for res, used in self.get_utilization().items()
+            },
+            "budget_issues": self.check_budget() if self.device else [],
+            "unmodelled": self.get_unmodelled(),
+            "groups": {
+                name: self.get_group_total(name) for name in self.groups
+            },
+            "modules": [mod.to_dict() for mod in self.modules],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the report to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error(
+                "Could not write resource report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def write_csv(self, path: str) -> bool:
+        """! @brief Write the cost per module, per module group and the
+        total to the CSV file 'path'."""
+        try:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(CSV_COLUMNS)
+                for mod in self.modules:
+                    row = mod.to_dict()
+                    row["kind"] = "module"
+                    writer.writerow([row[col] for col in CSV_COLUMNS])
+                rows = [
+                    ("group", name, self.get_group_total(name))
+                    for name in self.groups
+                ]
+                rows.append(("total", "", self.get_total()))
+                for kind, name, cost in rows:
+                    writer.writerow(
+                        [kind, name, "", "", ""]
+                        + [cost[res] for res in RESOURCE_TYPES]
+                    )
+        except IOError as err:
+            LOG.error(
+                "Could not write resource report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def __str__(self) -> str:
+        def fmt(cost: dict) -> str:
+            return (
+                "{luts:>7} LUTs {ffs:>7} FFs {bram18:>4} BRAM18 {dsps:>4} DSPs"
+            ).format(**cost)
+
+        out = ["Resource estimate:"]
+        for mod in self.modules:
+            out.append(
+                "  {:<40} {}{}".format(
+                    mod.name,
+                    fmt(mod.get_cost()),
+                    " (no model)" if mod.model == MODEL_NONE else "",
+                )
+            )
+        out.append("Module groups:")
+        for name in self.groups:
+            out.append(
+                "  {:<40} {}".format(name, fmt(self.get_group_total(name)))
+            )
+        out.append("  {:<40} {}".format("Total", fmt(self.get_total())))
+        if self.device is not None:
+            out.append(
+                "Utilization of {}: {}".format(
+                    self.device.name,
+                    ", ".join(
+                        "{} {:.1f}%".format(res, 100 * used)
+                        for res, used in self.get_utilization().items()
+                    ),
+                )
+            )
+            for issue in self.check_budget():
+                out.append("  Budget check: " + issue)
+        unmodelled = self.get_unmodelled()
+        if unmodelled:
+            out.append(
+                "{} modules without (complete) cost model: {}".format(
+                    len(unmodelled), ", ".join(unmodelled)
+                )
+            )
+        return "\n".join(out)
+
+
+def estimate_resources(chain, device=None) -> ResourceReport:
+    """! @brief Estimate the FPGA resources of the connected 'chain'.
+    Combines the resource models declared in the module specifications
+    (see 'AsModule.set_resource_model') with the line buffers of all 2D
+    Window Pipelines. Module groups and wrappers add no resources of their
+    own; Their cost is the sum of the modules they contain.
+    @param chain: The connected processing chain.
+    @param device: Device profile or part name for the budget check.
+    @return A ResourceReport."""
+    report = ResourceReport(get_device_profile(device))
+    rows = {}
+    # Module object ID -> name of the group it is instantiated in
+    # The toplevel (AsTop) first: Its modules not in a nested group are
+    # instantiated in the toplevel itself (e.g. the AXI masters)
+    member_of = {}
+    groups = [chain.top]
+    groups.extend(grp for grp in chain.module_groups if grp is not chain.top)
+    for group in groups:
+        report.groups[group.name] = [
+            mod.name for mod in group.modules if isinstance(mod, AsModuleGroup)
+        ]
+        for mod in group.modules:
+            member_of[id(mod)] = group.name
+        if isinstance(group, As2DWindowPipeline):
+            for row in group.buffer_rows:
+                rows[id(row.module)] = row
+    for mod in chain.modules:
+        # Module groups and wrappers only contain other modules
+        if isinstance(mod, AsModuleGroup):
+            continue
+        group = member_of.get(id(mod), chain.top.name)
+        if id(mod) in rows:
+            cost = get_buffer_row_cost(rows[id(mod)])
+            model = MODEL_BUFFER
+        elif getattr(mod, "resource_model", None):
+            cost = get_model_cost(mod)
+            model = MODEL_DECLARED
+        else:
+            cost = get_empty_cost()
+            model = MODEL_NONE
+        report.modules.append(ModuleCost(mod, group, model, cost))
+    unmodelled = report.get_unmodelled()
+    if unmodelled:
+        LOG.warning(
+            "Resource estimate incomplete: %i of %i modules without "
+            "(complete) cost model: %s",
+            len(unmodelled),
+            len(report.modules),
+            ", ".join(unmodelled),
+        )
+    LOG.info(
+        "Estimated resources of %i modules: %s",
+        len(report.modules),
+        ", ".join(
+            "{} {}".format(count, res)
+            for res, count in report.get_total().items()
+        ),
+    )
+    return report
+
+
+## @}
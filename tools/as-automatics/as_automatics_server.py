@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_server.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Implements the Automatics build server (asterics-server) and its client.
+The server loads Automatics and the module library once and runs
+system scripts in forked worker processes on request.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_server.py
+# @ingroup automatics_server
+# @author Philip Manke
+# @brief Automatics build server and client (asterics-server).
+# -----------------------------------------------------------------------------
+
+# Only the standard library is imported here:
+# The client side must start fast and not touch the Automatics environment.
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+
+## @defgroup automatics_server Automatics build server
+# @ingroup automatics_internal
+
+##
+# @addtogroup automatics_server
+# @{
+
+## File types that influence the module library
+WATCHED_SUFFIXES = (".py", ".vhd", ".vhdl", ".c", ".h")
+
+## Exit code used by the client if the server cannot be reached
+EXIT_NO_SERVER = 3
+
+
+def get_default_socket_path() -> str:
+    """! @brief Return the UNIX socket path used by server and client.
+    Can be overwritten using the environment variable 'ASTERICS_SERVER_SOCKET'.
+    """
+    path = os.environ.get("ASTERICS_SERVER_SOCKET")
+    if path:
+        return path
+    return os.path.join(
+        tempfile.gettempdir(), "asterics-server-{}.sock".format(os.getuid())
+    )
+
+
+def send_message(conn: socket.socket, message: dict):
+    """! @brief Send a message (one JSON object per line) through 'conn'."""
+    conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def read_messages(conn: socket.socket):
+    """! @brief Generator yielding all messages received through 'conn'."""
+    with conn.makefile("r", encoding="utf-8") as stream:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class AsAutomaticsServer:
+    """! @brief Long running process keeping a warm Automatics environment.
+    Automatics and the module library are loaded once at startup.
+    Each build request is executed in a forked worker process,
+    which inherits the parsed module library (copy-on-write).
+    The module repositories are polled for changes; the library is reloaded
+    before the next build if any spec script or source file was modified.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = "",
+        repositories: list = None,
+        poll_interval: float = 2.0,
+    ):
+        self.socket_path = socket_path or get_default_socket_path()
+        ## Additional repositories to preload: [(name, path), ...]
+        self.extra_repos = repositories if repositories else []
+        self.poll_interval = poll_interval
+        self.asterics = None  # The imported 'asterics' module
+        self.listener = None
+        self.running = False
+        self.workers = set()
+        self.build_count = 0
+        self.start_time = time.time()
+        self.repo_mtimes = {}
+
+    def load_environment(self):
+        """! @brief Import Automatics and load all module repositories."""
+        import asterics
+
+        self.asterics = asterics
+        self.reload_library()
+
+    def reload_library(self):
+        """! @brief (Re-)Build the module library from scratch."""
+        from as_automatics_module_lib import AsModuleLibrary
+        from as_automatics_helpers import append_to_path
+
+        start = time.perf_counter()
+        auto = self.asterics.Auto
+        auto.library = AsModuleLibrary(auto.asterics_home)
+        auto.add_module_repository(
+            append_to_path(self.asterics.asterics_home, "modules"), "default"
+        )
+        for name, path in self.extra_repos:
+            auto.add_module_repository(path, name)
+        self.repo_mtimes = self._get_repo_mtimes()
+        self.asterics.LOG.info(
+            "Server: Loaded module library (%i repositories) in %.3f s.",
+            len(auto.library.repos),
+            time.perf_counter() - start,
+        )
+
+    def _get_repo_mtimes(self) -> dict:
+        from as_automatics_helpers import get_file_mtimes
+
+        return get_file_mtimes(
+            [repo.path for repo in self.asterics.Auto.library.repos],
+            WATCHED_SUFFIXES,
+        )
+
+    def check_repositories(self) -> bool:
+        """! @brief Reload the module library if a repository changed.
+        Returns True if the library was reloaded."""
+        if self._get_repo_mtimes() == self.repo_mtimes:
+            return False
+        self.asterics.LOG.info("Server: Module repository changed, reloading.")
+        self.reload_library()
+        return True
+
+    def serve_forever(self):
+        """! @brief Open the socket and handle requests until stopped."""
+        if os.path.exists(self.socket_path):
+            # Refuse to replace the socket of a running server
+            try:
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                probe.connect(self.socket_path)
+                probe.close()
+                raise RuntimeError(
+                    "Server already running on '{}'!".format(self.socket_path)
+                )
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.socket_path)
+        self.load_environment()
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        self.listener.listen(16)
+        self.listener.settimeout(self.poll_interval)
+        self.running = True
+        print(
+            "asterics-server listening on '{}'".format(self.socket_path),
+            flush=True,
+        )
+        try:
+            while self.running:
+                self._reap_workers()
+                try:
+                    conn, _ = self.listener.accept()
+                except socket.timeout:
+                    if not self.workers:
+                        self.check_repositories()
+                    continue
+                self._handle_connection(conn)
+        finally:
+            self.listener.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def _reap_workers(self):
+        for pid in list(self.workers):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                self.workers.discard(pid)
+
+    def _handle_connection(self, conn: socket.socket):
+        try:
+            with conn.makefile("r", encoding="utf-8") as stream:
+                request = json.loads(stream.readline() or "{}")
+        except (ValueError, OSError):
+            request = {}
+        command = request.get("command", "")
+        if command == "build":
+            # Pick up changes to the repositories before forking
+            self.check_repositories()
+            self._fork_worker(conn, request)
+            return
+        if command == "status":
+            send_message(conn, self.get_status())
+        elif command == "reload":
+            self.reload_library()
+            send_message(conn, {"exit_code": 0})
+        elif command == "stop":
+            self.running = False
+            send_message(conn, {"exit_code": 0})
+        else:
+            send_message(
+                conn,
+                {"exit_code": 2, "error": "Unknown command '{}'".format(command)},
+            )
+        conn.close()
+
+    def get_status(self) -> dict:
+        """! @brief Return information about the server state."""
+        self._reap_workers()
+        return {
+            "exit_code": 0,
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.start_time, 3),
+            "builds": self.build_count,
+            "active_workers": len(self.workers),
+            "repositories": [
+                {
+                    "name": repo.name,
+                    "path": repo.path,
+                    "modules": len(repo.module_names),
+                }
+                for repo in self.asterics.Auto.library.repos
+            ],
+        }
+
+    def _fork_worker(self, conn: socket.socket, request: dict):
+        self.build_count += 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            # Parent process
+            conn.close()
+            self.workers.add(pid)
+            return
+        # Worker process
+        exit_code = 1
+        try:
+            self.listener.close()
+            exit_code = self._run_build(conn, request)
+        finally:
+            os._exit(exit_code)
+
+    def _run_build(self, conn: socket.socket, request: dict) -> int:
+        """! @brief Execute a system script in this (worker) process.
+        All output to stdout / stderr (including child processes)
+        is forwarded to the client."""
+        import runpy
+        import traceback
+        import as_automatics_logging as as_log
+
+        lock = threading.Lock()
+        pumps = []
+        for fd, name in ((1, "stdout"), (2, "stderr")):
+            read_end, write_end = os.pipe()
+            os.dup2(write_end, fd)
+            os.close(write_end)
+            pump = threading.Thread(
+                target=_pump_output, args=(read_end, name, conn, lock)
+            )
+            pump.start()
+            pumps.append(pump)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+        script = os.path.realpath(request.get("script", ""))
+        start = time.perf_counter()
+        exit_code = 0
+        try:
+            os.chdir(request.get("cwd", os.getcwd()))
+            # Fresh per-build state: logfile in the working directory,
+            # no errors from previous builds, no chain
+            as_log.init_log()
+            self.asterics.Auto.reset_build_state()
+            sys.argv = [script] + list(request.get("args", []))
+            sys.path.insert(0, os.path.dirname(script))
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as exit_exc:
+            if exit_exc.code is None:
+                exit_code = 0
+            elif isinstance(exit_exc.code, int):
+                exit_code = exit_exc.code
+            else:
+                print(exit_exc.code, file=sys.stderr)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        duration = time.perf_counter() - start
+
+        # Close the write ends of the pipes to end the pumps
+        sys.stdout.flush()
+        sys.stderr.flush()
+        as_log.flush_log()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        for pump in pumps:
+            pump.join()
+        with lock:
+            send_message(
+                conn,
+                {"exit_code": exit_code, "duration": round(duration, 4)},
+            )
+        conn.close()
+        return exit_code
+
+
+def _pump_output(read_end: int, name: str, conn: socket.socket, lock):
+    while True:
+        data = os.read(read_end, 4096)
+        if not data:
+            break
+        with lock:
+            send_message(
+                conn,
+                {"stream": name, "data": data.decode("utf-8", "replace")},
+            )
+    os.close(read_end)
+
+
+# Client side:
+
+
+def request_server(message: dict, socket_path: str = "") -> int:
+    """! @brief Send a request to the server and print all responses.
+    Returns the exit code reported by the server."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path or get_default_socket_path())
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(
+            "asterics-server is not running! Start it using "
+            "'asterics-server serve'.",
+            file=sys.stderr,
+        )
+        return EXIT_NO_SERVER
+    send_message(conn, message)
+    exit_code = 1
+    for response in read_messages(conn):
+        if "stream" in response:
+            out = sys.stdout if response["stream"] == "stdout" else sys.stderr
+            out.write(response["data"])
+            out.flush()
+            continue
+        exit_code = response.pop("exit_code", 1)
+        if message["command"] == "build":
+            print(
+                "asterics-server: Build finished in {} s (exit code {}).".format(
+                    response.get("duration", "?"), exit_code
+                ),
+                file=sys.stderr,
+            )
+        elif response:
+            print(json.dumps(response, indent=2))
+    conn.close()
+    return exit_code
+
+
+def main(argv: list = None) -> int:
+    """! @brief Command line interface of the asterics-server."""
+    parser = argparse.ArgumentParser(
+        prog="asterics-server",
+        description=(
+            "Keep Automatics and its module library loaded and build "
+            "ASTERICS systems on request."
+        ),
+    )
+    parser.add_argument(
+        "--socket", default="", help="Path of the UNIX socket to use."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Start the server.")
+    serve.add_argument(
+        "--repo",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("NAME", "PATH"),
+        help="Preload an additional module repository.",
+    )
+    serve.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Interval in seconds to check repositories for changes.",
+    )
+    build = sub.add_parser("build", help="Run a system script on the server.")
+    build.add_argument("script", help="The Automatics system script to run.")
+    build.add_argument(
+        "args",
+        nargs=argparse.REMAINDER,
+        help="Arguments passed to the script (e.g. 'core <output dir>').",
+    )
+    sub.add_parser("status", help="Show the server status.")
+    sub.add_parser("reload", help="Reload the module library.")
+    sub.add_parser("stop", help="Stop the server.")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = AsAutomaticsServer(
+            args.socket,
+            [(name, os.path.realpath(path)) for name, path in args.repo],
+            args.interval,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as err:
+            print(err, file=sys.stderr)
+            return 1
+        return 0
+    message = {"command": args.command}
+    if args.command == "build":
+        message.update(
+            {
+                "script": os.path.realpath(args.script),
+                "args": args.args,
+                "cwd": os.getcwd(),
+            }
+        )
+    return request_server(message, args.socket)
+
+
+## @}
+
+if __name__ == "__main__":
+    sys.exit(main())
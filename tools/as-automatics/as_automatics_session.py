@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_session.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Sessions building several independent processing chains in one process,
+sharing one module library.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_session.py
+# @ingroup automatics_mngmt
+# @author Philip Manke
+# @brief Build several independent processing chains in one process.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from as_automatics_env import AsAutomatics
+from as_automatics_module_lib import AsModuleLibrary
+from as_automatics_proc_chain import AsProcessingChain
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_cnn_layer import AsNNLayer
+from as_automatics_exceptions import (
+    AsErrorManager,
+    set_thread_error_manager,
+)
+from as_automatics_helpers import wait_for_worker
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+
+## @ingroup automatics_mngmt
+class AsSession:
+    """! @brief Container for independent processing chains.
+    All chains of a session share one module library, which is only read
+    after it is loaded. Every chain has its own AsAutomatics environment
+    (output settings, window pipelines) and its own error manager.
+    Errors raised in a thread are registered with the error manager of the
+    chain last created or activated in that thread.
+    Chains can be built and written in parallel using 'run'."""
+
+    def __init__(
+        self, library: AsModuleLibrary, asterics_home: str, version_no: str
+    ):
+        self.library = library
+        self.asterics_home = asterics_home
+        self.version = version_no
+        self.chains = []
+        ## Fail-fast setting for the error managers of new chains
+        self.fail_fast = None
+        self._lock = threading.Lock()
+
+    ##
+    # @addtogroup automatics_mngmt
+    # @{
+
+    def new_chain(self) -> AsProcessingChain:
+        """! @brief Provide a new, independent AsProcessingChain object.
+        The chain is activated for the calling thread (see 'activate').
+        @return  A new ASTERICS processing chain."""
+        env = AsAutomatics(self.asterics_home, self.version, self.library)
+        chain = AsProcessingChain(
+            self.library, parent=env, err_mgr=AsErrorManager(self.fail_fast)
+        )
+        env.current_chain = chain
+        with self._lock:
+            self.chains.append(chain)
+        self.activate(chain)
+        return chain
+
+    @staticmethod
+    def activate(chain: AsProcessingChain):
+        """! @brief Register errors raised in this thread with 'chain'.
+        Call before working on a chain other than the one last created
+        in the current thread."""
+        set_thread_error_manager(chain.err_mgr)
+
+    def set_fail_fast(self, severity: str = "Critical"):
+        """! @brief Set the fail-fast severity for chains of this session.
+        Applies to existing and new chains (see 'asterics.set_fail_fast')."""
+        self.fail_fast = severity
+        with self._lock:
+            for chain in self.chains:
+                chain.err_mgr.set_fail_fast(severity)
+
+    def new_2d_window_pipeline(
+        self,
+        chain: AsProcessingChain,
+        image_width: int,
+        image_height: int = 480,
+        name: str = "",
+        force_synchronous_pipeline: bool = None,
+    ) -> As2DWindowPipeline:
+        """! @brief Provide a new As2DWindowPipeline object for 'chain'.
+        See 'asterics.new_2d_window_pipeline' for the parameters."""
+        env = chain.parent
+        if not name:
+            name = "as_window_pipe_{}".format(len(env.windowpipes))
+        pipe = As2DWindowPipeline(image_width, image_height, name, chain=chain)
+        if force_synchronous_pipeline is not None:
+            pipe.set_pipeline_synchronous(force_synchronous_pipeline)
+        env.windowpipes.append(pipe)
+        return pipe
+
+    def new_nn_layer(
+        self,
+        chain: AsProcessingChain,
+        image_width: int,
+        image_height: int = 480,
+        name: str = "",
+    ) -> AsNNLayer:
+        """! @brief Provide a new AsNNLayer object for 'chain'.
+        See 'asterics.new_nn_layer' for the parameters."""
+        env = chain.parent
+        if not name:
+            name = "as_nn_layer_{}".format(len(env.windowpipes))
+        layer = AsNNLayer(image_width, image_height, name, chain=chain)
+        env.windowpipes.append(layer)
+        return layer
+
+    @staticmethod
+    def define_hardware_target(
+        chain: AsProcessingChain,
+        partname: str = "",
+        design_name: str = "",
+        board: str = "",
+    ):
+        """! @brief Define the hardware target of 'chain'.
+        See 'asterics.define_hardware_target'."""
+        chain.parent.set_hardware_target_definitions(
+            partname, design_name, board
+        )
+
+    @staticmethod
+    def set_ipcore_name(
+        chain: AsProcessingChain, name: str, description: str = ""
+    ):
+        """! @brief Set the name and description of the IP-Core of 'chain'.
+        See 'asterics.set_ipcore_name'."""
+        chain.parent.set_ipcore_name(name)
+        if description:
+            chain.parent.set_ipcore_description(description)
+
+    def run(
+        self, build_fns: list, jobs: int = 0, use_processes: bool = False
+    ) -> list:
+        """! @brief Run several build functions in parallel.
+        Every function is called as 'build_fn(session)' and should create,
+        connect and write its own chain using 'session.new_chain()'.
+        @note Vivado packaging runs as a separate process in the output
+              folder, so IP-Core builds can run in threads as well.
+        @param build_fns: List of build functions.
+        @param jobs: Number of parallel threads or processes (0: CPU count).
+        @param use_processes: Run every function in a forked worker process
+                  instead of a thread. Chains built in worker processes are
+                  not added to this session. Return values must be JSON
+                  serializable (other values are converted to strings).
+        @return A list of dictionaries (one per function, in order):
+                'success': False if the function raised an exception,
+                'result': The return value of the function,
+                'error': The exception message, if any."""
+        jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        if use_processes:
+            return self._run_forked(build_fns, jobs)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(self._run_build, build_fns))
+
+    ## @}
+
+    def _run_build(self, build_fn) -> dict:
+        """! @brief Run one build function, catching all exceptions."""
+        result = {"success": False, "result": None, "error": ""}
+        set_thread_error_manager(None)
+        try:
+            result["result"] = build_fn(self)
+            result["success"] = True
+        except Exception as err:
+            result["error"] = "{}: {}".format(type(err).__name__, str(err))
+            LOG.debug(traceback.format_exc())
+        finally:
+            set_thread_error_manager(None)
+        return result
+
+    def _run_forked(self, build_fns: list, jobs: int) -> list:
+        """! @brief Run the build functions in forked worker processes."""
+        results = [None] * len(build_fns)
+        running = {}  # pid -> (index, read end of the result pipe, data)
+        pending = list(enumerate(build_fns))
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        while pending or running:
+            while pending and len(running) < jobs:
+                idx, build_fn = pending.pop(0)
+                read_end, write_end = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    # Worker process
+                    os.close(read_end)
+                    result = self._run_build(build_fn)
+                    with os.fdopen(write_end, "w") as pipe:
+                        json.dump(result, pipe, default=str)
+                    as_log.flush_log()
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(0)
+                os.close(write_end)
+                running[pid] = (idx, read_end, [])
+            idx, data = wait_for_worker(running)
+            try:
+                results[idx] = json.loads(data)
+            except ValueError:
+                results[idx] = {
+                    "success": False,
+                    "result": None,
+                    "error": "Worker process failed",
+                }
+        return results
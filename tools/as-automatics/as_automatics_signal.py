@@ -50,7 +50,7 @@ from as_automatics_connection_helper import get_parent_module
 import as_automatics_helpers as as_help
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("connect")
 
 
 ## @ingroup automatics_intrep
@@ -61,6 +61,14 @@ class GenericSignal(Port):
     The 'direction' and 'connected' attribute are ignored for this class.
     Models a generic VHDL signal in an architecture."""
 
+    __slots__ = (
+        "is_signal",
+        "vector_map_incoming",
+        "vector_map_outgoing",
+        "vector_assignment_tasks",
+        "name_suffix",
+    )
+
     def __init__(
         self,
         name: str = "",
@@ -331,6 +339,8 @@ class GlueSignal(GenericSignal):
     The 'direction' and 'connected' attribute are ignored for this class.
     Used only to connect a port to a VHDL component in a port map."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         name: str = "",
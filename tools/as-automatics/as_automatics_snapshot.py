@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_snapshot.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Save and restore snapshots of connected AsProcessingChain objects.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_snapshot.py
+# @ingroup automatics_snapshot
+# @author Philip Manke
+# @brief Save and restore snapshots of connected processing chains.
+# -----------------------------------------------------------------------------
+
+import os
+import io
+import sys
+import json
+import types
+import zlib
+import marshal
+import pickle
+from hashlib import sha256
+
+from as_automatics_module_lib import AsModuleLibrary
+from as_automatics_exceptions import AsFileError
+from as_automatics_helpers import get_file_mtimes
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+
+## @defgroup automatics_snapshot Processing chain snapshots
+# @ingroup automatics_internal
+# A snapshot file consists of three parts:
+# 1. The magic line "ASTERICS-SNAPSHOT <format version>"
+# 2. A header line: JSON object with sorted keys, describing the snapshot
+# 3. The zlib compressed pickle stream of the processing chain.
+# References to the module library, the Automatics environment and to
+# classes and functions defined in module specification scripts are stored
+# symbolically and resolved using the library of the loading process.
+
+##
+# @addtogroup automatics_snapshot
+# @{
+
+SNAPSHOT_MAGIC = b"ASTERICS-SNAPSHOT"
+## Increment when the snapshot format or the pickled classes change
+SNAPSHOT_FORMAT_VERSION = 3
+PICKLE_PROTOCOL = 4
+## File types that make up the module library
+LIBRARY_SUFFIXES = (".py", ".vhd", ".vhdl")
+# The object graph of a connected chain is deep (ports <-> interfaces <-> ...)
+RECURSION_LIMIT = 50000
+
+
+def get_library_fingerprint(library: AsModuleLibrary) -> str:
+    """! @brief Return a SHA256 hash over the sources of all repositories.
+    Includes the repository names and the content of all specification
+    scripts and VHDL sources."""
+    hashgen = sha256()
+    for repo in library.repos:
+        hashgen.update("{}\n".format(repo.name).encode())
+        for path in sorted(get_file_mtimes([repo.path], LIBRARY_SUFFIXES)):
+            hashgen.update(os.path.relpath(path, repo.path).encode())
+            with open(path, "rb") as file:
+                hashgen.update(sha256(file.read()).digest())
+    return hashgen.hexdigest()
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """! @brief Pickler storing references to shared objects symbolically."""
+
+    def __init__(self, file, chain):
+        super().__init__(file, protocol=PICKLE_PROTOCOL)
+        self.chain = chain
+
+    def persistent_id(self, obj):
+        if obj is self.chain.library:
+            return ("library",)
+        if obj is self.chain.parent:
+            return ("automatics",)
+        if isinstance(obj, (type, types.FunctionType)):
+            module = sys.modules.get(obj.__module__)
+            if module is None:
+                script = AsModuleLibrary.spec_scripts.get(obj.__module__)
+                if script is None:
+                    raise pickle.PicklingError(
+                        "Can't store '{}' of unknown module '{}'".format(
+                            obj.__qualname__, obj.__module__
+                        )
+                    )
+                if "<" not in obj.__qualname__:
+                    return ("spec", obj.__module__, obj.__qualname__)
+            if isinstance(obj, types.FunctionType) and "<" in obj.__qualname__:
+                # Lambdas and local functions: Store the code object
+                if obj.__closure__:
+                    raise pickle.PicklingError(
+                        "Can't store function '{}' using a closure".format(
+                            obj.__qualname__
+                        )
+                    )
+                return (
+                    "code",
+                    obj.__module__,
+                    marshal.dumps(obj.__code__),
+                    obj.__defaults__,
+                )
+        return None
+
+    def reducer_override(self, obj):
+        # Functions added to single module objects in specification scripts
+        # (see as_sensor_ov7670_spec.py) are bound methods of local functions
+        if (
+            isinstance(obj, types.MethodType)
+            and "<" in obj.__func__.__qualname__
+        ):
+            return (_bind_method, (obj.__func__, obj.__self__))
+        return NotImplemented
+
+
+def _bind_method(func, obj):
+    return types.MethodType(func, obj)
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """! @brief Unpickler resolving the references of _SnapshotPickler."""
+
+    def __init__(self, file, auto):
+        super().__init__(file)
+        self.auto = auto
+
+    @staticmethod
+    def _get_namespace(module_name: str):
+        module = sys.modules.get(module_name)
+        if module is None:
+            module = AsModuleLibrary.spec_scripts.get(module_name)
+        if module is None:
+            raise pickle.UnpicklingError(
+                "Module '{}' is not loaded!".format(module_name)
+            )
+        return module
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "library":
+            return self.auto.library
+        if kind == "automatics":
+            return self.auto
+        if kind == "spec":
+            obj = self._get_namespace(pid[1])
+            for name in pid[2].split("."):
+                obj = getattr(obj, name)
+            return obj
+        if kind == "code":
+            namespace = self._get_namespace(pid[1])
+            return types.FunctionType(
+                marshal.loads(pid[2]), vars(namespace), None, pid[3]
+            )
+        raise pickle.UnpicklingError("Unknown reference '{}'".format(kind))
+
+
+def get_snapshot_header(chain) -> dict:
+    """! @brief Return the descriptive header of a snapshot of 'chain'."""
+    return {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "automatics_version": chain.parent.version,
+        "python": "{}.{}".format(*sys.version_info[:2]),
+        "library_fingerprint": get_library_fingerprint(chain.library),
+        "chain_hash": chain.get_hash(),
+        "auto_connect_run": chain.auto_connect_run,
+        "modules": sorted(mod.name for mod in chain.modules),
+        "pipelines": sorted(pipe.name for pipe in chain.pipelines),
+    }
+
+
+def save_snapshot(chain, path: str):
+    """! @brief Write a snapshot of 'chain' to the file 'path'.
+    The output only depends on the state of the chain (no timestamps)."""
+    buffer = io.BytesIO()
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        _SnapshotPickler(buffer, chain).dump(
+            (chain, chain.parent.windowpipes)
+        )
+    except (pickle.PicklingError, TypeError, AttributeError) as err:
+        LOG.error("Could not create snapshot of the chain: '%s'", str(err))
+        raise AsFileError(path, "Could not create snapshot", str(err))
+    finally:
+        sys.setrecursionlimit(limit)
+    header = json.dumps(get_snapshot_header(chain), sort_keys=True)
+    with open(path, "wb") as file:
+        file.write(
+            b"%s %d\n" % (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION)
+        )
+        file.write(header.encode() + b"\n")
+        file.write(zlib.compress(buffer.getvalue(), 9))
+    LOG.info("Saved snapshot of the processing chain to '%s'.", path)
+
+
+def is_snapshot_file(path: str) -> bool:
+    """! @brief Check if the file 'path' starts with the snapshot magic line.
+    Registers no errors, e.g. to tell snapshots from other files."""
+    try:
+        with open(path, "rb") as file:
+            magic = file.readline().split()
+    except OSError:
+        return False
+    return len(magic) == 2 and magic[0] == SNAPSHOT_MAGIC
+
+
+def read_snapshot_header(path: str) -> dict:
+    """! @brief Return the header of the snapshot file 'path'."""
+    with open(path, "rb") as file:
+        return _read_header(file, path)
+
+
+def _read_header(file, path: str) -> dict:
+    magic = file.readline().split()
+    if len(magic) != 2 or magic[0] != SNAPSHOT_MAGIC:
+        raise AsFileError(path, "Not an Automatics snapshot file")
+    if int(magic[1]) != SNAPSHOT_FORMAT_VERSION:
+        raise AsFileError(
+            path,
+            "Unsupported snapshot format version",
+            "Found version {}, supported: {}".format(
+                int(magic[1]), SNAPSHOT_FORMAT_VERSION
+            ),
+        )
+    return json.loads(file.readline())
+
+
+def load_snapshot(auto, path: str, check_library: bool = True):
+    """! @brief Restore a processing chain from the snapshot file 'path'.
+    The chain becomes the current chain of the AsAutomatics object 'auto'.
+    @param check_library: Compare the library fingerprint stored in the
+                          snapshot with the library of 'auto'.
+    @return The restored AsProcessingChain."""
+    with open(path, "rb") as file:
+        header = _read_header(file, path)
+        payload = file.read()
+    if header["automatics_version"] != auto.version:
+        raise AsFileError(
+            path,
+            "Snapshot was created by another Automatics version",
+            "Snapshot: {}, this is: {}".format(
+                header["automatics_version"], auto.version
+            ),
+        )
+    if check_library:
+        fingerprint = get_library_fingerprint(auto.library)
+        if header["library_fingerprint"] != fingerprint:
+            LOG.error(
+                "Snapshot '%s' was created using a different module library!",
+                path,
+            )
+            raise AsFileError(
+                path,
+                "Module library does not match the snapshot",
+                "Module sources or repositories changed since the snapshot "
+                "was created. Rebuild the chain to create a new snapshot.",
+            )
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        chain, windowpipes = _SnapshotUnpickler(
+            io.BytesIO(zlib.decompress(payload)), auto
+        ).load()
+    except (pickle.UnpicklingError, AttributeError, zlib.error) as err:
+        LOG.error("Could not load snapshot '%s': '%s'", path, str(err))
+        raise AsFileError(path, "Could not load snapshot", str(err))
+    finally:
+        sys.setrecursionlimit(limit)
+    auto.current_chain = chain
+    auto.windowpipes = windowpipes
+    LOG.info("Loaded snapshot of the processing chain from '%s'.", path)
+    return chain
+
+
+## @}
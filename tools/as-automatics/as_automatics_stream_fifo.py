@@ -0,0 +1,596 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_stream_fifo.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Automatic insertion and sizing of elastic buffers (as_stream_fifo) on the
+as_stream connections of a processing chain, based on the burst and stall
+behaviour of the connected modules.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_stream_fifo.py
+# @ingroup automatics_connection
+# @author Philip Manke
+# @brief Insert and size FIFOs on as_stream connections where required.
+# -----------------------------------------------------------------------------
+
+import json
+import math
+
+from as_automatics_module import AsModule
+from as_automatics_interface import Interface
+from as_automatics_templates import AsStream
+from as_automatics_throughput import (
+    get_stream_rate,
+    get_stream_width,
+    get_interface_port,
+    get_generic_int,
+    get_rate_value,
+)
+from as_automatics_exceptions import AsError
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_connection
+# @{
+
+## Entity name of the FIFO module inserted into stream connections
+FIFO_ENTITY = "as_stream_fifo"
+## Minimum BUFF_DEPTH of as_stream_fifo
+FIFO_MIN_DEPTH = 8
+## Free entries of as_stream_fifo when it stalls its source
+FIFO_STALL_MARGIN = 4
+## Bits stored per entry in addition to the data (AsStream flags)
+FIFO_FLAG_BITS = 6
+## Deepest buffers mapped to distributed RAM (LUTRAM) instead of BRAM
+LUTRAM_MAX_DEPTH = 64
+## Supported (depth, width) configurations of an 18 Kb block RAM
+BRAM18_ASPECTS = ((512, 36), (1024, 18), (2048, 9), (4096, 4), (8192, 2))
+
+
+def next_power_of_2(value: int) -> int:
+    return 1 << max(int(value) - 1, 0).bit_length()
+
+
+def get_buffer_cost(depth: int, width: int) -> dict:
+    """! @brief Estimate the memory resources of a FIFO buffer.
+    Buffers up to LUTRAM_MAX_DEPTH entries are assumed to be implemented
+    in distributed RAM (RAM32M / RAM64M primitives, 4 LUTs each), deeper
+    buffers in 18 Kb block RAMs.
+    @return Dictionary: 'bits', 'memory' ("LUTRAM" or "BRAM"), 'luts' and
+            'bram18' (number of 18 Kb block RAMs)."""
+    cost = {"bits": depth * width, "memory": "LUTRAM", "luts": 0, "bram18": 0}
+    if depth <= 32:
+        cost["luts"] = 4 * math.ceil(width / 6)
+    elif depth <= LUTRAM_MAX_DEPTH:
+        cost["luts"] = 4 * math.ceil(width / 3)
+    else:
+        cost["memory"] = "BRAM"
+        aspect = next(
+            (asp for asp in BRAM18_ASPECTS if asp[0] >= depth),
+            BRAM18_ASPECTS[-1],
+        )
+        cost["bram18"] = math.ceil(depth / aspect[0]) * math.ceil(
+            width / aspect[1]
+        )
+    return cost
+
+
+class StreamFifo:
+    """! @brief Buffer requirement of one as_stream connection."""
+
+    def __init__(self, source_inter: Interface, sink_inter: Interface):
+        self.source_inter = source_inter
+        self.sink_inter = sink_inter
+        self.source = source_inter.parent
+        self.sink = sink_inter.parent
+        self.width = get_stream_width(source_inter)
+        if self.width is None:
+            self.width = get_stream_width(sink_inter)
+        ## Average strobes per cycle at the target rate
+        self.rate = 0.0
+        ## Strobes the source outputs in consecutive cycles
+        self.burst = 1
+        ## Strobes per cycle the sink accepts (average)
+        self.accept_rate = 1.0
+        ## Cycles the sink may stall the connection in a row
+        self.stall_cycles = 0
+        ## Entries required to sustain the rate without stalling the source
+        self.required = 0
+        ## Stall cycles reaching the source (not absorbed by buffers)
+        self.passed_stall = 0
+        ## Entries buffered by the sink
+        self.available = 0
+        ## "insert", "resize", "stall" (stall absorbed upstream) or "none"
+        self.action = "none"
+        ## Module inserted or resized
+        self.module = None
+        ## Depth and width of the inserted FIFO or resized buffer
+        self.depth = 0
+        self.fifo_width = 0
+        self.cost = None
+
+    def get_name(self) -> str:
+        return "{}.{} -> {}.{}".format(
+            self.source.name,
+            self.source_inter.name,
+            self.sink.name,
+            self.sink_inter.name,
+        )
+
+    def to_dict(self) -> dict:
+        out = {
+            "source": self.source.name,
+            "source_interface": self.source_inter.name,
+            "sink": self.sink.name,
+            "sink_interface": self.sink_inter.name,
+            "width": self.width,
+            "strobes_per_cycle": round(self.rate, 4),
+            "burst_length": self.burst,
+            "sink_accept_rate": round(self.accept_rate, 4),
+            "sink_stall_cycles": self.stall_cycles,
+            "required_entries": self.required,
+            "available_entries": self.available,
+            "action": self.action,
+        }
+        if self.module is not None:
+            out["module"] = self.module.name
+            out["depth"] = self.depth
+            out["fifo_width"] = self.fifo_width
+            out["cost"] = self.cost
+        return out
+
+
+class StreamFifoReport:
+    """! @brief FIFOs inserted or resized by 'insert_stream_fifos'."""
+
+    def __init__(self):
+        ## All analyzed stream connections (StreamFifo)
+        self.connections = []
+
+    def get_fifos(self) -> list:
+        """! @brief Return the connections with an inserted or resized FIFO."""
+        return [
+            con
+            for con in self.connections
+            if con.action in ("insert", "resize")
+        ]
+
+    def get_total_cost(self) -> dict:
+        total = {"bits": 0, "luts": 0, "bram18": 0}
+        for con in self.get_fifos():
+            for key in total:
+                total[key] += con.cost[key]
+        return total
+
+    def to_dict(self) -> dict:
+        return {
+            "fifos": [con.to_dict() for con in self.get_fifos()],
+            "total": self.get_total_cost(),
+            "connections": [con.to_dict() for con in self.connections],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the report to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error(
+                "Could not write stream FIFO report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def __str__(self) -> str:
+        fifos = self.get_fifos()
+        total = self.get_total_cost()
+        lines = [
+            "Stream FIFOs: {} of {} stream connections buffered, "
+            "{} LUTs (LUTRAM), {} 18 Kb BRAMs:".format(
+                len(fifos),
+                len(self.connections),
+                total["luts"],
+                total["bram18"],
+            )
+        ]
+        for con in fifos:
+            lines.append(
+                "  {} {}: '{}' {} x {} bit, {} ({})".format(
+                    "Inserted" if con.action == "insert" else "Resized",
+                    con.get_name(),
+                    con.module.name,
+                    con.depth,
+                    con.fifo_width,
+                    con.cost["memory"],
+                    "{} LUTs".format(con.cost["luts"])
+                    if con.cost["memory"] == "LUTRAM"
+                    else "{} BRAM18".format(con.cost["bram18"]),
+                )
+            )
+        return "\n".join(lines)
+
+
+class StreamFifoPlanner:
+    """! @brief Determine the buffers required on the stream connections.
+    Considers the connections between modules of 'as_main' defined by
+    'chain.connect()' (2D window pipelines are not included).
+    Burst profiles along each connection:
+    - Sources output strobes at their target rate. Modules reducing the data
+      width (or memory sources) output bursts of (input width / output
+      width) strobes; Modules may declare longer bursts ('burst_length').
+    - Sinks accept one strobe per 'interval' cycles, modules with more
+      inputs at the rate of their slowest input, memory sinks at most
+      'memory_width' bits per cycle.
+    - Sinks may stall their inputs for 'stall_cycles' cycles in a row;
+      Modules without an input buffer pass on the stall they receive.
+    A connection requires (burst * (1 - accept rate) + stall * rate) entries
+    of buffering. If the sink's buffer ('buffer_bits') is too small, the
+    stall reaches the source. Unless the source side can absorb it (a
+    buffered module or a stallable source running below its maximum rate),
+    the sink's buffer is enlarged ('buffer_generic') or an as_stream_fifo
+    is inserted."""
+
+    def __init__(self, chain, target_rates: dict = None):
+        self.chain = chain
+        self.target_rates = target_rates or {}
+        self.connections = []
+        ## Module name -> list of connections into / out of the module
+        self.inputs = {}
+        self.outputs = {}
+        self.modules = {}
+
+    def __find_connections__(self):
+        """! @brief Resolve the user connections to as_stream interfaces."""
+        chain = self.chain
+        claimed = set()
+        for source, sink, top in chain.user_cons:
+            if top is not chain.as_main:
+                continue
+            for src_inter, snk_inter in self.__get_stream_pairs__(
+                source, sink, claimed
+            ):
+                claimed.add(id(src_inter))
+                claimed.add(id(snk_inter))
+                con = StreamFifo(src_inter, snk_inter)
+                if con.width is None:
+                    LOG.debug(
+                        "Stream FIFOs: Width of '%s' unknown; skipped.",
+                        con.get_name(),
+                    )
+                    continue
+                self.connections.append(con)
+                for mod in (con.source, con.sink):
+                    self.modules[mod.name] = mod
+                    self.inputs.setdefault(mod.name, [])
+                    self.outputs.setdefault(mod.name, [])
+                self.outputs[con.source.name].append(con)
+                self.inputs[con.sink.name].append(con)
+
+    def __get_stream_pairs__(self, source, sink, claimed: set) -> list:
+        """! @brief Return the as_stream interface pairs of a connection.
+        Modules are matched like 'AsProcessingChain.__connect_module__':
+        Each output of 'source' to the first unconnected input of 'sink'."""
+
+        def is_stream(obj):
+            return (
+                isinstance(obj, Interface)
+                and obj.type == AsStream.INTERFACE_TYPE_NAME
+                and self.__is_chain_module__(obj.parent)
+            )
+
+        if is_stream(source) and is_stream(sink):
+            if source.direction == "in":
+                source, sink = sink, source
+            if source.direction == sink.direction:
+                return []
+            if id(source) in claimed or id(sink) in claimed:
+                return []
+            return [(source, sink)]
+        if not (
+            self.__is_chain_module__(source) and self.__is_chain_module__(sink)
+        ):
+            return []
+        pairs = []
+        used = set(claimed)
+        for src_inter in source.interfaces:
+            if not is_stream(src_inter) or src_inter.direction != "out":
+                continue
+            if id(src_inter) in used:
+                continue
+            snk_inter = next(
+                (
+                    inter
+                    for inter in sink.interfaces
+                    if is_stream(inter)
+                    and inter.direction == "in"
+                    and id(inter) not in used
+                ),
+                None,
+            )
+            if snk_inter is None:
+                continue
+            used.add(id(snk_inter))
+            pairs.append((src_inter, snk_inter))
+        return pairs
+
+    def __is_chain_module__(self, module) -> bool:
+        return (
+            isinstance(module, AsModule)
+            and module.parent is self.chain.as_main
+        )
+
+    def __get_order__(self) -> list:
+        """! @brief Return the module names in topological order (Kahn).
+        Modules in cycles are appended in connection order."""
+        indegree = {name: len(cons) for name, cons in self.inputs.items()}
+        queue = [name for name, deg in indegree.items() if deg == 0]
+        order = []
+        for name in queue:
+            order.append(name)
+            for con in self.outputs[name]:
+                indegree[con.sink.name] -= 1
+                if indegree[con.sink.name] == 0:
+                    queue.append(con.sink.name)
+        order.extend(name for name in self.modules if name not in order)
+        return order
+
+    def __propagate_rates__(self, order: list):
+        """! @brief Propagate the target rates and bursts along connections."""
+        for name in order:
+            module = self.modules[name]
+            rate = get_stream_rate(module)
+            mem_width = get_rate_value(module, rate["memory_width"])
+            inputs = self.inputs[name]
+            if inputs:
+                in_rate = min(con.rate for con in inputs)
+                in_rate = min(in_rate, 1.0 / max(float(rate["interval"]), 1.0))
+                in_bits = sum(con.width * in_rate for con in inputs) / len(
+                    inputs
+                )
+                in_width = max(con.width for con in inputs)
+            else:
+                in_rate = float(
+                    self.target_rates.get(name, rate["source_rate"])
+                )
+                out_width = max(
+                    (con.width for con in self.outputs[name]), default=0
+                )
+                if mem_width and out_width:
+                    in_rate = min(in_rate, mem_width / out_width)
+                in_bits = in_rate * out_width
+                in_width = mem_width or 0
+            burst = get_rate_value(module, rate["burst_length"]) or 1
+            for con in self.outputs[name]:
+                con.rate = min(
+                    in_bits * float(rate["bit_ratio"]) / con.width, 1.0
+                )
+                con.burst = max(burst, math.ceil(in_width / con.width), 1)
+
+    def __get_accept_rate__(self, con: StreamFifo) -> float:
+        """! @brief Return the average strobes per cycle 'con.sink' accepts."""
+        rate = get_stream_rate(con.sink)
+        accept = 1.0 / max(float(rate["interval"]), 1.0)
+        mem_width = get_rate_value(con.sink, rate["memory_width"])
+        if mem_width:
+            accept = min(accept, mem_width / con.width)
+        # Joins run at the rate of their slowest input
+        for other in self.inputs[con.sink.name]:
+            if other is not con:
+                accept = min(accept, other.rate)
+        return accept
+
+    def __get_buffer_entries__(self, module: AsModule, width: int) -> int:
+        """! @brief Return the entries of 'width' bits buffered by 'module'."""
+        bits = get_rate_value(module, get_stream_rate(module)["buffer_bits"])
+        return bits // width if bits else 0
+
+    def __can_absorb__(self, module: AsModule, visited: set = None) -> bool:
+        """! @brief Return True if the modules before and including 'module'
+        can absorb stall on the outputs of 'module' without losing data or
+        reducing the target rate."""
+        visited = visited if visited is not None else set()
+        if module.name in visited:
+            return False
+        visited.add(module.name)
+        rate = get_stream_rate(module)
+        outputs = self.outputs[module.name]
+        if not all(self.__handles_stall__(con) for con in outputs):
+            return False
+        if rate["buffered"]:
+            return True
+        inputs = self.inputs[module.name]
+        if not inputs:
+            # Sources can catch up if running below their maximum rate
+            return module.name in self.target_rates and float(
+                self.target_rates[module.name]
+            ) < float(rate["source_rate"])
+        if not all(
+            get_interface_port(con.sink_inter, "stall") is not None
+            for con in inputs
+        ):
+            return False
+        return all(
+            self.__can_absorb__(con.source, visited) for con in inputs
+        )
+
+    @staticmethod
+    def __handles_stall__(con: StreamFifo) -> bool:
+        """! @brief Return True if the source of 'con' reacts to stall."""
+        return get_interface_port(con.source_inter, "stall") is not None
+
+    def plan(self) -> list:
+        """! @brief Determine the buffer requirement of all connections.
+        @return The analyzed connections (StreamFifo)."""
+        self.__find_connections__()
+        order = self.__get_order__()
+        self.__propagate_rates__(order)
+
+        # Stall cycles a module passes on to its inputs, in reverse order
+        for name in reversed(order):
+            module = self.modules[name]
+            rate = get_stream_rate(module)
+            stall = int(get_rate_value(module, rate["stall_cycles"]) or 0)
+            if not rate["buffered"]:
+                stall += max(
+                    (con.passed_stall for con in self.outputs[name]),
+                    default=0,
+                )
+            for con in self.inputs[name]:
+                self.__plan_connection__(con, stall)
+        return self.connections
+
+    def __plan_connection__(self, con: StreamFifo, stall: int):
+        """! @brief Determine the buffer required by one connection."""
+        con.accept_rate = self.__get_accept_rate__(con)
+        con.stall_cycles = stall
+        if con.rate > con.accept_rate + 1e-9:
+            # Unsustainable, buffering does not help
+            con.passed_stall = stall
+            LOG.debug(
+                "Stream FIFOs: '%s' cannot sustain %.3f strobes per cycle.",
+                con.get_name(),
+                con.rate,
+            )
+            return
+        burst_backlog = con.burst * max(1.0 - con.accept_rate, 0.0)
+        con.required = int(math.ceil(burst_backlog + stall * con.rate))
+        con.available = self.__get_buffer_entries__(con.sink, con.width)
+        if con.required <= con.available or con.required == 0:
+            return
+        if self.__handles_stall__(con) and self.__can_absorb__(con.source):
+            con.action = "stall"
+            con.passed_stall = stall
+            return
+        rate = get_stream_rate(con.sink)
+        if rate["buffer_generic"] and con.available:
+            con.action = "resize"
+        else:
+            con.action = "insert"
+
+
+def insert_stream_fifos(chain, target_rates: dict = None) -> StreamFifoReport:
+    """! @brief Insert and size FIFOs on the stream connections of a chain.
+    Must run before the user connections are made ('auto_connect').
+    Enlarges the input buffer of sinks with a 'buffer_generic' or inserts
+    as_stream_fifo modules into the user connections where the burst and
+    stall profiles of the connected modules require buffering.
+    @param chain: The AsProcessingChain.
+    @param target_rates: Optional dictionary: Source module name -> strobes
+                 per clock cycle to sustain (default: The 'source_rate').
+    @return A StreamFifoReport."""
+    report = StreamFifoReport()
+    report.connections = StreamFifoPlanner(chain, target_rates).plan()
+    for con in report.get_fifos():
+        try:
+            if con.action == "resize":
+                _resize_buffer(con)
+            else:
+                _insert_fifo(chain, con)
+        except AsError:
+            LOG.warning(
+                "Stream FIFOs: Could not buffer connection '%s'!",
+                con.get_name(),
+            )
+            con.action = "none"
+            con.module = None
+    for con in report.get_fifos():
+        LOG.info(
+            "Stream FIFOs: %s '%s' (%i x %i bit, %s) for '%s'.",
+            "Inserted" if con.action == "insert" else "Resized",
+            con.module.name,
+            con.depth,
+            con.fifo_width,
+            con.cost["memory"],
+            con.get_name(),
+        )
+    total = report.get_total_cost()
+    LOG.info(
+        "Stream FIFOs: %i of %i stream connections buffered, "
+        "%i LUTs (LUTRAM), %i 18 Kb BRAMs.",
+        len(report.get_fifos()),
+        len(report.connections),
+        total["luts"],
+        total["bram18"],
+    )
+    return report
+
+
+def _insert_fifo(chain, con: StreamFifo):
+    """! @brief Insert an as_stream_fifo into the connection 'con'."""
+    depth = next_power_of_2(
+        max(con.required + FIFO_STALL_MARGIN, FIFO_MIN_DEPTH)
+    )
+    fifo = chain.add_module(
+        FIFO_ENTITY, "{}_{}_fifo".format(con.source.name, con.sink.name)
+    )
+    fifo.set_generic_value("DATA_WIDTH", con.width)
+    fifo.set_generic_value("BUFF_DEPTH", depth)
+    chain._extract_generics(fifo)
+    fifo_in = fifo.get_interfaces_filtered("in", AsStream.INTERFACE_TYPE_NAME)
+    fifo_out = fifo.get_interfaces_filtered(
+        "out", AsStream.INTERFACE_TYPE_NAME
+    )
+    # Connect through the FIFO first: The original connection then skips the
+    # already connected interfaces
+    chain.user_cons.insert(0, (con.source_inter, fifo_in[0], chain.as_main))
+    chain.user_cons.insert(1, (fifo_out[0], con.sink_inter, chain.as_main))
+    con.module = fifo
+    con.depth = depth
+    con.fifo_width = con.width + FIFO_FLAG_BITS
+    con.cost = get_buffer_cost(depth, con.fifo_width)
+
+
+def _resize_buffer(con: StreamFifo):
+    """! @brief Enlarge the input buffer of 'con.sink'."""
+    module = con.sink
+    rate = get_stream_rate(module)
+    name = rate["buffer_generic"]
+    value = get_generic_int(module, name)
+    # The buffer size is proportional to the generic
+    value = next_power_of_2(
+        math.ceil(value * con.required / max(con.available, 1))
+    )
+    module.set_generic_value(name, value)
+    bits = get_rate_value(module, rate["buffer_bits"])
+    # Buffers of memory endpoints store words of the memory port width
+    width = get_rate_value(module, rate["memory_width"]) or con.width
+    con.module = module
+    con.depth = bits // width
+    con.fifo_width = width
+    con.cost = get_buffer_cost(con.depth, width)
+
+
+## @}
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_sweep.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Design space exploration: Build many variants of a processing chain
+in parallel worker processes and collect metrics for each variant.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_sweep.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Build and compare many variants of a processing chain.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import csv
+import json
+import time
+import itertools as ittls
+import traceback
+
+from as_automatics_helpers import append_to_path, wait_for_worker
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Valid values for the output kind of sweep variants
+SWEEP_OUTPUT_KINDS = ("core", "hw", "sw", "graph")
+
+
+def expand_param_grid(param_grid) -> list:
+    """! @brief Return the list of parameter sets described by 'param_grid'.
+    'param_grid' is either a dictionary {<name>: [<values>]}, which is expanded
+    to all combinations of the values, or a list of dictionaries
+    (each used as one parameter set)."""
+    if isinstance(param_grid, dict):
+        names = list(param_grid.keys())
+        return [
+            dict(zip(names, values))
+            for values in ittls.product(*(param_grid[n] for n in names))
+        ]
+    return [dict(params) for params in param_grid]
+
+
+def get_chain_metrics(chain) -> dict:
+    """! @brief Collect metrics describing a connected processing chain."""
+    regifs = list(chain.address_space.values())
+    metrics = {
+        "modules": len(chain.modules),
+        "register_interfaces": len(regifs),
+        "registers": sum(max(regif.get_reg_count(), 0) for regif in regifs),
+        "address_width": chain.mod_addr_width + chain.reg_addr_width,
+        "pipelines": len(chain.pipelines),
+        "pipeline_delay": 0,
+        "buffer_count": 0,
+        "buffer_size": 0,
+        "buffer_count_bram": 0,
+        "buffer_size_bram": 0,
+        "buffer_size_reg": 0,
+    }
+    for pipe in chain.pipelines:
+        stats = pipe.get_pipeline_buffer_statistics()
+        metrics["pipeline_delay"] = max(
+            metrics["pipeline_delay"], pipe.pipeline_delay
+        )
+        metrics["buffer_count"] += stats["count"]
+        metrics["buffer_size"] += stats["size"]
+        metrics["buffer_count_bram"] += stats["count_bram"]
+        metrics["buffer_size_bram"] += stats["size_bram"]
+        metrics["buffer_size_reg"] += stats["size_reg"]
+    return metrics
+
+
+def _build_variant(
+    auto, build_fn, params: dict, output: str, write, output_kind: str
+) -> dict:
+    """! @brief Build one variant (run in a worker process)."""
+    result = {"success": False, "error": "", "written": False}
+    start = time.perf_counter()
+    try:
+        auto.reset_build_state()
+        chain = build_fn(**params)
+        if chain is None:
+            chain = auto.current_chain
+        chain.auto_connect()
+        result["success"] = not chain.err_mgr.has_errors()
+        result.update(get_chain_metrics(chain))
+        if callable(write):
+            write = write(params, result)
+        if write and result["success"]:
+            if output_kind == "core":
+                written = chain.write_asterics_core(output)
+            elif output_kind == "hw":
+                written = chain.write_hw(output)
+            elif output_kind == "sw":
+                written = chain.write_sw(output)
+            else:
+                written = chain.write_system_graph(
+                    append_to_path(output, "system_graph", False)
+                )
+            result["written"] = bool(written)
+    except SystemExit as exit_exc:
+        # E.g. error handling of 'build_fn' calling 'sys.exit'
+        result["error"] = "SystemExit: {}".format(exit_exc.code)
+    except Exception as err:
+        result["error"] = "{}: {}".format(type(err).__name__, str(err))
+        LOG.debug(traceback.format_exc())
+    result["gen_time"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def sweep(
+    auto,
+    build_fn,
+    param_grid,
+    jobs: int = 0,
+    output_dir: str = "",
+    write=False,
+    output_kind: str = "core",
+) -> list:
+    """! @brief Build all variants of 'param_grid' using 'build_fn'.
+    Each variant is built in its own forked worker process, which inherits
+    the already loaded module library. Up to 'jobs' variants are built
+    at the same time.
+    @param auto: The AsAutomatics object (library must be loaded).
+    @param build_fn: Called as 'build_fn(**params)' for every parameter set.
+                     Must set up a chain using 'asterics.new_chain()' and
+                     may return it.
+    @param param_grid: See 'expand_param_grid'.
+    @param jobs: Number of parallel workers (0: number of CPUs).
+    @param output_dir: Outputs of variant 'n' are written to
+                       '<output_dir>/variant_<n>'.
+    @param write: Bool or function 'write(params, metrics) -> bool',
+                  selecting the variants for which outputs are written.
+    @param output_kind: One of SWEEP_OUTPUT_KINDS.
+    @return A list of dictionaries (one per variant): Parameters and metrics.
+    """
+    if output_kind not in SWEEP_OUTPUT_KINDS:
+        raise ValueError("Invalid output kind '{}'".format(output_kind))
+    if write and not output_dir:
+        raise ValueError("Writing outputs requires an output directory!")
+    variants = expand_param_grid(param_grid)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    results = [None] * len(variants)
+    running = {}  # pid -> (index, read end of the result pipe, data)
+    pending = list(enumerate(variants))
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    while pending or running:
+        while pending and len(running) < jobs:
+            idx, params = pending.pop(0)
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                # Worker process
+                os.close(read_end)
+                result = _build_variant(
+                    auto,
+                    build_fn,
+                    params,
+                    append_to_path(output_dir, "variant_{}".format(idx))
+                    if output_dir
+                    else "",
+                    write,
+                    output_kind,
+                )
+                with os.fdopen(write_end, "w") as pipe:
+                    json.dump(result, pipe)
+                as_log.flush_log()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(0)
+            os.close(write_end)
+            running[pid] = (idx, read_end, [])
+        idx, data = wait_for_worker(running)
+        try:
+            result = json.loads(data)
+        except ValueError:
+            result = {"success": False, "error": "Worker process failed"}
+        row = {"variant": idx}
+        row.update(variants[idx])
+        row.update(result)
+        results[idx] = row
+        LOG.info(
+            "Sweep: Variant %i done (%i/%i).",
+            idx,
+            len(variants) - len(pending) - len(running),
+            len(variants),
+        )
+    return results
+
+
+def get_table_columns(results: list) -> list:
+    """! @brief Return the column names of a sweep result table."""
+    columns = []
+    for row in results:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    return columns
+
+
+def print_sweep_table(results: list, columns: list = None):
+    """! @brief Print the results of a sweep as a table to the console."""
+    if not results:
+        print("No sweep results.")
+        return
+    if columns is None:
+        columns = [
+            col for col in get_table_columns(results) if col != "error"
+        ]
+    rows = [[str(row.get(col, "")) for col in columns] for row in results]
+    widths = [
+        max(len(col), *(len(row[idx]) for row in rows))
+        for idx, col in enumerate(columns)
+    ]
+    print("  ".join(col.rjust(w) for col, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(val.rjust(w) for val, w in zip(row, widths)))
+    for row in results:
+        if row.get("error"):
+            print("Variant {}: {}".format(row["variant"], row["error"]))
+
+
+def write_sweep_csv(results: list, path: str):
+    """! @brief Write the results of a sweep to a CSV file."""
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=get_table_columns(results))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+## @}
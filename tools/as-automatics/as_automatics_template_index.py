@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_template_index.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Index over the port names of interface templates, used to match the ports
+of VHDL entities to interface templates during module discovery.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_template_index.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Index matching VHDL port names to interface template ports.
+# -----------------------------------------------------------------------------
+
+from collections import namedtuple
+from typing import Sequence
+
+from as_automatics_port import Port
+from as_automatics_helpers import get_prefix_suffix
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+
+class TemplateMatch(
+    namedtuple("TemplateMatch", ("template", "port", "prefix", "suffix"))
+):
+    """! @brief A template port whose name is part of a port's code name.
+    'prefix' and 'suffix' are the parts of the code name surrounding the
+    template port name (as returned by get_prefix_suffix)."""
+
+    __slots__ = ()
+
+
+class PortNameAutomaton:
+    """! @brief Aho-Corasick automaton over a set of port names.
+    Finds all names contained in a string with a single pass over it.
+    The failure links are resolved when the automaton is built, so each
+    character of the searched string costs one dictionary lookup."""
+
+    def __init__(self, names: Sequence[str]):
+        # State 0 is the root. Per state: transitions and the names ending
+        # in this state (including the names of its failure states)
+        self.goto = [{}]
+        self.output = [()]
+        for name in names:
+            self.__add_name__(name)
+        self.__build_failure_links__()
+
+    def __add_name__(self, name: str):
+        state = 0
+        for char in name:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.output.append(())
+            state = nxt
+        if name not in self.output[state]:
+            self.output[state] += (name,)
+
+    def __build_failure_links__(self):
+        # Breadth first, so the failure state of a state is always complete.
+        # Transitions missing in a state are copied from its failure state.
+        fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, nxt in list(self.goto[state].items()):
+                queue.append(nxt)
+                fail[nxt] = (
+                    self.goto[fail[state]].get(char, 0) if state else 0
+                )
+                self.output[nxt] += self.output[fail[nxt]]
+            if state:
+                for char, nxt in self.goto[fail[state]].items():
+                    self.goto[state].setdefault(char, nxt)
+
+    def find(self, text: str) -> set:
+        """! @brief Return the set of names contained in 'text'."""
+        found = set()
+        goto = self.goto
+        output = self.output
+        state = 0
+        for char in text:
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class InterfaceTemplateIndex:
+    """! @brief Index over the ports of a list of interface templates.
+    Built once for a list of templates. 'match' returns the template ports
+    matching a port's code name in one pass over the code name.
+    An index may extend a 'base' index (e.g. local templates of a module
+    extending the index over the global templates) without copying it."""
+
+    def __init__(self, templates: Sequence, base=None):
+        self.base = base
+        self.templates = tuple(templates)
+        # Template port name -> [(position, template, template port), ...]
+        # The position is the index in the order of the templates and ports
+        self.ports_by_name = {}
+        position = base.size if base is not None else 0
+        for template in self.templates:
+            for tport in template.ports:
+                self.ports_by_name.setdefault(tport.name, []).append(
+                    (position, template, tport)
+                )
+                position += 1
+        self.size = position
+        self.template_ids = {id(template) for template in self.templates}
+        self.automaton = PortNameAutomaton(self.ports_by_name.keys())
+
+    def has_template(self, template) -> bool:
+        """! @brief Return True if 'template' is part of this index."""
+        if id(template) in self.template_ids:
+            return True
+        return self.base is not None and self.base.has_template(template)
+
+    def __find__(self, code_name: str, found: list):
+        if self.base is not None:
+            self.base.__find__(code_name, found)
+        for name in self.automaton.find(code_name):
+            prefix, suffix = get_prefix_suffix(
+                name, code_name, Port.directions
+            )
+            found.extend(
+                (-len(name), position, template, tport, prefix, suffix)
+                for position, template, tport in self.ports_by_name[name]
+            )
+
+    def match(self, code_name: str) -> Sequence[TemplateMatch]:
+        """! @brief Return all template ports whose name is part of 'code_name'.
+        The matches are ordered by the length of the template port name
+        (longest first), then by the order of the templates and ports."""
+        found = []
+        self.__find__(code_name, found)
+        found.sort(key=lambda entry: entry[:2])
+        return [TemplateMatch(*entry[2:]) for entry in found]
+
+
+def match_template_ports(template, code_name: str) -> Sequence[TemplateMatch]:
+    """! @brief Return the ports of 'template' whose name is part of 'code_name'.
+    Same result as 'InterfaceTemplateIndex((template,)).match(code_name)',
+    without building an index for a single lookup."""
+    matches = [
+        TemplateMatch(
+            template,
+            tport,
+            *get_prefix_suffix(tport.name, code_name, Port.directions)
+        )
+        for tport in template.ports
+        if tport.name in code_name
+    ]
+    matches.sort(key=lambda match: len(match.port.name), reverse=True)
+    return matches
+
+
+## @}
@@ -75,6 +75,8 @@ def add_templates():
 class AsStream(Interface):
     """! @brief Template definition for ASTERICS' 'as_stream' interface."""
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "as_stream"
 
     INTERFACE_TYPE_NAME = "as_stream"
@@ -115,6 +117,8 @@ class SlaveRegisterInterfaceTemplate(Interface):
     communication between ASTERICS Modules and the register management hardware.
     """
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "slv_reg_interface"
 
     def __init__(self):
@@ -143,6 +147,8 @@ class CameraInputOV7670(Interface):
     """! @brief Template definition for the Camera interface used by the OmniiVision
     OV7670 camera sensor."""
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "camera_interface_ov7670"
 
     INTERFACE_TYPE_NAME = "camera_interface_ov7670"
@@ -171,6 +177,8 @@ class AXIMasterMemoryInternal(Interface):
     """! @brief Template definition for the AXI Master Memory
     interface used in ASTERICS."""
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "axi_master_memory_int"
 
     INTERFACE_TYPE_NAME = "axi_master_memory_int"
@@ -254,6 +262,8 @@ class AXISlaveRegisterInterface(Interface):
     """! @brief Template definition for the AXI Slave Register
     interface used in ASTERICS."""
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "axi_slave_register_interface"
 
     INTERFACE_TYPE_NAME = "axi_slave_register_interface"
@@ -315,6 +325,8 @@ class AXISlaveRegisterInterface(Interface):
 class AXISlaveInterface(Interface):
     """! @brief Template definition for the AXI Slave interface used in ASTERICS."""
 
+    __slots__ = ()
+
     INTERFACE_TYPE_NAME = "axi_slave_interface"
 
     INTERFACE_TYPE_NAME = "axi_slave_interface"
@@ -456,6 +468,19 @@ class AsMain(AsModuleGroup):
             base_addr_str = 'X"{addr:0{length}X}"'.format(
                 length=length, addr=chain.asterics_base_addr
             )
+            reg_if_count = sum(
+                [
+                    len(mod.register_ifs)
+                    for mod in ittls.chain(chain.modules, chain.pipelines)
+                ]
+            )
+            # Pinned base addresses may leave unused slots in between
+            unused_slots = []
+            if chain.address_allocator is not None:
+                reg_if_count = max(
+                    reg_if_count, chain.address_allocator.slot_count
+                )
+                unused_slots = chain.address_allocator.get_unused_slots()
             # Generate some required signals and constants for register management:
             code_dict["signals"].extend(
                 [
@@ -473,14 +498,7 @@ class AsMain(AsModuleGroup):
                         chain.reg_addr_width
                     ),
                     "  constant c_reg_if_count : integer := {};".format(
-                        sum(
-                            [
-                                len(mod.register_ifs)
-                                for mod in ittls.chain(
-                                    chain.modules, chain.pipelines
-                                )
-                            ]
-                        )
+                        reg_if_count
                     ),
                     ("  signal read_module_addr : integer;"),
                     (
@@ -508,6 +526,13 @@ class AsMain(AsModuleGroup):
                         regif.parent.name, regif.name_suffix, regif.regif_num
                     )
                 )
+            # Read data of unused register interface slots
+            if unused_slots:
+                code_dict["body"].append("  -- Unused register address slots:")
+            for slot in unused_slots:
+                code_dict["body"].append(
+                    "  mod_read_data_arr({}) <= (others => '0');".format(slot)
+                )
 
         self.dynamic_code_generators.append(as_main_dynamic_code)
 
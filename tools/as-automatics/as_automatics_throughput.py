@@ -0,0 +1,590 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_throughput.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Static stream throughput and back-pressure (stall) analysis
+of connected processing chains.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_throughput.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief Static stream throughput and stall analysis of processing chains.
+# -----------------------------------------------------------------------------
+
+import json
+
+from as_automatics_2d_pipeline import As2DWindowPipeline
+from as_automatics_connection_helper import (
+    get_parent_module,
+    resolve_data_width,
+)
+from as_automatics_graph_export import get_interface_target
+from as_automatics_templates import AsStream
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Name of the node representing ports to and from outside of ASTERICS
+EXTERNAL_NODE = "external"
+
+## Defaults of the stream rate parameters (see AsModule.set_stream_rate)
+STREAM_RATE_DEFAULTS = {
+    "interval": 1,
+    "bit_ratio": 1.0,
+    "source_rate": 1.0,
+    "memory_width": None,
+    "buffered": False,
+    "burst_length": 1,
+    "stall_cycles": 0,
+    "buffer_bits": None,
+    "buffer_generic": None,
+    "latency": 1,
+}
+
+
+def get_stream_rate(module) -> dict:
+    """! @brief Return the stream rate parameters of 'module' with defaults."""
+    rate = dict(STREAM_RATE_DEFAULTS)
+    rate.update(getattr(module, "stream_rate", {}))
+    return rate
+
+
+def get_interface_port(inter, port_name: str):
+    """! @brief Return the port of 'inter' with the template name 'port_name'."""
+    return next((port for port in inter.ports if port.name == port_name), None)
+
+
+def get_stream_width(inter) -> int:
+    """! @brief Return the bit width of the data port of the stream 'inter'.
+    Returns None if the width cannot be resolved."""
+    port = get_interface_port(inter, "data")
+    if port is None:
+        return None
+    data_width = resolve_data_width(port)
+    if isinstance(data_width, list):
+        return None
+    return data_width.get_bit_width()
+
+
+def get_generic_int(module, name: str) -> int:
+    """! @brief Return the integer value of generic 'name' of 'module'."""
+    gen = module.get_generic(name, suppress_error=True)
+    if gen is None:
+        return None
+    value = gen.get_value()
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_rate_value(module, value) -> int:
+    """! @brief Return the integer value of a stream rate parameter.
+    'value' is an integer, a generic name or a tuple of both (product).
+    Returns None if a generic value cannot be resolved."""
+    if value is None:
+        return None
+    if not isinstance(value, (tuple, list)):
+        value = (value,)
+    out = 1
+    for factor in value:
+        if isinstance(factor, str):
+            factor = get_generic_int(module, factor)
+            if factor is None:
+                return None
+        out *= factor
+    return out
+
+
+class StreamEdge:
+    """! @brief A stream connection of the throughput analysis.
+    Annotated with the data width, strobe rate and stall handling."""
+
+    def __init__(self, source, sink, source_inter, sink_inter):
+        ## Source and sink node names
+        self.source = source
+        self.sink = sink
+        self.source_inter = source_inter
+        self.sink_inter = sink_inter
+        ## Data bits per strobe
+        self.width = get_stream_width(source_inter)
+        if self.width is None and sink_inter is not None:
+            self.width = get_stream_width(sink_inter)
+        ## Strobes per clock cycle offered by the source (before throttling)
+        self.demand = 0.0
+        ## Sustainable strobes per clock cycle
+        self.rate = 0.0
+        # Stall: The sink may assert stall / the source reacts to it
+        self.sink_stalls = sink_inter is not None and (
+            get_interface_port(sink_inter, "stall") is not None
+        )
+        stall = get_interface_port(source_inter, "stall")
+        self.stall_handled = stall is not None and (
+            stall.incoming is not None or bool(stall.outgoing)
+        )
+
+    def get_bits_per_cycle(self, rate: float) -> float:
+        return rate * (self.width or 0)
+
+    def to_dict(self, pixel_width: int) -> dict:
+        pixels = (self.width or 0) / pixel_width if pixel_width else 0
+        return {
+            "source": self.source,
+            "source_interface": self.source_inter.name,
+            "sink": self.sink,
+            "sink_interface": getattr(self.sink_inter, "name", ""),
+            "width": self.width,
+            "pixels_per_strobe": round(pixels, 4),
+            "strobes_per_cycle": round(self.rate, 4),
+            "bits_per_cycle": round(self.get_bits_per_cycle(self.rate), 4),
+            "demanded_strobes_per_cycle": round(self.demand, 4),
+            "sink_stalls": self.sink_stalls,
+            "stall_handled": self.stall_handled,
+        }
+
+
+class ModuleRate:
+    """! @brief Throughput annotation of a module (or 2D window pipeline)."""
+
+    def __init__(self, module):
+        self.module = module
+        self.name = module.name
+        self.rate = get_stream_rate(module)
+        self.inputs = []
+        self.outputs = []
+        ## Strobes per cycle on the inputs offered by the upstream modules
+        self.in_demand = 0.0
+        ## Offered load relative to the capacity of the module (> 1: too slow)
+        self.utilization = 0.0
+        ## Input strobes per cycle the module can accept
+        self.capacity = 1.0
+        ## The module may assert stall on its inputs / accepts stall
+        self.stall_out = False
+        self.stall_in = False
+
+    def is_source(self) -> bool:
+        return not self.inputs
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "entity": self.module.entity_name,
+            "capacity": round(self.capacity, 4),
+            "input_strobes_per_cycle": round(self.in_demand, 4),
+            "utilization": round(self.utilization, 4),
+            "asserts_stall": self.stall_out,
+            "accepts_stall": self.stall_in,
+            "buffered": bool(self.rate["buffered"]),
+        }
+
+
+class ThroughputReport:
+    """! @brief Result of the throughput analysis of a processing chain.
+    See 'analyze_throughput'."""
+
+    def __init__(self, clock_hz: float, pixel_width: int):
+        self.clock_hz = clock_hz
+        self.pixel_width = pixel_width
+        ## Node name -> ModuleRate
+        self.modules = {}
+        self.edges = []
+        ## Modules throttling the stream: (name, throttle factor)
+        ## The factor is the module's utilization relative to the highest
+        ## utilization of the modules before it
+        self.bottlenecks = []
+        ## Descriptions of stall paths the design does not handle
+        self.stall_issues = []
+        ## Source name -> {"demand", "sustainable", "pixel_rate", ...}
+        self.sources = {}
+
+    def get_sustainable_pixel_rate(self) -> float:
+        """! @brief Return the lowest sustainable pixel rate of all sources."""
+        rates = [src["pixel_rate"] for src in self.sources.values()]
+        return min(rates) if rates else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "clock_hz": self.clock_hz,
+            "pixel_width": self.pixel_width,
+            "sustainable_pixel_rate": self.get_sustainable_pixel_rate(),
+            "sources": self.sources,
+            "bottlenecks": [
+                {"module": name, "throttle": round(factor, 4)}
+                for name, factor in self.bottlenecks
+            ],
+            "stall_issues": self.stall_issues,
+            "modules": [mod.to_dict() for mod in self.modules.values()],
+            "edges": [edge.to_dict(self.pixel_width) for edge in self.edges],
+        }
+
+    def write_json(self, path: str) -> bool:
+        """! @brief Write the report to the JSON file 'path'."""
+        try:
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except IOError as err:
+            LOG.error(
+                "Could not write throughput report '%s': %s", path, str(err)
+            )
+            return False
+        return True
+
+    def __str__(self) -> str:
+        lines = [
+            "Stream throughput at {:.1f} MHz ({} bit pixels):".format(
+                self.clock_hz / 1e6, self.pixel_width
+            )
+        ]
+        for name, src in self.sources.items():
+            lines.append(
+                "  Source '{}': {:.3f} of {:.3f} strobes/cycle sustainable, "
+                "{:.2f} MPixel/s".format(
+                    name,
+                    src["sustainable"],
+                    src["demand"],
+                    src["pixel_rate"] / 1e6,
+                )
+            )
+        for edge in self.edges:
+            lines.append(
+                "  {} -> {}: {} bit, {:.3f} strobes/cycle, "
+                "{:.1f} bit/cycle{}".format(
+                    edge.source,
+                    edge.sink,
+                    edge.width if edge.width is not None else "?",
+                    edge.rate,
+                    edge.get_bits_per_cycle(edge.rate),
+                    "" if edge.stall_handled or not edge.sink_stalls
+                    else " (stall not handled)",
+                )
+            )
+        for name, factor in self.bottlenecks:
+            lines.append(
+                "  Bottleneck: '{}' passes {:.0f}% of the offered rate".format(
+                    name, 100 / factor
+                )
+            )
+        lines.extend("  Stall: " + issue for issue in self.stall_issues)
+        return "\n".join(lines)
+
+
+class ThroughputAnalysis:
+    """! @brief Dataflow analysis of the stream connections of a chain.
+    Nodes are the modules of the chain (modules of 2D window pipelines are
+    represented by their pipeline), edges are the connected as_stream
+    interfaces. Starting at the source modules, the offered strobe rates
+    are propagated along the edges and compared to the capacity of each
+    module (see AsModule.set_stream_rate):
+    - Modules accept one input strobe per 'interval' cycles.
+    - Outputs carry 'bit_ratio' times the input data bits per cycle,
+      with at most one strobe per cycle.
+    - Memory endpoints move at most 'memory_width' bits per cycle.
+    Modules with more inputs run at the rate of their slowest input."""
+
+    def __init__(self, chain, source_rates: dict = None):
+        self.chain = chain
+        self.source_rates = source_rates or {}
+        self.nodes = {}
+        self.edges = []
+        self.__build_graph__()
+
+    def __node_of__(self, module):
+        """! @brief Return the node name representing 'module'."""
+        chain = self.chain
+        while module is not None:
+            if module is chain.top or module is chain.as_main:
+                return EXTERNAL_NODE
+            if isinstance(module.parent, As2DWindowPipeline):
+                module = module.parent
+                continue
+            return module.name
+        return EXTERNAL_NODE
+
+    def __build_graph__(self):
+        chain = self.chain
+        modules = [
+            mod
+            for mod in chain.modules
+            if not isinstance(mod.parent, As2DWindowPipeline)
+        ]
+        modules.extend(chain.pipelines)
+        for module in modules:
+            self.nodes[module.name] = ModuleRate(module)
+        # Edges are found from the sink side (inputs have a single source,
+        # outputs may drive multiple sinks), outputs to external ports
+        # from the source side
+        for module in modules:
+            node = self.nodes[module.name]
+            for inter in module.interfaces:
+                if inter.type != AsStream.INTERFACE_TYPE_NAME:
+                    continue
+                has_stall = get_interface_port(inter, "stall") is not None
+                target = get_interface_target(inter)
+                if inter.direction == "in":
+                    node.stall_out |= has_stall
+                    if target is None:
+                        continue
+                    source = self.__node_of__(get_parent_module(target))
+                    if source not in self.nodes or source == module.name:
+                        continue
+                    self.__add_edge__(source, module.name, target.parent, inter)
+                else:
+                    node.stall_in |= has_stall
+                    if target is None:
+                        continue
+                    if self.__node_of__(get_parent_module(target)) == (
+                        EXTERNAL_NODE
+                    ):
+                        self.__add_edge__(module.name, EXTERNAL_NODE, inter)
+
+    def __add_edge__(self, source, sink, source_inter, sink_inter=None):
+        edge = StreamEdge(source, sink, source_inter, sink_inter)
+        self.edges.append(edge)
+        self.nodes[source].outputs.append(edge)
+        if sink in self.nodes:
+            self.nodes[sink].inputs.append(edge)
+
+    def __get_order__(self) -> list:
+        """! @brief Return the nodes in topological order (Kahn).
+        Nodes in cycles are appended in chain order."""
+        indegree = {name: len(node.inputs) for name, node in self.nodes.items()}
+        queue = [name for name, deg in indegree.items() if deg == 0]
+        order = []
+        for name in queue:
+            order.append(name)
+            for edge in self.nodes[name].outputs:
+                if edge.sink in indegree:
+                    indegree[edge.sink] -= 1
+                    if indegree[edge.sink] == 0:
+                        queue.append(edge.sink)
+        order.extend(name for name in self.nodes if name not in order)
+        return order
+
+    def __propagate__(self, order: list, factors: dict = None):
+        """! @brief Propagate the strobe rates along the edges.
+        Without 'factors', the rates offered by the sources are propagated
+        without throttling ('StreamEdge.demand', 'ModuleRate.utilization').
+        With 'factors' (source name -> throttle factor), the sources run at
+        their sustainable rate and every module passes at most its
+        capacity ('StreamEdge.rate')."""
+        throttled = factors is not None
+        for name in order:
+            node = self.nodes[name]
+            rate = node.rate
+            node.capacity = 1.0 / max(float(rate["interval"]), 1.0)
+            mem_width = None
+            if rate["memory_width"]:
+                mem_width = get_generic_int(node.module, rate["memory_width"])
+            if node.is_source():
+                out_width = max(
+                    (edge.width or 0 for edge in node.outputs), default=0
+                )
+                in_rate = float(
+                    self.source_rates.get(name, rate["source_rate"])
+                )
+                if mem_width and out_width:
+                    in_rate = min(in_rate, mem_width / out_width)
+                in_bits = in_rate * out_width
+                util = 0.0
+                if throttled:
+                    in_rate *= factors.get(name, 1.0)
+                    in_bits *= factors.get(name, 1.0)
+            else:
+                # Joins: Run at the rate of the slowest input
+                in_rate = min(
+                    edge.rate if throttled else edge.demand
+                    for edge in node.inputs
+                )
+                in_bits = sum(
+                    edge.get_bits_per_cycle(in_rate) for edge in node.inputs
+                ) / len(node.inputs)
+                util = in_rate / node.capacity
+                if mem_width:
+                    util = max(util, in_bits / mem_width)
+            out_bits = in_bits * float(rate["bit_ratio"])
+            out_rates = [
+                out_bits / edge.width if edge.width else in_rate
+                for edge in node.outputs
+            ]
+            # One strobe per cycle at most
+            util = max([util] + out_rates)
+            if throttled:
+                scale = 1.0 / max(util, 1.0)
+                for edge, out_rate in zip(node.outputs, out_rates):
+                    edge.rate = out_rate * scale
+            else:
+                node.in_demand = in_rate
+                node.utilization = util
+                for edge, out_rate in zip(node.outputs, out_rates):
+                    edge.demand = out_rate
+
+    def __get_downstream__(self, name: str) -> list:
+        """! @brief Return the names of all nodes reachable from 'name'."""
+        reached = [name]
+        for current in reached:
+            for edge in self.nodes[current].outputs:
+                if edge.sink in self.nodes and edge.sink not in reached:
+                    reached.append(edge.sink)
+        return reached
+
+    def __find_stall_issues__(self) -> list:
+        """! @brief Return descriptions of unhandled stall paths."""
+        issues = []
+        for node in self.nodes.values():
+            for edge in node.inputs:
+                if not edge.sink_stalls or edge.stall_handled:
+                    continue
+                issues.append(
+                    "'{}' may stall its input '{}', but '{}' ignores stall "
+                    "on '{}'.".format(
+                        edge.sink,
+                        edge.sink_inter.name,
+                        edge.source,
+                        edge.source_inter.name,
+                    )
+                )
+            # Stall reaching a module that cannot pass it on
+            stalled = any(
+                edge.sink_stalls and edge.stall_handled
+                for edge in node.outputs
+            )
+            if (
+                stalled
+                and node.inputs
+                and not node.stall_out
+                and not node.rate["buffered"]
+            ):
+                issues.append(
+                    "'{}' receives stall, but cannot stall its inputs and "
+                    "has no buffer.".format(node.name)
+                )
+        return issues
+
+    def run(self, clock_hz: float, pixel_width: int = 8) -> ThroughputReport:
+        """! @brief Run the analysis and return a ThroughputReport."""
+        report = ThroughputReport(clock_hz, pixel_width)
+        order = self.__get_order__()
+        self.__propagate__(order)
+
+        # Sustainable rates: Throttle each source by its worst bottleneck
+        factors = {}
+        for name in order:
+            node = self.nodes[name]
+            if not node.is_source() or not node.outputs:
+                continue
+            worst = max(
+                self.nodes[down].utilization
+                for down in self.__get_downstream__(name)
+            )
+            factor = 1.0 / max(worst, 1.0)
+            factors[name] = factor
+            width = max((edge.width or 0 for edge in node.outputs), default=0)
+            pixels = width / pixel_width if pixel_width else 0
+            report.sources[name] = {
+                "demand": round(node.in_demand, 4),
+                "sustainable": round(node.in_demand * factor, 4),
+                "pixels_per_strobe": round(pixels, 4),
+                "pixel_rate": node.in_demand * factor * pixels * clock_hz,
+                "can_stall": node.stall_in,
+            }
+        # A module is a bottleneck if it throttles the stream more
+        # than the modules before it
+        upstream_util = {}
+        for name in order:
+            node = self.nodes[name]
+            limit = max(upstream_util.get(name, 1.0), 1.0)
+            if node.utilization > limit:
+                report.bottlenecks.append((name, node.utilization / limit))
+            limit = max(limit, node.utilization)
+            for edge in node.outputs:
+                if edge.sink in self.nodes:
+                    upstream_util[edge.sink] = max(
+                        upstream_util.get(edge.sink, 1.0), limit
+                    )
+        report.bottlenecks.sort(key=lambda entry: -entry[1])
+        self.__propagate__(order, factors)
+
+        # Sources that cannot be throttled lose data at bottlenecks
+        for name, src in report.sources.items():
+            if src["sustainable"] < src["demand"] and not src["can_stall"]:
+                report.stall_issues.append(
+                    "Source '{}' cannot be stalled, but its stream is only "
+                    "sustainable at {:.0f}% of its rate.".format(
+                        name, src["sustainable"] / src["demand"] * 100
+                    )
+                )
+        report.stall_issues.extend(self.__find_stall_issues__())
+        report.modules = self.nodes
+        report.edges = self.edges
+        return report
+
+
+def analyze_throughput(
+    chain, clock_hz: float = 100e6, pixel_width: int = 8, source_rates=None
+) -> ThroughputReport:
+    """! @brief Analyze the stream throughput of a connected chain.
+    @param chain: The AsProcessingChain ('auto_connect' must have run).
+    @param clock_hz: Clock frequency of the ASTERICS system in Hz.
+    @param pixel_width: Bits per pixel, to convert strobes to pixels.
+    @param source_rates: Optional dictionary: Module name -> strobes per
+                 cycle, overriding the declared rate of source modules
+                 (e.g. of camera interfaces running on a slower clock).
+    @return A ThroughputReport."""
+    report = ThroughputAnalysis(chain, source_rates).run(clock_hz, pixel_width)
+    LOG.info(
+        "Throughput: %i stream connections, %i bottlenecks, "
+        "%i stall issues; sustainable pixel rate %.2f MPixel/s.",
+        len(report.edges),
+        len(report.bottlenecks),
+        len(report.stall_issues),
+        report.get_sustainable_pixel_rate() / 1e6,
+    )
+    for name, factor in report.bottlenecks:
+        LOG.warning(
+            "Throughput: '%s' is a bottleneck, passing %.0f%% of the rate "
+            "offered to it.",
+            name,
+            100 / factor,
+        )
+    for issue in report.stall_issues:
+        LOG.warning("Throughput: %s", issue)
+    return report
+
+
+## @}
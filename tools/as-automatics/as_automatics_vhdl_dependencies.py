@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_vhdl_dependencies.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Derive the dependencies between VHDL source files from their 'use' clauses
+and entity / component instantiations. Used to collect the hardware source
+files required by a processing chain.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_vhdl_dependencies.py
+# @ingroup automatics_analyze
+# @author Philip Manke
+# @brief File-level dependency graph of VHDL source files.
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import json
+from hashlib import sha256
+from typing import Sequence
+
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log("parser")
+
+##
+# @addtogroup automatics_analyze
+# @{
+
+## Libraries not provided by ASTERICS modules (not resolved to files)
+EXTERNAL_LIBRARIES = ("ieee", "std", "unisim", "unimacro", "xpm")
+
+## Name of the scan cache file in a cache directory
+CACHE_FILENAME = "vhdl_dependencies.json"
+
+_COMMENT_RE = re.compile(r"--[^\n]*")
+_ENTITY_RE = re.compile(r"^\s*entity\s+(\w+)\s+is\b", re.MULTILINE)
+_PACKAGE_RE = re.compile(r"^\s*package\s+(?!body\b)(\w+)\s+is\b", re.MULTILINE)
+_USE_RE = re.compile(r"\buse\s+(\w+)\.(\w+)")
+_ENTITY_INST_RE = re.compile(r":\s*entity\s+(?:(\w+)\.)?(\w+)")
+_COMPONENT_INST_RE = re.compile(
+    r"\b\w+\s*:\s*(?:component\s+)?(\w+)\s+(?:generic|port)\s+map\b"
+)
+
+## File content hash -> (provided units, required units)
+_scan_cache = {}
+## Directory to persist the scan results in (see 'set_cache_dir')
+cache_dir = ""
+
+
+def scan_vhdl_source(code: str) -> tuple:
+    """! @brief Return the design units provided and required by VHDL 'code'.
+    Provided units are entities and packages. Required units are packages
+    and entities referenced by 'use' clauses and entities instantiated
+    directly or as components. Units of external libraries are skipped.
+    @return Tuple of two sorted tuples: (provided, required) unit names."""
+    code = _COMMENT_RE.sub("", code.lower())
+    provided = set(_ENTITY_RE.findall(code))
+    provided.update(_PACKAGE_RE.findall(code))
+    required = {
+        unit
+        for lib, unit in _USE_RE.findall(code)
+        if lib not in EXTERNAL_LIBRARIES
+    }
+    required.update(
+        unit
+        for lib, unit in _ENTITY_INST_RE.findall(code)
+        if lib not in EXTERNAL_LIBRARIES
+    )
+    required.update(_COMPONENT_INST_RE.findall(code))
+    required.difference_update(provided)
+    required.discard("all")
+    return tuple(sorted(provided)), tuple(sorted(required))
+
+
+def scan_vhdl_file(path: str) -> tuple:
+    """! @brief Scan the VHDL file 'path' (see 'scan_vhdl_source').
+    Results are cached by the hash of the file contents."""
+    with open(path, "rb") as file:
+        data = file.read()
+    key = sha256(data).hexdigest()
+    try:
+        return _scan_cache[key]
+    except KeyError:
+        pass
+    result = scan_vhdl_source(data.decode("utf-8", errors="replace"))
+    _scan_cache[key] = result
+    return result
+
+
+def load_scan_cache(cache_dir: str) -> int:
+    """! @brief Load cached scan results from 'cache_dir'.
+    @return The number of cached results loaded."""
+    path = os.path.join(cache_dir, CACHE_FILENAME)
+    try:
+        with open(path, "r") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return 0
+    for key, (provided, required) in data.items():
+        _scan_cache.setdefault(key, (tuple(provided), tuple(required)))
+    return len(data)
+
+
+def save_scan_cache(cache_dir: str) -> bool:
+    """! @brief Store the cached scan results in 'cache_dir'."""
+    path = os.path.join(cache_dir, CACHE_FILENAME)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path + ".tmp", "w") as file:
+            json.dump(_scan_cache, file)
+        os.replace(path + ".tmp", path)
+    except OSError as err:
+        LOG.warning(
+            "Could not write VHDL dependency cache '%s': %s", path, str(err)
+        )
+        return False
+    return True
+
+
+def set_cache_dir(path: str):
+    """! @brief Persist the scan results in the directory 'path'.
+    Loads the results cached in 'path' by previous runs. The cache is
+    updated when the hardware files of a system are gathered.
+    Pass an empty string to disable."""
+    global cache_dir
+    cache_dir = os.path.realpath(path) if path else ""
+    if cache_dir:
+        count = load_scan_cache(cache_dir)
+        LOG.debug(
+            "Loaded %i cached VHDL scan results from '%s'.", count, cache_dir
+        )
+
+
+def get_module_files(module) -> list:
+    """! @brief Return the absolute paths of the files of 'module' (AsModule).
+    Relative paths in 'AsModule.files' are relative to the module directory.
+    """
+    module_dir = os.path.realpath(module.module_dir)
+    out = []
+    for hw_file in module.files:
+        source = os.path.realpath(hw_file)
+        if not hw_file.startswith("/"):
+            comp = os.path.commonprefix([module_dir, source])
+            if comp != module_dir:
+                source = os.path.realpath(os.path.join(module_dir, hw_file))
+        out.append(source)
+    return out
+
+
+class VHDLDependencyGraph:
+    """! @brief Dependencies between the VHDL files of a module library.
+    Nodes are VHDL files; A file depends on the files providing the
+    design units it requires. A file belongs to the modules (entity names)
+    listing it in 'AsModule.files'; Some files are shared by modules."""
+
+    def __init__(self):
+        ## File -> entity names of the modules the file belongs to
+        self.file_owners = {}
+        ## Design unit name -> file providing it
+        self.unit_files = {}
+        ## File -> (provided units, required units)
+        self.file_units = {}
+
+    @classmethod
+    def from_library(cls, library):
+        """! @brief Build the graph for all modules of an AsModuleLibrary.
+        Modules not loaded yet are added using the files of their manifest.
+        """
+        graph = cls()
+        for repo in library.repos:
+            for name in repo.module_names:
+                if name in repo.modules:
+                    graph.add_module(repo.modules[name])
+                else:
+                    for path in repo.manifests[name]["files"]:
+                        graph.add_file(path, name)
+        return graph
+
+    def add_module(self, module):
+        """! @brief Scan and add the VHDL files of 'module' (AsModule)."""
+        for path in get_module_files(module):
+            self.add_file(path, module.entity_name)
+
+    def add_file(self, path: str, owner: str = "") -> tuple:
+        """! @brief Scan and add the VHDL file 'path' belonging to 'owner'.
+        Files of modules added first take precedence for units provided by
+        multiple files. Unreadable files are skipped (return value None)."""
+        if owner and owner not in self.file_owners.setdefault(path, []):
+            self.file_owners[path].append(owner)
+        if path in self.file_units:
+            return self.file_units[path]
+        try:
+            units = scan_vhdl_file(path)
+        except OSError as err:
+            LOG.warning("Could not scan VHDL file '%s': %s", path, str(err))
+            return None
+        self.file_units[path] = units
+        for unit in units[0]:
+            self.unit_files.setdefault(unit, path)
+        return units
+
+    def get_file_dependencies(self, path: str) -> list:
+        """! @brief Return the files providing the units required by 'path'."""
+        units = self.file_units.get(path)
+        if units is None:
+            return []
+        deps = []
+        for unit in units[1]:
+            dep = self.unit_files.get(unit)
+            if dep is not None and dep != path and dep not in deps:
+                deps.append(dep)
+        return deps
+
+    def get_unresolved_units(self, path: str) -> list:
+        """! @brief Return the units required by 'path' that no file provides.
+        """
+        units = self.file_units.get(path)
+        if units is None:
+            return []
+        return [unit for unit in units[1] if unit not in self.unit_files]
+
+    def get_closure(self, files: Sequence[str]) -> list:
+        """! @brief Return 'files' and all files they depend on (recursively).
+        The files are returned in breadth-first order."""
+        closure = []
+        done = set()
+        queue = [os.path.realpath(path) for path in files]
+        for path in queue:
+            if path in done:
+                continue
+            done.add(path)
+            closure.append(path)
+            queue.extend(self.get_file_dependencies(path))
+        return closure
+
+    def get_owner(self, path: str) -> str:
+        """! @brief Return the first module owning 'path' ("" if none)."""
+        owners = self.file_owners.get(path)
+        return owners[0] if owners else ""
+
+    def get_module_files(self, entity_name: str) -> list:
+        """! @brief Return the files owned by the module 'entity_name'."""
+        return [
+            path
+            for path, owners in self.file_owners.items()
+            if entity_name in owners
+        ]
+
+    def get_module_dependencies(self, entity_name: str) -> list:
+        """! @brief Return the modules directly required by a module's files.
+        Derived from the file dependencies, not the declared 'dependencies'.
+        Files shared with the module itself do not count as dependencies.
+        """
+        deps = []
+        for path in self.get_module_files(entity_name):
+            for dep in self.get_file_dependencies(path):
+                owners = self.file_owners.get(dep)
+                if not owners or entity_name in owners:
+                    continue
+                if owners[0] not in deps:
+                    deps.append(owners[0])
+        return sorted(deps)
+
+
+def get_dependency_diff(graph: VHDLDependencyGraph, modules) -> dict:
+    """! @brief Compare the declared and derived dependencies of 'modules'.
+    @param modules: Iterable of AsModule (templates).
+    @return Dictionary: entity name -> {'missing': [...], 'unused': [...]}
+            for modules whose declared dependencies differ:
+            'missing': Required by the VHDL code, not declared.
+            'unused': Declared, not required by the VHDL code."""
+    report = {}
+    for module in modules:
+        derived = set(graph.get_module_dependencies(module.entity_name))
+        # Entity names are case insensitive (e.g. "DUAL_BRAM_READ_FIRST")
+        declared = {dep.lower() for dep in module.dependencies}
+        missing = sorted(derived - declared)
+        unused = sorted(declared - derived)
+        if missing or unused:
+            report[module.entity_name] = {"missing": missing, "unused": unused}
+    return report
+
+
+## @}
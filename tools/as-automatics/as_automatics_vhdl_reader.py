@@ -45,6 +45,13 @@ Can extract generics and ports into lists of Python objects.
 # @brief Contains methods for parsing the entity definition from a VHDL-file.
 # -----------------------------------------------------------------------------
 
+import os
+import sys
+import pickle
+import logging
+import multiprocessing
+from hashlib import sha256
+from concurrent.futures import ProcessPoolExecutor
 from typing import Sequence
 import as_automatics_logging as as_log
 
@@ -55,13 +62,37 @@ from as_automatics_helpers import eval_vhdl_expr
 from as_automatics_vhdl_static import PIPE_WINDOW_TYPE, PIPE_LINE_TYPE
 from as_automatics_exceptions import AsAnalysisError, AsFileError
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("parser")
 
 
 ##
 # @addtogroup automatics_analyze
 # @{
 
+## Name of the analysis cache file in a cache directory
+CACHE_FILENAME = "vhdl_entities.pickle"
+## Attributes of a VHDLReader stored in the analysis cache
+CACHED_ATTRIBUTES = (
+    "file_analyzed",
+    "entity_name",
+    "arch_name",
+    "component_name",
+    "found_ports",
+    "found_generics",
+    "found_constants",
+    "defgroup",
+    "addtogroup",
+    "description",
+    "brief_description",
+)
+
+## (file content hash, window module) -> pickled analysis results
+_analysis_cache = {}
+## Whether the analysis cache changed since it was loaded or saved
+_cache_modified = False
+## Directory to persist the analysis results in (see 'set_cache_dir')
+cache_dir = ""
+
 
 class VHDLReader:
     """! @brief This class implements methods used to read and partially parse VHDL-files.
@@ -250,6 +281,12 @@ class VHDLReader:
 
     def __analyze__(self):
         LOG.info("Start analysis of VHDL file '%s' ...", self.vhdl_file)
+        key = get_analysis_key(self.vhdl_file, self.window_module)
+        if key in _analysis_cache:
+            LOG.debug("Using cached analysis of '%s'.", self.vhdl_file)
+            for attr, value in pickle.loads(_analysis_cache[key]).items():
+                setattr(self, attr, value)
+            return
         try:
             self.file_analyzed = False
             # Open the source file
@@ -270,6 +307,8 @@ class VHDLReader:
                 self.vhdl_file,
                 "{} error(s) encountered!".format(len(self.errors)),
             )
+        if key is not None:
+            store_analysis(key, self)
 
     def __analyze_readfile__(self, file_obj):
         # Marker variables, where in the VHDL file are we currently?
@@ -742,4 +781,176 @@ class VHDLReader:
         return line
 
 
+def uses_window_types(text: str) -> bool:
+    """! @brief Whether the VHDL code 'text' uses the data types of the
+    2D Window Pipeline, which are only parsed for window modules."""
+    text = text.lower()
+    return PIPE_WINDOW_TYPE in text or PIPE_LINE_TYPE in text
+
+
+def get_analysis_key(path: str, window_module: bool = False) -> tuple:
+    """! @brief Return the analysis cache key of the VHDL file 'path'.
+    Returns None if the file can't be read."""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except IOError:
+        return None
+    window_module = window_module and uses_window_types(
+        data.decode("utf-8", errors="replace")
+    )
+    return (sha256(data).hexdigest(), window_module)
+
+
+def store_analysis(key: tuple, reader: VHDLReader):
+    """! @brief Store the results of an analyzed VHDLReader in the cache.
+    Results are stored pickled, so each cache hit returns new objects."""
+    global _cache_modified
+    _analysis_cache[key] = pickle.dumps(
+        {attr: getattr(reader, attr) for attr in CACHED_ATTRIBUTES}
+    )
+    _cache_modified = True
+
+
+def get_cache_format() -> str:
+    """! @brief Return the format stamp of the analysis cache.
+    Changes with the source code of the parser and the cached classes."""
+    hashgen = sha256()
+    for cls in (VHDLReader, Port, Generic, Constant):
+        with open(sys.modules[cls.__module__].__file__, "rb") as file:
+            hashgen.update(file.read())
+    return hashgen.hexdigest()
+
+
+def load_analysis_cache(cache_dir: str) -> int:
+    """! @brief Load cached analysis results from 'cache_dir'.
+    Results cached by another version of the parser are ignored.
+    @return The number of cached results loaded."""
+    path = os.path.join(cache_dir, CACHE_FILENAME)
+    try:
+        with open(path, "rb") as file:
+            data = pickle.load(file)
+        if data["format"] != get_cache_format():
+            return 0
+        entries = data["entries"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+        return 0
+    for key, value in entries.items():
+        _analysis_cache.setdefault(key, value)
+    return len(entries)
+
+
+def save_analysis_cache(cache_dir: str) -> bool:
+    """! @brief Store the cached analysis results in 'cache_dir'."""
+    global _cache_modified
+    path = os.path.join(cache_dir, CACHE_FILENAME)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            pickle.dump(
+                {"format": get_cache_format(), "entries": _analysis_cache},
+                file,
+            )
+        os.replace(path + ".tmp", path)
+    except OSError as err:
+        LOG.warning(
+            "Could not write VHDL analysis cache '%s': %s", path, str(err)
+        )
+        return False
+    _cache_modified = False
+    return True
+
+
+def update_cache_dir() -> bool:
+    """! @brief Save the analysis results to the cache directory (if set),
+    if new files were analyzed since the cache was loaded or saved."""
+    if cache_dir and _cache_modified:
+        return save_analysis_cache(cache_dir)
+    return True
+
+
+def set_cache_dir(path: str):
+    """! @brief Persist the analysis results in the directory 'path'.
+    Loads the results cached in 'path' by previous runs. The cache is
+    updated when module repositories are added to the library.
+    Pass an empty string to disable."""
+    global cache_dir
+    cache_dir = os.path.realpath(path) if path else ""
+    if cache_dir:
+        count = load_analysis_cache(cache_dir)
+        LOG.debug(
+            "Loaded %i cached VHDL analysis results from '%s'.",
+            count,
+            cache_dir,
+        )
+
+
+def _init_prescan_worker():
+    # Workers only fill the cache; Errors are reported by the regular
+    # analysis in the main process
+    logging.disable(logging.CRITICAL)
+
+
+def _prescan_file(path: str) -> list:
+    """! @brief Analyze the VHDL file 'path' for the analysis cache.
+    Files using the 2D Window Pipeline data types are analyzed both
+    as regular and as window module files.
+    @return List of tuples (cache key, pickled results) of new results."""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except IOError:
+        return []
+    text = data.decode("utf-8", errors="replace")
+    if "entity" not in text.lower():
+        # Packages are not analyzed
+        return []
+    variants = [False]
+    if uses_window_types(text):
+        variants.append(True)
+    out = []
+    for window_module in variants:
+        key = (sha256(data).hexdigest(), window_module)
+        if key in _analysis_cache:
+            continue
+        try:
+            VHDLReader(path, window_module).get_entity_name()
+        except Exception:
+            # Not every VHDL file is a parsable toplevel file
+            continue
+        if key in _analysis_cache:
+            out.append((key, _analysis_cache[key]))
+    return out
+
+
+def prescan_vhdl_files(paths: Sequence[str], jobs: int = 0) -> int:
+    """! @brief Analyze VHDL files in parallel to fill the analysis cache.
+    The files are analyzed by up to 'jobs' forked worker processes.
+    Files with cached results are skipped. Without 'fork' support or
+    with 'jobs' == 1 nothing is done: Files are analyzed on first use.
+    @param paths: The VHDL files to analyze.
+    @param jobs: Number of parallel workers (0: number of CPUs).
+    @return The number of new analysis results."""
+    global _cache_modified
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(paths) < 2 or not hasattr(os, "fork"):
+        return 0
+    sys.stdout.flush()
+    sys.stderr.flush()
+    count = 0
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(paths)),
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_prescan_worker,
+    ) as pool:
+        for results in pool.map(_prescan_file, paths):
+            for key, value in results:
+                _analysis_cache[key] = value
+                count += 1
+    if count:
+        _cache_modified = True
+    LOG.debug("Prescanned %i VHDL files in %i processes.", len(paths), jobs)
+    return count
+
+
 ## @}
@@ -42,7 +42,10 @@ infrastructure required by any ASTERICS processing chain.
 # @brief File writer for the infrastructure VHDL files of ASTERICS.
 # -----------------------------------------------------------------------------
 
+import os
+import sys
 import copy
+import json
 import itertools as ittls
 
 from typing import Sequence
@@ -66,7 +69,10 @@ import as_automatics_logging as as_log
 import as_automatics_vhdl_static as as_static
 
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("writer")
+
+## Buffer size for the generated VHDL files in bytes
+WRITE_BUFFER_SIZE = 1 << 16
 
 
 ##
@@ -86,16 +92,35 @@ class VHDLWriter:
         self.chain = chain
         # List of signals of the file currently generating
         self.signal_list = []
+        # Contents of 'signal_list' (to filter duplicate declarations)
+        self.signal_set = set()
         # Architecture body of the file currently generating
         self.arch_body = []
+        # Contents of 'arch_body' (only while adding signal assignments)
+        self.arch_body_set = set()
 
     def clear_lists(self):
         """! @brief Reset to init state"""
         self.signal_list.clear()
+        self.signal_set.clear()
         self.arch_body.clear()
+        self.arch_body_set.clear()
+
+    def _add_signal_declarations(self, declarations: Sequence[str]):
+        self.signal_list.extend(declarations)
+        self.signal_set.update(declarations)
+
+    def _add_signal_declaration(self, declaration: str):
+        """! @brief Add a signal declaration, unless already present."""
+        if declaration not in self.signal_set:
+            self.signal_list.append(declaration)
+            self.signal_set.add(declaration)
 
     def write_module_group_vhd(self, folder: str, module_group: AsModuleGroup):
-        """! @brief Generate the VHDL file for a module group (AsModuleGroup)"""
+        """! @brief Generate the VHDL file for a module group (AsModuleGroup)
+        The generated code is written to the file as it is generated.
+        Only the architecture body is collected first, as the signal
+        declarations preceding it are gathered while generating it."""
         LOG.info("Writing ASTERICS module group file '%s'.", module_group.name)
         filename = "{}.vhd".format(module_group.name)
         outfile = as_help.append_to_path(
@@ -106,53 +131,121 @@ class VHDLWriter:
         self.generate_glue_signal_strings(module_group.signals)
 
         header = self._generate_header_and_library_string(module_group)
-        vhdl_list = []
-        # Generate the module's entity declaration
-        vhdl_list.extend(self._generate_entity(module_group, None))
-        # Generate the toplevel architecture
-        vhdl_list.extend(
-            self._generate_module_group_architecture(module_group, None)
-        )
         # Open the output file
-        with open(outfile, "w") as ofile:
+        with open(outfile, "w", buffering=WRITE_BUFFER_SIZE) as ofile:
             # Make sure we can write to the file
             if not ofile.writable():
                 raise AsFileError(msg="File not writable", filename=filename)
-            ofile.write(header)
-            vhdl_write.write_list_to_file(vhdl_list, ofile)
+            vhdl_write.write_lines_to_file(
+                ittls.chain(
+                    # Generate the module's entity declaration
+                    self._generate_entity(module_group, ofile),
+                    # Generate the toplevel architecture
+                    self._generate_module_group_architecture(
+                        module_group, ofile
+                    ),
+                ),
+                ofile,
+                header,
+            )
 
         # Reset to init state
         self.clear_lists()
 
-    def _generate_entity(self, module: AsModule, file) -> list:
-        """! @brief Generate and write the entity description of a given module
-        to the output file."""
+    def write_module_group_files(
+        self, folder: str, module_groups: Sequence[AsModuleGroup], jobs: int = 1
+    ):
+        """! @brief Generate the VHDL files for all 'module_groups'.
+        With 'jobs' > 1, the files are written by up to 'jobs' forked worker
+        processes at the same time (see 'as_automatics_sweep.py').
+        Changes to the module groups made while generating the files
+        (e.g. by dynamic code generators) are then kept in the workers only.
+        @param folder: The output folder.
+        @param module_groups: The module groups to generate files for.
+        @param jobs: Number of parallel workers (0: number of CPUs)."""
+        jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        # Wrappers sharing the entity of another wrapper have no own file
+        module_groups = [
+            group
+            for group in module_groups
+            if getattr(group, "shared_wrapper", None) is None
+        ]
+        if jobs == 1 or len(module_groups) < 2:
+            for group in module_groups:
+                self.write_module_group_vhd(folder, group)
+            return
+
+        errors = []
+        # pid -> (module group, read end of the result pipe, data)
+        running = {}
+        pending = list(module_groups)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        while pending or running:
+            while pending and len(running) < jobs:
+                group = pending.pop(0)
+                read_end, write_end = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    # Worker process
+                    os.close(read_end)
+                    error = ""
+                    try:
+                        self.write_module_group_vhd(folder, group)
+                    except Exception as err:
+                        error = "{}: {}".format(type(err).__name__, str(err))
+                    with os.fdopen(write_end, "w") as pipe:
+                        json.dump({"error": error}, pipe)
+                    as_log.flush_log()
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(0)
+                os.close(write_end)
+                running[pid] = (group, read_end, [])
+            group, data = as_help.wait_for_worker(running)
+            try:
+                error = json.loads(data)["error"]
+            except ValueError:
+                error = "Worker process failed"
+            if error:
+                LOG.error(
+                    "Could not write module group file '%s': %s",
+                    group.name,
+                    error,
+                )
+                errors.append(group.name)
+        if errors:
+            raise AsFileError(
+                folder,
+                "Could not write module group files!",
+                ", ".join(errors),
+            )
+
+    def _generate_entity(self, module: AsModule, file):
+        """! @brief Generate the entity description of a given module
+        line by line."""
         # "Start" the entity description
-        out_list = ["entity {} is".format(module.entity_name)]
+        yield "entity {} is".format(module.entity_name)
         # Check if there are generics
         if module.generics:
-            out_list.append("  generic(")
+            yield "  generic("
             # Generate the generic list
-            out_list.extend(
-                vhdl_write.convert_generic_entity_list(module.generics)
-            )
+            yield from vhdl_write.convert_generic_entity_list(module.generics)
 
-        out_list.append("  port(")
+        yield "  port("
         # Generate the port list
-        out_list.extend(
-            vhdl_write.convert_port_entity_list(
-                module.get_full_port_list(include_signals=False)
-            )
+        yield from vhdl_write.convert_port_entity_list(
+            module.get_full_port_list(include_signals=False)
         )
-        out_list.append("end entity {};\n".format(module.entity_name))
-        return out_list
+        yield "end entity {};\n".format(module.entity_name)
 
     def _generate_module_group_architecture(
         self, group_module: AsModuleGroup, file
-    ) -> list:
-
+    ):
+        """! @brief Generate the architecture of a module group line by line.
+        """
         # Add static code
-        self.signal_list.extend(group_module.static_code["signals"])
+        self._add_signal_declarations(group_module.static_code["signals"])
         self.arch_body.extend(group_module.static_code["body"])
 
         # Generate constant declaration strings
@@ -170,7 +263,7 @@ class VHDLWriter:
         code_dict = {"signals": [], "body": []}
         for gen in group_module.dynamic_code_generators:
             gen(self.chain, code_dict)
-        self.signal_list.extend(code_dict["signals"])
+        self._add_signal_declarations(code_dict["signals"])
         self.arch_body.extend(code_dict["body"])
 
         if not isinstance(group_module, AsModuleWrapper):
@@ -189,21 +282,16 @@ class VHDLWriter:
                 )
             self.arch_body.append(ret)  # And add to the architecture body
 
-        out_list = []
-
-        out_list.append(
-            "\narchitecture RTL of {} is".format(group_module.entity_name)
-        )
+        yield "\narchitecture RTL of {} is".format(group_module.entity_name)
         if constant_list:
-            out_list.append("  -- Constant declarations:")
-            out_list.extend(constant_list)
+            yield "  -- Constant declarations:"
+            yield from constant_list
         if self.signal_list:
-            out_list.append("\n  -- Signal declarations:")
-            out_list.extend(self.signal_list)
-        out_list.append("\nbegin")
-        out_list.extend(self.arch_body)
-        out_list.append("\nend architecture RTL;\n")
-        return out_list
+            yield "\n  -- Signal declarations:"
+            yield from self.signal_list
+        yield "\nbegin"
+        yield from self.arch_body
+        yield "\nend architecture RTL;\n"
 
     def _architecture_port_assignements(self, group_module: AsModuleGroup):
         # External port assignments
@@ -267,33 +355,37 @@ class VHDLWriter:
     def _architecture_signal_assignements(self, group_module: AsModuleGroup):
         # Add signal assignments to the architecture body
         self.arch_body.extend(["  ", "  -- Signal assignments:"])
+        self.arch_body_set = set(self.arch_body)
         for signal in group_module.signals:
             # Add the signal declaration
             if signal.port_type == "signal":
                 self._handle_module_group_signal(group_module, signal)
+        self.arch_body_set.clear()
 
     def _handle_module_group_signal(
         self, group_module: AsModuleGroup, signal: GenericSignal
     ):
-        self.signal_list.append(
-            "  signal {} : {};".format(
-                signal.code_name, as_help.get_printable_datatype(signal)
-            )
+        declaration = "  signal {} : {};".format(
+            signal.code_name, as_help.get_printable_datatype(signal)
         )
+        self.signal_list.append(declaration)
+        self.signal_set.add(declaration)
         in_done = False
         try:
             # If the signal has a vector map with content, generate
             # the vector assignment string stored in a glue signal
 
             if signal.vector_map_incoming:
-                self.arch_body.extend(
-                    vhdl_write.generate_vector_assignments(signal)
-                )
+                assignments = vhdl_write.generate_vector_assignments(signal)
+                self.arch_body.extend(assignments)
+                self.arch_body_set.update(assignments)
                 in_done = True
             if signal.vector_map_outgoing:
-                self.arch_body.extend(
-                    vhdl_write.generate_from_vector_assignment_strings(signal)
+                assignments = vhdl_write.generate_from_vector_assignment_strings(
+                    signal
                 )
+                self.arch_body.extend(assignments)
+                self.arch_body_set.update(assignments)
                 return None
         except AttributeError:
             pass
@@ -318,8 +410,9 @@ class VHDLWriter:
             add_str = as_static.ASSIGNMENT_TEMPL.format(
                 target_str, signal.code_name
             )
-            if add_str not in self.arch_body:
+            if add_str not in self.arch_body_set:
                 self.arch_body.append(add_str)
+                self.arch_body_set.add(add_str)
         for source in signal.incoming:
             if in_done:
                 break
@@ -345,8 +438,9 @@ class VHDLWriter:
             add_str = as_static.ASSIGNMENT_TEMPL.format(
                 signal.code_name, source_str
             )
-            if add_str not in self.arch_body:
+            if add_str not in self.arch_body_set:
                 self.arch_body.append(add_str)
+                self.arch_body_set.add(add_str)
 
     def _instantiate_module(self, module: AsModule) -> str:
         """! @brief Generate VHDL code as a list of strings to instantiate 'module'.
@@ -378,13 +472,14 @@ class VHDLWriter:
         # -> Generating the port map <-
         port_str = ["  port map("]
         full_port_list = module.get_full_port_list(include_signals=False)
+        last = len(full_port_list) - 1
         # For every port of this module:
-        for port in full_port_list:
+        for idx, port in enumerate(full_port_list):
             # Target of the port map
             target = None
 
             # Determine the format for this ports port map line
-            if full_port_list.index(port) < len(full_port_list) - 1:
+            if idx < last:
                 templ_str = "    {} => {},"
             else:
                 templ_str = "    {} => {}\n  );"
@@ -409,8 +504,7 @@ class VHDLWriter:
                         glue.code_name, as_help.get_printable_datatype(glue)
                     )
                     # Make sure the same glue signal is not declared twice
-                    if glue_signal_str not in self.signal_list:
-                        self.signal_list.append(glue_signal_str)
+                    self._add_signal_declaration(glue_signal_str)
 
             else:  # -> No glue signal present <-
                 # Port mapping target is one of the connected ports,
@@ -487,8 +581,7 @@ class VHDLWriter:
                 glue.code_name, as_help.get_printable_datatype(glue)
             )
             # Filter duplicate signals
-            if glue_signal_str not in self.signal_list:
-                self.signal_list.append(glue_signal_str)
+            self._add_signal_declaration(glue_signal_str)
 
     # Can't outsource to vhdl_writer_helpers as it needs access to
     # AsModuleWrapper class
@@ -178,9 +178,9 @@ def bundle_signals(bundle_list: list, bundle_type: str) -> list:
     return out
 
 
-def convert_generic_entity_list(generics: Sequence[Generic]):
-    """! @brief Convert a list of Generic objects to the string representation
-    in the format for a VHDL entity."""
+def get_generic_declarations(generics: Sequence[Generic]) -> tuple:
+    """! @brief Return the (name, data type, default value) tuples
+    declaring 'generics' in a VHDL entity or component."""
     out = []
     for gen in generics:
         # Grab the default value
@@ -188,22 +188,34 @@ def convert_generic_entity_list(generics: Sequence[Generic]):
         # Add quotes if it is a string (not boolean or numeric)
         if not (gval == "True" or gval == "False" or str(gval).isnumeric()):
             gval = '"{}"'.format(gval)
+        out.append((gen.code_name, gen.data_type, gval))
+    return tuple(out)
+
+
+def convert_generic_entity_list(generics: Sequence[Generic]):
+    """! @brief Convert a list of Generic objects to the string representation
+    in the format for a VHDL entity."""
+    return format_generic_declarations(get_generic_declarations(generics))
+
+
+def format_generic_declarations(declarations: Sequence[tuple]) -> list:
+    """! @brief Format the tuples of 'get_generic_declarations'."""
+    out = []
+    last = len(declarations) - 1
+    for idx, decl in enumerate(declarations):
         # Set the format string (last generic "closes" the generic section)
-        if generics.index(gen) == len(generics) - 1:
+        if idx == last:
             format_str = "    {} : {} := {}\n  );"
         else:
             format_str = "    {} : {} := {};"
-        # Insert the generic name, data type and default value
-        # and add the result to the return list
-        out.append(format_str.format(gen.code_name, gen.data_type, gval))
+        out.append(format_str.format(*decl))
     return out
 
 
-def convert_port_entity_list(ports: Sequence[Port]):
-    """! @brief Convert a list of port objects to the string representation
-    in the format for a VHDL entity."""
+def get_port_declarations(ports: Sequence[Port]) -> tuple:
+    """! @brief Return the (name, direction, data type) tuples declaring
+    the ports of 'ports' that are part of a VHDL entity or component."""
     out = []
-    in_entity = []
     for port in ports:
         # Skip specifically excluded ports
         if not port.in_entity:
@@ -223,25 +235,34 @@ def convert_port_entity_list(ports: Sequence[Port]):
             pass
         else:
             continue
-        in_entity.append(port)
-
-    for port in in_entity:
         # Generate string parts of the entity port declaration
-        port_data = get_printable_datatype(port)
-        port_dir = port.get_direction_normalized()
-        # Generate and add string for entity
-        if in_entity.index(port) == len(in_entity) - 1:
-            out.append(
-                "    {} : {} {}\n  );".format(
-                    port.get_print_name(), port_dir, port_data
-                )
+        out.append(
+            (
+                port.get_print_name(),
+                port.get_direction_normalized(),
+                get_printable_datatype(port),
             )
+        )
+    return tuple(out)
+
+
+def convert_port_entity_list(ports: Sequence[Port]):
+    """! @brief Convert a list of port objects to the string representation
+    in the format for a VHDL entity."""
+    return format_port_declarations(get_port_declarations(ports))
+
+
+def format_port_declarations(declarations: Sequence[tuple]) -> list:
+    """! @brief Format the tuples of 'get_port_declarations'."""
+    out = []
+    last = len(declarations) - 1
+    for idx, decl in enumerate(declarations):
+        # The last port "closes" the port section
+        if idx == last:
+            format_str = "    {} : {} {}\n  );"
         else:
-            out.append(
-                "    {} : {} {};".format(
-                    port.get_print_name(), port_dir, port_data
-                )
-            )
+            format_str = "    {} : {} {};"
+        out.append(format_str.format(*decl))
     return out
 
 
@@ -250,7 +271,22 @@ def write_list_to_file(wlist: Sequence[str], file, prefix_line: str = ""):
     file.write("\n".join(wlist))
 
 
+def write_lines_to_file(lines, file, prefix_line: str = ""):
+    """! @brief Write the strings of the iterable 'lines' to 'file'.
+    Produces the same output as 'write_list_to_file' without collecting
+    the lines in a list first. Lines are written as they are generated."""
+    file.write(prefix_line)
+    lines = iter(lines)
+    for line in lines:
+        file.write(line)
+        break
+    for line in lines:
+        file.write("\n")
+        file.write(line)
+
+
 def generate_component_declaration(module) -> str:
+    """! @brief Generate the VHDL component declaration for 'module'."""
     if module.generics:
         gen_list_str = ["generic("]
         gen_list_str.extend(convert_generic_entity_list(module.generics))
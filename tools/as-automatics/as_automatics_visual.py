@@ -54,7 +54,7 @@ from as_automatics_proc_chain import AsProcessingChain
 from as_automatics_connection_helper import get_parent_module
 import as_automatics_logging as as_log
 
-LOG = as_log.get_log()
+LOG = as_log.get_log("writer")
 
 # Check if Graphviz is installed before importing,
 # we don't want all of Automatics to fail if not installed!
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+as_automatics_watch.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Implements the watch mode of Automatics:
+Regenerate a system whenever its script or module sources change.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# --------------------- DOXYGEN -----------------------------------------------
+##
+# @file as_automatics_watch.py
+# @ingroup automatics_generate
+# @author Philip Manke
+# @brief Implements the watch mode of Automatics.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import shutil
+import filecmp
+import tempfile
+
+from as_automatics_helpers import get_file_mtimes
+import as_automatics_logging as as_log
+
+LOG = as_log.get_log()
+
+##
+# @addtogroup automatics_generate
+# @{
+
+## File types that are relevant for module templates and system scripts
+WATCHED_SUFFIXES = (".py", ".vhd", ".vhdl", ".c", ".h")
+
+
+def sync_output_tree(source: str, target: str) -> tuple:
+    """! @brief Update the directory 'target' to match 'source'.
+    Only files with a different content (or symlinks with a different target)
+    are rewritten, so unchanged files keep their modification time.
+    Files in 'target' that are not present in 'source' are left alone.
+    @return A tuple of lists: (written files, unchanged files)"""
+    written = []
+    unchanged = []
+    for root, dirs, files in os.walk(source):
+        rel_root = os.path.relpath(root, source)
+        target_root = os.path.normpath(os.path.join(target, rel_root))
+        os.makedirs(target_root, exist_ok=True)
+        # Symlinks to directories are listed in 'dirs' but not walked
+        links = [d for d in dirs if os.path.islink(os.path.join(root, d))]
+        for item in sorted(files + links):
+            src = os.path.join(root, item)
+            dst = os.path.join(target_root, item)
+            rel_path = os.path.normpath(os.path.join(rel_root, item))
+            if os.path.islink(src):
+                link = os.readlink(src)
+                if os.path.islink(dst) and os.readlink(dst) == link:
+                    unchanged.append(rel_path)
+                    continue
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                os.symlink(link, dst)
+            elif (
+                os.path.isfile(dst)
+                and not os.path.islink(dst)
+                and filecmp.cmp(src, dst, shallow=False)
+            ):
+                unchanged.append(rel_path)
+                continue
+            else:
+                if os.path.islink(dst):
+                    os.remove(dst)
+                shutil.copy2(src, dst)
+            written.append(rel_path)
+    return written, unchanged
+
+
+class AsSystemWatcher:
+    """! @brief Rebuild an ASTERICS system when its sources change.
+    The system script, the files next to it and all module repositories
+    are polled for changes. When a module source changes, only the templates
+    of the affected modules are reloaded. The script is then run in a forked
+    process (using the already loaded module library), generating the system
+    into a staging directory. Only the files whose content changed are copied
+    to the actual output directory.
+    """
+
+    def __init__(
+        self,
+        auto,
+        script: str,
+        target: str,
+        output: str,
+        interval: float = 1.0,
+    ):
+        self.auto = auto
+        self.script = os.path.realpath(script)
+        self.target = target
+        self.output = os.path.realpath(output)
+        self.interval = interval
+        ## Repositories only known to the system script
+        self.script_repos = []
+        self.mtimes = {}
+        self.rebuild_count = 0
+
+    def get_watched_paths(self) -> list:
+        """! @brief Return all files and folders polled for changes."""
+        paths = [os.path.dirname(self.script)]
+        paths.extend(repo.path for repo in self.auto.library.repos)
+        paths.extend(self.script_repos)
+        return paths
+
+    def get_mtimes(self) -> dict:
+        # Don't watch the output of the script, if it is placed next to it
+        return {
+            path: mtime
+            for path, mtime in get_file_mtimes(
+                self.get_watched_paths(), WATCHED_SUFFIXES
+            ).items()
+            if not path.startswith(self.output + "/")
+        }
+
+    def get_changed_files(self) -> list:
+        """! @brief Return files modified, added or removed since last call."""
+        mtimes = self.get_mtimes()
+        changed = [
+            path
+            for path in set(mtimes) | set(self.mtimes)
+            if mtimes.get(path) != self.mtimes.get(path)
+        ]
+        self.mtimes = mtimes
+        return sorted(changed)
+
+    def run(self, max_rebuilds: int = 0):
+        """! @brief Build the system and rebuild on changes until interrupted.
+        @param max_rebuilds: Stop after this many rebuilds (0: run forever)."""
+        self.rebuild([])
+        print(
+            "Watching '{}' and {} repositories for changes "
+            "(Ctrl+C to stop)...".format(
+                self.script,
+                len(self.auto.library.repos) + len(self.script_repos),
+            )
+        )
+        try:
+            while not max_rebuilds or self.rebuild_count <= max_rebuilds:
+                time.sleep(self.interval)
+                changed = self.get_changed_files()
+                if changed:
+                    self.rebuild(changed)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+    def rebuild(self, changed_files: list) -> int:
+        """! @brief Reload affected module templates and rebuild the system.
+        @param changed_files: Files modified since the last build.
+        @return The exit code of the system script."""
+        self.rebuild_count += 1
+        start = time.perf_counter()
+        reloaded = []
+        if changed_files:
+            reloaded = self.auto.library.reload_module_folders(changed_files)
+        t_reload = time.perf_counter()
+
+        staging = tempfile.mkdtemp(prefix="asterics-watch-")
+        try:
+            exit_code = self._run_script(os.path.join(staging, "out"))
+            t_build = time.perf_counter()
+            written, unchanged = [], []
+            if exit_code == 0 and os.path.isdir(os.path.join(staging, "out")):
+                written, unchanged = sync_output_tree(
+                    os.path.join(staging, "out"), self.output
+                )
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        t_sync = time.perf_counter()
+        # Baseline after the build: don't react to our own output
+        self.mtimes = self.get_mtimes()
+
+        print(
+            (
+                "Rebuild #{}: {} changed file(s), {} template(s) reloaded, "
+                "script exit code {}\n"
+                "  reload {:.3f} s | build {:.3f} s | sync {:.3f} s | "
+                "total {:.3f} s\n"
+                "  {} file(s) written, {} unchanged"
+            ).format(
+                self.rebuild_count,
+                len(changed_files),
+                len(reloaded),
+                exit_code,
+                t_reload - start,
+                t_build - t_reload,
+                t_sync - t_build,
+                t_sync - start,
+                len(written),
+                len(unchanged),
+            )
+        )
+        for path in written:
+            LOG.info("Watch: Updated '%s'", path)
+        return exit_code
+
+    def _run_script(self, output: str) -> int:
+        """! @brief Run the system script in a forked process."""
+        import runpy
+        import traceback
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Child process
+            os.close(read_end)
+            exit_code = 0
+            known = set(repo.path for repo in self.auto.library.repos)
+            try:
+                self.auto.reset_build_state()
+                sys.argv = [self.script, self.target, output]
+                sys.path.insert(0, os.path.dirname(self.script))
+                runpy.run_path(self.script, run_name="__main__")
+            except SystemExit as exit_exc:
+                if isinstance(exit_exc.code, int):
+                    exit_code = exit_exc.code
+                elif exit_exc.code is not None:
+                    print(exit_exc.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                # Report repositories added by the script to watch them
+                repos = [
+                    repo.path
+                    for repo in self.auto.library.repos
+                    if repo.path not in known
+                ]
+                with os.fdopen(write_end, "w") as pipe:
+                    json.dump(repos, pipe)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                as_log.flush_log()
+                os._exit(exit_code)
+        # Parent process
+        os.close(write_end)
+        with os.fdopen(read_end, "r") as pipe:
+            data = pipe.read()
+        _, status = os.waitpid(pid, 0)
+        try:
+            self.script_repos = sorted(
+                set(self.script_repos) | set(json.loads(data))
+            )
+        except ValueError:
+            pass
+        return os.waitstatus_to_exitcode(status)
+
+
+## @}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print("Usage: as_automatics_watch.py <system script> <target> <output>")
+        sys.exit(1)
+    import asterics
+
+    asterics.watch(*sys.argv[1:])
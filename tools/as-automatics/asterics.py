@@ -119,6 +119,7 @@ except KeyError:
 
 # Import Automatics
 from as_automatics_env import AsAutomatics
+from as_automatics_session import AsSession
 from as_automatics_proc_chain import AsProcessingChain
 from as_automatics_2d_pipeline import As2DWindowPipeline
 from as_automatics_cnn_layer import AsNNLayer
@@ -130,6 +131,9 @@ from as_automatics_interface import Interface
 import as_automatics_builder as as_build
 import as_automatics_logging as as_log
 import as_automatics_exceptions as as_err
+import as_automatics_vhdl_dependencies as as_vdeps
+import as_automatics_vhdl_reader as as_vhdl_reader
+import as_automatics_module_index as as_module_index
 
 # Initialize logging
 LOG = as_log.init_log()
@@ -204,14 +208,33 @@ def new_chain() -> AsProcessingChain:
     before calling this again to start the second system!
     @return  A new ASTERICS processing chain."""
     AsProcessingChain.err_mgr = as_err.AsError.err_mgr
-    # Add "standard" ASTERICS modules
-    Auto.add_module_repository(
-        append_to_path(asterics_home, "modules"), "default"
-    )
+    _add_default_repository()
     Auto.current_chain = AsProcessingChain(Auto.library, parent=Auto)
     return Auto.current_chain
 
 
+def new_session() -> AsSession:
+    """! @brief Provide a new AsSession object.
+    A session builds any number of independent processing chains, sharing
+    the module library of Automatics. Each chain has its own error manager,
+    window pipelines and output settings. Chains of a session may be
+    built and written in parallel, using threads or processes.
+    Use 'session.new_chain()' instead of 'asterics.new_chain()' and
+    'session.new_2d_window_pipeline(chain, ...)' to add window pipelines.
+    @return  A new AsSession object."""
+    _add_default_repository()
+    return AsSession(Auto.library, asterics_home, Automatics_version)
+
+
+def _add_default_repository():
+    # Add "standard" ASTERICS modules (only once, the library may be
+    # preloaded, e.g. by the asterics-server)
+    if Auto.library.get_repo("default") is None:
+        Auto.add_module_repository(
+            append_to_path(asterics_home, "modules"), "default"
+        )
+
+
 def new_2d_window_pipeline(
     image_width: int,
     image_height: int = 480,
@@ -324,6 +347,45 @@ def set_ipcore_name(name: str, description: str = ""):
         Auto.set_ipcore_description(description)
 
 
+def set_ooc_synthesis_jobs(jobs: int = 0):
+    """! @brief Set the number of parallel out-of-context synthesis runs.
+    Modules of 2D Window Pipelines added with 'create_wrapper=True' are
+    synthesized out-of-context when packaging the IP-Core using Vivado.
+    Identical modules share one run. The runs are launched in parallel.
+    @param jobs  Number of parallel runs (0: number of CPUs, default).
+                 None: Only create the runs, without launching them.
+    """
+    Auto.set_ooc_jobs(jobs)
+
+
+def set_packaging_timeout(seconds: float = None):
+    """! @brief Abort Vivado IP-Core packaging after 'seconds'.
+    Vivado's output is logged to 'packaging.log' in the IP-Core folder.
+    @param seconds  Time limit for packaging (None: no limit, default).
+    """
+    Auto.set_packaging_timeout(seconds)
+
+
+def set_discovery_jobs(jobs: int = 0):
+    """! @brief Analyze the VHDL files of module repositories in parallel.
+    Applies to repositories added after this call, including the default
+    module repository added by 'new_chain'.
+    @param jobs  Number of processes (0: number of CPUs, 1: sequential).
+    """
+    Auto.library.discovery_jobs = jobs
+
+
+def set_lazy_module_loading(enabled: bool = True):
+    """! @brief List the modules of repositories from their manifest index.
+    The module specification scripts only run for module folders changed
+    since the index was written; Module templates are loaded on first use.
+    Applies to repositories added after this call, including the default
+    module repository added by 'new_chain'.
+    @param enabled  Load lazily (True) or all modules immediately (False).
+    """
+    Auto.library.lazy_loading = enabled
+
+
 def add_module_repository(path: str, repository_name: str = "user") -> bool:
     """! @brief Retrieve ASTERICS modules from another location.
     @param path: Where to scan for ASTERICS modules.
@@ -364,6 +426,109 @@ def vears(path: str, use_symlinks: bool = True, force: bool = False) -> bool:
     return True
 
 
+def watch(script: str, target: str, output: str, interval: float = 1.0):
+    """! @brief Build a system and rebuild it whenever its sources change.
+    The system script, the files in its folder and all module repositories
+    are polled for changes. Only the affected module templates are reloaded
+    and only output files whose content changed are rewritten.
+    Stop watching using Ctrl+C.
+    @param script: Path to the system script (e.g. 'asterics-gen.py').
+    @param target: The build target passed to the script (e.g. 'core').
+    @param output: The output directory passed to the script.
+    @param interval: Time in seconds between checks for changes."""
+    from as_automatics_watch import AsSystemWatcher
+
+    _add_default_repository()
+    AsSystemWatcher(Auto, script, target, output, interval).run()
+
+
+def load_snapshot(path: str, check_library: bool = True) -> AsProcessingChain:
+    """! @brief Restore a processing chain saved using 'chain.save_snapshot'.
+    The restored chain replaces the current chain and can be used to
+    generate outputs without running auto_connect() again.
+    @param path: The snapshot file to load.
+    @param check_library: Refuse to load the snapshot if the module library
+                          changed since the snapshot was created.
+    @return The restored processing chain."""
+    import as_automatics_snapshot as as_snap
+
+    AsProcessingChain.err_mgr = as_err.AsError.err_mgr
+    _add_default_repository()
+    return as_snap.load_snapshot(Auto, path, check_library)
+
+
+def chain_diff(old, new):
+    """! @brief Compare two processing chains structurally.
+    Reports added and removed modules, changed generics, rewired
+    connections, changed line buffers and changed register addresses.
+    @param old, new: Processing chains (connected), paths to chain
+                     descriptions (see 'chain.write_description') or paths
+                     to snapshots (see 'chain.save_snapshot').
+    @return A ChainDiff: Print it or export it using 'write_json'.
+            'diff.is_empty()' is True if the chains are identical."""
+    import as_automatics_chain_diff as as_diff
+    import as_automatics_snapshot as as_snap
+
+    descs = []
+    for chain in (old, new):
+        if isinstance(chain, str):
+            if not as_snap.is_snapshot_file(chain):
+                descs.append(as_diff.read_chain_description(chain))
+                continue
+            # Loading a snapshot replaces the current chain: Restore it
+            current = Auto.current_chain
+            try:
+                chain = load_snapshot(chain)
+            finally:
+                Auto.current_chain = current
+        elif not chain.auto_connect_run:
+            chain.auto_connect()
+        descs.append(as_diff.describe_chain(chain))
+    return as_diff.ChainDiff(*descs)
+
+
+def sweep(
+    build_fn,
+    param_grid,
+    jobs: int = 0,
+    output_dir: str = "",
+    write=False,
+    output_kind: str = "core",
+    csv_path: str = "",
+    print_table: bool = True,
+) -> list:
+    """! @brief Build many variants of a system and compare them.
+    'build_fn(**params)' is called for every parameter set in 'param_grid'
+    in an isolated worker process (sharing the loaded module library).
+    It should create a chain using 'new_chain()' and describe the system.
+    For each variant the buffer report numbers, the register count,
+    the pipeline delay and the generation time are collected.
+    Example:
+    sweep(build, {"width": [320, 640], "bram": [256, 512]}, jobs=4)
+    @param build_fn: Function describing the system using the parameters.
+    @param param_grid: Dictionary {<parameter>: [<values>]} (all combinations)
+                       or a list of dictionaries (one per variant).
+    @param jobs: Number of variants built in parallel (0: number of CPUs).
+    @param output_dir: Folder for the outputs of the variants.
+    @param write: True to write outputs for all variants or a function
+                  'write(params, metrics) -> bool' to select variants.
+    @param output_kind: Which output to write: 'core', 'hw', 'sw' or 'graph'.
+    @param csv_path: Optionally write the result table to this CSV file.
+    @param print_table: Print the result table to the console.
+    @return A list with a dictionary of parameters and metrics per variant."""
+    import as_automatics_sweep as as_sweep
+
+    _add_default_repository()
+    results = as_sweep.sweep(
+        Auto, build_fn, param_grid, jobs, output_dir, write, output_kind
+    )
+    if print_table:
+        as_sweep.print_sweep_table(results)
+    if csv_path:
+        as_sweep.write_sweep_csv(results, csv_path)
+    return results
+
+
 def set_loglevel(console: str = "warning", logfile: str = "info"):
     """! @brief Set the logging severity level for the console and log file outputs.
     Valid loglevels are: debug, info, warning, error, critical.
@@ -382,9 +547,69 @@ def verbose():
     set_loglevel(console="INFO")
 
 
+def silent():
+    """! @brief Silent build mode: Don't write a log file (no file at all)
+    and only show errors on the console."""
+    as_log.init_log(silent=True)
+
+
+def set_subsystem_loglevel(subsystem: str, loglevel: str):
+    """! @brief Set the logging severity level of a single subsystem.
+    Valid subsystems are: parser, connect, pipeline2d, writer.
+    Use to silence noisy parts of Automatics, such as the 2D window pipeline.
+    Records must still pass the console and logfile loglevels to be output.
+    @param subsystem: The subsystem to set the loglevel for.
+    @param loglevel: The loglevel or 'notset' to use the general loglevel."""
+    as_log.set_subsystem_loglevel(subsystem, loglevel)
+
+
 def list_errors():
     """! @brief List all errors encountered so far on the commandline."""
     as_err.list_errors()
 
 
+def set_fail_fast(severity: str = "Critical"):
+    """! @brief Abort 'auto_connect' on the first error of at least 'severity'.
+    By default, Automatics runs all connection phases to report as many
+    errors of the user script at once as possible.
+    @param severity: 'Critical', 'Error', 'Warning' or None to disable."""
+    as_err.AsError.err_mgr.set_fail_fast(severity)
+
+
+def write_errors_json(path: str) -> bool:
+    """! @brief Export all errors encountered so far to a JSON file.
+    Includes the error counts per severity, type, error class and module.
+    @param path: The JSON file to write.
+    @return True on success, else False."""
+    return as_err.AsError.err_mgr.write_json(path)
+
+
+def set_cache_dir(path: str):
+    """! @brief Set a directory to cache VHDL analysis results in.
+    The VHDL files of the module library are scanned for the packages and
+    entities they use, to gather exactly the files a system requires, and
+    the module toplevel files are parsed to create the module templates.
+    Results are cached per file contents; With a cache directory they are
+    kept between runs. The manifest indexes of module repositories (see
+    'set_lazy_module_loading') are stored there instead of in the
+    repositories. Pass an empty string to disable."""
+    as_vdeps.set_cache_dir(path)
+    as_vhdl_reader.set_cache_dir(path)
+    as_module_index.set_cache_dir(path)
+
+
+def get_dependency_report() -> dict:
+    """! @brief Compare the declared and the derived module dependencies.
+    Lists, per module of the library, the modules required by its VHDL code
+    but not declared in its specification ('missing') and declared modules
+    not used by the VHDL code ('unused').
+    @return Dictionary: entity name -> {'missing': [...], 'unused': [...]}"""
+    library = Auto.library
+    library.load_all_templates()
+    return as_vdeps.get_dependency_diff(
+        library.get_dependency_graph(),
+        [module for repo in library.repos for module in repo.modules.values()],
+    )
+
+
 ## @} (addtogroup automatics_cds)
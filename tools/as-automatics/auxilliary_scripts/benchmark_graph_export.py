@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+benchmark_graph_export.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Measure the time to export the system graph of a large synthetic chain
+(about 1000 modules by default) for all output formats and collapse levels.
+If available, the legacy graphviz based 'system_graph' and the Graphviz
+'dot' layout are measured as well.
+
+Usage: python3 benchmark_graph_export.py [paths] [filters]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import asterics
+import as_automatics_logging as as_log
+import as_automatics_graph_export as as_graph
+from benchmark_logging import build_chain
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 125
+    filters = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    as_log.init_log("", loglevel_console="ERROR")
+    asterics.new_chain()
+
+    chain = build_chain(paths, filters)
+    connect_time = timed(chain.auto_connect)
+    print(
+        "Chain: {} modules, {} 2D window filters (auto_connect: {:.1f} s)".format(
+            len(chain.modules), filters, connect_time
+        )
+    )
+    dot = shutil.which("dot")
+    print(
+        "{:<10} {:<10} {:>12} {:>10} {:>10} {:>14}".format(
+            "Format", "Collapse", "export [s]", "nodes", "edges", "dot -Tsvg [s]"
+        )
+    )
+    with tempfile.TemporaryDirectory(prefix="as-graph-bench-") as outdir:
+        for collapse in as_graph.GRAPH_COLLAPSE_LEVELS:
+            for fmt in ("dot", "json"):
+                out_file = os.path.join(outdir, "{}_{}".format(collapse, fmt))
+                duration = timed(
+                    as_graph.write_chain_graph,
+                    chain,
+                    out_file,
+                    fmt,
+                    collapse=collapse,
+                )
+                graph = as_graph.ChainGraph(chain, collapse=collapse)
+                nodes = sum(1 for _ in graph.nodes())
+                edges = sum(1 for _ in graph.edges())
+                layout = "-"
+                if fmt == "dot" and dot is not None:
+                    layout = "{:.3f}".format(
+                        timed(
+                            subprocess.run,
+                            [
+                                dot,
+                                "-Tsvg",
+                                "-o",
+                                out_file + ".svg",
+                                out_file + ".dot",
+                            ],
+                        )
+                    )
+                print(
+                    "{:<10} {:<10} {:>12.4f} {:>10} {:>10} {:>14}".format(
+                        fmt, collapse, duration, nodes, edges, layout
+                    )
+                )
+    try:
+        import as_automatics_visual as as_vis
+
+        if as_vis.graphviz_available:
+            duration = timed(
+                as_vis.system_graph,
+                chain,
+                "",
+                False,
+                False,
+                False,
+                False,
+                False,
+                return_graph=True,
+            )
+            print("Legacy system_graph (graphviz): {:.4f} s".format(duration))
+    except ImportError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
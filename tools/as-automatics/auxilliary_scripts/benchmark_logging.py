@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+benchmark_logging.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Measure the overhead of the logging configurations of Automatics
+for the 'auto_connect' run of a large processing chain.
+
+Usage: python3 benchmark_logging.py [paths] [filters] [repetitions]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+
+import asterics
+import as_automatics_logging as as_log
+
+## Logging configurations: (name, init_log keyword arguments)
+CONFIGS = (
+    ("sync, file DEBUG", {"loglevel_file": "DEBUG", "use_queue": False}),
+    ("queued, file DEBUG", {"loglevel_file": "DEBUG"}),
+    ("sync, file INFO", {"use_queue": False}),
+    ("queued, file INFO (default)", {}),
+    ("queued, 2D pipeline WARNING", {"pipeline2d": "WARNING"}),
+    ("silent (no file)", {"silent": True}),
+    ("logging disabled", None),
+)
+
+
+def build_chain(paths: int, filters: int):
+    """! @brief Build a chain with 'paths' reader -> invert -> writer paths
+    and a 2D window pipeline of 'filters' filters in series."""
+    chain = asterics.new_chain()
+    for idx in range(paths):
+        reader = chain.add_module("as_memreader", "reader{}".format(idx))
+        invert = chain.add_module("as_invert", "invert{}".format(idx))
+        writer = chain.add_module("as_memwriter", "writer{}".format(idx))
+        writer.set_generic_value("MEMORY_DATA_WIDTH", 32)
+        writer.set_generic_value("DIN_WIDTH", 32)
+        chain.connect(reader, invert)
+        chain.connect(invert, writer)
+    if filters:
+        reader = chain.add_module("as_memreader", "pipe_reader")
+        reader.set_generic_value("DOUT_WIDTH", 8)
+        writer = chain.add_module("as_memwriter", "pipe_writer")
+        writer.set_generic_value("MEMORY_DATA_WIDTH", 32)
+        writer.set_generic_value("DIN_WIDTH", 8)
+        pipe = asterics.new_2d_window_pipeline(640, name="pipe")
+        prev = reader
+        for idx in range(filters):
+            fil = pipe.add_module(
+                "as_2d_conv_filter_internal", "filter{}".format(idx)
+            )
+            fil.set_generic_value("KERNEL_SIZE", 3)
+            fil.set_generic_value("KERNEL_TYPE", '"gauss"')
+            if prev is reader:
+                reader.connect(fil)
+            else:
+                prev.get_port("data_out").connect(fil)
+            prev = fil
+        prev.get_port("data_out").connect(writer.get("in"))
+    return chain
+
+
+def run_config(config, paths: int, filters: int, logfile: str):
+    """! @brief Build and connect the chain in a forked process.
+    @return Dictionary: auto_connect time and size of the log file."""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        if config is None:
+            logging.getLogger(as_log.LOGGER_NAME).disabled = True
+        else:
+            config = dict(config)
+            subsystem_level = config.pop("pipeline2d", "")
+            as_log.init_log(logfile, loglevel_console="ERROR", **config)
+            if subsystem_level:
+                as_log.set_subsystem_loglevel("pipeline2d", subsystem_level)
+        chain = build_chain(paths, filters)
+        start = time.perf_counter()
+        chain.auto_connect()
+        duration = time.perf_counter() - start
+        as_log.flush_log()
+        flushed = time.perf_counter() - start
+        with os.fdopen(write_end, "w") as pipe:
+            json.dump(
+                {
+                    "time": duration,
+                    "flushed": flushed,
+                    "modules": len(chain.modules),
+                    "logsize": os.path.getsize(logfile)
+                    if os.path.exists(logfile)
+                    else 0,
+                },
+                pipe,
+            )
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end, "r") as pipe:
+        data = pipe.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    filters = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    repetitions = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    # Load the module library once, the benchmark runs use forked processes
+    as_log.init_log("", loglevel_console="ERROR")
+    asterics.new_chain()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="as-log-bench-") as logdir:
+        for num, (name, config) in enumerate(CONFIGS):
+            runs = [
+                run_config(
+                    config,
+                    paths,
+                    filters,
+                    os.path.join(logdir, "{}_{}.log".format(num, rep)),
+                )
+                for rep in range(repetitions)
+            ]
+            best = min(runs, key=lambda run: run["time"])
+            results.append((name, best))
+    print(
+        "auto_connect of {} modules, {} 2D window filters "
+        "(best of {} runs):".format(
+            results[0][1]["modules"], filters, repetitions
+        )
+    )
+    print(
+        "{:<30} {:>12} {:>16} {:>10} {:>12}".format(
+            "Configuration", "time [s]", "incl. flush [s]", "overhead", "log [kB]"
+        )
+    )
+    reference = results[-1][1]["time"]
+    for name, res in results:
+        print(
+            "{:<30} {:>12.3f} {:>16.3f} {:>9.1f}% {:>12.1f}".format(
+                name,
+                res["time"],
+                res["flushed"],
+                (res["time"] / reference - 1) * 100,
+                res["logsize"] / 1024,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+benchmark_memory.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Measure the memory used by module instances of the module library
+(bytes and Python objects per instance) and the time to create them.
+
+Usage: python3 benchmark_memory.py [instances] [module names ...]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import gc
+import sys
+import time
+import tracemalloc
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+
+import asterics
+import as_automatics_logging as as_log
+
+DEFAULT_MODULES = (
+    "as_cnn_serial_convolution",
+    "as_2d_conv_filter_internal",
+    "as_memwriter",
+    "as_invert",
+)
+
+
+def measure_instances(library, module_name: str, count: int) -> dict:
+    """! @brief Create 'count' instances of a module and measure them."""
+    # Warm up (caches, interned strings, ...)
+    library.get_module_instance(module_name)
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    instances = [
+        library.get_module_instance(module_name) for _ in range(count)
+    ]
+    duration = time.perf_counter() - start
+    gc.collect()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    objects_after = len(gc.get_objects())
+    size = sum(
+        stat.size_diff
+        for stat in snapshot_after.compare_to(snapshot_before, "filename")
+    )
+    start = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - start
+    del instances
+    return {
+        "bytes": size / count,
+        "objects": (objects_after - objects_before) / count,
+        "time": duration / count,
+        "gc": gc_time,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    modules = sys.argv[2:] or DEFAULT_MODULES
+    as_log.init_log("", loglevel_console="ERROR")
+    asterics.new_chain()
+    library = asterics.Auto.library
+
+    print("Memory per module instance ({} instances each):".format(count))
+    print(
+        "{:<30} {:>14} {:>14} {:>16} {:>12}".format(
+            "Module", "bytes", "GC objects", "copy time [ms]", "gc [ms]"
+        )
+    )
+    for name in modules:
+        res = measure_instances(library, name, count)
+        print(
+            "{:<30} {:>14.0f} {:>14.1f} {:>16.3f} {:>12.1f}".format(
+                name,
+                res["bytes"],
+                res["objects"],
+                res["time"] * 1000,
+                res["gc"] * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+benchmark_port_rules.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Measure the time spent evaluating port rules during 'auto_connect'.
+Builds the chain of benchmark_logging.py and times every call of
+'AsProcessingChain._eval_port_rules'.
+
+Usage: python3 benchmark_port_rules.py [paths] [filters] [repetitions]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import asterics
+import as_automatics_logging as as_log
+from as_automatics_proc_chain import AsProcessingChain
+from benchmark_logging import build_chain
+
+
+def measure(paths: int, filters: int) -> dict:
+    """! @brief Build and connect the chain, timing the port rule evaluation."""
+    stats = {"calls": 0, "time": 0.0}
+    eval_port_rules = AsProcessingChain._eval_port_rules
+
+    def timed_eval_port_rules(chain, source, sink, sink_parent):
+        start = time.perf_counter()
+        try:
+            return eval_port_rules(chain, source, sink, sink_parent)
+        finally:
+            stats["time"] += time.perf_counter() - start
+            stats["calls"] += 1
+
+    AsProcessingChain._eval_port_rules = timed_eval_port_rules
+    try:
+        chain = build_chain(paths, filters)
+        start = time.perf_counter()
+        chain.auto_connect()
+        stats["total"] = time.perf_counter() - start
+    finally:
+        AsProcessingChain._eval_port_rules = eval_port_rules
+    stats["modules"] = len(chain.modules)
+    return stats
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    filters = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    repetitions = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    as_log.init_log("", loglevel_console="ERROR")
+    asterics.new_chain()
+
+    runs = [measure(paths, filters) for _ in range(repetitions)]
+    best = min(runs, key=lambda run: run["time"])
+    print(
+        "auto_connect of {} modules (best of {} runs):".format(
+            best["modules"], repetitions
+        )
+    )
+    print("Port rule evaluations: {}".format(best["calls"]))
+    print("Time in port rules:    {:.3f} s".format(best["time"]))
+    print(
+        "Per evaluation:        {:.2f} us".format(
+            best["time"] / max(best["calls"], 1) * 1e6
+        )
+    )
+    print("auto_connect total:    {:.3f} s".format(best["total"]))
+
+
+if __name__ == "__main__":
+    main()
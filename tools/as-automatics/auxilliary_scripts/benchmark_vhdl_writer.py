@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+benchmark_vhdl_writer.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Measure the time to export the system graph of a large synthetic chain
+(about 1000 modules by default) for all output formats and collapse levels.
+If available, the legacy graphviz based 'system_graph' and the Graphviz
+'dot' layout are measured as well.
+
+Usage: python3 benchmark_vhdl_writer.py [paths] [filters]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import asterics
+import as_automatics_logging as as_log
+from as_automatics_vhdl_writer import VHDLWriter
+from benchmark_logging import build_chain
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 125
+    filters = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    as_log.init_log("", loglevel_console="ERROR")
+    asterics.new_chain()
+
+    chain = build_chain(paths, filters)
+    chain.auto_connect()
+    groups = [chain.top] + list(chain.module_groups)
+    print(
+        "Chain: {} modules in {} module groups".format(
+            len(chain.modules), len(groups)
+        )
+    )
+    with tempfile.TemporaryDirectory(prefix="as-vhdl-bench-") as outdir:
+        for run_jobs in (1, jobs):
+            writer = VHDLWriter(chain)
+            start = time.perf_counter()
+            writer.write_module_group_files(outdir, groups, run_jobs)
+            duration = time.perf_counter() - start
+            size = sum(
+                os.path.getsize(os.path.join(outdir, name))
+                for name in os.listdir(outdir)
+            )
+            print(
+                "jobs={:<4} {:>8.3f} s  ({:.1f} kB VHDL)".format(
+                    run_jobs or os.cpu_count(), duration, size / 1024
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+chain_diff.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Compare two saved processing chains structurally, e.g. to gate changes in CI.
+The chains are chain descriptions ('chain.write_description(path)') or
+snapshots ('chain.save_snapshot(path)').
+
+Usage: python3 chain_diff.py <old chain> <new chain> [--json <output file>]
+                             [--quiet]
+Exit status: 0 if the chains are identical, 1 if they differ, 2 on errors.
+Requires ASTERICS_HOME and the Automatics directory in PYTHONPATH.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import sys
+
+
+def main(args: list) -> int:
+    paths = [arg for arg in args if not arg.startswith("-")]
+    json_path = None
+    if "--json" in args:
+        json_path = args[args.index("--json") + 1]
+        paths.remove(json_path)
+    if len(paths) != 2 or "-h" in args or "--help" in args:
+        print(__doc__)
+        return 2
+
+    import asterics
+    from as_automatics_exceptions import AsError
+
+    asterics.silent()
+    try:
+        diff = asterics.chain_diff(*paths)
+    except (AsError, OSError) as err:
+        print("Error: " + str(err))
+        return 2
+    if "--quiet" not in args:
+        print(diff)
+    if json_path and not diff.write_json(json_path):
+        return 2
+    return 0 if diff.is_empty() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
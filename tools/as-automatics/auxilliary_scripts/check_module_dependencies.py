@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+check_module_dependencies.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+List the modules whose declared dependencies (AsModule.dependencies)
+differ from the dependencies found in their VHDL sources.
+
+Usage: python3 check_module_dependencies.py [cache directory]
+Requires ASTERICS_HOME to be set (source settings.sh).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+
+import asterics
+import as_automatics_logging as as_log
+import as_automatics_vhdl_dependencies as as_vdeps
+
+
+def main():
+    as_log.init_log("", loglevel_console="ERROR")
+    # Loads the module library
+    asterics.new_chain()
+    if len(sys.argv) > 1:
+        asterics.set_cache_dir(sys.argv[1])
+    start = time.perf_counter()
+    report = asterics.get_dependency_report()
+    duration = time.perf_counter() - start
+
+    print("{:<32} {:<30} {}".format("Module", "Missing", "Unused"))
+    for entity, diff in sorted(report.items()):
+        print(
+            "{:<32} {:<30} {}".format(
+                entity, ", ".join(diff["missing"]), ", ".join(diff["unused"])
+            )
+        )
+    print(
+        "{} of {} modules differ (analysis: {:.3f} s)".format(
+            len(report), len(asterics.Auto.library.get_module_names()), duration
+        )
+    )
+    if len(sys.argv) > 1:
+        as_vdeps.save_scan_cache(as_vdeps.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+record_tcl_commands.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Run a generated packaging TCL fragment (e.g. 'package_ooc_config.tcl') in a
+stand-in TCL interpreter, recording the Vivado commands it issues, and check
+the out-of-context synthesis schedule.
+
+Usage: python3 record_tcl_commands.py <TCL file> [--json <output file>]
+                                      [--no-auto-runs]
+--no-auto-runs: Don't emulate Vivado creating the runs of new blocksets.
+Requires Python with Tkinter (for the TCL interpreter).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import sys
+import json
+import tkinter
+
+
+class VivadoStandIn:
+    """! @brief Records the Vivado commands of a TCL script.
+    Unknown commands are recorded and answered with plausible values."""
+
+    def __init__(self, auto_runs: bool = True):
+        self.auto_runs = auto_runs
+        self.commands = []
+        self.filesets = []
+        self.runs = ["synth_1"]
+        self.launched = []
+        self.waited = []
+        self.jobs = None
+        self.tcl = tkinter.Tcl()
+        self.tcl.createcommand("record_command", self.record)
+        self.tcl.eval("proc unknown args { return [record_command {*}$args] }")
+
+    @staticmethod
+    def get_arguments(args: tuple) -> list:
+        """! @brief Return the arguments without options."""
+        out = []
+        skip = False
+        for arg in args:
+            if skip:
+                skip = False
+            elif arg.startswith("-"):
+                skip = arg not in ("-quiet", "-blockset", "-notrace")
+            else:
+                out.append(arg)
+        return out
+
+    def get_option(self, args: tuple, option: str) -> str:
+        if option in args and args.index(option) + 1 < len(args):
+            return args[args.index(option) + 1]
+        return None
+
+    def record(self, command: str, *args) -> str:
+        self.commands.append([command] + list(args))
+        params = self.get_arguments(args)
+        if command == "create_fileset":
+            self.filesets.extend(params)
+            if self.auto_runs and "-blockset" in args:
+                self.runs.extend(name + "_synth_1" for name in params)
+        elif command == "create_run":
+            self.runs.extend(params)
+        elif command == "get_runs":
+            return " ".join(run for run in params if run in self.runs)
+        elif command == "launch_runs":
+            self.jobs = self.get_option(args, "-jobs")
+            for arg in params:
+                self.launched.extend(self.tcl.splitlist(arg))
+        elif command == "wait_on_run":
+            self.waited.extend(params)
+        elif command == "get_property":
+            if params and params[0].lower() == "progress":
+                return "100%"
+            if params and params[0].lower() == "flow":
+                return "Vivado Synthesis"
+        elif command.startswith("get_"):
+            return " ".join(params[-1:])
+        return ""
+
+    def run(self, path: str):
+        self.tcl.eval("source {{{}}}".format(path))
+
+    def check(self) -> list:
+        """! @brief Return a list of problems of the recorded schedule."""
+        issues = []
+        for name in set(self.filesets):
+            if self.filesets.count(name) > 1:
+                issues.append(
+                    "Fileset '{}' created more than once".format(name)
+                )
+        for run in self.launched:
+            if run not in self.runs:
+                issues.append("Run '{}' launched but never created".format(run))
+            if run not in self.waited:
+                issues.append("Run '{}' launched but not waited on".format(run))
+        if len(set(self.launched)) != len(self.launched):
+            issues.append("Runs launched more than once")
+        return issues
+
+    def to_dict(self) -> dict:
+        return {
+            "commands": self.commands,
+            "filesets": self.filesets,
+            "launched_runs": self.launched,
+            "jobs": self.jobs,
+            "issues": self.check(),
+        }
+
+
+def main(args: list) -> int:
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return 1
+    json_path = None
+    if "--json" in args:
+        json_path = args[args.index("--json") + 1]
+    standin = VivadoStandIn(auto_runs="--no-auto-runs" not in args)
+    standin.run(args[0])
+    for command in standin.commands:
+        print(" ".join(command))
+    print(
+        "\n{} filesets, {} runs launched using {} jobs: {}".format(
+            len(standin.filesets),
+            len(standin.launched),
+            standin.jobs,
+            " ".join(standin.launched),
+        )
+    )
+    issues = standin.check()
+    for issue in issues:
+        print("Problem: " + issue)
+    if json_path:
+        with open(json_path, "w") as file:
+            json.dump(standin.to_dict(), file, indent=2)
+    return 1 if issues else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -43,7 +43,6 @@ Class representing an ASTERICS module part of an ASTERICS processing chain.
 import os
 import sys
 import copy
-import pandas as pd
 from PyQt5 import uic
 import PyQt5.QtGui as qg
 import PyQt5.QtCore as qc
@@ -100,6 +99,11 @@ class OutLog:
         # self.flush = None
 
     def write(self, m):
+        # Widgets may only be modified from the GUI thread
+        app = qw.QApplication.instance()
+        if app is not None and qc.QThread.currentThread() is not app.thread():
+            sys.__stdout__.write(m)
+            return
         if self.edit:
             self.edit.moveCursor(qg.QTextCursor.End)
             self.edit.insertPlainText(m)
@@ -114,6 +118,32 @@ class OutLog:
             self.out.flush()
 
 
+class ModuleLoader(qc.QThread):
+    """Scan a module repository in a background thread.
+    Emits 'module_found' for every module as soon as it is registered in the
+    module library, so the module list fills while the GUI is responsive."""
+
+    module_found = qc.pyqtSignal(str, str)
+    loading_done = qc.pyqtSignal(list, str)
+
+    def __init__(self, auto: AsAutomatics, path: str, repo_name: str):
+        super(ModuleLoader, self).__init__()
+        self.auto = auto
+        self.path = path
+        self.repo_name = repo_name
+
+    def run(self):
+        error = ""
+        mods = []
+        try:
+            mods = self.auto.add_module_repository(
+                self.path, self.repo_name, self.module_found.emit
+            )
+        except Exception as err:
+            error = str(err)
+        self.loading_done.emit(mods, error)
+
+
 class AlignDelegate(qw.QStyledItemDelegate):
     def initStyleOption(self, option, index):
         super(AlignDelegate, self).initStyleOption(option, index)
@@ -297,6 +327,7 @@ class GUI(qw.QMainWindow):
         print("Hello from ASTERICS Automatics!")
         # Show GUI
         self.wizard = None
+        self.loaders = []
         self.show()
 
     def add_generic_info(self, module: AsModule):
@@ -461,7 +492,8 @@ class GUI(qw.QMainWindow):
     def add_module(self, modname: str, reponame: str = ""):
         """ Add the ASTERICS module with name `modname` in the modulelist """
 
-        mod = self.auto.library.get_module_template(modname, reponame)
+        # Listing only needs the manifest, the template is loaded on click
+        mod = self.auto.library.get_module_manifest(modname, reponame)
         status_column = 3
         mod_type_column = 1
 
@@ -470,34 +502,35 @@ class GUI(qw.QMainWindow):
         self.modlist.insertRow(y)
 
         tablerow = [
-            mod.entity_name,
-            mod.module_type.status,
-            mod.repository_name,
-            mod.dev_status.status,
-            mod.module_category,
+            mod["entity"],
+            mod["module_type"]["status"],
+            mod["repository"],
+            mod["dev_status"]["status"],
+            mod["module_category"],
             "",
-            mod.brief_description,
+            mod["brief_description"],
         ]  # one tablerow
 
-        self.module_names_automatics[modname]["name"] = mod.entity_name
-        self.module_names_automatics[modname]["mod_show"] = mod.show_in_browser
-        self.module_names_automatics[modname]["repository"] = mod.repository_name
-        self.module_names_automatics[modname]["dev_status"] = mod.dev_status.status
-        self.module_names_automatics[modname]["mod_status"] = mod.module_type.status
-        self.module_names_automatics[modname]["mod_descrip"] = mod.brief_description
-        self.module_names_automatics[modname]["mod_comment"] = mod.brief_description
-        self.module_names_automatics[modname]["dev_comment"] = mod.dev_status.comment
-        self.module_names_automatics[modname]["module_category"] = mod.module_category
+        row = self.module_names_automatics[modname]
+        row["name"] = mod["entity"]
+        row["mod_show"] = mod["show_in_browser"]
+        row["repository"] = mod["repository"]
+        row["dev_status"] = mod["dev_status"]["status"]
+        row["mod_status"] = mod["module_type"]["status"]
+        row["mod_descrip"] = mod["brief_description"]
+        row["mod_comment"] = mod["brief_description"]
+        row["dev_comment"] = mod["dev_status"]["comment"]
+        row["module_category"] = mod["module_category"]
 
         for x in range(len(tablerow)):
             item = qw.QTableWidgetItem(tablerow[x])
             if x == 0:
-                item.setToolTip(mod.brief_description)
+                item.setToolTip(mod["brief_description"])
             elif x == status_column:
-                toolTip = mod.dev_status.comment
+                toolTip = mod["dev_status"]["comment"]
                 item.setToolTip(toolTip)
             elif x == mod_type_column:
-                toolTip = mod.module_type.comment
+                toolTip = mod["module_type"]["comment"]
                 item.setToolTip(toolTip)
             else:
                 item.setToolTip(tablerow[x])
@@ -511,16 +544,7 @@ class GUI(qw.QMainWindow):
             print("Invalid folder selection!\nAborted!")
         else:
             print("Scanning for ASTERICS modules in '{}'".format(folder))
-            mods = self.auto.add_module_repository(folder, "user")
-            if mods:
-                for modname in mods:
-                    self.add_module(modname, "user")
-                self.modlist.resizeColumnsToContents()
-                print(
-                    "Added {} modules to repository 'user'!".format(len(mods))
-                )
-            else:
-                print("No modules found in '{}'.".format(folder))
+            self.load_repository(folder, "user")
 
     def add_repo_folder_dialog(self):
         """Allows the user to select a folder and returns the path."""
@@ -627,6 +651,10 @@ class GUI(qw.QMainWindow):
         # print("Current number of ASTERICS modules: ", len(module_names))
         for modname in module_names:
             self.add_module(modname)
+        self.update_modlist_summary()
+
+    def update_modlist_summary(self):
+        """Update the column sizes, search completer and module counters."""
         self.modlist.resizeColumnsToContents()
 
         self.completer.setCompleter(
@@ -634,15 +662,66 @@ class GUI(qw.QMainWindow):
         )
         # print("Loaded {} modules!".format(self.modlist.rowCount()))
         self.showAllModul.setText("All({})".format(self.modlist.rowCount()))
-        df = pd.DataFrame.from_dict(self.module_names_automatics).T
-        self.showAutomatics.setText(
-            "Automatics({})".format(len(df[df["mod_show"] == True]))
+        shown = sum(
+            1
+            for row in self.module_names_automatics.values()
+            if row["mod_show"]
         )
+        self.showAutomatics.setText("Automatics({})".format(shown))
         self.showOther.setText(
-            "Other({})".format(
-                self.modlist.rowCount() - len(df[df["mod_show"] == True])
+            "Other({})".format(self.modlist.rowCount() - shown)
+        )
+
+    def load_repository(self, path: str, repo_name: str):
+        """Scan the repository at `path` in the background.
+        Modules are added to the module list as they are found.
+        Port and generic details are only read when a module is selected."""
+        loader = ModuleLoader(self.auto, path, repo_name)
+        loader.module_found.connect(self.module_loaded)
+        loader.loading_done.connect(
+            lambda mods, error: self.repository_loaded(
+                loader, repo_name, path, mods, error
             )
         )
+        self.loaders.append(loader)
+        # The wizard needs the complete module list
+        self.actionStartWizard.setEnabled(False)
+        self.statusBar().showMessage(
+            "Loading modules of repository '{}'...".format(repo_name)
+        )
+        loader.start()
+
+    def module_loaded(self, modname: str, reponame: str):
+        """Add a module found by a ModuleLoader to the module list."""
+        self.add_module(modname, reponame)
+        self.statusBar().showMessage(
+            "Loading modules... ({} found)".format(self.modlist.rowCount())
+        )
+
+    def repository_loaded(
+        self, loader, repo_name: str, path: str, mods: list, error: str
+    ):
+        """Finish loading a repository (called when a ModuleLoader is done)."""
+        loader.wait()
+        self.loaders.remove(loader)
+        if error:
+            print(
+                "Could not load repository '{}' from '{}': {}".format(
+                    repo_name, path, error
+                )
+            )
+        elif mods:
+            print(
+                "Added {} modules to repository '{}'!".format(
+                    len(mods), repo_name
+                )
+            )
+        else:
+            print("No modules found in '{}'.".format(path))
+        self.update_modlist_summary()
+        if not self.loaders:
+            self.actionStartWizard.setEnabled(True)
+            self.statusBar().clearMessage()
 
     def clear_all(self):
         """Clear the GUI information"""
@@ -1203,9 +1282,11 @@ class Wizard(qw.QWizard):
                 )
             )
 
-            df = pd.DataFrame.from_dict(self.gui.module_names_automatics).T
-            df = df[df["mod_show"] == True]
-            modules = list(df.index)
+            modules = [
+                modname
+                for modname, row in self.gui.module_names_automatics.items()
+                if row["mod_show"]
+            ]
             modules.remove("as_sensor_ov7670")
             modules.remove("as_memreader")
             modules.remove("as_memwriter")
@@ -2198,13 +2279,13 @@ def start_gui():
     app = qw.QApplication(sys.argv)
     app.setApplicationName("ASTERICS GUI")
     auto = AsAutomatics(asterics_home, Automatics_version)
-    auto.add_module_repository(
-        append_to_path(asterics_home, "modules"), "default"
-    )
+    # List the modules from the manifest indexes, load them when selected
+    auto.library.lazy_loading = True
     # auto.add_module_repository(
     #   "/home/phil/EES/asterics-nonfree/modules/", "nonfree")  # DEBUG
     gui = GUI(auto)
-    gui.build_modlist()
+    # Show the window immediately, the module list fills in the background
+    gui.load_repository(append_to_path(asterics_home, "modules"), "default")
 
     app.exec_()
 
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+conftest.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Test configuration of the Automatics tests: Sets up the environment
+normally provided by the ASTERICS settings file.
+Run the tests from the Automatics directory using 'python -m pytest tests'.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+
+import pytest
+
+AUTOMATICS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ASTERICS_DIR = os.path.dirname(os.path.dirname(AUTOMATICS_DIR))
+
+os.environ.setdefault("ASTERICS_HOME", ASTERICS_DIR)
+os.environ.setdefault("ASTERICS_AUTOMATICS_HOME", AUTOMATICS_DIR)
+if AUTOMATICS_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATICS_DIR)
+
+
+@pytest.fixture
+def asterics_home() -> str:
+    return os.environ["ASTERICS_HOME"]
+
+
+@pytest.fixture
+def asterics(tmp_path, monkeypatch):
+    """The 'asterics' module with a fresh build state.
+    Runs the test in a temporary directory (log files are written there)."""
+    monkeypatch.chdir(tmp_path)
+    import asterics
+
+    asterics.silent()
+    asterics.Auto.reset_build_state()
+    return asterics
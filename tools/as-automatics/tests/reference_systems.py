@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+reference_systems.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Builds the reference systems and summarizes their outputs for comparison:
+The content hashes of the generated VHDL files and the list of connections.
+Each system is built in its own process, as the system scripts do:
+'python3 reference_systems.py <system> <output folder>' prints the summary
+(JSON) of one system; 'python3 reference_systems.py --all <JSON file>'
+writes the summaries of all systems (e.g. to update the expected outputs
+in 'data/reference_systems.json').
+Requires ASTERICS_HOME; Automatics modules in PYTHONPATH take precedence
+over those of this Automatics directory (to summarize other versions).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import runpy
+import tempfile
+import subprocess
+from hashlib import sha256
+
+AUTOMATICS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+## System name -> chain description script, relative to ASTERICS_HOME
+SYSTEM_SCRIPTS = {
+    "canny": "systems/as_refdesign_canny/asterics/canny_pipeline/"
+    "asterics-gen.py",
+    "image_differencing": "systems/as_refdesign_zynq/asterics/"
+    "image_differencing/asterics-gen.py",
+    "image_invert": "systems/as_refdesign_zynq_linux/asterics/"
+    "image_invert/asterics-gen.py",
+}
+## All reference systems
+SYSTEMS = tuple(SYSTEM_SCRIPTS)
+
+
+def load_system(name: str):
+    """Run the script of system 'name' without a build target.
+    Returns the described processing chain, not connected or written."""
+    import asterics
+
+    script = os.path.join(os.environ["ASTERICS_HOME"], SYSTEM_SCRIPTS[name])
+    argv = sys.argv
+    sys.argv = [script]
+    try:
+        # The scripts print their usage and exit without a build target
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+    finally:
+        sys.argv = argv
+    return asterics.Auto.current_chain
+
+
+def build_system(name: str, output: str):
+    """Build the reference system 'name', writing its core to 'output'."""
+    script = os.path.join(os.environ["ASTERICS_HOME"], SYSTEM_SCRIPTS[name])
+    argv = sys.argv
+    cwd = os.getcwd()
+    sys.argv = [script, "core", output]
+    # The scripts write the system graph to the working directory
+    os.chdir(output)
+    try:
+        env = runpy.run_path(script, run_name="__main__")
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+    if not env.get("success"):
+        raise RuntimeError("Could not write system '{}'".format(name))
+    return env["chain"]
+
+
+def get_endpoint(obj) -> str:
+    from as_automatics_connection_helper import get_parent_module
+
+    parent = get_parent_module(obj)
+    name = getattr(obj, "code_name", None) or str(obj)
+    if parent is None:
+        return name
+    return "{}.{}".format(parent.name, name)
+
+
+def get_connections(chain) -> list:
+    """Return all connections of 'chain' as sorted [source, sink] pairs."""
+    objects = list(chain.modules) + list(chain.module_groups)
+    if chain.top is not None:
+        objects.append(chain.top)
+    edges = set()
+    for obj in objects:
+        ports = list(obj.get_full_port_list())
+        ports.extend(getattr(obj, "signals", ()))
+        for port in ports:
+            incoming = getattr(port, "incoming", None)
+            if incoming is not None and not isinstance(incoming, list):
+                incoming = [incoming]
+            for source in incoming or ():
+                edges.add((get_endpoint(source), get_endpoint(port)))
+            for sink in getattr(port, "outgoing", ()):
+                edges.add((get_endpoint(port), get_endpoint(sink)))
+    return [list(edge) for edge in sorted(edges)]
+
+
+def get_generated_vhdl(output: str) -> dict:
+    """Return the content hashes of the VHDL files generated by Automatics.
+    Module sources (linked to the module repository) are not included."""
+    out = {}
+    for root, _, files in os.walk(output):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(".vhd") or os.path.islink(path):
+                continue
+            with open(path, "rb") as file:
+                out[os.path.relpath(path, output)] = sha256(
+                    file.read()
+                ).hexdigest()
+    return out
+
+
+def summarize_system(name: str, output: str) -> dict:
+    """Build system 'name' and return the summary of its outputs."""
+    import asterics
+
+    asterics.quiet()
+    chain = build_system(name, output)
+    return {
+        "vhdl": get_generated_vhdl(output),
+        "connections": get_connections(chain),
+    }
+
+
+def run_system(name: str, output: str) -> dict:
+    """Build system 'name' in a new process and return its summary."""
+    proc = subprocess.run(
+        [sys.executable, os.path.realpath(__file__), name, output],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def main(args: list) -> int:
+    if len(args) == 2 and args[0] == "--all":
+        summaries = {}
+        for name in SYSTEMS:
+            with tempfile.TemporaryDirectory() as output:
+                summaries[name] = run_system(name, output)
+        with open(args[1], "w") as file:
+            json.dump(summaries, file, indent=1, sort_keys=True)
+            file.write("\n")
+        return 0
+    if len(args) != 2 or args[0] not in SYSTEMS:
+        print(__doc__)
+        return 2
+    os.makedirs(args[1], exist_ok=True)
+    summary = summarize_system(args[0], os.path.realpath(args[1]))
+    print(json.dumps(summary, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.append(AUTOMATICS_DIR)
+    sys.exit(main(sys.argv[1:]))
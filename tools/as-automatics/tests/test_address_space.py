@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_address_space.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the register address space allocation (pinned base addresses)
+and the register map exports, using the reference systems.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import csv
+import json
+
+import pytest
+
+import reference_systems
+from as_automatics_address_space import RDL_ACCESS, AddressSpaceAllocator
+from as_automatics_exceptions import AsAssignError
+
+# image_differencing: 4 register interfaces of 16 registers (64 bytes)
+SLOT_SIZE = 64
+
+
+def write_system(chain, output: str) -> dict:
+    """Write the core of 'chain' and all register map formats.
+    Returns the paths of the register maps by format."""
+    assert chain.write_asterics_core(output, use_symlinks=True)
+    paths = {}
+    for fmt in ("json", "csv", "h", "rdl"):
+        paths[fmt] = os.path.join(output, "regmap." + fmt)
+        assert chain.write_address_map(paths[fmt], fmt)
+    return paths
+
+
+def read_maps(paths: dict) -> dict:
+    """Parse each register map to {(interface, register): address}."""
+    maps = {}
+    with open(paths["json"], "r") as file:
+        data = json.load(file)
+    maps["json"] = {
+        (row["interface"], row["register"]): row["address"]
+        for row in data["registers"]
+    }
+    maps["active"] = {
+        (row["interface"], row["register"]): row["address"]
+        for row in data["registers"]
+        if row["type"] in RDL_ACCESS
+    }
+    with open(paths["csv"], "r", newline="") as file:
+        maps["csv"] = {
+            (row["interface"], int(row["register"])): int(row["address"], 16)
+            for row in csv.DictReader(file)
+        }
+    with open(paths["h"], "r") as file:
+        maps["h"] = {
+            (name.lower(), int(reg)): int(addr, 16)
+            for name, reg, addr in re.findall(
+                r"#define ASTERICS_(\w+)_REG(\d+) 0x(\w+)u", file.read()
+            )
+        }
+    maps["rdl"] = {}
+    with open(paths["rdl"], "r") as file:
+        regs = []
+        for line in file:
+            match = re.search(r"reg(\d+) @ 0x(\w+);", line)
+            if match:
+                regs.append((int(match.group(1)), int(match.group(2), 16)))
+            match = re.match(r"  \} (\w+) @ 0x(\w+);", line)
+            if match:
+                base = int(match.group(2), 16)
+                for reg, offset in regs:
+                    maps["rdl"][(match.group(1), reg)] = base + offset
+                regs = []
+    return maps, data["summary"]
+
+
+def read_software_slots(output: str) -> dict:
+    """Register interface number of each module from 'asterics.h'."""
+    with open(os.path.join(output, "software", "asterics.h"), "r") as file:
+        return {
+            name.lower(): int(num)
+            for name, num in re.findall(
+                r"#define AS_MODULE_BASEREG_(\w+) (\d+)", file.read()
+            )
+        }
+
+
+@pytest.mark.parametrize("system", reference_systems.SYSTEMS)
+def test_address_map_exports_match(asterics, system, tmp_path):
+    chain = reference_systems.load_system(system)
+    paths = write_system(chain, str(tmp_path))
+    maps, summary = read_maps(paths)
+
+    assert maps["json"]
+    assert maps["csv"] == maps["json"]
+    assert maps["h"] == maps["json"]
+    # The SystemRDL description leaves out inactive registers
+    assert maps["rdl"] == maps["active"]
+    # Without pins, the register interfaces fill the slots in order
+    slots = read_software_slots(str(tmp_path))
+    assert sorted(slots.values()) == list(range(len(slots)))
+    assert summary["slots"] == summary["register_interfaces"] == len(slots)
+    for (name, reg), address in maps["json"].items():
+        assert address == (
+            chain.asterics_base_addr
+            + slots[name] * summary["slot_size"]
+            + reg * chain.addr_per_reg
+        )
+
+
+def test_pinned_base_address(asterics, tmp_path):
+    chain = reference_systems.load_system("image_differencing")
+    pinned = chain.asterics_base_addr + 6 * SLOT_SIZE
+    chain.set_register_base_address("writer1", pinned)
+    paths = write_system(chain, str(tmp_path))
+    maps, summary = read_maps(paths)
+
+    assert maps["json"][("writer1", 0)] == pinned
+    assert maps["csv"] == maps["h"] == maps["json"]
+    assert maps["rdl"] == maps["active"]
+    assert summary["slot_size"] == SLOT_SIZE
+    assert summary["pinned"] == 1
+    assert summary["slots"] == 7
+    assert summary["module_addr_width"] == 3
+    assert summary["address_span"] == 7 * SLOT_SIZE
+    # The other register interfaces keep the first slots
+    assert read_software_slots(str(tmp_path)) == {
+        "as_sensor_ov7670_0": 0,
+        "as_memreader_0": 1,
+        "writer0": 2,
+        "writer1": 6,
+    }
+
+    with open(os.path.join(str(tmp_path), "hardware", "as_main.vhd")) as file:
+        as_main = file.read()
+    assert "c_writer1_regif_num : integer := 6;" in as_main
+    # Module address widened to decode slot 6; unused slots read zero
+    assert "c_module_addr_width : integer := 3;" in as_main
+    assert "c_reg_if_count : integer := 7;" in as_main
+    for slot in (3, 4, 5):
+        assert "mod_read_data_arr({}) <= (others => '0');".format(slot) in (
+            as_main
+        )
+    assert "mod_read_data_arr(6) <= (others => '0');" not in as_main
+
+
+def test_unused_pin_is_reported(asterics, tmp_path):
+    chain = reference_systems.load_system("image_invert")
+    chain.set_register_base_address("no_such_module", chain.asterics_base_addr)
+    assert chain.write_asterics_core(str(tmp_path), use_symlinks=True)
+    assert chain.address_allocator.get_unused_pins() == ["no_such_module"]
+
+
+@pytest.mark.parametrize(
+    "address, message",
+    [
+        (0x1000 + 32, "not aligned"),
+        (0x1000 - SLOT_SIZE, "outside of the ASTERICS address space"),
+        (0x2000 + SLOT_SIZE, "outside of the ASTERICS address space"),
+        (0x1000 + 2 * SLOT_SIZE, "already pinned for 'writer0'"),
+    ],
+)
+def test_invalid_pins(address, message):
+    allocator = AddressSpaceAllocator(
+        0x1000, 0x2000, 4, 16, {"writer0": 0x1000 + 2 * SLOT_SIZE}
+    )
+    with pytest.raises(AsAssignError) as err:
+        allocator.pin("writer1", address)
+    assert message in str(err.value)
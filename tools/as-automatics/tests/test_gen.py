@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_gen.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the batch generation command line tool (asterics-gen).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import sys
+import json
+
+import pytest
+
+import as_automatics_gen as gen
+
+SCRIPT = """
+import sys
+import sys
+import json
+import asterics
+
+with open("argv.json", "w") as file:
+    json.dump(sys.argv[1:], file)
+chain = asterics.new_chain()
+reader = chain.add_module("as_memreader", "reader0")
+writer = chain.add_module("as_memwriter", "writer0")
+reader.set_generic_value("MEMORY_DATA_WIDTH", 32)
+writer.set_generic_value("MEMORY_DATA_WIDTH", 32)
+reader.connect(writer)
+"""
+
+
+def write_description(path, memory_width: int = 32):
+    """Write a description of a memreader -> memwriter chain. The AXI masters
+    added by 'auto_instantiate' have a data width of 32 bits."""
+    generics = {"MEMORY_DATA_WIDTH": memory_width}
+    desc = {
+        "modules": [
+            {"entity": "as_memreader", "name": "reader0"},
+            {"entity": "as_memwriter", "name": "writer0"},
+        ],
+        "generics": {"reader0": generics, "writer0": generics},
+        "connections": [["reader0", "writer0"]],
+        "auto_instantiate": True,
+    }
+    with open(path, "w") as file:
+        json.dump(desc, file)
+
+
+@pytest.fixture
+def script(asterics, tmp_path, monkeypatch):
+    # The script run modifies the interpreter's arguments and search path
+    monkeypatch.setattr("sys.argv", list(sys.argv))
+    monkeypatch.setattr("sys.path", list(sys.path))
+    path = tmp_path / "script.py"
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+def test_options_after_script(script, tmp_path, capsys):
+    argv = [script, "-k", "core", "-o", "out", "--profile", "--silent"]
+
+    assert gen.main(argv) == gen.EXIT_OK
+    assert (tmp_path / "out").is_dir()
+    assert "total" in capsys.readouterr().out
+    with open("argv.json", "r") as file:
+        assert json.load(file) == []
+
+
+def test_script_arguments(script, tmp_path):
+    argv = [script, "first", "-k", "core", "-o", "out", "--silent"]
+    argv += ["--", "--second", "-k"]
+
+    assert gen.main(argv) == gen.EXIT_OK
+    assert (tmp_path / "out").is_dir()
+    with open("argv.json", "r") as file:
+        assert json.load(file) == ["first", "--second", "-k"]
+
+
+def test_description_options(asterics, tmp_path):
+    write_description("chain.json")
+    argv = ["-k", "core", "-o", "out", "chain.json", "--errors-json", "e.json"]
+
+    assert gen.main(argv + ["--silent"]) == gen.EXIT_OK
+    assert (tmp_path / "out").is_dir()
+    assert (tmp_path / "e.json").is_file()
+
+
+def test_description_extra_arguments(asterics):
+    write_description("chain.json")
+
+    with pytest.raises(SystemExit) as exit_info:
+        gen.main(["-k", "core", "-o", "out", "chain.json", "extra"])
+    assert exit_info.value.code == gen.EXIT_USAGE
+
+
+def test_data_width_errors(asterics, tmp_path):
+    write_description("chain.json", memory_width=64)
+    argv = ["-k", "core", "-o", "out", "chain.json", "--silent"]
+
+    assert gen.main(argv + ["--errors-json", "e.json"]) == gen.EXIT_ERROR
+    assert not (tmp_path / "out").exists()
+    with open("e.json", "r") as file:
+        errors = json.load(file)
+    assert errors["severities"]["Error"] >= 1
+    assert "AsConnectionError" in errors["classes"]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_graph_export.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the system graph export (as_automatics_graph_export).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import reference_systems
+from as_automatics_graph_export import ChainGraph
+
+
+@pytest.fixture
+def canny(asterics, tmp_path):
+    return reference_systems.build_system("canny", str(tmp_path))
+
+
+@pytest.mark.parametrize("collapse", ["pipeline", "group"])
+def test_merged_edges_count_each_kind(canny, collapse):
+    graph = ChainGraph(canny, collapse=collapse)
+    list(graph.nodes())
+    edges = {(edge.tail, edge.head): edge for edge in graph.edges()}
+
+    # Camera to pipeline: Stream interfaces and single ports
+    edge = edges[("cam0", "as_canny_pipeline")]
+    assert edge.kind == "interface"
+    interfaces, ports = edge.label.split("\n\n")
+    assert interfaces.endswith("(+1 more interfaces)")
+    assert ports.endswith("(+1 more ports)")
+
+    edge = edges[("as_canny_pipeline", "writer0")]
+    assert edge.label.endswith("(+1 more interfaces)")
+    assert "\n\n" not in edge.label
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_logging.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the queued Automatics logging.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import io
+import sys
+
+import pytest
+
+import as_automatics_logging as as_log
+
+
+@pytest.fixture
+def console(monkeypatch):
+    """Returns a function initializing the log, writing console log output
+    to a stream that is returned as well ('print' output can be added)."""
+
+    def init_log(*args, **kwargs):
+        # Output capturing of pytest replaces 'sys.stderr' before each test
+        stream = io.StringIO()
+        monkeypatch.setattr(sys, "stderr", stream)
+        return as_log.init_log(*args, **kwargs), stream
+
+    yield init_log
+    as_log.init_log("", silent=True)
+
+
+def test_console_records_keep_order_with_print(console, tmp_path):
+    logfile = str(tmp_path / "test.log")
+    log, stream = console(logfile, loglevel_console="WARNING")
+    log.info("Only in the log file")
+    log.critical("Critical error")
+    log.getChild("connect").warning("Warning of a subsystem")
+    print("Completed!", file=stream)
+    assert stream.getvalue().splitlines() == [
+        "Automatics CRITICAL: Critical error",
+        "Automatics WARNING: Warning of a subsystem",
+        "Completed!",
+    ]
+    as_log.flush_log()
+    with open(logfile, "r") as file:
+        lines = [line.split(": ", 1)[1] for line in file.read().splitlines()]
+    assert lines == [
+        "INFO - Only in the log file",
+        "CRITICAL - Critical error",
+        "WARNING - Warning of a subsystem",
+    ]
+
+
+def test_verbose_console_records_keep_order(console):
+    log, stream = console("", loglevel_console="INFO")
+    log.info("Info")
+    print("Completed!", file=stream)
+    assert stream.getvalue().splitlines() == [
+        "Automatics INFO: Info",
+        "Completed!",
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_memory_bandwidth.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the memory bandwidth model (as_automatics_memory_bandwidth).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+def test_port_direction_from_stream_interface(asterics):
+    chain = asterics.new_chain()
+    reader = chain.add_module("as_memreader", "reader0")
+    writer = chain.add_module("as_memwriter", "writer0")
+    chain.add_module("as_memwriter", "writer1")
+    reader.connect(writer)
+
+    report = chain.tune_memory_ports(100e6, apply=False)
+    ports = {port.name: port for port in report.ports}
+    assert ports["reader0"].direction == "read"
+    assert ports["writer0"].direction == "write"
+    # Not connected: Still writes to memory, but without a stream rate
+    assert ports["writer1"].direction == "write"
+    assert ports["writer1"].bits_per_cycle == 0
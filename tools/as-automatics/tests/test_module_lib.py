@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_module_lib.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the module library: Reloading module folders after file changes.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+
+from as_automatics_module_lib import AsModuleLibrary
+
+SPEC_SCRIPT = '''
+from as_automatics_module import AsModule
+
+
+def get_module_instance(module_dir: str) -> AsModule:
+    module = AsModule()
+    module.files = ["../shared/as_shared_pkg.vhd"]
+    module.discover_module(module_dir + "/hardware/vhdl/as_invert.vhd")
+    return module
+'''
+
+
+def make_repository(asterics_home: str, path: str) -> str:
+    """Create a repository with one module using a file of another folder."""
+    repo = os.path.join(path, "repo")
+    vhdl_dir = os.path.join(repo, "as_test", "hardware", "vhdl")
+    script_dir = os.path.join(repo, "as_test", "hardware", "automatics")
+    os.makedirs(vhdl_dir)
+    os.makedirs(script_dir)
+    os.makedirs(os.path.join(repo, "shared"))
+    shutil.copy(
+        os.path.join(
+            asterics_home, "modules/as_invert/hardware/hdl/vhdl/as_invert.vhd"
+        ),
+        vhdl_dir,
+    )
+    with open(os.path.join(script_dir, "as_test_spec.py"), "w") as file:
+        file.write(SPEC_SCRIPT)
+    with open(os.path.join(repo, "shared", "as_shared_pkg.vhd"), "w") as file:
+        file.write("package as_shared_pkg is\nend package;\n")
+    return repo
+
+
+def test_reload_relative_file_of_other_folder(
+    asterics_home, tmp_path, monkeypatch
+):
+    repo = make_repository(asterics_home, str(tmp_path))
+    library = AsModuleLibrary(asterics_home)
+    assert library.add_module_repository(repo, "test") == ["as_invert"]
+    # Relative module files must not be resolved against the working dir
+    monkeypatch.chdir(asterics_home)
+    changed = os.path.join(repo, "shared", "as_shared_pkg.vhd")
+    assert library.reload_module_folders([changed]) == ["as_invert"]
+    assert library.reload_module_folders([]) == []
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_ooc_schedule.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the out-of-context synthesis schedule of the packaging TCL script,
+run in a stand-in TCL interpreter (auxilliary_scripts/record_tcl_commands.py).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import os
+import sys
+
+import pytest
+
+import reference_systems
+import as_automatics_builder as as_build
+from as_automatics_module_wrapper import AsModuleWrapper
+
+# The stand-in TCL interpreter requires Tkinter
+pytest.importorskip("tkinter")
+sys.path.append(
+    os.path.join(reference_systems.AUTOMATICS_DIR, "auxilliary_scripts")
+)
+from record_tcl_commands import VivadoStandIn  # noqa: E402
+
+## Canny pipeline modules wrapped for out-of-context synthesis
+WRAPPED_MODULES = ("fgauss0", "fsobelx", "fsobely", "cordic")
+
+
+def run_schedule(path: str, auto_runs: bool = True) -> VivadoStandIn:
+    standin = VivadoStandIn(auto_runs)
+    standin.run(path)
+    assert standin.check() == []
+    return standin
+
+
+def check_launch_order(standin: VivadoStandIn):
+    """One 'launch_runs' of all runs, followed by waiting for each run."""
+    names = [command[0] for command in standin.commands]
+    assert names.count("launch_runs") == 1
+    launch = names.index("launch_runs")
+    waits = [
+        command[1]
+        for command in standin.commands[launch:]
+        if command[0] == "wait_on_run"
+    ]
+    assert waits == standin.launched
+    assert "wait_on_run" not in names[:launch]
+
+
+@pytest.fixture
+def wrapped_canny(asterics):
+    """The Canny system with filters added using 'create_wrapper=True'.
+    'fsobely' is made identical to 'fsobelx'."""
+    chain = reference_systems.load_system("canny")
+    pipe = chain.pipelines[0]
+    for name in WRAPPED_MODULES:
+        pipe.get_module(name).wrap = True
+    pipe.get_module("fsobely").set_generic_value("KERNEL_TYPE", '"sobel_x"')
+    chain.auto_connect()
+    assert not chain.err_mgr.has_errors()
+    return chain
+
+
+def test_schedule_order(tmp_path):
+    path = str(tmp_path / "schedule.tcl")
+    with open(path, "w") as file:
+        file.write(
+            as_build.get_ooc_schedule_tcl(
+                [(10, "light"), (30, "heavy"), (20, "medium"), (20, "avg")],
+                jobs=2,
+            )
+        )
+
+    standin = run_schedule(path)
+    assert standin.launched == [
+        "heavy_synth_1",
+        "avg_synth_1",
+        "medium_synth_1",
+        "light_synth_1",
+    ]
+    assert standin.jobs == "2"
+    check_launch_order(standin)
+    # Runs not created by Vivado are created by the schedule
+    standin = run_schedule(path, auto_runs=False)
+    created = [cmd[1] for cmd in standin.commands if cmd[0] == "create_run"]
+    assert sorted(created) == sorted(standin.launched)
+
+
+def test_shared_wrappers(wrapped_canny, tmp_path):
+    chain = wrapped_canny
+    wrappers = {
+        group.name: group
+        for group in chain.module_groups
+        if isinstance(group, AsModuleWrapper)
+    }
+    assert sorted(wrappers) == sorted(WRAPPED_MODULES)
+    assert wrappers["fsobely"].shared_wrapper is wrappers["fsobelx"]
+    assert wrappers["fsobely"].entity_name == "fsobelx_wrapper"
+
+    as_build.write_vivado_package_tcl(chain, str(tmp_path), ooc_jobs=8)
+    standin = run_schedule(str(tmp_path / "package_ooc_config.tcl"))
+    # The identical filters share one fileset (and so one run)
+    assert sorted(standin.filesets) == [
+        "cordic_wrapper",
+        "fgauss0_wrapper",
+        "fsobelx_wrapper",
+    ]
+    assert sorted(standin.launched) == [
+        name + "_synth_1" for name in sorted(standin.filesets)
+    ]
+    # Not more jobs than runs
+    assert standin.jobs == "3"
+    check_launch_order(standin)
+
+    # Longest runs (see 'get_ooc_run_weight') first
+    def get_weight(run: str) -> int:
+        entity = run[: -len("_synth_1")]
+        wrapper = next(
+            mod for mod in wrappers.values() if mod.entity_name == entity
+        )
+        dep_mods = []
+        as_build.get_dependencies(chain, wrapper.modules[0], dep_mods)
+        files = set(wrapper.modules[0].files)
+        for dep in dep_mods:
+            files.update(chain.library.get_module_template(dep).files)
+        return as_build.get_ooc_run_weight(files)
+
+    weights = [get_weight(run) for run in standin.launched]
+    assert weights == sorted(weights, reverse=True)
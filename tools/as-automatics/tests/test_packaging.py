@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_packaging.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the Vivado packaging jobs (as_automatics_packaging), using a stub
+'ees-vivado' script on PATH.
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import os
+import time
+import threading
+
+import pytest
+
+import as_automatics_packaging as as_pack
+from as_automatics_exceptions import AsToolError
+
+## Stub of the Vivado start script. Prints the progress markers of the
+## packaging TCL scripts; FAKE_VIVADO_MODE selects how it ends.
+STUB_SCRIPT = """#!/bin/sh
+pwd > fake_vivado_call.txt
+echo "$@" >> fake_vivado_call.txt
+echo "Updating the compile order of all sources..."
+echo "Generating Out-of-Context Synthesis Runs..."
+echo "1 of 2"
+echo "2 of 2"
+echo "Running 2 Out-of-Context Synthesis Runs"
+case "$FAKE_VIVADO_MODE" in
+  fail)
+    echo "ERROR: Synthesis failed"
+    exit 3 ;;
+  error)
+    echo "Encountered an error during IP packaging" ;;
+  hang)
+    # A child process, like the synthesis runs of Vivado
+    sleep 60 &
+    echo $! > fake_vivado_child.pid
+    wait
+    exit 0 ;;
+esac
+echo "Updating compile order and packaging"
+echo "Saving IP-Core"
+exit 0
+"""
+
+ALL_PHASES = [
+    as_pack.STARTUP_PHASE,
+    "sources",
+    "ooc_setup",
+    "ooc_synthesis",
+    "packaging",
+    "saving",
+]
+
+
+@pytest.fixture
+def fake_vivado(tmp_path, monkeypatch):
+    """Put the stub 'ees-vivado' on PATH. Returns a function setting its
+    mode and returning a job running it in a new folder."""
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    stub = bindir / "ees-vivado"
+    stub.write_text(STUB_SCRIPT)
+    stub.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bindir) + os.pathsep + os.environ["PATH"])
+
+    def new_job(mode: str = "", name: str = "core", **kwargs):
+        workdir = tmp_path / name
+        workdir.mkdir()
+        return as_pack.PackagingJob(
+            ["ees-vivado", "-mode", "tcl"],
+            cwd=str(workdir),
+            env={"FAKE_VIVADO_MODE": mode},
+            log_path=str(workdir / "packaging.log"),
+            **kwargs
+        )
+
+    return new_job
+
+
+def record_progress(job) -> list:
+    progress = []
+    job.on_progress = lambda job: progress.append(
+        (job.phase, job.ooc_progress)
+    )
+    return progress
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Killed, but not reaped yet
+    try:
+        with open("/proc/{}/stat".format(pid), "r") as file:
+            return file.read().split()[2] != "Z"
+    except OSError:
+        return True
+
+
+def wait_for(condition, seconds: float = 10.0) -> bool:
+    end = time.monotonic() + seconds
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_success(fake_vivado):
+    job = fake_vivado()
+    progress = record_progress(job)
+
+    assert job.run()
+    assert job.status == as_pack.DONE
+    assert job.returncode == 0 and not job.error
+    assert list(job.phase_times) == ALL_PHASES
+    assert all(secs >= 0 for secs in job.phase_times.values())
+    assert progress == [
+        ("sources", (0, 0)),
+        ("ooc_setup", (0, 0)),
+        ("ooc_setup", (1, 2)),
+        ("ooc_setup", (2, 2)),
+        ("ooc_synthesis", (2, 2)),
+        ("packaging", (2, 2)),
+        ("saving", (2, 2)),
+    ]
+    # Runs in the job's folder, without changing the working directory
+    with open(os.path.join(job.cwd, "fake_vivado_call.txt")) as file:
+        assert file.read().splitlines() == [job.cwd, "-mode tcl"]
+    assert os.getcwd() != job.cwd
+    with open(job.log_path) as file:
+        assert file.read().splitlines() == job.output
+    assert job.output[-1] == "Saving IP-Core"
+    assert job.to_dict()["status"] == as_pack.DONE
+
+
+def test_non_zero_exit(fake_vivado):
+    job = fake_vivado("fail")
+
+    assert not job.run()
+    assert job.status == as_pack.FAILED
+    assert job.returncode == 3
+    assert job.error == "Exit status 3"
+    assert job.phase == "ooc_synthesis"
+    assert job.output[-1] == "ERROR: Synthesis failed"
+
+
+def test_failure_reported_in_output(fake_vivado):
+    job = fake_vivado("error")
+
+    assert not job.run()
+    assert job.status == as_pack.FAILED
+    assert job.returncode == 0
+    assert job.error == "Encountered an error during IP packaging"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Process groups")
+def test_timeout_kills_process_group(fake_vivado):
+    job = fake_vivado("hang", timeout=1.0)
+    child_pid_file = os.path.join(job.cwd, "fake_vivado_child.pid")
+
+    start = time.monotonic()
+    assert not job.run()
+    assert time.monotonic() - start < as_pack.KILL_GRACE_PERIOD
+    assert job.status == as_pack.TIMEOUT
+    assert job.error == "Timeout after 1.0 seconds"
+    assert job.phase == "ooc_synthesis"
+    # The tool's child process was stopped with the tool
+    with open(child_pid_file) as file:
+        child_pid = int(file.read())
+    assert wait_for(lambda: not is_running(child_pid))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Process groups")
+def test_runner_cancel(fake_vivado):
+    runner = as_pack.PackagingRunner(jobs=2)
+    jobs = [fake_vivado("hang", name) for name in ("core0", "core1")]
+    started = threading.Semaphore(0)
+
+    def on_progress(job):
+        if job.phase == "ooc_synthesis":
+            started.release()
+
+    def cancel_when_started():
+        for _ in jobs:
+            started.acquire()
+        runner.cancel()
+
+    for job in jobs:
+        job.on_progress = on_progress
+    cancel_thread = threading.Thread(target=cancel_when_started)
+    cancel_thread.start()
+
+    start = time.monotonic()
+    assert runner.run(jobs) == jobs
+    cancel_thread.join()
+    assert time.monotonic() - start < as_pack.KILL_GRACE_PERIOD
+    assert [job.status for job in jobs] == [as_pack.CANCELLED] * 2
+    assert not runner.running
+
+
+def test_missing_executable(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    job = as_pack.PackagingJob(["ees-vivado"], cwd=str(tmp_path))
+
+    assert not job.run()
+    assert job.status == as_pack.FAILED
+    assert job.error.startswith("Could not run 'ees-vivado'")
+
+
+def test_run_vivado_packaging(asterics, fake_vivado, monkeypatch, tmp_path):
+    import as_automatics_builder as as_build
+
+    chain = asterics.new_chain()
+    reader = chain.add_module("as_memreader", "reader0")
+    writer = chain.add_module("as_memwriter", "writer0")
+    reader.connect(writer)
+    chain.auto_connect()
+    output = tmp_path / "ip"
+    output.mkdir()
+
+    job = as_build.run_vivado_packaging(chain, str(output))
+    assert job.success
+    assert list(job.phase_times) == ALL_PHASES
+    assert (output / "packaging.log").exists()
+
+    monkeypatch.setenv("FAKE_VIVADO_MODE", "fail")
+    with pytest.raises(AsToolError):
+        as_build.run_vivado_packaging(chain, str(output))
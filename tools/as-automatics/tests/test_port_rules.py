@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_port_rules.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the port rule evaluation (rule tables): The reference systems are
+built and their generated VHDL files and connections compared to the
+outputs of the previous rule evaluation ('data/reference_systems.json').
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import os
+import json
+
+import pytest
+
+import reference_systems
+from as_automatics_port import Port, RuleTable, parse_rule_action
+
+EXPECTED_PATH = os.path.join(
+    os.path.dirname(__file__), "data", "reference_systems.json"
+)
+
+
+@pytest.fixture(scope="module")
+def expected():
+    with open(EXPECTED_PATH, "r") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("system", reference_systems.SYSTEMS)
+def test_reference_system_outputs(system, expected, tmp_path):
+    summary = reference_systems.run_system(system, str(tmp_path))
+    assert summary["vhdl"] == expected[system]["vhdl"]
+    assert summary["connections"] == expected[system]["connections"]
+
+
+@pytest.mark.parametrize(
+    "action, kind, arg",
+    [
+        ("connect", "connect", ""),
+        ("make_external", "make_external", ""),
+        ("bundle_and", "bundle", "and"),
+        ("bundle_or", "bundle", "or"),
+        ("fallback_port(strobe_in)", "fallback_port", "strobe_in"),
+        ("fallback_signal(flush)", "fallback_signal", "flush"),
+        ("set_value('0')", "set_value", "'0'"),
+        ("connect_maybe", "invalid", ""),
+    ],
+)
+def test_parse_rule_action(action, kind, arg):
+    assert parse_rule_action(action) == (action, kind, arg)
+
+
+def test_rule_table_keeps_ruleset_order():
+    ruleset = (
+        Port.Rule("sink_missing", "note"),
+        Port.Rule("both_present", "connect"),
+        Port.Rule("sink_missing", "fallback_port(strobe_in)"),
+    )
+    evals = {"sink_missing": len, "both_present": bool}
+    table = RuleTable(ruleset, evals)
+    assert table.conditions == (
+        ("sink_missing", len),
+        ("both_present", bool),
+    )
+    assert [act.kind for act in table.actions["sink_missing"]] == [
+        "note",
+        "fallback_port",
+    ]
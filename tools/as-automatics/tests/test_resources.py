@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_resources.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the FPGA resource estimation (as_automatics_resources).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import pytest
+
+import reference_systems
+from as_automatics_resources import MODEL_DECLARED, MODEL_NONE
+
+## Modules of the reference systems with a cost model
+MODELLED_ENTITIES = (
+    "as_memreader",
+    "as_memwriter",
+    "as_2d_conv_filter_internal",
+    "axi_master",
+    "axi_slave",
+    "as_regmgr",
+)
+
+
+@pytest.fixture
+def memory_chain(asterics):
+    chain = asterics.new_chain()
+    reader = chain.add_module("as_memreader", "reader0")
+    writer = chain.add_module("as_memwriter", "writer0")
+    writer.set_generic_value("DIN_WIDTH", 32)
+    writer.set_generic_value("MEMORY_DATA_WIDTH", 32)
+    reader.connect(writer)
+    return chain
+
+
+@pytest.mark.parametrize("system", reference_systems.SYSTEMS)
+def test_reference_system_models(asterics, system):
+    chain = reference_systems.load_system(system)
+    report = chain.estimate_resources("xc7z020")
+
+    for mod in report.modules:
+        if mod.entity in MODELLED_ENTITIES:
+            assert mod.model == MODEL_DECLARED, mod.name
+            assert None not in mod.cost.values(), mod.name
+            assert mod.cost["luts"] > 0 and mod.cost["ffs"] > 0, mod.name
+    # The toplevel group contains all modules (e.g. the AXI masters in it)
+    assert chain.top.name in report.groups
+    assert all(mod.group in report.groups for mod in report.modules)
+    assert report.get_group_total(chain.top.name) == report.get_total()
+    unmodelled = report.get_unmodelled()
+    assert unmodelled
+    # Incomplete coverage can not pass the budget check
+    issues = report.check_budget()
+    assert len(issues) == 1
+    assert issues[0].startswith(
+        "Incomplete estimate: {} of {} modules".format(
+            len(unmodelled), len(report.modules)
+        )
+    )
+
+
+def test_memory_module_fifo_cost(memory_chain):
+    writer = memory_chain.get_module("writer0")
+    report = memory_chain.estimate_resources("xc7z020")
+    costs = {mod.name: mod.get_cost() for mod in report.modules}
+    # 4 bursts of 256 bytes: 256 words of 32 bits in one BRAM18
+    assert costs["writer0"]["bram18"] == 1
+
+    writer.set_generic_value("FIFO_NUMBER_OF_BURSTS", 16)
+    report = memory_chain.estimate_resources("xc7z020")
+    costs = {mod.name: mod.get_cost() for mod in report.modules}
+    # 1024 words of 32 bits
+    assert costs["writer0"]["bram18"] == 2
+
+
+def test_budget_check(memory_chain):
+    report = memory_chain.estimate_resources("xc7z020")
+
+    assert not report.get_unmodelled()
+    assert all(mod.model != MODEL_NONE for mod in report.modules)
+    assert report.check_budget() == []
+    total = report.get_total()
+    issues = report.check_budget(
+        {"name": "tiny", "luts": total["luts"] - 1, "ffs": 10 ** 6,
+         "bram18": 100, "dsps": 0}
+    )
+    assert len(issues) == 1 and issues[0].startswith("luts: ")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_session.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of sessions of independent processing chains (AsSession).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import signal
+
+import pytest
+
+## Larger than the buffer of a pipe (64 KiB on Linux)
+LARGE_RESULT_SIZE = 200000
+
+
+@pytest.fixture
+def timeout():
+    """Fail instead of hanging if waiting for the workers blocks."""
+
+    def handler(signum, frame):
+        raise TimeoutError("Waiting for the worker processes timed out")
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.alarm(30)
+    yield
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, previous)
+
+
+def test_forked_large_results(asterics, timeout):
+    session = asterics.new_session()
+    build_fns = [
+        lambda sess: "x" * LARGE_RESULT_SIZE,
+        lambda sess: "y",
+        lambda sess: "z" * LARGE_RESULT_SIZE,
+    ]
+
+    results = session.run(build_fns, jobs=2, use_processes=True)
+    assert [row["success"] for row in results] == [True] * 3
+    assert results[0]["result"] == "x" * LARGE_RESULT_SIZE
+    assert results[1]["result"] == "y"
+    assert results[2]["result"] == "z" * LARGE_RESULT_SIZE
+
+
+def test_forked_exception(asterics, timeout):
+    session = asterics.new_session()
+
+    def build(sess):
+        raise ValueError("Invalid parameters")
+
+    results = session.run([build], use_processes=True)
+    assert not results[0]["success"]
+    assert results[0]["error"] == "ValueError: Invalid parameters"
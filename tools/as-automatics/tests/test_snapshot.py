@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_snapshot.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of processing chain snapshots (as_automatics_snapshot).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+
+import pytest
+
+import reference_systems
+
+
+@pytest.mark.parametrize("system", reference_systems.SYSTEMS)
+def test_snapshot_round_trip(asterics, tmp_path, system):
+    chain = reference_systems.load_system(system)
+    chain.auto_connect()
+    path = str(tmp_path / "chain.snapshot")
+    connections = reference_systems.get_connections(chain)
+    resources = chain.estimate_resources().to_dict()
+
+    assert chain.save_snapshot(path)
+    assert not chain.err_mgr.has_errors()
+    loaded = asterics.load_snapshot(path)
+    assert loaded is not chain
+    assert loaded is asterics.Auto.current_chain
+    assert loaded.get_hash() == chain.get_hash()
+    assert reference_systems.get_connections(loaded) == connections
+    # Resource models declared by the module specifications are restored
+    assert loaded.estimate_resources().to_dict() == resources
+    assert asterics.chain_diff(chain, loaded).is_empty()
+
+
+@pytest.fixture
+def fail_fast(asterics):
+    # The fail-fast setting is kept when the build state is reset
+    asterics.set_fail_fast("Error")
+    yield
+    asterics.set_fail_fast(None)
+
+
+def test_diff_descriptions_and_snapshots(asterics, fail_fast, tmp_path):
+    chain = reference_systems.load_system("image_invert")
+    err_mgr = chain.err_mgr
+    desc_a = str(tmp_path / "a.json")
+    desc_b = str(tmp_path / "b.json")
+    snapshot = str(tmp_path / "chain.snapshot")
+    assert chain.write_description(desc_a)
+    assert chain.write_description(desc_b)
+    assert chain.save_snapshot(snapshot)
+
+    assert asterics.chain_diff(desc_a, desc_b).is_empty()
+    assert asterics.chain_diff(snapshot, desc_b).is_empty()
+    # Telling descriptions from snapshots registers no errors
+    assert not err_mgr.errors
+    assert not err_mgr.fail_fast_triggered()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# This file is part of the ASTERICS Framework.
+# (C) 2019 Hochschule Augsburg, University of Applied Sciences
+# -----------------------------------------------------------------------------
+"""
+test_sweep.py
+
+Company:
+Efficient Embedded Systems Group
+University of Applied Sciences, Augsburg, Germany
+http://ees.hs-augsburg.de
+
+Author:
+Philip Manke
+
+Description:
+Tests of the design space exploration (asterics.sweep).
+"""
+# --------------------- LICENSE -----------------------------------------------
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# -----------------------------------------------------------------------------
+
+import sys
+
+
+def test_variant_calling_sys_exit(asterics):
+    def build(stop):
+        chain = asterics.new_chain()
+        reader = chain.add_module("as_memreader", "reader0")
+        writer = chain.add_module("as_memwriter", "writer0")
+        # Data width of the AXI masters
+        reader.set_generic_value("MEMORY_DATA_WIDTH", 32)
+        writer.set_generic_value("MEMORY_DATA_WIDTH", 32)
+        reader.connect(writer)
+        if stop:
+            sys.exit("Invalid parameters")
+        return chain
+
+    results = asterics.sweep(
+        build, {"stop": [False, True]}, jobs=1, print_table=False
+    )
+    assert [row["variant"] for row in results] == [0, 1]
+    assert results[0]["success"] and not results[0]["error"]
+    assert not results[1]["success"]
+    assert results[1]["error"] == "SystemExit: Invalid parameters"